@@ -0,0 +1,29 @@
+"""add awaiting_upload to jobstatus enum
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = '005'
+down_revision: Union[str, None] = '004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # ALTER TYPE ... ADD VALUE は PostgreSQL のトランザクション内では実行できないため、
+    # 明示的に COMMIT してトランザクション外で実行する
+    conn = op.get_bind()
+    conn.execute(sa.text("COMMIT"))
+    conn.execute(sa.text("ALTER TYPE jobstatus ADD VALUE IF NOT EXISTS 'awaiting_upload' BEFORE 'pending'"))
+
+
+def downgrade() -> None:
+    # PostgreSQL は enum 値の削除を直接サポートしないため省略
+    pass
@@ -0,0 +1,28 @@
+"""add content_hash to videos and analysis_version to analysis_jobs
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '006'
+down_revision: Union[str, None] = '005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('videos', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.create_index('ix_videos_content_hash', 'videos', ['content_hash'])
+    op.add_column('analysis_jobs', sa.Column('analysis_version', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('analysis_jobs', 'analysis_version')
+    op.drop_index('ix_videos_content_hash', table_name='videos')
+    op.drop_column('videos', 'content_hash')
@@ -0,0 +1,46 @@
+"""add ffprobe media metadata columns to videos
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '007'
+down_revision: Union[str, None] = '006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('videos', sa.Column('width', sa.Integer(), nullable=True))
+    op.add_column('videos', sa.Column('height', sa.Integer(), nullable=True))
+    op.add_column('videos', sa.Column('fps', sa.Float(), nullable=True))
+    op.add_column('videos', sa.Column('video_codec', sa.String(), nullable=True))
+    op.add_column('videos', sa.Column('audio_codec', sa.String(), nullable=True))
+    op.add_column('videos', sa.Column('has_audio', sa.Boolean(), nullable=True))
+    op.add_column('videos', sa.Column('bit_rate', sa.BigInteger(), nullable=True))
+    op.add_column('videos', sa.Column('keyframe_interval', sa.Float(), nullable=True))
+    op.create_index('ix_videos_duration', 'videos', ['duration'])
+    op.create_index('ix_videos_height', 'videos', ['height'])
+    op.create_index('ix_videos_video_codec', 'videos', ['video_codec'])
+    op.create_index('ix_videos_has_audio', 'videos', ['has_audio'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_videos_has_audio', table_name='videos')
+    op.drop_index('ix_videos_video_codec', table_name='videos')
+    op.drop_index('ix_videos_height', table_name='videos')
+    op.drop_index('ix_videos_duration', table_name='videos')
+    op.drop_column('videos', 'keyframe_interval')
+    op.drop_column('videos', 'bit_rate')
+    op.drop_column('videos', 'has_audio')
+    op.drop_column('videos', 'audio_codec')
+    op.drop_column('videos', 'video_codec')
+    op.drop_column('videos', 'fps')
+    op.drop_column('videos', 'height')
+    op.drop_column('videos', 'width')
@@ -0,0 +1,26 @@
+"""add proxy rendition paths to videos
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '008'
+down_revision: Union[str, None] = '007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('videos', sa.Column('proxy_path', sa.String(), nullable=True))
+    op.add_column('videos', sa.Column('hls_playlist_path', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('videos', 'hls_playlist_path')
+    op.drop_column('videos', 'proxy_path')
@@ -0,0 +1,24 @@
+"""add waveform peaks path to videos
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '010'
+down_revision: Union[str, None] = '009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('videos', sa.Column('waveform_path', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('videos', 'waveform_path')
@@ -0,0 +1,146 @@
+"""multipart/form-data のリクエストボディを一時ファイルに書かずに逐次解析する"""
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional, Union
+
+import multipart
+from multipart.multipart import parse_options_header
+from starlette.requests import Request
+
+MAX_FIELD_SIZE = 64 * 1024
+
+
+class MultipartStreamError(Exception):
+    """multipart の形式が不正"""
+
+
+@dataclass
+class FormField:
+    name: str
+    value: str
+
+
+@dataclass
+class FileStart:
+    name: str
+    filename: str
+    content_type: Optional[str]
+
+
+@dataclass
+class FileData:
+    data: bytes
+
+
+@dataclass
+class FileEnd:
+    pass
+
+
+MultipartEvent = Union[FormField, FileStart, FileData, FileEnd]
+
+
+class _PartState:
+    def __init__(self):
+        self.headers: dict[bytes, bytes] = {}
+        self.name = ""
+        self.is_file = False
+        self.data = bytearray()
+
+
+class StreamingMultipartParser:
+    """
+    リクエストボディを受信しながら multipart のイベントを順に返す
+
+    starlette の MultiPartParser と異なり、ファイルのパートを SpooledTemporaryFile に
+    保存せず、受信したチャンクをそのまま FileData として呼び出し側へ渡す。
+    """
+
+    def __init__(self, request: Request, max_field_size: int = MAX_FIELD_SIZE):
+        self.request = request
+        self.max_field_size = max_field_size
+        self._events: list[MultipartEvent] = []
+        self._part = _PartState()
+        self._header_name = b""
+        self._header_value = b""
+        self._charset = "utf-8"
+
+    def _decode(self, value: bytes) -> str:
+        try:
+            return value.decode(self._charset)
+        except UnicodeDecodeError:
+            return value.decode("latin-1")
+
+    def on_part_begin(self) -> None:
+        self._part = _PartState()
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        self._part.headers[self._header_name.lower()] = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._part.headers.get(b"content-disposition", b""))
+        if b"name" not in options:
+            raise MultipartStreamError('Content-Disposition に "name" がありません')
+        self._part.name = self._decode(options[b"name"])
+        if b"filename" in options:
+            self._part.is_file = True
+            content_type = self._part.headers.get(b"content-type")
+            self._events.append(
+                FileStart(
+                    name=self._part.name,
+                    filename=self._decode(options[b"filename"]),
+                    content_type=self._decode(content_type) if content_type else None,
+                )
+            )
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._part.is_file:
+            self._events.append(FileData(data=data[start:end]))
+            return
+        self._part.data += data[start:end]
+        if len(self._part.data) > self.max_field_size:
+            raise MultipartStreamError(f"フィールドが大きすぎます: name={self._part.name}")
+
+    def on_part_end(self) -> None:
+        if self._part.is_file:
+            self._events.append(FileEnd())
+        else:
+            self._events.append(FormField(name=self._part.name, value=self._decode(bytes(self._part.data))))
+
+    async def events(self) -> AsyncIterator[MultipartEvent]:
+        content_type, params = parse_options_header(self.request.headers.get("Content-Type", ""))
+        if content_type != b"multipart/form-data" or b"boundary" not in params:
+            raise MultipartStreamError("multipart/form-data で送信してください")
+        charset = params.get(b"charset")
+        if charset:
+            self._charset = charset.decode("latin-1")
+
+        parser = multipart.MultipartParser(
+            params[b"boundary"],
+            {
+                "on_part_begin": self.on_part_begin,
+                "on_part_data": self.on_part_data,
+                "on_part_end": self.on_part_end,
+                "on_header_field": self.on_header_field,
+                "on_header_value": self.on_header_value,
+                "on_header_end": self.on_header_end,
+                "on_headers_finished": self.on_headers_finished,
+            },
+        )
+        async for chunk in self.request.stream():
+            parser.write(chunk)
+            # コールバックは同期関数のため、たまったイベントをここで非同期に渡す
+            events, self._events = self._events, []
+            for event in events:
+                yield event
+        parser.finalize()
+        events, self._events = self._events, []
+        for event in events:
+            yield event
@@ -1,9 +1,9 @@
 from datetime import datetime, timedelta
+from typing import Optional
 
-from fastapi import APIRouter, HTTPException, status
-from fastapi.responses import StreamingResponse
-import io
+from fastapi import APIRouter, Header, HTTPException, status
 
+from app.api.streaming import stream_storage_file
 from app.models.database import SessionLocal
 from app.models.edit_session import ExportJob, ExportJobStatus
 from app.models.job import AnalysisJob, Video
@@ -28,7 +28,9 @@ async def get_video_url(job_id: str):
     """
     動画URLを取得
 
-    - ジョブIDから元動画の署名付きURLを生成
+    - 再生用プロキシが生成済みの場合はプロキシ、未生成の場合は元動画の署名付きURLを生成
+    - HLS が生成済みの場合は配信エンドポイントのURLも返す
+    - 編集時刻はどちらも元動画の時間軸（エクスポートは常に元動画から行う）
     - 有効期限は1時間
     """
     db = SessionLocal()
@@ -46,12 +48,15 @@ async def get_video_url(job_id: str):
             )
 
         storage_service = StorageService()
-        url = storage_service.generate_presigned_url(job.video.file_path, expiration=3600)
+        playback_path = job.video.proxy_path or job.video.file_path
+        url = storage_service.generate_presigned_url(playback_path, expiration=3600)
         expires_at = datetime.utcnow() + timedelta(seconds=3600)
 
         return VideoUrlResponse(
             url=url,
             expires_at=expires_at.isoformat(),
+            is_proxy=job.video.proxy_path is not None,
+            hls_url=f"/api/jobs/{job_id}/video/hls/playlist.m3u8" if job.video.hls_playlist_path else None,
         )
     finally:
         db.close()
@@ -86,6 +91,7 @@ async def update_edit_session(job_id: str, payload: EditSessionUpdate):
     編集セッションを更新
 
     - 編集アクションの追加・更新・削除
+    - 動画の長さが取得済みの場合、範囲外のアクションは 400
     """
     db = SessionLocal()
     try:
@@ -98,7 +104,11 @@ async def update_edit_session(job_id: str, payload: EditSessionUpdate):
 
         service = EditSessionService(db)
         try:
-            session = service.update_session(job_id, payload.actions)
+            session = service.update_session(
+                job_id,
+                payload.actions,
+                duration=job.video.duration if job.video else None,
+            )
         except ValueError as exc:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -271,9 +281,16 @@ async def get_export_download(job_id: str):
 
 
 @router.get("/{job_id}/export/file")
-async def download_export_file(job_id: str):
+async def download_export_file(
+    job_id: str,
+    range_header: Optional[str] = Header(default=None, alias="Range"),
+    if_range: Optional[str] = Header(default=None, alias="If-Range"),
+):
     """
     編集済み動画をバックエンド経由でダウンロード（CORS回避）
+
+    - メモリに全体を読み込まずチャンク単位でストリーミング配信
+    - Range / If-Range に対応（ダウンロードの再開が可能）
     """
     db = SessionLocal()
     try:
@@ -306,18 +323,19 @@ async def download_export_file(job_id: str):
                 detail="エクスポート済み動画が見つかりません",
             )
 
-        storage_service = StorageService()
-        content = storage_service.get_file_content(export_job.output_path)
-
-        filename = export_job.output_path.split("/")[-1]
-
-        return StreamingResponse(
-            io.BytesIO(content),
-            media_type="video/mp4",
-            headers={
-                "Content-Disposition": f'attachment; filename="{filename}"',
-                "Content-Length": str(len(content)),
-            },
-        )
+        output_path = export_job.output_path
     finally:
         db.close()
+
+    storage_service = StorageService()
+    filename = output_path.split("/")[-1]
+
+    return stream_storage_file(
+        storage_service,
+        output_path,
+        media_type="video/mp4",
+        content_disposition=f'attachment; filename="{filename}"',
+        range_header=range_header,
+        if_range_header=if_range,
+        not_found_detail="エクスポート済み動画がストレージに存在しません",
+    )
@@ -1,18 +1,19 @@
 import asyncio
 import json
 import logging
+import re
 from datetime import datetime, timezone
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Optional
 from urllib.parse import quote
 
-from fastapi import APIRouter, HTTPException, status
-from fastapi.responses import StreamingResponse, Response
+from fastapi import APIRouter, Header, HTTPException, Query, status
 from sse_starlette.sse import EventSourceResponse
 
 logger = logging.getLogger(__name__)
 
+from app.api.streaming import stream_storage_file
 from app.models.database import SessionLocal
-from app.models.job import AnalysisJob, Video, RiskItem as DBRiskItem
+from app.models.job import AnalysisJob, Video, RiskItem as DBRiskItem, JobStatus as DBJobStatus
 from app.schemas.job import (
     AnalysisJobResponse,
     AnalysisJobSummary,
@@ -28,8 +29,10 @@ from app.schemas.job import (
     RiskCategory,
     RiskLevel,
     RiskSource,
+    ThumbnailsResponse,
 )
 from app.services.progress import ProgressService
+from app.services.proxy_rendition import hls_content_type
 from app.services.storage import StorageService
 
 router = APIRouter()
@@ -40,7 +43,7 @@ async def list_jobs():
     """
     ジョブ一覧を取得
 
-    - 全ジョブをステータス付きで一覧取得
+    - 全ジョブをステータス付きで一覧取得（アップロード待ちのジョブは除く）
     - 作成日時の降順でソート
     """
     db = SessionLocal()
@@ -48,7 +51,10 @@ async def list_jobs():
         jobs = (
             db.query(AnalysisJob)
             .join(Video)
-            .filter(AnalysisJob.deleted_at.is_(None))
+            .filter(
+                AnalysisJob.deleted_at.is_(None),
+                AnalysisJob.status != DBJobStatus.awaiting_upload,
+            )
             .order_by(AnalysisJob.created_at.desc())
             .all()
         )
@@ -258,6 +264,8 @@ async def get_job_events(job_id: str):
 
     - Server-Sent Events エンドポイント
     - 進捗更新をリアルタイムでクライアントに配信
+    - 文字起こしの確定セグメント・途中結果を transcript イベントとして配信
+    - 再実行で文字起こしが破棄された場合は transcript_reset イベントを送り、先頭から配信し直す
     """
     db = SessionLocal()
     try:
@@ -273,8 +281,30 @@ async def get_job_events(job_id: str):
     async def event_generator() -> AsyncGenerator[dict, None]:
         progress_service = ProgressService()
         last_progress = None
+        transcript_index = 0
+        transcript_generation = None
+        last_partials: dict[str, str] = {}
 
         while True:
+            # 再実行で破棄された場合、表示済みの文字起こしを消させて先頭から読み直す
+            generation = progress_service.get_transcript_generation(job_id)
+            if transcript_generation is not None and generation != transcript_generation:
+                transcript_index = 0
+                last_partials = {}
+                yield {"event": "transcript_reset", "data": json.dumps({"generation": generation})}
+            transcript_generation = generation
+
+            # 文字起こしの確定セグメント（差分）と途中結果
+            segments = progress_service.get_transcript_segments(job_id, transcript_index)
+            partials = progress_service.get_partial_transcripts(job_id)
+            if segments or partials != last_partials:
+                transcript_index += len(segments)
+                last_partials = partials
+                yield {
+                    "event": "transcript",
+                    "data": json.dumps({"segments": segments, "partials": partials}, ensure_ascii=False),
+                }
+
             progress = progress_service.get_progress(job_id)
 
             if progress != last_progress:
@@ -297,12 +327,19 @@ async def get_job_events(job_id: str):
 
 
 @router.get("/{job_id}/video")
-async def get_job_video(job_id: str):
+async def get_job_video(
+    job_id: str,
+    range_header: Optional[str] = Header(default=None, alias="Range"),
+    if_range: Optional[str] = Header(default=None, alias="If-Range"),
+    original: bool = Query(default=False, description="プロキシがあっても元動画を配信する"),
+):
     """
     動画ファイルを配信
 
     - ジョブに関連付けられた動画をストレージから取得して配信
+    - 再生用プロキシが生成済みの場合はプロキシを配信（original=true で元動画）
     - ストリーミング配信でメモリ効率的
+    - Range / If-Range に対応し、シーク時は必要な範囲のみ 206 で返却
     """
     db = SessionLocal()
     try:
@@ -326,6 +363,8 @@ async def get_job_video(job_id: str):
             )
 
         file_path = job.video.file_path
+        if job.video.proxy_path and not original:
+            file_path = job.video.proxy_path
         original_name = job.video.original_name
 
     finally:
@@ -334,43 +373,16 @@ async def get_job_video(job_id: str):
     # Stream video outside of db session to avoid locks
     try:
         storage = StorageService()
-
-        # Check if file exists
-        if not storage.file_exists(file_path):
-            logger.error(f"Video file not found in storage: {file_path}")
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="動画ファイルがストレージに存在しません",
-            )
-
-        # Get file size for Content-Length header
-        file_size = storage.get_file_size(file_path)
-
-        # Stream file content in chunks
-        def iter_file():
-            stream = storage.get_file_stream(file_path)
-            try:
-                chunk_size = 1024 * 1024  # 1MB chunks
-                while True:
-                    chunk = stream.read(chunk_size)
-                    if not chunk:
-                        break
-                    yield chunk
-            finally:
-                if hasattr(stream, 'close'):
-                    stream.close()
-
         encoded_name = quote(original_name, encoding="utf-8")
-        headers = {
-            "Content-Disposition": f"inline; filename*=UTF-8''{encoded_name}",
-        }
-        if file_size:
-            headers["Content-Length"] = str(file_size)
-
-        return StreamingResponse(
-            iter_file(),
+
+        return stream_storage_file(
+            storage,
+            file_path,
             media_type="video/mp4",
-            headers=headers,
+            content_disposition=f"inline; filename*=UTF-8''{encoded_name}",
+            range_header=range_header,
+            if_range_header=if_range,
+            not_found_detail="動画ファイルがストレージに存在しません",
         )
     except HTTPException:
         raise
@@ -382,6 +394,175 @@ async def get_job_video(job_id: str):
         )
 
 
+HLS_FILENAME_PATTERN = re.compile(r"^[A-Za-z0-9_-]+\.(m3u8|m4s|mp4)$")
+
+
+@router.get("/{job_id}/video/hls/{filename}")
+async def get_job_video_hls(
+    job_id: str,
+    filename: str,
+    range_header: Optional[str] = Header(default=None, alias="Range"),
+    if_range: Optional[str] = Header(default=None, alias="If-Range"),
+):
+    """
+    再生用プロキシの HLS（プレイリスト・fMP4 セグメント）を配信
+
+    プレイリスト内のセグメントは相対パスのため、同じエンドポイントから配信される。
+    """
+    if not HLS_FILENAME_PATTERN.match(filename):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="ファイルが見つかりません",
+        )
+
+    db = SessionLocal()
+    try:
+        job = (
+            db.query(AnalysisJob)
+            .join(Video)
+            .filter(AnalysisJob.id == job_id, AnalysisJob.deleted_at.is_(None))
+            .first()
+        )
+        if not job or not job.video.hls_playlist_path:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="HLS が見つかりません",
+            )
+        hls_directory = job.video.hls_playlist_path.rsplit("/", 1)[0]
+    finally:
+        db.close()
+
+    return stream_storage_file(
+        StorageService(),
+        f"{hls_directory}/{filename}",
+        media_type=hls_content_type(filename),
+        content_disposition="inline",
+        range_header=range_header,
+        if_range_header=if_range,
+        not_found_detail="HLS のファイルがストレージに存在しません",
+    )
+
+
+THUMBNAIL_FILENAME_PATTERN = re.compile(r"^[A-Za-z0-9_-]+\.jpg$")
+# トークンごとにパスが変わり内容は更新されないため、ブラウザ・CDN に長期キャッシュさせる
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# 再解析で差し替わる可能性があるため、期限後は ETag で再検証させる
+WAVEFORM_CACHE_CONTROL = "public, max-age=86400"
+
+
+def _get_thumbnail_manifest(job_id: str) -> tuple[str, dict]:
+    """ジョブの動画IDとサムネイルのマニフェストを取得（未生成の場合は404）"""
+    db = SessionLocal()
+    try:
+        job = (
+            db.query(AnalysisJob)
+            .join(Video)
+            .filter(AnalysisJob.id == job_id, AnalysisJob.deleted_at.is_(None))
+            .first()
+        )
+        if not job:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="ジョブが見つかりません",
+            )
+        if not job.video.thumbnail_manifest:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="サムネイルが生成されていません",
+            )
+        return str(job.video.id), job.video.thumbnail_manifest
+    finally:
+        db.close()
+
+
+@router.get("/{job_id}/thumbnails", response_model=ThumbnailsResponse)
+async def get_job_thumbnails(job_id: str):
+    """
+    サムネイルスプライトのレイアウトとリスク箇所の静止画のURLを取得
+
+    - URL は生成ごとに変わり、同じURLの内容は変わらない（長期キャッシュ可能）
+    """
+    _, manifest = _get_thumbnail_manifest(job_id)
+    base_url = f"/api/jobs/{job_id}/thumbnails/{manifest['token']}"
+    return ThumbnailsResponse(
+        interval=manifest["interval"],
+        width=manifest["width"],
+        height=manifest["height"],
+        columns=manifest["columns"],
+        rows=manifest["rows"],
+        count=manifest["count"],
+        sprite_urls=[f"{base_url}/{name}" for name in manifest["sprites"]],
+        risk_thumbnail_urls={
+            risk_item_id: f"{base_url}/{name}" for risk_item_id, name in manifest["stills"].items()
+        },
+    )
+
+
+@router.get("/{job_id}/thumbnails/{token}/{filename}")
+async def get_job_thumbnail_file(job_id: str, token: str, filename: str):
+    """サムネイル画像を不変の Cache-Control 付きで配信"""
+    video_id, manifest = _get_thumbnail_manifest(job_id)
+    if token != manifest["token"] or not THUMBNAIL_FILENAME_PATTERN.match(filename):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="サムネイルが見つかりません",
+        )
+
+    return stream_storage_file(
+        StorageService(),
+        f"thumbnails/{video_id}/{token}/{filename}",
+        media_type="image/jpeg",
+        content_disposition="inline",
+        not_found_detail="サムネイルがストレージに存在しません",
+        cache_control=IMMUTABLE_CACHE_CONTROL,
+    )
+
+
+@router.get("/{job_id}/waveform")
+async def get_job_waveform(
+    job_id: str,
+    if_none_match: Optional[str] = Header(default=None, alias="If-None-Match"),
+):
+    """
+    音声波形ピーク（複数ズームレベルの最小値・最大値）をバイナリで配信
+
+    - 形式は app.services.waveform を参照
+    - ETag 付きでキャッシュ可能（If-None-Match 一致時は 304）
+    - 音声がない・未計算の場合は 404
+    """
+    db = SessionLocal()
+    try:
+        job = (
+            db.query(AnalysisJob)
+            .join(Video)
+            .filter(AnalysisJob.id == job_id, AnalysisJob.deleted_at.is_(None))
+            .first()
+        )
+        if not job:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="ジョブが見つかりません",
+            )
+        if not job.video.waveform_path:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="波形データがありません",
+            )
+        waveform_path = job.video.waveform_path
+    finally:
+        db.close()
+
+    return stream_storage_file(
+        StorageService(),
+        waveform_path,
+        media_type="application/octet-stream",
+        content_disposition="inline",
+        not_found_detail="波形データがストレージに存在しません",
+        cache_control=WAVEFORM_CACHE_CONTROL,
+        if_none_match_header=if_none_match,
+    )
+
+
 @router.delete("/{job_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_job(job_id: str):
     """
@@ -1,95 +1,293 @@
 import logging
 import os
+import tempfile
 import uuid
-from typing import Annotated
-
-from fastapi import APIRouter, File, Form, HTTPException, UploadFile, status
+from datetime import datetime, timezone
+from typing import Optional
+from fastapi import APIRouter, Header, HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
 
 logger = logging.getLogger(__name__)
 
+from app.api.multipart_stream import (
+    FileData,
+    FileStart,
+    FormField,
+    MultipartStreamError,
+    StreamingMultipartParser,
+)
 from app.config import get_settings
 from app.models.database import SessionLocal
 from app.models.job import AnalysisJob, Video, Platform as DBPlatform, JobStatus
-from app.schemas.job import AnalysisJobResponse, VideoMetadata, Platform
+from app.schemas.job import (
+    AnalysisJobResponse,
+    DirectUploadRequest,
+    DirectUploadResponse,
+    ResumableUploadResponse,
+    UploadCompleteRequest,
+    UploadTargetResponse,
+    VideoMetadata,
+    Platform,
+)
+from app.services.analysis_dedup import reuse_analysis_if_available
+from app.services.media_probe import MediaInfo, apply_media_info, probe_stored_media
 from app.services.storage import StorageService
+from app.services.upload_ingest import (
+    EmptyUpload,
+    IngestResult,
+    StreamingStorageUpload,
+    UploadTooLarge,
+)
 from app.services.progress import ProgressService
+from app.services.resumable_upload import (
+    InvalidUploadChunk,
+    ResumableUploadService,
+    UploadOffsetMismatch,
+    UploadSessionBusy,
+    UploadSessionNotFound,
+)
 from app.tasks.analyze import analyze_video
+from app.tasks.media import process_video_media, schedule_thumbnails
+from app.tasks.uploads import sweep_expired_uploads, verify_content_hash
 
 router = APIRouter()
 settings = get_settings()
 
 
-def validate_file(file: UploadFile) -> None:
-    """ファイルのバリデーション"""
-    if not file.filename:
+def validate_file_type(filename: str | None, content_type: str | None) -> None:
+    """ファイル名（拡張子）と MIME タイプのバリデーション"""
+    if not filename:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="ファイル名が指定されていません",
         )
 
-    extension = os.path.splitext(file.filename)[1].lower().lstrip(".")
+    extension = os.path.splitext(filename)[1].lower().lstrip(".")
     if extension not in settings.allowed_extensions_list:
         raise HTTPException(
             status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
             detail=f"サポートされていないファイル形式です。対応形式: {settings.allowed_extensions}",
         )
 
-    if file.content_type and not file.content_type.startswith("video/"):
+    if content_type and not content_type.startswith("video/"):
         raise HTTPException(
             status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
             detail="動画ファイルを指定してください",
         )
 
 
-@router.post("", status_code=status.HTTP_202_ACCEPTED, response_model=AnalysisJobResponse)
-async def upload_video(
-    file: Annotated[UploadFile, File(description="動画ファイル（mp4形式）")],
-    purpose: Annotated[str, Form(description="動画の用途")],
-    platform: Annotated[Platform, Form(description="投稿先媒体")],
-    target_audience: Annotated[str, Form(description="想定ターゲット")],
-):
+UPLOAD_VIDEO_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "description": (
+            "purpose / platform / target_audience は file より前のパートで送信すること。"
+            "file より前に届いたメタ情報は動画の受信前に検証され、不正な場合は本体を受信せずに 422 を返す。"
+            "file より後に届いたメタ情報は動画全体の受信後にしか検証できない。"
+        ),
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file", "purpose", "platform", "target_audience"],
+                    "properties": {
+                        "file": {"type": "string", "format": "binary", "description": "動画ファイル（mp4形式）"},
+                        "purpose": {"type": "string", "description": "動画の用途"},
+                        "platform": {"type": "string", "enum": [p.value for p in Platform], "description": "投稿先媒体"},
+                        "target_audience": {"type": "string", "description": "想定ターゲット"},
+                    },
+                }
+            }
+        },
+    }
+}
+
+
+def schedule_media_processing(video: Video, thumbnails: bool = False) -> bool:
     """
-    動画をアップロードし、解析を開始する
+    faststart リマックス・再生用プロキシの生成と、未計算の content_hash の計算を登録
+    （1つのタスクで1回のダウンロードで行う）
 
-    - 動画ファイルをストレージに保存
-    - ジョブレコードを作成
-    - 解析タスクを登録
-    - ジョブIDを返却（非同期処理）
+    content_hash は同一内容の解析結果の再利用に使う。解析タスクでは動画全体を読む計算を行わず、
+    解析の開始を遅らせないようにこのタスクで計算する。
+    いずれも登録に失敗してもアップロードは成功とする。
+    thumbnails を指定すると、同じタスクでサムネイルも生成する（解析結果を再利用して完了済みのジョブ用）。
+
+    Returns:
+        タスクを登録したか（False の場合、サムネイルは呼び出し側で登録する）
     """
-    validate_file(file)
+    if not (settings.faststart_remux_enabled or settings.proxy_enabled or not video.content_hash):
+        return False
+    try:
+        process_video_media.delay(str(video.id), thumbnails=thumbnails)
+        return True
+    except Exception as e:
+        logger.warning(f"動画処理タスクの登録に失敗しました: video_id={video.id}, error={e}")
+        return False
 
-    file.file.seek(0, 2)
-    file_size = file.file.tell()
-    file.file.seek(0)
 
-    if file_size > settings.max_file_size_bytes:
-        raise HTTPException(
-            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-            detail=f"ファイルサイズが上限を超えています。上限: {settings.max_file_size_mb}MB",
-        )
+def probe_uploaded_video(storage_service, file_path: str) -> Optional[MediaInfo]:
+    """
+    アップロード完了時に動画のメタ情報を署名付き URL から取得（ダウンロードしない）
 
-    storage_service = StorageService()
+    解析タスクの登録前に長さ・フレームレートを保存し、Gemini のサンプリング設定に使えるようにする。
+    失敗してもアップロードは成功とし、解析タスク内で改めて取得する。
+    """
     try:
-        file_path = storage_service.upload_file(
-            file.file,
-            file.filename,
-            file.content_type or "video/mp4",
-        )
+        return probe_stored_media(storage_service, file_path)
     except Exception as e:
-        logger.error(f"ストレージへのアップロードに失敗しました: {e}", exc_info=True)
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"ストレージへのアップロードに失敗しました: {str(e)}",
+        logger.warning(f"アップロード完了時のメタ情報取得に失敗しました: file_path={file_path}, error={e}")
+        return None
+
+
+def schedule_upload_sweep(upload_service: ResumableUploadService) -> None:
+    """期限切れセッションの分割アップロードを中止するタスクを一定間隔で登録（失敗してもアップロードは継続）"""
+    try:
+        if upload_service.claim_sweep():
+            sweep_expired_uploads.delay()
+    except Exception as e:
+        logger.warning(f"期限切れアップロードの掃除タスクの登録に失敗しました: error={e}")
+
+
+def validate_received_metadata(fields: dict[str, str]) -> None:
+    """
+    ファイルより前に届いたメタ情報を検証（不正な場合は 422）
+
+    未着のフィールドはファイルの後に届く可能性があるため、ここでは必須チェックを行わない。
+    """
+    try:
+        VideoMetadata(**{name: value for name, value in fields.items() if name in VideoMetadata.model_fields})
+    except ValidationError as e:
+        errors = [error for error in e.errors() if error["type"] != "missing"]
+        if errors:
+            raise RequestValidationError(errors)
+
+
+def parse_upload_metadata(fields: dict[str, str]) -> VideoMetadata:
+    """フォームのメタ情報を検証（不正な場合は 422）"""
+    try:
+        return VideoMetadata(
+            purpose=fields.get("purpose"),
+            platform=fields.get("platform"),
+            target_audience=fields.get("target_audience"),
         )
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+
+
+async def ingest_upload_stream(request: Request) -> tuple[IngestResult, str, VideoMetadata]:
+    """
+    multipart のボディを受信しながら動画をストレージへ送信
+
+    ファイルより前に届いたメタ情報は本体の受信前に検証する。
+    ファイルより後に届いたメタ情報は全体の受信後の検証になるため、クライアントはメタ情報を先に送ること。
+
+    Returns:
+        (取り込み結果, 元のファイル名, メタ情報)
+    """
+    missing_file = RequestValidationError(
+        [{"type": "missing", "loc": ("body", "file"), "msg": "Field required", "input": None}]
+    )
+    if not request.headers.get("Content-Type", "").startswith("multipart/form-data"):
+        raise missing_file
+
+    fields: dict[str, str] = {}
+    filename: str | None = None
+    upload: StreamingStorageUpload | None = None
+    try:
+        async for event in StreamingMultipartParser(request).events():
+            if isinstance(event, FormField):
+                fields[event.name] = event.value
+            elif isinstance(event, FileStart):
+                if event.name != "file" or upload is not None:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail="動画ファイルは file フィールドで1つだけ指定してください",
+                    )
+                # ファイル名・MIME タイプと先に届いたメタ情報は、本体の受信前に検証して拒否する
+                validate_file_type(event.filename, event.content_type)
+                validate_received_metadata(fields)
+                filename = event.filename
+                upload = StreamingStorageUpload(
+                    StorageService(),
+                    event.filename,
+                    event.content_type or "video/mp4",
+                    settings.max_file_size_bytes,
+                )
+                await upload.start()
+            elif isinstance(event, FileData) and upload is not None:
+                await upload.write(event.data)
 
+        if upload is None:
+            raise missing_file
+        metadata = parse_upload_metadata(fields)
+        result = await upload.finish()
+        return result, filename, metadata
+    except BaseException as e:
+        if upload is not None:
+            await upload.abort()
+        if isinstance(e, UploadTooLarge):
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"ファイルサイズが上限を超えています。上限: {settings.max_file_size_mb}MB",
+            )
+        if isinstance(e, EmptyUpload):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="ファイルが空です",
+            )
+        if isinstance(e, MultipartStreamError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e),
+            )
+        if isinstance(e, Exception) and not isinstance(e, (HTTPException, RequestValidationError)):
+            logger.error(f"ストレージへのアップロードに失敗しました: {e}", exc_info=True)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"ストレージへのアップロードに失敗しました: {str(e)}",
+            )
+        raise
+
+
+@router.post(
+    "",
+    status_code=status.HTTP_202_ACCEPTED,
+    response_model=AnalysisJobResponse,
+    openapi_extra=UPLOAD_VIDEO_OPENAPI,
+)
+async def upload_video(request: Request):
+    """
+    動画をアップロードし、解析を開始する
+
+    - リクエストボディを逐次受信しながら動画をストレージへ送信（一時ファイルを使わない）
+    - メタ情報は file より前のパートで送ること（先に届いたメタ情報は動画の受信前に検証する）
+    - 上限サイズを超えた時点で受信を打ち切る
+    - 受信と同じ1パスで SHA-256 を計算
+    - ジョブレコードを作成
+    - 解析タスクと faststart リマックス・再生用プロキシの生成を登録
+    - ジョブIDを返却（非同期処理）
+    """
+    result, filename, metadata = await ingest_upload_stream(request)
+    file_path = result.file_path
+    purpose = metadata.purpose
+    platform = metadata.platform
+    target_audience = metadata.target_audience
+
+    storage_service = StorageService()
+    media_info = await run_in_threadpool(probe_uploaded_video, storage_service, file_path)
     db = SessionLocal()
     try:
         video = Video(
             id=uuid.uuid4(),
             file_path=file_path,
-            original_name=file.filename,
-            file_size=file_size,
+            original_name=filename,
+            file_size=result.size,
+            content_hash=result.sha256,
         )
+        if media_info is not None:
+            apply_media_info(video, media_info)
         db.add(video)
         db.flush()
 
@@ -111,15 +309,22 @@ async def upload_video(
         progress_service = ProgressService()
         progress_service.initialize_progress(str(job.id))
 
-        analyze_video.delay(
-            str(job.id),
-            file_path,
-            {
-                "purpose": purpose,
-                "platform": platform.value,
-                "target_audience": target_audience,
-            },
-        )
+        # 同一内容・同一メタ情報の解析が完了済みなら、結果を複製して解析タスクを登録しない
+        reused = reuse_analysis_if_available(db, job, video.content_hash) is not None
+        if reused:
+            progress_service.set_job_completed(str(job.id))
+        else:
+            analyze_video.delay(
+                str(job.id),
+                file_path,
+                {
+                    "purpose": purpose,
+                    "platform": platform.value,
+                    "target_audience": target_audience,
+                },
+            )
+        if not schedule_media_processing(video, thumbnails=reused) and reused:
+            schedule_thumbnails(job.id)
 
         return AnalysisJobResponse(
             id=job.id,
@@ -148,3 +353,446 @@ async def upload_video(
         )
     finally:
         db.close()
+
+
+@router.post("/uploads", status_code=status.HTTP_201_CREATED, response_model=DirectUploadResponse)
+async def create_direct_upload(
+    request: DirectUploadRequest,
+    origin: str | None = Header(default=None),
+):
+    """
+    ストレージへの直接アップロード枠を発行する
+
+    - 動画・ジョブレコードを「アップロード待ち」状態で作成
+    - 署名付き POST（S3/MinIO）またはレジューマブルセッション（GCS）を返却
+    - クライアントはアップロード後に完了通知エンドポイントを呼び出す
+    """
+    validate_file_type(request.filename, request.content_type)
+
+    if request.file_size > settings.direct_upload_max_file_size_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"ファイルサイズが上限を超えています。上限: {settings.direct_upload_max_file_size_mb}MB",
+        )
+
+    storage_service = StorageService()
+    expiration = settings.direct_upload_expiration_seconds
+    try:
+        target = storage_service.create_upload_target(
+            request.filename,
+            request.content_type,
+            request.file_size,
+            expiration=expiration,
+            origin=origin,
+        )
+    except Exception as e:
+        logger.error(f"アップロード先の発行に失敗しました: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"アップロード先の発行に失敗しました: {str(e)}",
+        )
+
+    db = SessionLocal()
+    try:
+        video = Video(
+            id=uuid.uuid4(),
+            file_path=target.file_path,
+            original_name=request.filename,
+            file_size=request.file_size,
+        )
+        db.add(video)
+        db.flush()
+
+        job = AnalysisJob(
+            id=uuid.uuid4(),
+            video_id=video.id,
+            status=JobStatus.awaiting_upload,
+            purpose=request.purpose,
+            platform=DBPlatform(request.platform.value),
+            target_audience=request.target_audience,
+        )
+        db.add(job)
+        db.commit()
+
+        logger.info(f"直接アップロード枠を発行しました: job_id={job.id}, file={request.filename}")
+
+        return DirectUploadResponse(
+            job_id=job.id,
+            upload=UploadTargetResponse(
+                method=target.method,
+                url=target.url,
+                fields=target.fields,
+                headers=target.headers,
+            ),
+            expires_in=expiration,
+        )
+    except Exception as e:
+        logger.error(f"アップロード枠の作成中にエラーが発生しました: {e}", exc_info=True)
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"アップロード枠の作成に失敗しました: {str(e)}",
+        )
+    finally:
+        db.close()
+
+
+@router.post(
+    "/uploads/{job_id}/complete",
+    status_code=status.HTTP_202_ACCEPTED,
+    response_model=AnalysisJobResponse,
+)
+async def complete_direct_upload(job_id: str, request: UploadCompleteRequest | None = None):
+    """
+    直接アップロードの完了を通知し、解析を開始する
+
+    - ストレージのメタデータ（HEAD）でサイズと MIME タイプを検証
+    - 検証に失敗した場合はオブジェクトを削除し、ジョブを失敗にする
+    - 動画のメタ情報を署名付き URL の ffprobe で取得（ダウンロードしない）
+    - sha256 が申告された場合、同一内容の完了済み解析があれば解析タスクを登録せずに結果を再利用する
+    - ジョブを待機状態にして解析タスクを登録
+    """
+    return await run_in_threadpool(finalize_awaiting_upload, job_id, request.sha256 if request else None)
+
+
+def finalize_awaiting_upload(job_id: str, declared_hash: str | None = None) -> AnalysisJobResponse:
+    """
+    アップロード待ちのジョブのオブジェクトを検証し、解析タスクを登録
+
+    直接アップロードの本体は API を経由しないため、内容のハッシュはクライアントの申告値を使う。
+    申告値で完了済みの解析を再利用した場合は、verify_content_hash で実際の内容を後から検証する
+    （Video.content_hash には検証済みの値のみを保存し、他のジョブの再利用元にならないようにする）。
+    """
+    db = SessionLocal()
+    try:
+        job = (
+            db.query(AnalysisJob)
+            .filter(AnalysisJob.id == job_id, AnalysisJob.deleted_at.is_(None))
+            .first()
+        )
+        if not job:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="ジョブが見つかりません",
+            )
+        if job.status != JobStatus.awaiting_upload:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="このジョブはアップロード待ちではありません",
+            )
+
+        video = job.video
+        storage_service = StorageService()
+        metadata = storage_service.get_file_metadata(video.file_path)
+        if metadata is None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="アップロードが完了していません",
+            )
+
+        rejection = None
+        if metadata.size != video.file_size or metadata.size > settings.direct_upload_max_file_size_bytes:
+            rejection = (
+                status.HTTP_400_BAD_REQUEST,
+                f"アップロードされたファイルサイズが申告と一致しません: {metadata.size}",
+            )
+        elif metadata.content_type and not metadata.content_type.startswith("video/"):
+            rejection = (status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, "動画ファイルを指定してください")
+
+        if rejection:
+            status_code, detail = rejection
+            logger.warning(f"直接アップロードの検証に失敗しました: job_id={job_id}, reason={detail}")
+            try:
+                storage_service.delete_file(video.file_path)
+            except Exception as delete_error:
+                logger.warning(f"検証失敗後のファイル削除に失敗しました: {delete_error}")
+            job.status = JobStatus.failed
+            job.error_message = detail
+            db.commit()
+            raise HTTPException(status_code=status_code, detail=detail)
+
+        media_info = probe_uploaded_video(storage_service, video.file_path)
+        if media_info is not None:
+            apply_media_info(video, media_info)
+
+        # 完了通知の重複で解析が二重に登録されないよう、状態遷移を条件付き更新で行う
+        updated = (
+            db.query(AnalysisJob)
+            .filter(AnalysisJob.id == job.id, AnalysisJob.status == JobStatus.awaiting_upload)
+            .update({AnalysisJob.status: JobStatus.pending}, synchronize_session=False)
+        )
+        db.commit()
+        if not updated:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="このジョブはアップロード待ちではありません",
+            )
+
+        logger.info(f"直接アップロード完了: job_id={job.id}, file={video.original_name}, size={metadata.size}")
+
+        progress_service = ProgressService()
+        progress_service.initialize_progress(str(job.id))
+
+        reused = (
+            declared_hash is not None
+            and reuse_analysis_if_available(db, job, declared_hash.lower()) is not None
+        )
+        if reused:
+            progress_service.set_job_completed(str(job.id))
+            verify_content_hash.delay(str(job.id), video.file_path, declared_hash)
+        else:
+            analyze_video.delay(
+                str(job.id),
+                video.file_path,
+                {
+                    "purpose": job.purpose,
+                    "platform": job.platform.value,
+                    "target_audience": job.target_audience,
+                },
+            )
+        if not schedule_media_processing(video, thumbnails=reused) and reused:
+            schedule_thumbnails(job.id)
+
+        return AnalysisJobResponse(
+            id=job.id,
+            status=JobStatus.completed if reused else JobStatus.pending,
+            video_name=video.original_name,
+            metadata=VideoMetadata(
+                purpose=job.purpose,
+                platform=Platform(job.platform.value),
+                target_audience=job.target_audience,
+            ),
+            created_at=job.created_at,
+            completed_at=job.completed_at,
+            error_message=job.error_message,
+        )
+    finally:
+        db.close()
+
+
+TUS_VERSION = "1.0.0"
+
+
+def _resumable_session_or_404(service: ResumableUploadService, job_id: str):
+    session = service.get(job_id)
+    if session is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="アップロードセッションが見つかりません",
+        )
+    return session
+
+
+@router.post("/resumable", status_code=status.HTTP_201_CREATED, response_model=ResumableUploadResponse)
+async def create_resumable_upload(request: DirectUploadRequest, response: Response):
+    """
+    レジューマブルアップロードを開始する（tus 方式）
+
+    - 動画・ジョブレコードを「アップロード待ち」状態で作成
+    - ストレージの分割アップロード（S3 マルチパート / GCS レジューマブルセッション）を開始
+    - クライアントは chunk_size ごとに PATCH で送信し、HEAD で受信済みオフセットを確認できる
+    - 放置されて期限切れになったセッションの分割アップロードを中止するタスクを一定間隔で登録
+    """
+    validate_file_type(request.filename, request.content_type)
+
+    if request.file_size > settings.direct_upload_max_file_size_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"ファイルサイズが上限を超えています。上限: {settings.direct_upload_max_file_size_mb}MB",
+        )
+
+    job_id = uuid.uuid4()
+    upload_service = ResumableUploadService()
+    try:
+        session = await run_in_threadpool(
+            upload_service.create,
+            str(job_id),
+            request.filename,
+            request.content_type,
+            request.file_size,
+        )
+    except Exception as e:
+        logger.error(f"アップロードセッションの作成に失敗しました: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"アップロードセッションの作成に失敗しました: {str(e)}",
+        )
+
+    db = SessionLocal()
+    try:
+        video = Video(
+            id=uuid.uuid4(),
+            file_path=session.file_path,
+            original_name=request.filename,
+            file_size=request.file_size,
+        )
+        db.add(video)
+        db.flush()
+
+        job = AnalysisJob(
+            id=job_id,
+            video_id=video.id,
+            status=JobStatus.awaiting_upload,
+            purpose=request.purpose,
+            platform=DBPlatform(request.platform.value),
+            target_audience=request.target_audience,
+        )
+        db.add(job)
+        db.commit()
+    except Exception as e:
+        logger.error(f"アップロードセッションの作成中にエラーが発生しました: {e}", exc_info=True)
+        db.rollback()
+        try:
+            upload_service.abort(str(job_id))
+        except Exception as abort_error:
+            logger.warning(f"分割アップロードの中止に失敗しました: {abort_error}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"アップロードセッションの作成に失敗しました: {str(e)}",
+        )
+    finally:
+        db.close()
+
+    schedule_upload_sweep(upload_service)
+
+    response.headers["Location"] = f"/api/videos/resumable/{job_id}"
+    response.headers["Tus-Resumable"] = TUS_VERSION
+    return ResumableUploadResponse(
+        job_id=job_id,
+        chunk_size=session.chunk_size,
+        offset=session.offset,
+        expires_in=settings.resumable_upload_expiration_seconds,
+    )
+
+
+@router.head("/resumable/{job_id}")
+async def get_resumable_upload_offset(job_id: str):
+    """受信済みオフセットを返す（中断後はこのオフセットから再送する）"""
+    session = _resumable_session_or_404(ResumableUploadService(), job_id)
+    return Response(
+        status_code=status.HTTP_200_OK,
+        headers={
+            "Upload-Offset": str(session.offset),
+            "Upload-Length": str(session.size),
+            "Tus-Resumable": TUS_VERSION,
+            "Cache-Control": "no-store",
+        },
+    )
+
+
+@router.patch("/resumable/{job_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def upload_resumable_chunk(
+    job_id: str,
+    request: Request,
+    upload_offset: int = Header(alias="Upload-Offset", ge=0),
+):
+    """
+    チャンクを受信してストレージへ転送する
+
+    - Upload-Offset はサーバーの受信済みオフセットと一致する必要がある（不一致は 409）
+    - チャンクは chunk_size バイト（最終チャンクのみ残りのバイト数）
+    - 受信するのは1チャンク分のみで、ファイル全体を保持することはない
+    """
+    upload_service = ResumableUploadService()
+    session = _resumable_session_or_404(upload_service, job_id)
+    max_length = session.chunk_size
+
+    with tempfile.SpooledTemporaryFile(max_size=max_length) as chunk:
+        length = 0
+        async for data in request.stream():
+            length += len(data)
+            if length > max_length:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"チャンクサイズが上限を超えています。上限: {max_length}バイト",
+                )
+            chunk.write(data)
+        chunk.seek(0)
+
+        try:
+            session = await run_in_threadpool(
+                upload_service.write_chunk, job_id, upload_offset, chunk, length
+            )
+        except UploadSessionNotFound:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="アップロードセッションが見つかりません",
+            )
+        except UploadOffsetMismatch as e:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Upload-Offset が受信済みオフセットと一致しません",
+                headers={"Upload-Offset": str(e.offset), "Tus-Resumable": TUS_VERSION},
+            )
+        except UploadSessionBusy:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="このアップロードには別のチャンクを送信中です",
+            )
+        except InvalidUploadChunk as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e),
+            )
+        except Exception as e:
+            logger.error(f"チャンクの転送に失敗しました: job_id={job_id}, error={e}", exc_info=True)
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail="チャンクのストレージへの転送に失敗しました。同じオフセットから再送してください",
+            )
+
+    return Response(
+        status_code=status.HTTP_204_NO_CONTENT,
+        headers={"Upload-Offset": str(session.offset), "Tus-Resumable": TUS_VERSION},
+    )
+
+
+@router.post(
+    "/resumable/{job_id}/complete",
+    status_code=status.HTTP_202_ACCEPTED,
+    response_model=AnalysisJobResponse,
+)
+async def complete_resumable_upload(job_id: str, request: UploadCompleteRequest | None = None):
+    """
+    レジューマブルアップロードを完了し、解析を開始する
+
+    - ストレージのオブジェクトを確定（S3 はマルチパートの結合）
+    - 以降は直接アップロードの完了通知と同じ検証・重複判定・解析登録を行う
+    """
+    upload_service = ResumableUploadService()
+    try:
+        await run_in_threadpool(upload_service.complete, job_id)
+    except UploadSessionNotFound:
+        # 完了済み（再送）の場合はセッションが無い。オブジェクトの検証に委ねる
+        pass
+    except InvalidUploadChunk as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e),
+        )
+    return await run_in_threadpool(finalize_awaiting_upload, job_id, request.sha256 if request else None)
+
+
+@router.delete("/resumable/{job_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def abort_resumable_upload(job_id: str):
+    """レジューマブルアップロードを中止し、送信済みのチャンクとジョブを破棄する"""
+    upload_service = ResumableUploadService()
+    try:
+        await run_in_threadpool(upload_service.abort, job_id)
+    except UploadSessionNotFound:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="アップロードセッションが見つかりません",
+        )
+
+    db = SessionLocal()
+    try:
+        job = db.query(AnalysisJob).filter(AnalysisJob.id == job_id).first()
+        if job and job.status == JobStatus.awaiting_upload:
+            job.status = JobStatus.failed
+            job.error_message = "アップロードが中止されました"
+            job.deleted_at = datetime.now(timezone.utc)
+            db.commit()
+    finally:
+        db.close()
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,151 @@
+"""ストレージ上のファイルを HTTP Range 対応でストリーミング配信する"""
+import logging
+from typing import Iterator, Optional
+
+from fastapi import HTTPException, status
+from fastapi.responses import Response, StreamingResponse
+
+from app.config import get_settings
+from app.services.storage import BaseStorageService
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class RangeNotSatisfiable(Exception):
+    """Range ヘッダーがファイルサイズに対して満たせない"""
+
+
+def parse_range_header(range_header: Optional[str], file_size: int) -> Optional[tuple[int, int]]:
+    """
+    Range ヘッダーを解析し、配信するバイト範囲 (start, end) を返す（end を含む）
+
+    - 単一範囲（bytes=0-99 / bytes=100- / bytes=-500）のみ対応
+    - ヘッダーが無い・解釈できない・複数範囲の場合は None（全体を配信）
+    - 範囲が満たせない場合は RangeNotSatisfiable を送出
+    """
+    if not range_header:
+        return None
+
+    unit, _, spec = range_header.strip().partition("=")
+    if unit.strip().lower() != "bytes" or not spec or "," in spec:
+        return None
+
+    start_text, sep, end_text = spec.strip().partition("-")
+    if not sep:
+        return None
+    start_text, end_text = start_text.strip(), end_text.strip()
+
+    try:
+        if not start_text:
+            # サフィックス指定: 末尾から N バイト
+            suffix_length = int(end_text)
+            if suffix_length <= 0:
+                raise RangeNotSatisfiable(range_header)
+            return max(file_size - suffix_length, 0), file_size - 1
+
+        start = int(start_text)
+        end = int(end_text) if end_text else file_size - 1
+    except ValueError:
+        return None
+
+    if start >= file_size:
+        raise RangeNotSatisfiable(range_header)
+    if start > end:
+        return None
+    return start, min(end, file_size - 1)
+
+
+def stream_storage_file(
+    storage: BaseStorageService,
+    file_path: str,
+    *,
+    media_type: str,
+    content_disposition: str,
+    range_header: Optional[str] = None,
+    if_range_header: Optional[str] = None,
+    not_found_detail: str = "ファイルがストレージに存在しません",
+    cache_control: Optional[str] = None,
+    if_none_match_header: Optional[str] = None,
+) -> Response:
+    """
+    ストレージのファイルを 200 / 206 でストリーミング配信するレスポンスを生成
+
+    メタデータ取得（HEAD）1回と、必要な範囲のみの GET 1回で配信する。
+    cache_control を指定した場合は Cache-Control ヘッダーに設定する。
+    If-None-Match が現在の ETag と一致する場合は本文を返さず 304 とする。
+    """
+    metadata = storage.get_file_metadata(file_path)
+    if metadata is None:
+        logger.error(f"File not found in storage: {file_path}")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=not_found_detail,
+        )
+
+    file_size = metadata.size
+    etag = f'"{metadata.etag}"' if metadata.etag else None
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": content_disposition,
+    }
+    if etag:
+        headers["ETag"] = etag
+    if cache_control:
+        headers["Cache-Control"] = cache_control
+
+    if etag and if_none_match_header and etag in {tag.strip() for tag in if_none_match_header.split(",")}:
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={key: value for key, value in headers.items() if key != "Accept-Ranges"},
+        )
+
+    # If-Range が現在の ETag と一致しない場合は Range を無視して全体を返す
+    if if_range_header and if_range_header.strip() != etag:
+        range_header = None
+
+    try:
+        byte_range = parse_range_header(range_header, file_size)
+    except RangeNotSatisfiable:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="指定された範囲は配信できません",
+            headers={"Content-Range": f"bytes */{file_size}", "Accept-Ranges": "bytes"},
+        )
+
+    if byte_range is None:
+        start, end = 0, file_size - 1
+        status_code = status.HTTP_200_OK
+        stream_range = (None, None)
+    else:
+        start, end = byte_range
+        status_code = status.HTTP_206_PARTIAL_CONTENT
+        headers["Content-Range"] = f"bytes {start}-{end}/{file_size}"
+        stream_range = (start, end)
+
+    length = max(end - start + 1, 0)
+    headers["Content-Length"] = str(length)
+
+    def iter_file() -> Iterator[bytes]:
+        if length == 0:
+            return
+        stream = storage.get_file_stream(file_path, *stream_range)
+        try:
+            remaining = length
+            chunk_size = settings.storage_stream_chunk_size_bytes
+            while remaining > 0:
+                chunk = stream.read(min(chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+        finally:
+            if hasattr(stream, "close"):
+                stream.close()
+
+    return StreamingResponse(
+        iter_file(),
+        status_code=status_code,
+        media_type=media_type,
+        headers=headers,
+    )
@@ -1,4 +1,5 @@
 from celery import Celery
+from celery.signals import worker_process_init, worker_process_shutdown
 
 from app.config import get_settings
 
@@ -8,7 +9,7 @@ celery_app = Celery(
     "video_risk_analyzer",
     broker=settings.celery_broker_url,
     backend=settings.celery_result_backend,
-    include=["app.tasks.analyze", "app.tasks.export"],
+    include=["app.tasks.analyze", "app.tasks.export", "app.tasks.media", "app.tasks.uploads"],
 )
 
 celery_app.conf.update(
@@ -24,6 +25,7 @@ celery_app.conf.update(
     task_routes={
         "app.tasks.analyze.*": {"queue": "analysis"},
         "app.tasks.export.*": {"queue": "export"},
+        "app.tasks.media.*": {"queue": "media"},
     },
     task_annotations={
         "app.tasks.analyze.analyze_video": {
@@ -32,3 +34,19 @@ celery_app.conf.update(
         },
     },
 )
+
+
+@worker_process_init.connect
+def init_worker_process(**kwargs) -> None:
+    """prefork の子プロセスごとに共有クライアントを生成"""
+    from app.services.clients import init_clients, reset_clients
+
+    reset_clients()
+    init_clients()
+
+
+@worker_process_shutdown.connect
+def shutdown_worker_process(**kwargs) -> None:
+    from app.services.clients import reset_clients
+
+    reset_clients()
@@ -18,19 +18,150 @@ class Settings(BaseSettings):
     storage_access_key: str = "minioadmin"
     storage_secret_key: str = "minioadmin"
     storage_bucket: str = "videos"
+    # ブラウザから見たストレージのエンドポイント（直接アップロード用、未設定時は storage_endpoint）
+    storage_public_endpoint: str = ""
 
     # Google Cloud
     google_cloud_project: str = ""
     gcs_service_account_email: str = ""  # For IAM-based signed URL generation
 
+    # Storage transfer tuning
+    storage_multipart_threshold_mb: int = 16
+    storage_multipart_chunksize_mb: int = 16
+    storage_transfer_concurrency: int = 8
+    storage_max_pool_connections: int = 32
+    storage_download_part_size_mb: int = 16
+    storage_download_concurrency: int = 8
+    storage_stream_chunk_size_kb: int = 1024  # 256KBの倍数であること（GCS）
+    gcs_upload_chunk_size_mb: int = 8  # 256KBの倍数であること
+    gcs_parallel_composite_threshold_mb: int = 64
+    gcs_credentials_refresh_margin_seconds: int = 300
+    signed_url_cache_bucket_seconds: int = 300
+    signed_url_cache_max_entries: int = 1024
+
     # Application
     max_file_size_mb: int = 100
+    # ストレージへの直接アップロード（API を経由しないため上限を大きく取れる）
+    direct_upload_max_file_size_mb: int = 5120
+    direct_upload_expiration_seconds: int = 3600
+    # レジューマブルアップロード（チャンクは S3 の最小パート 5MB 以上、GCS の 256KB の倍数であること）
+    resumable_upload_chunk_size_mb: int = 8
+    resumable_upload_expiration_seconds: int = 86400
+    # 期限切れセッションの分割アップロードを中止するタスクの最短実行間隔（セッション作成時に登録する）
+    resumable_upload_sweep_interval_seconds: int = 3600
     allowed_extensions: str = "mp4"
 
+    # 同一内容・同一メタ情報の動画は完了済みの解析結果を再利用する
+    analysis_dedup_enabled: bool = True
+
+    # moov が末尾にある MP4 はアップロード後に先頭へ移動（再エンコードなし）して差し替える
+    faststart_remux_enabled: bool = True
+    # 差し替え前のオブジェクトを削除するまでの猶予（読み込み中の解析・再生を中断しないため）
+    faststart_original_retention_seconds: int = 21600
+
+    # タイムライン編集の再生用プロキシ（短辺の画素数・最大ビットレート・HLS セグメント長）
+    proxy_enabled: bool = True
+    proxy_short_side: int = 540
+    proxy_max_bitrate_kbps: int = 1200
+    proxy_hls_segment_seconds: int = 2
+
+    # タイムラインのサムネイル（スプライトの間隔・セルサイズ・1シートの行列数）とリスク箇所の静止画
+    thumbnails_enabled: bool = True
+    thumbnail_interval_seconds: int = 2
+    thumbnail_max_count: int = 1000
+    thumbnail_width: int = 160
+    thumbnail_height: int = 90
+    thumbnail_sprite_columns: int = 10
+    thumbnail_sprite_rows: int = 10
+    thumbnail_still_width: int = 480
+
+    # タイムラインの音声波形ピーク（16kHz で 160 サンプル = 10ms 単位から粗いレベルを作る）
+    waveform_enabled: bool = True
+    waveform_samples_per_peak: str = "160,640,2560"
+    waveform_bits: int = 8
+
+    # 音声抽出の入力（local / url / stream）。url・stream は他のステージが動画をダウンロードしない場合、
+    # ダウンロードせずにストレージから直接抽出する（ダウンロードする場合はそのローカルコピーを読む）
+    audio_extraction_mode: str = "local"
+    audio_extraction_url_expiration_seconds: int = 3600
+
+    # 文字起こしは無音位置で区切った短いチャンクに分けて並列に送る（同期認識の上限 60 秒未満）
+    transcription_chunk_max_seconds: float = 55.0
+    transcription_chunk_min_seconds: float = 20.0
+    # 無音が見つからず固定位置で切る場合の重なり（境界の単語を両側で認識させる）
+    transcription_chunk_overlap_seconds: float = 1.0
+    transcription_silence_threshold_db: float = -40.0
+    transcription_max_parallel_chunks: int = 4
+    # batch（チャンクごとの同期認識）/ streaming（抽出中の音声を送り、途中結果と細かい進捗を通知するストリーミング認識）
+    transcription_mode: str = "batch"
+    # 発話区間のみを文字起こしに送る（無音・小さな背景音の区間は送らない）
+    transcription_vad_enabled: bool = True
+    # 送信する音声の形式（auto / flac / opus / linear16、batch・streaming 共通）。auto は長い動画のみ Opus にする
+    transcription_audio_encoding: str = "auto"
+    transcription_opus_min_duration_seconds: int = 1800
+    transcription_opus_bitrate_kbps: int = 32
+    # 同じ音声・同じ認識設定の文字起こし結果を Redis に保存して再利用する（0 以下は期限なし）。
+    # キーは音声全体のハッシュのため、有効な場合は抽出の完了まで認識を始めない
+    transcription_cache_enabled: bool = True
+    transcription_cache_ttl_seconds: int = 604800
+
+    # Analysis pipeline (stage timeouts in seconds)
+    analysis_source_timeout_seconds: int = 900
+    analysis_audio_timeout_seconds: int = 600
+    analysis_video_timeout_seconds: int = 900
+    analysis_risk_timeout_seconds: int = 120
+    # この長さ以上の動画は Gemini に低解像度のフレームとして読ませる（入力トークン数を抑える）
+    gemini_low_resolution_min_seconds: int = 600
+
+    # Worker video cache
+    video_cache_enabled: bool = True
+    video_cache_dir: str = "/tmp/video_cache"
+    video_cache_max_mb: int = 5120
+
     @property
     def max_file_size_bytes(self) -> int:
         return self.max_file_size_mb * 1024 * 1024
 
+    @property
+    def direct_upload_max_file_size_bytes(self) -> int:
+        return self.direct_upload_max_file_size_mb * 1024 * 1024
+
+    @property
+    def resumable_upload_chunk_size_bytes(self) -> int:
+        return self.resumable_upload_chunk_size_mb * 1024 * 1024
+
+    @property
+    def storage_multipart_threshold_bytes(self) -> int:
+        return self.storage_multipart_threshold_mb * 1024 * 1024
+
+    @property
+    def storage_multipart_chunksize_bytes(self) -> int:
+        return self.storage_multipart_chunksize_mb * 1024 * 1024
+
+    @property
+    def storage_download_part_size_bytes(self) -> int:
+        return self.storage_download_part_size_mb * 1024 * 1024
+
+    @property
+    def storage_stream_chunk_size_bytes(self) -> int:
+        return self.storage_stream_chunk_size_kb * 1024
+
+    @property
+    def gcs_upload_chunk_size_bytes(self) -> int:
+        return self.gcs_upload_chunk_size_mb * 1024 * 1024
+
+    @property
+    def gcs_parallel_composite_threshold_bytes(self) -> int:
+        return self.gcs_parallel_composite_threshold_mb * 1024 * 1024
+
+    @property
+    def video_cache_max_bytes(self) -> int:
+        return self.video_cache_max_mb * 1024 * 1024
+
+    @property
+    def waveform_samples_per_peak_list(self) -> list[int]:
+        return [int(value.strip()) for value in self.waveform_samples_per_peak.split(",") if value.strip()]
+
     @property
     def allowed_extensions_list(self) -> list[str]:
         return [ext.strip().lower() for ext in self.allowed_extensions.split(",")]
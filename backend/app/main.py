@@ -1,15 +1,28 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import get_settings
 from app.api.routes import videos, jobs, editor
+from app.services.clients import init_clients, reset_clients
 
 settings = get_settings()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # ストレージ・Redis クライアントはプロセス起動時に1回だけ生成する
+    init_clients()
+    yield
+    reset_clients()
+
+
 app = FastAPI(
     title="Enjo-Guardian API",
     description="動画の炎上リスクからあなたを守ります",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
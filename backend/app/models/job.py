@@ -2,7 +2,7 @@ import uuid
 from datetime import datetime, timezone
 from enum import Enum as PyEnum
 
-from sqlalchemy import Column, String, DateTime, Enum, Integer, Float, ForeignKey, JSON
+from sqlalchemy import BigInteger, Boolean, Column, String, DateTime, Enum, Integer, Float, ForeignKey, JSON
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 
@@ -10,6 +10,7 @@ from app.models.database import Base
 
 
 class JobStatus(str, PyEnum):
+    awaiting_upload = "awaiting_upload"
     pending = "pending"
     processing = "processing"
     completed = "completed"
@@ -51,7 +52,25 @@ class Video(Base):
     file_path = Column(String, nullable=False)
     original_name = Column(String, nullable=False)
     file_size = Column(Integer, nullable=False)
-    duration = Column(Float, nullable=True)
+    duration = Column(Float, nullable=True, index=True)
+    # ffprobe で取得したメタ情報（has_audio が NULL の場合は未取得）
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True, index=True)
+    fps = Column(Float, nullable=True)
+    video_codec = Column(String, nullable=True, index=True)
+    audio_codec = Column(String, nullable=True)
+    has_audio = Column(Boolean, nullable=True, index=True)
+    bit_rate = Column(BigInteger, nullable=True)
+    keyframe_interval = Column(Float, nullable=True)
+    # 編集画面の再生用レンディション（未生成の場合は元動画を配信）
+    proxy_path = Column(String, nullable=True)
+    hls_playlist_path = Column(String, nullable=True)
+    # サムネイルスプライト・リスク箇所静止画のレイアウトとファイル名（ThumbnailManifest）
+    thumbnail_manifest = Column(JSON, nullable=True)
+    # 音声波形ピークのバイナリ（音声がない動画は NULL）
+    waveform_path = Column(String, nullable=True)
+    # アップロードされた元のバイト列の SHA-256（解析結果の再利用判定用。faststart で file_path を差し替えても変更しない）
+    content_hash = Column(String(64), nullable=True, index=True)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
 
     job = relationship("AnalysisJob", back_populates="video", uselist=False)
@@ -71,6 +90,7 @@ class AnalysisJob(Base):
     transcription_result = Column(JSON, nullable=True)
     ocr_result = Column(JSON, nullable=True)
     video_analysis_result = Column(JSON, nullable=True)
+    analysis_version = Column(String, nullable=True)
     error_message = Column(String, nullable=True)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     completed_at = Column(DateTime, nullable=True)
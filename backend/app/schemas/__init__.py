@@ -6,6 +6,10 @@ from app.schemas.job import (
     RiskLevel,
     RiskSource,
     VideoMetadata,
+    DirectUploadRequest,
+    UploadTargetResponse,
+    DirectUploadResponse,
+    ResumableUploadResponse,
     AnalysisJobResponse,
     AnalysisJobSummary,
     PhaseProgress,
@@ -39,6 +43,10 @@ __all__ = [
     "RiskLevel",
     "RiskSource",
     "VideoMetadata",
+    "DirectUploadRequest",
+    "UploadTargetResponse",
+    "DirectUploadResponse",
+    "ResumableUploadResponse",
     "AnalysisJobResponse",
     "AnalysisJobSummary",
     "PhaseProgress",
@@ -132,6 +132,8 @@ class VideoUrlResponse(BaseModel):
     """Response schema for video URL."""
     url: str
     expires_at: str
+    is_proxy: bool = Field(default=False, description="Whether url points to the low-resolution proxy")
+    hls_url: Optional[str] = Field(default=None, description="HLS playlist of the proxy, if available")
 
 
 class DownloadUrlResponse(BaseModel):
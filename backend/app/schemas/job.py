@@ -15,6 +15,7 @@ class Platform(str, Enum):
 
 
 class JobStatus(str, Enum):
+    awaiting_upload = "awaiting_upload"
     pending = "pending"
     processing = "processing"
     completed = "completed"
@@ -54,6 +55,42 @@ class VideoMetadata(BaseModel):
     target_audience: str = Field(..., min_length=1, max_length=500)
 
 
+class DirectUploadRequest(VideoMetadata):
+    filename: str = Field(..., min_length=1, max_length=255)
+    content_type: str = Field(default="video/mp4", max_length=255)
+    file_size: int = Field(..., gt=0)
+
+
+class UploadCompleteRequest(BaseModel):
+    """
+    アップロード完了通知（任意）
+
+    sha256 はクライアントが計算した動画全体の SHA-256（16進小文字）。
+    申告された値で完了済みの解析を再利用し、実際の内容との一致は後から検証する。
+    """
+    sha256: Optional[str] = Field(default=None, pattern=r"^[0-9a-fA-F]{64}$")
+
+
+class UploadTargetResponse(BaseModel):
+    method: str
+    url: str
+    fields: dict[str, str] = Field(default_factory=dict)
+    headers: dict[str, str] = Field(default_factory=dict)
+
+
+class DirectUploadResponse(BaseModel):
+    job_id: UUID
+    upload: UploadTargetResponse
+    expires_in: int
+
+
+class ResumableUploadResponse(BaseModel):
+    job_id: UUID
+    chunk_size: int
+    offset: int
+    expires_in: int
+
+
 class AnalysisJobResponse(BaseModel):
     id: UUID
     status: JobStatus
@@ -130,6 +167,24 @@ class RiskAssessmentResponse(BaseModel):
     risks: list[RiskItemResponse]
 
 
+class ThumbnailsResponse(BaseModel):
+    """
+    サムネイルスプライトのレイアウトと配信URL
+
+    i 番目のサムネイル（時刻 i * interval）は sprite_urls[i // (columns * rows)] の
+    列 i % columns、行 (i // columns) % rows のセル（width x height）にある。
+    """
+    interval: float
+    width: int
+    height: int
+    columns: int
+    rows: int
+    count: int
+    sprite_urls: list[str]
+    # リスクアイテムID -> 静止画のURL
+    risk_thumbnail_urls: dict[str, str]
+
+
 class AnalysisResultResponse(BaseModel):
     job: AnalysisJobResponse
     assessment: RiskAssessmentResponse
@@ -0,0 +1,154 @@
+"""同一内容の動画に対する完了済み解析結果の再利用"""
+import hashlib
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.models.job import AnalysisJob, JobStatus, RiskItem, Video
+from app.services.media_probe import apply_media_info, media_info_from_video
+from app.services.storage import BaseStorageService
+
+logger = logging.getLogger(__name__)
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def current_analysis_version() -> str:
+    """
+    解析結果の再利用可否を判定するためのバージョン文字列
+
+    モデルやプロンプトが変わった場合、過去の結果は再利用しない。
+    """
+    from app.services.audio_analyzer import SPEECH_MODEL
+    from app.services.clients import GEMINI_MODEL_NAME
+    from app.services.gemini_video_analysis import PROMPT_VERSION
+
+    return f"speech={SPEECH_MODEL};gemini={GEMINI_MODEL_NAME};prompt={PROMPT_VERSION}"
+
+
+def compute_file_sha256(path: str) -> str:
+    """ローカルファイルの SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def compute_object_sha256(storage_service: BaseStorageService, file_path: str) -> str:
+    """ストレージ上のオブジェクトを読み流しながら SHA-256 を計算（ローカルに保存しない）"""
+    digest = hashlib.sha256()
+    stream = storage_service.get_file_stream(file_path)
+    try:
+        for chunk in iter(lambda: stream.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    finally:
+        if hasattr(stream, "close"):
+            stream.close()
+    return digest.hexdigest()
+
+
+def find_reusable_job(db: Session, job: AnalysisJob, content_hash: str) -> Optional[AnalysisJob]:
+    """
+    同一内容・同一メタ情報・同一バージョンで完了済みの解析ジョブを探す
+
+    Args:
+        db: DBセッション
+        job: 解析しようとしているジョブ（自身は対象外）
+        content_hash: 動画の SHA-256
+    """
+    if not get_settings().analysis_dedup_enabled:
+        return None
+    return (
+        db.query(AnalysisJob)
+        .join(Video)
+        .filter(
+            Video.content_hash == content_hash,
+            AnalysisJob.id != job.id,
+            AnalysisJob.status == JobStatus.completed,
+            AnalysisJob.deleted_at.is_(None),
+            AnalysisJob.analysis_version == current_analysis_version(),
+            AnalysisJob.purpose == job.purpose,
+            AnalysisJob.platform == job.platform,
+            AnalysisJob.target_audience == job.target_audience,
+        )
+        .order_by(AnalysisJob.completed_at.desc())
+        .first()
+    )
+
+
+def clone_analysis(db: Session, source: AnalysisJob, target: AnalysisJob) -> None:
+    """完了済みジョブの解析結果とリスクアイテムを複製し、target を完了状態にする"""
+    target.overall_score = source.overall_score
+    target.risk_level = source.risk_level
+    target.transcription_result = source.transcription_result
+    target.ocr_result = source.ocr_result
+    target.video_analysis_result = source.video_analysis_result
+    target.analysis_version = source.analysis_version
+    target.error_message = None
+    target.status = JobStatus.completed
+    target.completed_at = datetime.now(timezone.utc)
+    if target.video is not None and target.video.has_audio is None:
+        source_info = media_info_from_video(source.video)
+        if source_info is not None:
+            apply_media_info(target.video, source_info)
+        elif target.video.duration is None:
+            target.video.duration = source.video.duration
+    if target.video is not None and target.video.waveform_path is None:
+        # 内容が同一のため波形ピークも同じものを参照する
+        target.video.waveform_path = source.video.waveform_path
+
+    for item in source.risk_items:
+        db.add(
+            RiskItem(
+                id=uuid.uuid4(),
+                job_id=target.id,
+                timestamp=item.timestamp,
+                end_timestamp=item.end_timestamp,
+                category=item.category,
+                subcategory=item.subcategory,
+                score=item.score,
+                level=item.level,
+                rationale=item.rationale,
+                source=item.source,
+                evidence=item.evidence,
+            )
+        )
+    db.commit()
+    logger.info(
+        f"解析結果を再利用しました: job_id={target.id}, source_job_id={source.id}, "
+        f"risk_count={len(source.risk_items)}"
+    )
+
+
+def discard_analysis(db: Session, job: AnalysisJob) -> None:
+    """複製した解析結果とリスクアイテムを破棄し、解析待ちに戻す"""
+    job.overall_score = None
+    job.risk_level = None
+    job.transcription_result = None
+    job.ocr_result = None
+    job.video_analysis_result = None
+    job.analysis_version = None
+    job.completed_at = None
+    job.status = JobStatus.pending
+    job.risk_items.clear()
+    db.commit()
+
+
+def reuse_analysis_if_available(
+    db: Session,
+    job: AnalysisJob,
+    content_hash: Optional[str],
+) -> Optional[AnalysisJob]:
+    """content_hash が一致する完了済みジョブがあれば結果を複製し、その複製元を返す"""
+    if not content_hash:
+        return None
+    source = find_reusable_job(db, job, content_hash)
+    if source is None:
+        return None
+    clone_analysis(db, source, job)
+    return source
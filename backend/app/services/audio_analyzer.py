@@ -1,18 +1,166 @@
+import collections
+import concurrent.futures
+import dataclasses
+import logging
+import math
 import os
+import queue
 import tempfile
 import subprocess
-from typing import Optional
+import threading
+import time
+from typing import IO, Callable, Iterable, Iterator, Optional, Union
 from dataclasses import dataclass
 
-from google.cloud import speech_v2 as speech
+import numpy as np
 from google.cloud.speech_v2.types import cloud_speech
-from google.api_core.client_options import ClientOptions
 
 from app.config import get_settings
+from app.services.audio_chunking import AudioChunk, ChunkPlanner, pcm_to_wav
+from app.services.audio_encoding import (
+    FLAC,
+    LINEAR16,
+    OPUS,
+    AudioEncodingError,
+    StreamEncoder,
+    encode_pcm,
+    select_audio_encoding,
+)
+from app.services.clients import get_speech_client
+from app.services.pipeline import StageCancelledError
 from app.services.storage import StorageService
+from app.services.transcription_cache import AudioFingerprint, TranscriptionCache, config_fingerprint
+from app.services.waveform import WaveformBuilder, save_waveform_peaks
 
+logger = logging.getLogger(__name__)
 settings = get_settings()
 
+SPEECH_MODEL = "chirp_2"
+SPEECH_LANGUAGE_CODES = ["ja-JP"]
+# 認識機能の設定（文字起こしキャッシュのキーにも含める）
+SPEECH_FEATURES = {
+    "enable_word_time_offsets": True,
+    "enable_automatic_punctuation": True,
+    # chirp_2 は diarization_config 非対応のため指定しない
+}
+
+EXTRACT_TIMEOUT_SECONDS = 300
+# 抽出する音声（16kHz モノラル 16bit PCM）と、ffmpeg の標準出力から一度に読み込むバイト数
+SAMPLE_RATE = 16000
+PCM_READ_BYTES = 64 * 1024
+# 認識待ちのチャンクがワーカー数のこの倍を超えたら音声の読み込みを待たせる（PCM を溜め込まない）
+PENDING_CHUNKS_PER_WORKER = 2
+# ffmpeg の実行中に停止通知を確認する間隔（秒）
+CANCEL_POLL_SECONDS = 0.5
+# 音声抽出の入力: local はダウンロード済みファイル、url は署名付き URL、stream はストレージのストリーム
+EXTRACTION_MODE_LOCAL = "local"
+EXTRACTION_MODE_URL = "url"
+EXTRACTION_MODE_STREAM = "stream"
+
+# 文字起こしの方式: batch はチャンクごとの同期認識、streaming はストリーミング認識で途中結果を通知する
+TRANSCRIPTION_MODE_BATCH = "batch"
+TRANSCRIPTION_MODE_STREAMING = "streaming"
+# ストリーミング認識の1リクエストあたりの音声（16kHz 16bit で 0.5 秒、上限 25KB 未満）
+STREAMING_REQUEST_BYTES = 16000
+# ストリーミング認識で明示する送信形式（FLAC / Ogg Opus はヘッダーを含むため分割して送れる）
+STREAMING_ENCODINGS = {
+    LINEAR16: cloud_speech.ExplicitDecodingConfig.AudioEncoding.LINEAR16,
+    FLAC: cloud_speech.ExplicitDecodingConfig.AudioEncoding.FLAC,
+    OPUS: cloud_speech.ExplicitDecodingConfig.AudioEncoding.OGG_OPUS,
+}
+# 進捗の通知はこの割合（%）以上進んだときのみ行う（Redis への書き込みを抑える）
+PROGRESS_REPORT_STEP = 1.0
+
+
+def build_extract_command(input_source: str, output: str = "pipe:1", ffmpeg_path: str = "ffmpeg") -> list[str]:
+    """動画から 16kHz モノラルの 16bit PCM（ヘッダーなし）を抽出し、標準出力に書き出す ffmpeg コマンド"""
+    command = [ffmpeg_path]
+    if input_source.startswith(("http://", "https://")):
+        # レンジ読み込み中の切断から再開する
+        command += ["-reconnect", "1", "-reconnect_on_network_error", "1", "-reconnect_delay_max", "5"]
+    return command + [
+        "-i", input_source,
+        "-vn",
+        "-acodec", "pcm_s16le",
+        "-ar", str(SAMPLE_RATE),
+        "-ac", "1",
+        "-f", "s16le",
+        output,
+    ]
+
+
+def raise_if_cancelled(cancel_event: Optional[threading.Event]) -> None:
+    """停止が通知されていれば StageCancelledError を送出"""
+    if cancel_event is not None and cancel_event.is_set():
+        raise StageCancelledError("音声解析はキャンセルされました")
+
+
+def run_ffmpeg(
+    command: list[str],
+    cancel_event: Optional[threading.Event] = None,
+    feed: Optional[Callable[[subprocess.Popen], None]] = None,
+    timeout: Optional[float] = EXTRACT_TIMEOUT_SECONDS,
+    consume: Optional[Callable[[IO[bytes]], None]] = None,
+) -> subprocess.CompletedProcess:
+    """
+    ffmpeg を実行し、停止通知・タイムアウト時はプロセスを終了させる
+
+    feed が指定された場合は標準入力をパイプにし、別スレッドで feed(process) を実行する。
+    consume が指定された場合は標準出力をパイプにし、別スレッドで consume(stdout) を実行する
+    （consume の例外はプロセスを終了させたうえで送出する）。timeout が None の場合は時間で打ち切らない。
+    """
+    process = subprocess.Popen(
+        command,
+        stdin=subprocess.PIPE if feed is not None else subprocess.DEVNULL,
+        stdout=subprocess.PIPE if consume is not None else subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+    )
+    stderr_parts: list[bytes] = []
+    consume_errors: list[BaseException] = []
+
+    def read_stdout() -> None:
+        try:
+            consume(process.stdout)
+        except BaseException as e:
+            consume_errors.append(e)
+            # 読み手がいなくなった ffmpeg が書き込みで止まらないように終了させる
+            process.kill()
+
+    threads = [threading.Thread(target=lambda: stderr_parts.append(process.stderr.read()), daemon=True)]
+    if feed is not None:
+        threads.append(threading.Thread(target=feed, args=(process,), daemon=True))
+    consumer = threading.Thread(target=read_stdout, daemon=True) if consume is not None else None
+    for thread in threads + ([consumer] if consumer is not None else []):
+        thread.start()
+
+    deadline = None if timeout is None else time.monotonic() + timeout
+    try:
+        while True:
+            try:
+                returncode = process.wait(timeout=CANCEL_POLL_SECONDS)
+                break
+            except subprocess.TimeoutExpired:
+                raise_if_cancelled(cancel_event)
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise subprocess.TimeoutExpired(command, timeout)
+        if consumer is not None:
+            # パイプに残った出力を読み終えるまで待つ
+            while consumer.is_alive():
+                consumer.join(timeout=CANCEL_POLL_SECONDS)
+                raise_if_cancelled(cancel_event)
+    except BaseException:
+        process.kill()
+        process.wait()
+        raise
+    finally:
+        for thread in threads:
+            thread.join(timeout=CANCEL_POLL_SECONDS)
+
+    if consume_errors:
+        raise consume_errors[0]
+    stderr = b"".join(stderr_parts).decode("utf-8", errors="replace")
+    return subprocess.CompletedProcess(command, returncode, "", stderr)
+
 
 @dataclass
 class TranscriptionSegment:
@@ -29,106 +177,567 @@ class TranscriptionResult:
     has_audio: bool
 
 
+@dataclass
+class TranscriptionListener:
+    """
+    文字起こしの途中経過の通知先（チャンクを並列に処理するため、別スレッドから呼ばれる）
+
+    - on_progress: 処理済みの音声の割合（0.0〜1.0）
+    - on_segments: 確定したセグメント（時刻順とは限らない）
+    - on_partial: チャンク開始時刻（秒）と未確定のテキスト（確定時は空文字）
+    """
+    on_progress: Optional[Callable[[float], None]] = None
+    on_segments: Optional[Callable[[list[TranscriptionSegment]], None]] = None
+    on_partial: Optional[Callable[[float, str], None]] = None
+
+
+class _ChunkProgress:
+    """
+    チャンクごとの処理済み秒数を集計し、listener へ通知する
+
+    チャンクは音声の抽出と並行して追加されるため、抽出中の全体の長さは
+    「追加済みのチャンク + 動画の残りの長さ」で見積もる。close 後は通知しない。
+    """
+
+    def __init__(self, listener: Optional[TranscriptionListener], duration: Optional[float] = None):
+        self.listener = listener or TranscriptionListener()
+        self.duration = duration
+        self.planned = 0.0
+        self.position = 0.0
+        self.planning = True
+        self.processed: dict[int, float] = {}
+        self.reported = 0.0
+        self.closed = False
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """音声の読み込み開始を通知する"""
+        if self.listener.on_progress is not None:
+            with self._lock:
+                if not self.closed:
+                    self._notify(self.listener.on_progress, 0.0)
+
+    def add_chunk(self, chunk: AudioChunk) -> None:
+        """区切りが確定したチャンクを全体の長さに加える（ストリーミング認識では認識の開始より後になる）"""
+        with self._lock:
+            self.processed.setdefault(chunk.index, 0.0)
+            self.planned += chunk.end - chunk.start
+            self.position = chunk.end
+
+    def finish_planning(self) -> None:
+        """全チャンクを追加し終えた（以降は追加済みのチャンクの長さを全体とする）"""
+        with self._lock:
+            self.planning = False
+            self._report()
+
+    def advance(self, chunk: AudioChunk, seconds: float) -> None:
+        """チャンク先頭から seconds 秒までを処理済みとする"""
+        with self._lock:
+            self.processed[chunk.index] = max(self.processed.get(chunk.index, 0.0), min(seconds, chunk.end - chunk.start))
+            self._report()
+
+    def _report(self) -> None:
+        if self.listener.on_progress is None or self.closed or not self.processed:
+            return
+        remaining = max(self.duration - self.position, 0.0) if self.planning and self.duration else 0.0
+        fraction = min(sum(self.processed.values()) / ((self.planned + remaining) or 1.0), 1.0)
+        if fraction <= self.reported or ((fraction - self.reported) * 100 < PROGRESS_REPORT_STEP and fraction < 1.0):
+            return
+        self.reported = fraction
+        self._notify(self.listener.on_progress, fraction)
+
+    def add_segments(self, chunk: AudioChunk, segments: list[TranscriptionSegment]) -> None:
+        if not segments or self.listener.on_segments is None:
+            return
+        with self._lock:
+            if not self.closed:
+                self._notify(self.listener.on_segments, segments)
+
+    def set_partial(self, chunk: AudioChunk, text: str) -> None:
+        if self.listener.on_partial is None:
+            return
+        with self._lock:
+            if not self.closed:
+                self._notify(self.listener.on_partial, chunk.start, text)
+
+    def close(self) -> None:
+        """以降の通知を止める"""
+        with self._lock:
+            self.closed = True
+
+    @staticmethod
+    def _notify(callback, *args) -> None:
+        # 通知の失敗で文字起こしを止めない
+        try:
+            callback(*args)
+        except Exception as e:
+            logger.warning(f"文字起こしの途中経過の通知に失敗しました: error={e}")
+
+
+class _PcmReader:
+    """
+    ffmpeg の標準出力から PCM を読み、チャンクの区切り・波形ピーク・音声のハッシュを同時に求める
+
+    区切りが確定したチャンクはその場で on_chunk に渡す（抽出の完了を待たずに認識を始める）。
+    on_feed は PCM を受け取るたびに planner を渡して呼ぶ（区切りが未確定のチャンクの PCM を送るため）。
+    """
+
+    def __init__(
+        self,
+        planner: ChunkPlanner,
+        on_chunk: Callable[[AudioChunk, bytes], None],
+        on_start: Optional[Callable[[], None]] = None,
+        waveform: Optional[WaveformBuilder] = None,
+        fingerprint: Optional[AudioFingerprint] = None,
+        on_feed: Optional[Callable[[ChunkPlanner], None]] = None,
+    ):
+        self.planner = planner
+        self.on_chunk = on_chunk
+        self.on_start = on_start
+        self.on_feed = on_feed
+        self.waveform = waveform
+        self.fingerprint = fingerprint
+        self.received = 0
+
+    def __call__(self, stdout: IO[bytes]) -> None:
+        pending = b""
+        while True:
+            data = stdout.read(PCM_READ_BYTES)
+            if not data:
+                break
+            if not self.received and self.on_start is not None:
+                self.on_start()
+            self.received += len(data)
+            if pending:
+                data = pending + data
+            usable = len(data) - len(data) % 2
+            pending = data[usable:]
+            self._process(data[:usable] if pending else data)
+
+    def _process(self, pcm: bytes) -> None:
+        if self.fingerprint is not None:
+            self.fingerprint.update(pcm)
+        if self.waveform is not None:
+            try:
+                self.waveform.feed(np.frombuffer(pcm, dtype="<i2"))
+            except Exception as e:
+                logger.warning(f"波形ピークの計算に失敗しました: error={e}")
+                self.waveform = None
+        for chunk, chunk_pcm in self.planner.feed(pcm):
+            self.on_chunk(chunk, chunk_pcm)
+        if self.on_feed is not None:
+            self.on_feed(self.planner)
+
+    def finish(self) -> None:
+        """音声の終端までを区切り、残りのチャンクを on_chunk に渡す"""
+        for chunk, chunk_pcm in self.planner.finish():
+            self.on_chunk(chunk, chunk_pcm)
+
+
+class _LiveChunk:
+    """
+    区切り位置が確定する前から認識を始めるチャンク（ストリーミング認識用）
+
+    抽出中の PCM のうち、このチャンクに含まれることが確定した分から順に認識側へ渡し、
+    区切りが確定したら残りを渡して閉じる。chunk は認識側と共有し、区切りの確定時に終端と採用範囲を更新する
+    （それまでの keep_end は無限大だが、送信済みの音声はすべて確定後の keep_end より前にある）。
+    """
+
+    _END = object()
+
+    def __init__(self, chunk: AudioChunk, cancel_event: Optional[threading.Event] = None):
+        self.chunk = dataclasses.replace(chunk, end_sample=chunk.start_sample, keep_end=math.inf)
+        self.cancel_event = cancel_event
+        self._queue: queue.Queue = queue.Queue()
+
+    def push(self, pcm: bytes, end_sample: int) -> None:
+        """end_sample までの PCM を渡す"""
+        self._queue.put(pcm)
+        self.chunk.end_sample = end_sample
+
+    def finish(self, chunk: AudioChunk, pcm: bytes) -> None:
+        """区切りが確定したチャンクの PCM のうち、未送信の分を渡して閉じる"""
+        rest = pcm[(self.chunk.end_sample - chunk.start_sample) * 2:]
+        if rest:
+            self._queue.put(rest)
+        self.chunk.end_sample = chunk.end_sample
+        self.chunk.keep_end = chunk.keep_end
+        self._queue.put(self._END)
+
+    def abort(self) -> None:
+        """音声の抽出が失敗・中断した（認識側は待つのをやめて失敗する）"""
+        self._queue.put(StageCancelledError("音声の抽出が中断されました"))
+
+    def __iter__(self) -> Iterator[bytes]:
+        while True:
+            try:
+                item = self._queue.get(timeout=CANCEL_POLL_SECONDS)
+            except queue.Empty:
+                raise_if_cancelled(self.cancel_event)
+                continue
+            if item is self._END:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+
+
+class _ChunkRecognition:
+    """
+    チャンクを受け取った順に並列で認識する（認識待ちが溜まると読み込み側を待たせる）
+
+    batch は区切りが確定したチャンクから認識する。streaming は区切りが未確定のチャンクも開始位置が決まった時点で
+    ストリーミング認識を始め、抽出中の PCM を update で送る（_LiveChunk）。
+    """
+
+    def __init__(
+        self,
+        service: "AudioAnalyzerService",
+        encoding: str,
+        streaming: bool,
+        tracker: _ChunkProgress,
+        cancel_event: Optional[threading.Event] = None,
+    ):
+        self.service = service
+        self.encoding = encoding
+        self.streaming = streaming
+        self.tracker = tracker
+        self.cancel_event = cancel_event
+        max_workers = max(1, settings.transcription_max_parallel_chunks)
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+        self._slots = threading.Semaphore(max_workers * PENDING_CHUNKS_PER_WORKER)
+        self.futures: list[concurrent.futures.Future] = []
+        self._live: dict[int, _LiveChunk] = {}
+
+    def submit(self, chunk: AudioChunk, pcm: bytes) -> None:
+        """区切りが確定したチャンクを渡す"""
+        if not self.streaming:
+            self.tracker.add_chunk(chunk)
+            self._start(chunk, pcm)
+            return
+        live = self._live.pop(chunk.index, None) or self._open(chunk)
+        live.finish(chunk, pcm)
+        self.tracker.add_chunk(chunk)
+
+    def update(self, planner: ChunkPlanner) -> None:
+        """区切りが未確定のチャンクに含まれることが確定した PCM を送る（streaming のみ）"""
+        if not self.streaming:
+            return
+        pending = planner.pending()
+        if pending is None:
+            return
+        live = self._live.get(pending.index)
+        if live is None:
+            live = self._live[pending.index] = self._open(pending)
+        if pending.end_sample > live.chunk.end_sample:
+            live.push(planner.pcm(live.chunk.end_sample, pending.end_sample), pending.end_sample)
+
+    def _open(self, chunk: AudioChunk) -> _LiveChunk:
+        live = _LiveChunk(chunk, self.cancel_event)
+        self._start(live.chunk, live)
+        return live
+
+    def _start(self, chunk: AudioChunk, audio: Union[bytes, Iterable[bytes]]) -> None:
+        # 区切りが未確定のチャンクは高々1つのため、待っている間も認識中のチャンクは終わりうる
+        while not self._slots.acquire(timeout=CANCEL_POLL_SECONDS):
+            raise_if_cancelled(self.cancel_event)
+        future = self.executor.submit(
+            self.service._transcribe_chunk,
+            audio, chunk, self.encoding, self.streaming, self.tracker, self.cancel_event,
+        )
+        future.add_done_callback(lambda _: self._slots.release())
+        self.futures.append(future)
+
+    def segments(self) -> list[TranscriptionSegment]:
+        """全チャンクの認識を待ち、時刻順のセグメントを返す"""
+        segments = [segment for future in self.futures for segment in future.result()]
+        segments.sort(key=lambda seg: seg.start_time)
+        return segments
+
+    def close(self) -> None:
+        """未開始のチャンクを取り消す（認識中のチャンクは停止通知で打ち切られ、閉じていないチャンクは失敗させる）"""
+        for live in self._live.values():
+            live.abort()
+        self._live.clear()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
 class AudioAnalyzerService:
     def __init__(self):
         self.storage_service = StorageService()
-        self.speech_client = speech.SpeechClient(
-            client_options=ClientOptions(
-                api_endpoint="us-central1-speech.googleapis.com"
-            )
-        )
+        self.speech_client = get_speech_client()
         self.project_id = settings.google_cloud_project
 
-    def extract_audio(self, video_path: str) -> Optional[str]:
+    def extract_audio(
+        self,
+        video_path: str,
+        local_video_path: Optional[str],
+        reader: _PcmReader,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> bool:
         """
-        動画から音声を抽出
+        動画から 16kHz モノラルの PCM を抽出し、ffmpeg の標準出力を reader に読ませる
+
+        音声はファイルに書き出さない。local_video_path がなく、audio_extraction_mode が url / stream の場合は
+        動画をダウンロードせず、ffmpeg が署名付き URL（レンジ読み込み）または
+        標準入力に流したストレージのストリームから直接読む。音声を読み始める前に失敗した場合は
+        ダウンロードして抽出する（読み始めた後は reader に渡した音声を取り消せないため失敗とする）。
 
         Args:
             video_path: ストレージ内の動画ファイルパス
+            local_video_path: ダウンロード済みの動画ファイルパス。
+                指定された場合はダウンロードせずに使用し、削除もしない
+            reader: ffmpeg の標準出力の読み手
+            cancel_event: 停止通知。設定された場合は ffmpeg を終了させて StageCancelledError を送出する
 
         Returns:
-            抽出された音声ファイルのローカルパス、音声がない場合はNone
+            音声を抽出した場合は True、音声がない場合は False
         """
-        with tempfile.NamedTemporaryFile(suffix=".mp4", delete=False) as video_file:
-            video_local_path = video_file.name
-            self.storage_service.download_file(video_path, video_local_path)
-
-        audio_path = video_local_path.replace(".mp4", ".wav")
+        mode = settings.audio_extraction_mode
+        if local_video_path is None and mode in (EXTRACTION_MODE_URL, EXTRACTION_MODE_STREAM):
+            try:
+                return self._extract_audio_without_download(video_path, mode, reader, cancel_event)
+            except StageCancelledError:
+                raise
+            except Exception as e:
+                if reader.received:
+                    raise
+                logger.warning(
+                    f"動画を直接読み込む音声抽出に失敗したため、ダウンロードして抽出します: "
+                    f"video_path={video_path}, mode={mode}, error={e}"
+                )
+
+        owns_video_file = local_video_path is None
+        if owns_video_file:
+            with tempfile.NamedTemporaryFile(suffix=".mp4", delete=False) as video_file:
+                local_video_path = video_file.name
+                self.storage_service.download_file(video_path, local_video_path)
 
         try:
-            result = subprocess.run(
-                [
-                    "ffmpeg",
-                    "-i", video_local_path,
-                    "-vn",
-                    "-acodec", "pcm_s16le",
-                    "-ar", "16000",
-                    "-ac", "1",
-                    "-y",
-                    audio_path,
-                ],
-                capture_output=True,
-                text=True,
-                timeout=300,
-            )
-
-            if result.returncode != 0:
-                if "does not contain any stream" in result.stderr:
-                    return None
-                raise RuntimeError(f"ffmpeg error: {result.stderr}")
-
-            if not os.path.exists(audio_path) or os.path.getsize(audio_path) == 0:
-                return None
-
-            return audio_path
+            raise_if_cancelled(cancel_event)
+            result = run_ffmpeg(build_extract_command(local_video_path), cancel_event, timeout=None, consume=reader)
+            return self._audio_extracted(result, reader)
 
         finally:
-            if os.path.exists(video_local_path):
-                os.unlink(video_local_path)
-
-    def transcribe(self, audio_path: str) -> TranscriptionResult:
+            if owns_video_file and os.path.exists(local_video_path):
+                os.unlink(local_video_path)
+
+    def _extract_audio_without_download(
+        self,
+        video_path: str,
+        mode: str,
+        reader: _PcmReader,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> bool:
+        """ローカルに動画のコピーを作らずに音声を抽出"""
+        if mode == EXTRACTION_MODE_URL:
+            url = self.storage_service.generate_presigned_url(
+                video_path, expiration=settings.audio_extraction_url_expiration_seconds
+            )
+            result = run_ffmpeg(build_extract_command(url), cancel_event, timeout=None, consume=reader)
+        else:
+            result = self._run_ffmpeg_from_stream(
+                build_extract_command("pipe:0"), video_path, cancel_event, consume=reader
+            )
+        extracted = self._audio_extracted(result, reader)
+        logger.info(f"動画をダウンロードせずに音声を抽出しました: video_path={video_path}, mode={mode}")
+        return extracted
+
+    def _run_ffmpeg_from_stream(
+        self,
+        command: list[str],
+        video_path: str,
+        cancel_event: Optional[threading.Event] = None,
+        consume: Optional[Callable[[IO[bytes]], None]] = None,
+    ) -> subprocess.CompletedProcess:
         """
-        音声を文字起こし
+        ストレージのストリームを ffmpeg の標準入力へ流しながら実行する
 
-        Args:
-            audio_path: 音声ファイルのローカルパス
+        入力はシークできないため、moov が先頭にある（faststart の）MP4 である必要がある。
+        """
+        stream = self.storage_service.get_file_stream(video_path)
+        feed_errors: list[BaseException] = []
+
+        def feed(process: subprocess.Popen) -> None:
+            try:
+                chunk_size = settings.storage_stream_chunk_size_bytes
+                while True:
+                    chunk = stream.read(chunk_size)
+                    if not chunk:
+                        break
+                    process.stdin.write(chunk)
+            except (BrokenPipeError, ValueError):
+                # ffmpeg が先に終了した（エラーは終了コードで判定する）
+                pass
+            except Exception as e:
+                feed_errors.append(e)
+            finally:
+                if hasattr(stream, "close"):
+                    stream.close()
+                try:
+                    process.stdin.close()
+                except BrokenPipeError:
+                    pass
+
+        result = run_ffmpeg(command, cancel_event, feed=feed, timeout=None, consume=consume)
+        if feed_errors:
+            # 読み込みが途中で失敗すると ffmpeg は途中までの音声で正常終了するため、明示的に失敗とする
+            raise RuntimeError(f"動画ストリームの読み込みに失敗しました: {feed_errors[0]}")
+        return result
+
+    @staticmethod
+    def _audio_extracted(result: subprocess.CompletedProcess, reader: _PcmReader) -> bool:
+        """ffmpeg の実行結果から音声を抽出できたかを返す（音声ストリームがない場合は False）"""
+        if result.returncode != 0:
+            if "does not contain any stream" in result.stderr:
+                return False
+            raise RuntimeError(f"ffmpeg error: {result.stderr}")
+        return reader.received > 0
+
+    def _transcribe_chunk(
+        self,
+        audio: Union[bytes, Iterable[bytes]],
+        chunk: AudioChunk,
+        encoding: str,
+        streaming: bool,
+        tracker: _ChunkProgress,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> list[TranscriptionSegment]:
+        """
+        1チャンクを認識し、確定したセグメントと進捗を通知する
 
-        Returns:
-            文字起こし結果
+        audio は batch ではチャンクの PCM、streaming では抽出に合わせて届く PCM のブロック。
         """
-        with open(audio_path, "rb") as audio_file:
-            audio_content = audio_file.read()
-
-        config = cloud_speech.RecognitionConfig(
-            auto_decoding_config=cloud_speech.AutoDetectDecodingConfig(),
-            language_codes=["ja-JP"],
-            model="chirp_2",
-            features=cloud_speech.RecognitionFeatures(
-                enable_word_time_offsets=True,
-                enable_automatic_punctuation=True,
-                # chirp_2 は diarization_config 非対応のため削除
-            ),
+        raise_if_cancelled(cancel_event)
+        if streaming:
+            segments = self._stream_chunk(audio, chunk, encoding, tracker, cancel_event)
+        else:
+            response = self._recognize_chunk(audio, chunk, encoding)
+            segments = self._segments_from_results(response.results, chunk)
+            tracker.add_segments(chunk, segments)
+        tracker.advance(chunk, chunk.end - chunk.start)
+        return segments
+
+    def _chunk_content(self, pcm: bytes, chunk: AudioChunk, encoding: str) -> bytes:
+        """チャンクの送信データ（圧縮に失敗した場合は WAV で送る）"""
+        if encoding == LINEAR16:
+            return pcm_to_wav(pcm, chunk.sample_rate)
+        try:
+            return encode_pcm(pcm, chunk.sample_rate, encoding)
+        except AudioEncodingError as e:
+            logger.warning(f"音声の圧縮に失敗したため WAV で送信します: index={chunk.index}, error={e}")
+            return pcm_to_wav(pcm, chunk.sample_rate)
+
+    @property
+    def _recognizer(self) -> str:
+        return f"projects/{self.project_id}/locations/us-central1/recognizers/_"
+
+    @staticmethod
+    def _recognition_config(**decoding) -> cloud_speech.RecognitionConfig:
+        return cloud_speech.RecognitionConfig(
+            **decoding,
+            language_codes=SPEECH_LANGUAGE_CODES,
+            model=SPEECH_MODEL,
+            features=cloud_speech.RecognitionFeatures(**SPEECH_FEATURES),
         )
 
+    def _recognize_chunk(self, pcm: bytes, chunk: AudioChunk, encoding: str):
+        """1チャンク分の音声を同期認識"""
         request = cloud_speech.RecognizeRequest(
-            recognizer=f"projects/{self.project_id}/locations/us-central1/recognizers/_",
-            config=config,
-            content=audio_content,
+            recognizer=self._recognizer,
+            config=self._recognition_config(auto_decoding_config=cloud_speech.AutoDetectDecodingConfig()),
+            content=self._chunk_content(pcm, chunk, encoding),
+        )
+        logger.info(f"チャンクを認識します: index={chunk.index}, start={chunk.start:.2f}, end={chunk.end:.2f}")
+        return self.speech_client.recognize(request=request)
+
+    def _stream_chunk(
+        self,
+        blocks: Iterable[bytes],
+        chunk: AudioChunk,
+        encoding: str,
+        tracker: _ChunkProgress,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> list[TranscriptionSegment]:
+        """
+        1チャンク分の音声を、抽出に合わせて届く PCM から送りながらストリーミング認識
+
+        FLAC / Opus の場合は ffmpeg で圧縮しながら出力された分を送る（起動できない場合は LINEAR16 で送る）。
+        1リクエストは STREAMING_REQUEST_BYTES 以下とし、確定結果はその場でセグメントに変換して通知する。
+        """
+        encoder = None
+        if encoding != LINEAR16:
+            try:
+                encoder = StreamEncoder(encoding, chunk.sample_rate)
+            except AudioEncodingError as e:
+                logger.warning(f"音声の圧縮を開始できないため LINEAR16 で送信します: index={chunk.index}, error={e}")
+                encoding = LINEAR16
+        config = cloud_speech.StreamingRecognitionConfig(
+            config=self._recognition_config(
+                explicit_decoding_config=cloud_speech.ExplicitDecodingConfig(
+                    encoding=STREAMING_ENCODINGS[encoding],
+                    sample_rate_hertz=chunk.sample_rate,
+                    audio_channel_count=1,
+                )
+            ),
+            streaming_features=cloud_speech.StreamingRecognitionFeatures(interim_results=True),
         )
 
+        def requests():
+            yield cloud_speech.StreamingRecognizeRequest(recognizer=self._recognizer, streaming_config=config)
+            if encoder is not None:
+                audio = encoder.encode(blocks, STREAMING_REQUEST_BYTES)
+            else:
+                audio = (
+                    block[offset:offset + STREAMING_REQUEST_BYTES]
+                    for block in blocks
+                    for offset in range(0, len(block), STREAMING_REQUEST_BYTES)
+                )
+            for data in audio:
+                raise_if_cancelled(cancel_event)
+                yield cloud_speech.StreamingRecognizeRequest(audio=data)
+
+        logger.info(
+            f"チャンクをストリーミング認識します: index={chunk.index}, start={chunk.start:.2f}, encoding={encoding}"
+        )
+        segments = []
         try:
-            response = self.speech_client.recognize(request=request)
+            for response in self.speech_client.streaming_recognize(requests=requests()):
+                raise_if_cancelled(cancel_event)
+                for result in response.results:
+                    if result.is_final:
+                        final_segments = self._segments_from_results([result], chunk)
+                        segments.extend(final_segments)
+                        tracker.add_segments(chunk, final_segments)
+                        tracker.set_partial(chunk, "")
+                    elif result.alternatives:
+                        tracker.set_partial(chunk, result.alternatives[0].transcript)
+                    if result.result_end_offset:
+                        tracker.advance(chunk, result.result_end_offset.total_seconds())
         finally:
-            if os.path.exists(audio_path):
-                os.unlink(audio_path)
+            if encoder is not None:
+                encoder.close()
+        return segments
 
+    def _segments_from_results(self, results, chunk: AudioChunk) -> list[TranscriptionSegment]:
+        """
+        チャンクの認識結果をセグメントに変換
+
+        単語の時刻はチャンク先頭からの相対値のため、チャンクの開始時刻を加算する。
+        重なり部分の単語は chunk.keeps で一方のチャンクからのみ採用する。
+        """
+        offset = chunk.start
         segments = []
-        for result in response.results:
+        for result in results:
             if not result.alternatives:
                 continue
 
             alternative = result.alternatives[0]
-            words = alternative.words if alternative.words else []
+            words = [
+                word
+                for word in (alternative.words if alternative.words else [])
+                if chunk.keeps(offset + word.start_offset.total_seconds())
+            ]
 
             if words:
                 current_speaker = None
@@ -140,19 +749,19 @@ class AudioAnalyzerService:
 
                     if current_speaker is None:
                         current_speaker = speaker
-                        start_time = word.start_offset.total_seconds()
+                        start_time = offset + word.start_offset.total_seconds()
 
                     if speaker != current_speaker:
                         segments.append(TranscriptionSegment(
                             speaker=current_speaker,
                             text=" ".join(current_text),
                             start_time=start_time,
-                            end_time=word.start_offset.total_seconds(),
+                            end_time=offset + word.start_offset.total_seconds(),
                             confidence=alternative.confidence,
                         ))
                         current_speaker = speaker
                         current_text = []
-                        start_time = word.start_offset.total_seconds()
+                        start_time = offset + word.start_offset.total_seconds()
 
                     current_text.append(word.word)
 
@@ -161,36 +770,157 @@ class AudioAnalyzerService:
                         speaker=current_speaker,
                         text=" ".join(current_text),
                         start_time=start_time,
-                        end_time=words[-1].end_offset.total_seconds() if words else start_time,
+                        end_time=offset + words[-1].end_offset.total_seconds(),
                         confidence=alternative.confidence,
                     ))
-            else:
+            elif not alternative.words:
+                # 単語の時刻がない場合はチャンクの範囲をセグメントの範囲とする
                 segments.append(TranscriptionSegment(
                     speaker="Speaker 1",
                     text=alternative.transcript,
-                    start_time=0.0,
-                    end_time=0.0,
+                    start_time=chunk.start,
+                    end_time=chunk.end,
                     confidence=alternative.confidence,
                 ))
 
-        return TranscriptionResult(segments=segments, has_audio=len(segments) > 0)
-
-    def analyze(self, video_path: str) -> TranscriptionResult:
+        return segments
+
+    def analyze(
+        self,
+        video_path: str,
+        local_video_path: Optional[str] = None,
+        waveform_output: Optional[str] = None,
+        duration: Optional[float] = None,
+        listener: Optional[TranscriptionListener] = None,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> TranscriptionResult:
         """
         動画から音声を解析
 
+        ffmpeg が標準出力に書き出す PCM を読みながら無音位置でチャンクに区切り、区切りが確定したチャンクから
+        抽出の完了を待たずに並列に認識する（音声の一時ファイルは作らない）。
+        発話検出が有効な場合は発話区間のみを送り、発話がなければ音声なしとする。
+        各チャンクは FLAC / Opus に圧縮して送る（形式は動画の長さから選ぶ）。
+        transcription_mode が streaming の場合はチャンクの開始位置が決まった時点でストリーミング認識を始め、
+        抽出中の PCM を圧縮しながら送って、途中結果と処理済みの音声位置を listener へ逐次通知する。
+        波形ピークと文字起こしキャッシュのキー（音声のハッシュ）も同じ PCM から求める。
+        キャッシュが有効な場合、キーは音声全体から決まるため、区切ったチャンクは抽出の完了まで保持し、
+        キャッシュがなかった場合にのみ認識へ送る（キャッシュがあれば Speech-to-Text を一度も呼ばない）。
+
         Args:
             video_path: ストレージ内の動画ファイルパス
+            local_video_path: ダウンロード済みの動画ファイルパス（任意）
+            waveform_output: 指定された場合、抽出した音声の波形ピークをこのパスに書き出す
+            duration: ffprobe で取得した動画の長さ（送信する音声形式の選択と進捗の見積もりに使う）
+            listener: 文字起こしの進捗・確定セグメント・途中結果の通知先
+            cancel_event: 停止通知（ステージのタイムアウト・キャンセル時に設定される）
 
         Returns:
             文字起こし結果
         """
-        audio_path = self.extract_audio(video_path)
+        streaming = settings.transcription_mode == TRANSCRIPTION_MODE_STREAMING
+        encoding = select_audio_encoding(duration)
+        logger.info(
+            f"文字起こしを開始します: video_path={video_path}, mode={'streaming' if streaming else 'batch'}, "
+            f"encoding={encoding}, duration={duration}"
+        )
 
-        if audio_path is None:
-            return TranscriptionResult(segments=[], has_audio=False)
+        tracker = _ChunkProgress(listener, duration)
+        recognition = _ChunkRecognition(self, encoding, streaming, tracker, cancel_event)
+        planner = ChunkPlanner(
+            SAMPLE_RATE,
+            max_seconds=settings.transcription_chunk_max_seconds,
+            min_seconds=settings.transcription_chunk_min_seconds,
+            overlap_seconds=settings.transcription_chunk_overlap_seconds,
+            silence_threshold_db=settings.transcription_silence_threshold_db,
+            speech_only=settings.transcription_vad_enabled,
+        )
+        # キャッシュの確認が済むまで認識に送らないチャンク
+        held: Optional[collections.deque] = collections.deque() if settings.transcription_cache_enabled else None
+        reader = _PcmReader(
+            planner,
+            recognition.submit if held is None else lambda chunk, pcm: held.append((chunk, pcm)),
+            on_start=tracker.start,
+            waveform=self._waveform_builder() if waveform_output else None,
+            fingerprint=AudioFingerprint(SAMPLE_RATE) if held is not None else None,
+            on_feed=recognition.update if streaming and held is None else None,
+        )
 
-        return self.transcribe(audio_path)
+        try:
+            if not self.extract_audio(video_path, local_video_path, reader, cancel_event):
+                return TranscriptionResult(segments=[], has_audio=False)
+            reader.finish()
+            logger.info(
+                f"音声を抽出しました: video_path={video_path}, "
+                f"duration={planner.sample_count / SAMPLE_RATE:.1f}s, chunks={planner.chunk_count}"
+            )
+            if reader.waveform is not None:
+                try:
+                    save_waveform_peaks(reader.waveform.finish(), waveform_output)
+                except Exception as e:
+                    logger.warning(f"波形ピークの保存に失敗しました: video_path={video_path}, error={e}")
+
+            cache = cache_key = None
+            if held is not None:
+                cache = TranscriptionCache()
+                cache_key = cache.key(reader.fingerprint.hexdigest(), config_fingerprint(self.recognizer_config()))
+                cached = cache.get(cache_key)
+                if cached is not None:
+                    return self._reuse_cached(cached, cache_key, video_path, tracker)
+                while held:
+                    recognition.submit(*held.popleft())
+            tracker.finish_planning()
+
+            segments = recognition.segments()
+            result = TranscriptionResult(segments=segments, has_audio=len(segments) > 0)
+            if cache is not None:
+                cache.set(cache_key, self.result_to_dict(result))
+            return result
+        finally:
+            recognition.close()
+            tracker.close()
+
+    def _reuse_cached(
+        self,
+        cached: dict,
+        cache_key: str,
+        video_path: str,
+        tracker: _ChunkProgress,
+    ) -> TranscriptionResult:
+        """キャッシュの結果のセグメントと完了を通知して返す"""
+        tracker.close()
+        result = self.result_from_dict(cached)
+        logger.info(
+            f"文字起こしキャッシュを再利用しました: video_path={video_path}, "
+            f"key={cache_key}, segments={len(result.segments)}"
+        )
+        listener = tracker.listener
+        if listener.on_segments is not None and result.segments:
+            tracker._notify(listener.on_segments, result.segments)
+        if listener.on_progress is not None:
+            tracker._notify(listener.on_progress, 1.0)
+        return result
+
+    @staticmethod
+    def _waveform_builder() -> Optional[WaveformBuilder]:
+        try:
+            return WaveformBuilder(SAMPLE_RATE, settings.waveform_samples_per_peak_list, settings.waveform_bits)
+        except Exception as e:
+            logger.warning(f"波形ピークの設定が不正なため計算しません: error={e}")
+            return None
+
+    @staticmethod
+    def recognizer_config() -> dict:
+        """文字起こし結果に影響する認識器の設定（モデル・言語・機能）"""
+        return {"model": SPEECH_MODEL, "language_codes": SPEECH_LANGUAGE_CODES, "features": SPEECH_FEATURES}
+
+    @staticmethod
+    def result_from_dict(data: dict) -> TranscriptionResult:
+        """result_to_dict の逆変換"""
+        return TranscriptionResult(
+            segments=[TranscriptionSegment(**segment) for segment in data.get("segments", [])],
+            has_audio=data.get("has_audio", False),
+        )
 
     def result_to_dict(self, result: TranscriptionResult) -> dict:
         """結果を辞書形式に変換"""
@@ -0,0 +1,347 @@
+"""長い音声から発話区間を検出し、無音位置で区切った文字起こし用の短いチャンクに分割する"""
+import io
+import math
+import wave
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+# 無音判定の単位（20ms）と、瞬間的な無音で切らないための平滑化幅（200ms）
+FRAME_SECONDS = 0.02
+SMOOTHING_FRAMES = 10
+
+# 発話検出（VAD）: 有声音はエネルギー、無声子音（サ行など）は弱いエネルギーと高いゼロ交差率で判定する
+VAD_NOISE_FLOOR_PERCENTILE = 10
+VAD_NOISE_MARGIN_DB = 10.0
+VAD_UNVOICED_MARGIN_DB = 10.0
+VAD_UNVOICED_ZCR = 0.25
+# 短い途切れは同じ発話として結合し、短すぎる区間は捨て、前後に余白を付ける（語頭・語尾の欠け防止）
+VAD_MERGE_GAP_SECONDS = 0.5
+VAD_MIN_SPEECH_SECONDS = 0.2
+VAD_PADDING_SECONDS = 0.3
+# 逐次分割ではノイズフロアをこの長さの音声を受け取ってから求め、以降はこの間隔で求め直す
+VAD_WARMUP_SECONDS = 10.0
+VAD_FLOOR_UPDATE_SECONDS = 30.0
+
+
+@dataclass
+class AudioChunk:
+    """
+    音声チャンクの範囲（サンプル単位）
+
+    keep_start〜keep_end は、このチャンクの認識結果から採用する単語の開始時刻の範囲（秒）。
+    固定位置で切った重なり部分の単語が両側のチャンクで重複しないようにする。
+    """
+    index: int
+    start_sample: int
+    end_sample: int
+    sample_rate: int
+    keep_start: float
+    keep_end: float
+
+    @property
+    def start(self) -> float:
+        return self.start_sample / self.sample_rate
+
+    @property
+    def end(self) -> float:
+        return self.end_sample / self.sample_rate
+
+    def keeps(self, time: float) -> bool:
+        """絶対時刻 time に始まる単語をこのチャンクから採用するか"""
+        return self.keep_start <= time < self.keep_end
+
+
+def _frame_stats(samples: np.ndarray, frame: int) -> tuple[np.ndarray, np.ndarray]:
+    """フレームごとの平均二乗とゼロ交差率（末尾の端数は1フレームとして扱う）"""
+    samples = np.asarray(samples, dtype=np.float64)
+    full = len(samples) // frame * frame
+    parts = [samples[:full].reshape(-1, frame)] if full else []
+    if full < len(samples):
+        parts.append(samples[full:].reshape(1, -1))
+    if not parts:
+        return np.zeros(0), np.zeros(0)
+    energies, crossings = [], []
+    for part in parts:
+        energies.append(np.mean(np.square(part), axis=1))
+        signs = np.signbit(part)
+        crossings.append(np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / part.shape[1])
+    return np.concatenate(energies), np.concatenate(crossings)
+
+
+def _energy_db(mean_square: np.ndarray) -> np.ndarray:
+    rms = np.sqrt(mean_square) / 32768.0
+    return 20 * np.log10(np.maximum(rms, 1e-10))
+
+
+def _find_silence(smoothed: np.ndarray, lo: int, hi: int, threshold_db: float) -> Optional[int]:
+    """フレーム範囲 [lo, hi) で最も静かなフレーム（しきい値未満でなければ None）"""
+    if lo >= hi:
+        return None
+    quietest = lo + int(np.argmin(smoothed[lo:hi]))
+    return quietest if smoothed[quietest] < threshold_db else None
+
+
+class ChunkPlanner:
+    """
+    PCM を先頭から順に受け取り、max_seconds 以下のチャンクに区切って、区切り位置が確定したものから返す
+
+    - 各チャンクは min_seconds〜max_seconds の範囲で最も静かな位置で区切る
+    - しきい値を下回る無音がない場合は max_seconds で切り、overlap_seconds だけ重ねる
+      （重なりの中央を境界とし、単語はどちらか一方のチャンクからのみ採用する）
+    - speech_only の場合は発話区間のみを対象とし、発話がなければチャンクを返さない
+
+    音声の抽出（ffmpeg のパイプ出力）と並行して文字起こしを始めるため、PCM はまだ返していない範囲のみを保持する。
+    発話検出のしきい値は指定値と「ノイズフロア + マージン」の大きい方とし、背景ノイズが大きい音声でも常時発話と
+    判定しないようにする。ノイズフロアは受け取り済みの音声から求めるため、先頭 VAD_WARMUP_SECONDS 秒は判定を保留し、
+    以降は VAD_FLOOR_UPDATE_SECONDS 秒ごとに求め直す。
+    """
+
+    def __init__(
+        self,
+        sample_rate: int,
+        max_seconds: float,
+        min_seconds: float,
+        overlap_seconds: float,
+        silence_threshold_db: float,
+        speech_only: bool = False,
+    ):
+        self.sample_rate = sample_rate
+        self.frame = max(int(sample_rate * FRAME_SECONDS), 1)
+        self.max_samples = int(max_seconds * sample_rate)
+        self.min_samples = min(int(min_seconds * sample_rate), self.max_samples)
+        self.overlap_samples = min(int(overlap_seconds * sample_rate), self.min_samples // 2)
+        self.silence_threshold_db = silence_threshold_db
+        self.speech_only = speech_only
+        self.sample_count = 0
+        self.chunk_count = 0
+
+        frame_seconds = self.frame / sample_rate
+        self._padding = int(VAD_PADDING_SECONDS / frame_seconds)
+        self._merge_gap = int(VAD_MERGE_GAP_SECONDS / frame_seconds) + 2 * self._padding
+        self._min_speech = int(VAD_MIN_SPEECH_SECONDS / frame_seconds)
+        self._warmup_frames = int(VAD_WARMUP_SECONDS / frame_seconds)
+        self._floor_update_frames = int(VAD_FLOOR_UPDATE_SECONDS / frame_seconds)
+
+        # 返していない範囲の PCM（_pcm_start はその先頭のサンプル位置）とフレームに満たない端数
+        self._pcm = bytearray()
+        self._pcm_start = 0
+        self._tail = np.zeros(0, dtype=np.int16)
+        # フレームごとの特徴量（容量を倍々に確保し、先頭 _frames 個が有効）
+        self._energy_db = np.zeros(0)
+        self._zcr = np.zeros(0)
+        self._frames = 0
+
+        # 分割中の範囲での次のチャンクの開始位置（None は範囲外）
+        self._start: Optional[int] = None if speech_only else 0
+        self._keep_start = 0.0
+        # 発話検出: 判定済みのフレーム数、ノイズフロア、結合中の発話（フレーム単位の [start, end)）
+        self._classified = 0
+        self._noise_floor: Optional[float] = None
+        self._floor_frames = 0
+        self._run: Optional[list[int]] = None
+        self._ready: list[tuple[AudioChunk, bytes]] = []
+
+    def feed(self, pcm: bytes) -> list[tuple[AudioChunk, bytes]]:
+        """16bit モノラル PCM（偶数バイト）を追加し、区切りが確定したチャンクとその PCM を返す"""
+        if not pcm:
+            return []
+        self._pcm += pcm
+        samples = np.frombuffer(pcm, dtype="<i2")
+        self.sample_count += len(samples)
+        if len(self._tail):
+            samples = np.concatenate([self._tail, samples])
+        full = len(samples) // self.frame * self.frame
+        self._add_frames(samples[:full])
+        self._tail = samples[full:].copy()
+
+        if self.speech_only:
+            self._classify(final=False)
+        self._cut_open_range()
+        return self._take_ready()
+
+    def finish(self) -> list[tuple[AudioChunk, bytes]]:
+        """音声の終端までを分割し、残りのチャンクを返す"""
+        if len(self._tail):
+            self._add_frames(self._tail)
+            self._tail = np.zeros(0, dtype=np.int16)
+        if self.speech_only:
+            self._classify(final=True)
+            if self._run is not None:
+                self._close_run()
+        elif self._start is not None and self.sample_count:
+            self._flush_range(self.sample_count)
+        return self._take_ready()
+
+    def pending(self) -> Optional[AudioChunk]:
+        """
+        区切り位置が未確定のチャンク（end_sample はこのチャンクに含まれることが確定した位置）
+
+        区切りは min_seconds より前にはならず、固定位置で切る場合も次のチャンクの開始（重なりの先頭）より
+        前にはならないため、そこまでの PCM は区切りの確定を待たずに認識へ送れる。keep_end は未確定のため無限大とする。
+        発話区間は短すぎて捨てられることがなくなってから、送れる PCM がない間は None を返す。
+        """
+        if self._start is None:
+            return None
+        if self.speech_only:
+            if self._run is None or self._run[1] - self._run[0] < self._min_speech:
+                return None
+            known_end = min((self._run[1] + self._padding) * self.frame, self.sample_count)
+        else:
+            known_end = self.sample_count
+        committed = min(
+            known_end,
+            self._start + self.min_samples - self.frame,
+            self._start + self.max_samples - self.overlap_samples,
+        )
+        if committed <= self._start:
+            return None
+        return AudioChunk(
+            index=self.chunk_count,
+            start_sample=self._start,
+            end_sample=committed,
+            sample_rate=self.sample_rate,
+            keep_start=self._keep_start,
+            keep_end=math.inf,
+        )
+
+    def pcm(self, start_sample: int, end_sample: int) -> bytes:
+        """保持している範囲の PCM を返す（pending のチャンクの範囲は常に保持している）"""
+        return bytes(self._pcm[(start_sample - self._pcm_start) * 2:(end_sample - self._pcm_start) * 2])
+
+    def _add_frames(self, samples: np.ndarray) -> None:
+        energy, zcr = _frame_stats(samples, self.frame)
+        needed = self._frames + len(energy)
+        if needed > len(self._energy_db):
+            capacity = max(needed, 2 * len(self._energy_db), 1024)
+            for name in ("_energy_db", "_zcr"):
+                grown = np.zeros(capacity)
+                grown[:self._frames] = getattr(self, name)[:self._frames]
+                setattr(self, name, grown)
+        self._energy_db[self._frames:needed] = _energy_db(energy)
+        self._zcr[self._frames:needed] = zcr
+        self._frames = needed
+
+    def _classify(self, final: bool) -> None:
+        """未判定のフレームを発話・非発話に分け、発話の結合と区間の確定を進める"""
+        if not final and self._frames < self._warmup_frames:
+            return
+        if final or self._noise_floor is None or self._frames - self._floor_frames >= self._floor_update_frames:
+            if self._frames == 0:
+                return
+            self._noise_floor = float(np.percentile(self._energy_db[:self._frames], VAD_NOISE_FLOOR_PERCENTILE))
+            self._floor_frames = self._frames
+        threshold = max(self.silence_threshold_db, self._noise_floor + VAD_NOISE_MARGIN_DB)
+
+        lo, hi = self._classified, self._frames
+        energy, zcr = self._energy_db[lo:hi], self._zcr[lo:hi]
+        speech = (energy > threshold) | ((energy > threshold - VAD_UNVOICED_MARGIN_DB) & (zcr > VAD_UNVOICED_ZCR))
+        for index in (np.flatnonzero(speech) + lo).tolist():
+            if self._run is not None and index - self._run[1] <= self._merge_gap:
+                self._run[1] = index + 1
+                continue
+            if self._run is not None:
+                self._close_run()
+            self._run = [index, index + 1]
+            self._start = max(index - self._padding, 0) * self.frame
+            self._keep_start = self._start / self.sample_rate
+        self._classified = hi
+
+        # 以降の発話とは結合されない距離まで離れたら区間を確定する
+        if self._run is not None and hi - self._run[1] > self._merge_gap:
+            self._close_run()
+
+    def _close_run(self) -> None:
+        start, end = self._run
+        self._run = None
+        if end - start < self._min_speech:
+            # 短すぎる区間は捨てる（区切りは上限より十分短いため、まだチャンクを返していない）
+            self._start = None
+            return
+        self._flush_range(min(min(end + self._padding, self._frames) * self.frame, self.sample_count))
+
+    def _cut_open_range(self) -> None:
+        """終端が未確定の範囲のうち、区切り位置が確定した部分をチャンクにする"""
+        if self._start is None:
+            return
+        if self.speech_only:
+            if self._run is None:
+                return
+            known_end = min((self._run[1] + self._padding) * self.frame, self.sample_count)
+        else:
+            known_end = self.sample_count
+        while known_end - self._start > self.max_samples:
+            # 区切り位置の候補の平滑化に、候補の後ろのフレームも必要
+            if (self._start + self.max_samples) // self.frame + SMOOTHING_FRAMES > self._frames:
+                break
+            self._next_chunk(None)
+
+    def _flush_range(self, range_end: int) -> None:
+        """終端が確定した範囲の残りをチャンクにする"""
+        while self._start < range_end:
+            self._next_chunk(range_end)
+        self._start = None
+
+    def _next_chunk(self, range_end: Optional[int]) -> None:
+        start, frame = self._start, self.frame
+        if range_end is not None and range_end - start <= self.max_samples:
+            end, next_start = range_end, range_end
+        else:
+            silence = self._find_silence((start + self.min_samples) // frame, (start + self.max_samples) // frame)
+            if silence is not None:
+                end = next_start = silence * frame + frame // 2
+            else:
+                end = start + self.max_samples
+                next_start = end - self.overlap_samples
+
+        keep_end = (end + next_start) / 2 / self.sample_rate
+        chunk = AudioChunk(
+            index=self.chunk_count,
+            start_sample=start,
+            end_sample=end,
+            sample_rate=self.sample_rate,
+            keep_start=self._keep_start,
+            keep_end=keep_end,
+        )
+        self._ready.append((chunk, self.pcm(start, end)))
+        self.chunk_count += 1
+        self._start, self._keep_start = next_start, keep_end
+
+    def _find_silence(self, lo: int, hi: int) -> Optional[int]:
+        """フレーム範囲 [lo, hi) の平滑化したエネルギーから区切り位置を探す（前後の余白のみ平滑化する）"""
+        if lo >= hi:
+            return None
+        window_start = max(lo - SMOOTHING_FRAMES, 0)
+        window_end = min(hi + SMOOTHING_FRAMES, self._frames)
+        kernel = np.ones(SMOOTHING_FRAMES) / SMOOTHING_FRAMES
+        smoothed = np.convolve(self._energy_db[window_start:window_end], kernel, mode="same")
+        silence = _find_silence(smoothed, lo - window_start, hi - window_start, self.silence_threshold_db)
+        return None if silence is None else silence + window_start
+
+    def _take_ready(self) -> list[tuple[AudioChunk, bytes]]:
+        ready, self._ready = self._ready, []
+        # 以降のチャンクに含まれ得ない PCM を捨てる（移動の回数を抑えるため半分以上になったときのみ）
+        if self._start is not None:
+            keep_from = self._start
+        elif self.speech_only:
+            keep_from = max(self._classified - self._padding, 0) * self.frame
+        else:
+            keep_from = self.sample_count
+        drop = (keep_from - self._pcm_start) * 2
+        if drop > 0 and drop * 2 >= len(self._pcm):
+            del self._pcm[:drop]
+            self._pcm_start = keep_from
+        return ready
+
+
+def pcm_to_wav(pcm: bytes, sample_rate: int) -> bytes:
+    """16bit モノラル PCM を単体の WAV にする"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as out:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(sample_rate)
+        out.writeframes(pcm)
+    return buffer.getvalue()
+
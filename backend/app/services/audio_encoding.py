@@ -0,0 +1,144 @@
+"""文字起こしに送る音声チャンクの圧縮（FLAC / Opus）"""
+import logging
+import subprocess
+import threading
+from typing import Iterable, Iterator, Optional
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+LINEAR16 = "linear16"
+FLAC = "flac"
+OPUS = "opus"
+AUDIO_ENCODINGS = (LINEAR16, FLAC, OPUS)
+
+ENCODE_TIMEOUT_SECONDS = 60
+
+
+class AudioEncodingError(Exception):
+    """ffmpeg による音声の圧縮に失敗"""
+
+
+def select_audio_encoding(duration: Optional[float]) -> str:
+    """
+    文字起こしに送る音声の形式を決める
+
+    - 設定が auto の場合、通常は可逆の FLAC（認識精度は WAV と同じ）
+    - 長い動画は転送量を優先して Opus（音声向けの低ビットレートで十分な精度が出る）
+    """
+    settings = get_settings()
+    encoding = settings.transcription_audio_encoding
+    if encoding in AUDIO_ENCODINGS:
+        return encoding
+    if encoding != "auto":
+        logger.warning(f"未知の音声形式のため auto として扱います: {encoding}")
+    if duration is not None and duration >= settings.transcription_opus_min_duration_seconds:
+        return OPUS
+    return FLAC
+
+
+def build_encode_command(
+    encoding: str, sample_rate: int, ffmpeg_path: str = "ffmpeg", flush_packets: bool = False
+) -> list[str]:
+    """
+    標準入力の 16bit モノラル PCM を圧縮して標準出力に書き出す ffmpeg コマンド
+
+    flush_packets はパケットごとに出力する（ストリーミング送信で出力バッファの分だけ送信が遅れないように）。
+    """
+    command = [
+        ffmpeg_path,
+        "-hide_banner",
+        "-loglevel", "error",
+        "-f", "s16le",
+        "-ar", str(sample_rate),
+        "-ac", "1",
+        "-i", "pipe:0",
+    ]
+    if encoding == FLAC:
+        command += ["-c:a", "flac", "-compression_level", "5", "-f", "flac"]
+    elif encoding == OPUS:
+        command += [
+            "-c:a", "libopus",
+            "-b:a", f"{get_settings().transcription_opus_bitrate_kbps}k",
+            "-application", "voip",
+            "-f", "ogg",
+        ]
+    else:
+        raise AudioEncodingError(f"圧縮に対応していない形式です: {encoding}")
+    if flush_packets:
+        command += ["-flush_packets", "1"]
+    return command + ["pipe:1"]
+
+
+def encode_pcm(pcm: bytes, sample_rate: int, encoding: str, ffmpeg_path: str = "ffmpeg") -> bytes:
+    """16bit モノラル PCM を FLAC または Ogg Opus に圧縮する"""
+    command = build_encode_command(encoding, sample_rate, ffmpeg_path)
+    try:
+        result = subprocess.run(command, input=pcm, capture_output=True, timeout=ENCODE_TIMEOUT_SECONDS)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        raise AudioEncodingError(f"ffmpeg の実行に失敗しました: {e}") from e
+    if result.returncode != 0 or not result.stdout:
+        stderr = result.stderr.decode("utf-8", errors="replace").strip()
+        raise AudioEncodingError(f"ffmpeg error: {stderr}")
+    return result.stdout
+
+
+class StreamEncoder:
+    """
+    受け取りながら PCM を FLAC または Ogg Opus に圧縮する ffmpeg プロセス（ストリーミング認識への送信用）
+
+    入力は別スレッドで書き込み、圧縮済みのデータは ffmpeg が出力した分から encode が返す。
+    起動に失敗した場合はコンストラクタが AudioEncodingError を送出する（送信形式を決める前に呼ぶ）。
+    """
+
+    def __init__(self, encoding: str, sample_rate: int, ffmpeg_path: str = "ffmpeg"):
+        command = build_encode_command(encoding, sample_rate, ffmpeg_path, flush_packets=True)
+        try:
+            self.process = subprocess.Popen(
+                command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+            )
+        except OSError as e:
+            raise AudioEncodingError(f"ffmpeg の実行に失敗しました: {e}") from e
+
+    def encode(self, blocks: Iterable[bytes], read_bytes: int) -> Iterator[bytes]:
+        """blocks の PCM を書き込みながら、圧縮済みのデータを read_bytes 以下ずつ返す（入力側の例外は再送出する）"""
+        errors: list[BaseException] = []
+
+        def write() -> None:
+            try:
+                for block in blocks:
+                    self.process.stdin.write(block)
+            except BrokenPipeError:
+                pass
+            except BaseException as e:
+                errors.append(e)
+            finally:
+                try:
+                    self.process.stdin.close()
+                except OSError:
+                    pass
+
+        writer = threading.Thread(target=write, daemon=True)
+        writer.start()
+        while True:
+            data = self.process.stdout.read1(read_bytes)
+            if not data:
+                break
+            yield data
+        writer.join()
+        try:
+            returncode = self.process.wait(timeout=ENCODE_TIMEOUT_SECONDS)
+        except subprocess.TimeoutExpired as e:
+            raise AudioEncodingError(f"ffmpeg の実行に失敗しました: {e}") from e
+        if errors:
+            raise errors[0]
+        if returncode != 0:
+            stderr = self.process.stderr.read().decode("utf-8", errors="replace").strip()
+            raise AudioEncodingError(f"ffmpeg error: {stderr}")
+
+    def close(self) -> None:
+        """終了していないプロセスを止める（中断・送信の失敗時）"""
+        if self.process.poll() is None:
+            self.process.kill()
+            self.process.wait()
@@ -0,0 +1,119 @@
+"""プロセス単位で共有する外部サービスクライアントのレジストリ"""
+import logging
+import os
+import threading
+from typing import Any, Callable, TypeVar
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+T = TypeVar("T")
+
+GEMINI_MODEL_NAME = "gemini-3-pro-preview"
+
+
+class ClientRegistry:
+    """
+    スレッドセーフなクライアントをプロセス内で1つずつ保持する
+
+    - 初回要求時に生成し、以降は同じインスタンスを返す
+    - fork 後の子プロセスでは親のクライアント（ソケット・gRPCチャネル）を
+      引き継がないよう、PID の変化を検知して破棄する
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._clients: dict[str, Any] = {}
+        self._pid = os.getpid()
+
+    def get(self, name: str, factory: Callable[[], T]) -> T:
+        self._reset_after_fork()
+        client = self._clients.get(name)
+        if client is not None:
+            return client
+        with self._lock:
+            client = self._clients.get(name)
+            if client is None:
+                client = factory()
+                self._clients[name] = client
+                logger.info(f"クライアントを生成しました: name={name}, pid={self._pid}")
+            return client
+
+    def reset(self) -> None:
+        """保持しているクライアントを閉じて破棄"""
+        with self._lock:
+            clients, self._clients = self._clients, {}
+        for name, client in clients.items():
+            close = getattr(client, "close", None)
+            if callable(close):
+                try:
+                    close()
+                except Exception as e:
+                    logger.warning(f"クライアントのクローズに失敗しました: name={name}, error={e}")
+
+    def _reset_after_fork(self) -> None:
+        if self._pid != os.getpid():
+            # 親プロセスのクライアントは子プロセスでは使わず、閉じもしない
+            self._lock = threading.RLock()
+            self._clients = {}
+            self._pid = os.getpid()
+
+
+registry = ClientRegistry()
+
+
+def get_redis_client():
+    """共有コネクションプールを持つ Redis クライアント"""
+    import redis
+
+    return registry.get("redis", lambda: redis.from_url(settings.redis_url))
+
+
+def get_speech_client():
+    """Speech-to-Text v2 クライアント"""
+    def factory():
+        from google.api_core.client_options import ClientOptions
+        from google.cloud import speech_v2 as speech
+
+        return speech.SpeechClient(
+            client_options=ClientOptions(
+                api_endpoint="us-central1-speech.googleapis.com"
+            )
+        )
+
+    return registry.get("speech", factory)
+
+
+def get_gemini_model():
+    """Vertex AI の Gemini モデル"""
+    def factory():
+        import vertexai
+        from vertexai.generative_models import GenerativeModel
+
+        if settings.google_cloud_project:
+            vertexai.init(project=settings.google_cloud_project, location="global")
+        return GenerativeModel(GEMINI_MODEL_NAME)
+
+    return registry.get("gemini", factory)
+
+
+def init_clients() -> None:
+    """
+    プロセス起動時にクライアントを生成する（API 起動時・Celery 子プロセス起動時）
+
+    ストレージのバケット存在確認もここで1回だけ行う。
+    失敗しても起動は継続し、初回利用時に再度生成を試みる。
+    """
+    from app.services.storage import StorageService
+
+    for name, factory in (("storage", StorageService), ("redis", get_redis_client)):
+        try:
+            factory()
+        except Exception as e:
+            logger.warning(f"クライアントの初期化に失敗しました: name={name}, error={e}")
+
+
+def reset_clients() -> None:
+    registry.reset()
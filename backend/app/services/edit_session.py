@@ -9,6 +9,9 @@ from sqlalchemy.orm import Session
 from app.models.edit_session import EditSession, EditAction
 from app.schemas.editor import EditActionInput
 
+# Allow small rounding differences between the player position and the probed duration
+DURATION_TOLERANCE_SECONDS = 0.1
+
 
 class EditSessionService:
     """Service for managing edit sessions and actions."""
@@ -38,7 +41,12 @@ class EditSessionService:
         self,
         job_id: str,
         actions: Iterable[EditActionInput],
+        duration: float | None = None,
     ) -> EditSession:
+        actions = list(actions)
+        if duration:
+            self._validate_ranges(actions, duration)
+
         session = self.get_or_create_session(job_id)
 
         existing_actions = {action.id: action for action in session.actions}
@@ -64,6 +72,18 @@ class EditSessionService:
         self.db.refresh(session)
         return session
 
+    @staticmethod
+    def _validate_ranges(actions: Iterable[EditActionInput], duration: float) -> None:
+        for action_input in actions:
+            if (
+                action_input.start_time >= duration
+                or action_input.end_time > duration + DURATION_TOLERANCE_SECONDS
+            ):
+                raise ValueError(
+                    f"編集範囲が動画の長さ({duration:.3f}秒)を超えています: "
+                    f"start_time={action_input.start_time}, end_time={action_input.end_time}"
+                )
+
     def _create_action(self, session_id: UUID, action_input: EditActionInput) -> EditAction:
         return EditAction(
             session_id=session_id,
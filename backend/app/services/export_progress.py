@@ -2,9 +2,8 @@
 import json
 from typing import Optional
 
-import redis
-
 from app.config import get_settings
+from app.services.clients import get_redis_client
 
 settings = get_settings()
 
@@ -13,7 +12,7 @@ class ExportProgressService:
     """Manage export progress status in Redis."""
 
     def __init__(self) -> None:
-        self.redis_client = redis.from_url(settings.redis_url)
+        self.redis_client = get_redis_client()
         self.progress_key_prefix = "export_progress:"
 
     def _get_progress_key(self, export_id: str) -> str:
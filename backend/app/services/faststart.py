@@ -0,0 +1,98 @@
+"""MP4 の moov アトムを先頭へ移動（faststart）するための判定とリマックス"""
+import logging
+import struct
+import subprocess
+from typing import Callable, Optional
+
+from app.services.storage import BaseStorageService
+
+logger = logging.getLogger(__name__)
+
+REMUX_TIMEOUT_SECONDS = 1800
+# 先頭から走査するトップレベルのボックス数の上限（通常は ftyp, moov/mdat, free 程度）
+MAX_TOP_LEVEL_BOXES = 64
+
+
+class FaststartError(Exception):
+    """リマックスに失敗"""
+
+
+def moov_after_mdat(read_range: Callable[[int, int], bytes], size: int) -> Optional[bool]:
+    """
+    トップレベルのボックスを走査し、moov が mdat より後ろにあるかを判定
+
+    ボックスヘッダー（最大16バイト）のみを読むため、ファイル全体は取得しない。
+
+    Args:
+        read_range: (start, end) のバイト範囲（end を含む）を返す関数
+        size: ファイルサイズ
+
+    Returns:
+        moov が mdat より後ろなら True、先頭側なら False、
+        ISO BMFF でない・構造を判定できない場合は None
+    """
+    offset = 0
+    for index in range(MAX_TOP_LEVEL_BOXES):
+        if offset + 8 > size:
+            return None
+        header = read_range(offset, min(offset + 15, size - 1))
+        if len(header) < 8:
+            return None
+        box_size, box_type = struct.unpack(">I4s", header[:8])
+        if index == 0 and box_type != b"ftyp":
+            return None
+        if box_type == b"moov":
+            return False
+        if box_type == b"mdat":
+            return True
+        if box_size == 1:
+            if len(header) < 16:
+                return None
+            box_size = struct.unpack(">Q", header[8:16])[0]
+        elif box_size == 0:
+            # ファイル末尾まで続くボックス（moov/mdat 以外）
+            return None
+        if box_size < 8:
+            return None
+        offset += box_size
+    return None
+
+
+def needs_faststart(storage_service: BaseStorageService, file_path: str, size: int) -> bool:
+    """ストレージ上の MP4 が faststart されていない（moov が末尾にある）か"""
+    def read_range(start: int, end: int) -> bytes:
+        stream = storage_service.get_file_stream(file_path, start, end)
+        try:
+            return stream.read(end - start + 1)
+        finally:
+            close = getattr(stream, "close", None)
+            if callable(close):
+                close()
+
+    return moov_after_mdat(read_range, size) is True
+
+
+def remux_faststart(input_path: str, output_path: str, ffmpeg_path: str = "ffmpeg") -> None:
+    """
+    再エンコードせずに moov を先頭へ移動した MP4 を出力
+
+    編集・解析で使う映像と音声のストリームのみを残す
+    （iPhone のメタデータトラック等は MP4 へコピーできないことがあるため）。
+    """
+    command = [
+        ffmpeg_path,
+        "-y",
+        "-i", input_path,
+        "-map", "0:v",
+        "-map", "0:a?",
+        "-c", "copy",
+        "-map_metadata", "0",
+        "-movflags", "+faststart",
+        output_path,
+    ]
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, timeout=REMUX_TIMEOUT_SECONDS)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        raise FaststartError(f"ffmpeg の実行に失敗しました: {e}") from e
+    if result.returncode != 0:
+        raise FaststartError(f"ffmpeg error: {result.stderr}")
@@ -3,12 +3,16 @@ from typing import List, Optional, Dict, Any
 import json
 import tempfile
 import os
-import vertexai
-from vertexai.generative_models import GenerativeModel, Part
+from vertexai.generative_models import GenerationConfig, Part
 from app.config import get_settings
+from app.services.clients import get_gemini_model
+from app.services.media_probe import MediaInfo
 from app.services.storage import StorageService
 import uuid # For generating risk IDs
 
+# プロンプトや出力の解釈を変更した場合は更新する（解析結果の再利用判定に使用）
+PROMPT_VERSION = "1"
+
 # ... existing UnifiedVideoAnalysisResult dataclass ...
 
 @dataclass
@@ -34,32 +38,32 @@ class UnifiedVideoAnalysisResult:
 class GeminiVideoAnalysisService:
     def __init__(self):
         self.settings = get_settings()
-        if self.settings.google_cloud_project:
-            vertexai.init(project=self.settings.google_cloud_project, location="global")
-        self.model = GenerativeModel("gemini-3-pro-preview")
+        self.model = get_gemini_model()
         self.storage_service = StorageService()
 
-    def analyze_video(self, video_path: str) -> UnifiedVideoAnalysisResult:
+    def analyze_video(
+        self,
+        video_path: str,
+        local_video_path: Optional[str] = None,
+        media_info: Optional[MediaInfo] = None,
+    ) -> UnifiedVideoAnalysisResult:
         """
         Geminiモデルを使用して動画を直接分析し、統合された結果を返す。
 
+        GCS の場合は gs:// URI を渡して Vertex AI に直接読ませる（ワーカーで動画を読み込まない）。
+        それ以外のストレージは Vertex AI から参照できないため、ローカルの動画をインラインで送る。
+
         Args:
-            video_path: 分析する動画のGCS URL。
+            video_path: 分析する動画のストレージ内のパス。
+            local_video_path: ダウンロード済みの動画ファイルパス。指定された場合は再ダウンロードしない。
+            media_info: 動画のメタ情報。長さとフレームレートをサンプリング設定とプロンプトに使う。
 
         Returns:
             UnifiedVideoAnalysisResult: 統合された動画分析結果。
         """
-        with tempfile.NamedTemporaryFile(suffix=".mp4", delete=False) as tmp:
-            tmp_path = tmp.name
-        try:
-            self.storage_service.download_file(video_path, tmp_path)
-            with open(tmp_path, "rb") as f:
-                video_bytes = f.read()
-        finally:
-            if os.path.exists(tmp_path):
-                os.unlink(tmp_path)
-
-        video_part = Part.from_data(data=video_bytes, mime_type="video/mp4")
+        video_part = Part.from_dict(
+            {**self._video_source(video_path, local_video_path), **build_video_metadata(media_info)}
+        )
 
         prompt_text = """この動画コンテンツを詳細に分析し、以下の情報を厳密にJSON形式で提供してください。
         分析結果には、動画内のテキスト、検出されたオブジェクト、主要なイベント、動画全体の要約、および炎上リスク評価を含めてください。
@@ -110,8 +114,8 @@ class GeminiVideoAnalysisService:
         JSONのみを出力し、説明は不要です。
         """
 
-        contents = [prompt_text, video_part]
-        response = self.model.generate_content(contents)
+        contents = [prompt_text, *describe_media(media_info), video_part]
+        response = self.model.generate_content(contents, generation_config=build_generation_config(media_info))
 
         response_text = response.text.strip()
         
@@ -134,6 +138,7 @@ class GeminiVideoAnalysisService:
         for risk_data in data.get("risks", []):
             # Generate a unique ID for each risk item, as Gemini won't provide one
             risk_data['id'] = str(uuid.uuid4())
+            clamp_risk_timestamps(risk_data, media_info)
             parsed_risks.append(risk_data)
 
         return UnifiedVideoAnalysisResult(
@@ -149,4 +154,76 @@ class GeminiVideoAnalysisService:
                 "detected_texts", "detected_events", "detected_objects", "risks"
             ]},
             raw_gemini_response=response_text
-        )
\ No newline at end of file
+        )
+
+    def _video_source(self, video_path: str, local_video_path: Optional[str]) -> Dict[str, Any]:
+        """Part の動画データ部分（GCS は URI、それ以外はインラインのバイト列）"""
+        if not requires_local_video():
+            return {"file_data": {"file_uri": f"gs://{self.settings.storage_bucket}/{video_path}", "mime_type": "video/mp4"}}
+
+        if local_video_path is not None:
+            with open(local_video_path, "rb") as f:
+                return {"inline_data": {"data": f.read(), "mime_type": "video/mp4"}}
+
+        with tempfile.NamedTemporaryFile(suffix=".mp4", delete=False) as tmp:
+            tmp_path = tmp.name
+        try:
+            self.storage_service.download_file(video_path, tmp_path)
+            with open(tmp_path, "rb") as f:
+                return {"inline_data": {"data": f.read(), "mime_type": "video/mp4"}}
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+
+def requires_local_video() -> bool:
+    """Gemini に送るためにローカルの動画が必要か（GCS 以外は Vertex AI から直接読めない）"""
+    return not get_settings().use_gcs
+
+
+def build_video_metadata(media_info: Optional[MediaInfo]) -> Dict[str, Any]:
+    """
+    動画の解析範囲（VideoMetadata）
+
+    長さが分かっている場合は終了位置を明示し、末尾の不完全なフレームや長さの誤認を避ける。
+    """
+    if media_info is None or not media_info.duration:
+        return {}
+    return {"video_metadata": {"start_offset": "0s", "end_offset": f"{media_info.duration:.3f}s"}}
+
+
+def build_generation_config(media_info: Optional[MediaInfo]) -> Optional[GenerationConfig]:
+    """
+    動画の長さに応じたサンプリング設定
+
+    Gemini は動画を 1 秒ごとのフレームとして読み込むため、入力トークン数は長さに比例する。
+    長い動画はフレームの解像度を下げ、コンテキストの上限と料金を抑える。
+    （利用中の SDK では VideoMetadata のサンプリング fps を指定できないため、解像度で調整する）
+    """
+    if media_info is None or not media_info.duration:
+        return None
+    if media_info.duration < get_settings().gemini_low_resolution_min_seconds:
+        return None
+    return GenerationConfig.from_dict({"media_resolution": "MEDIA_RESOLUTION_LOW"})
+
+
+def describe_media(media_info: Optional[MediaInfo]) -> List[str]:
+    """プロンプトに添える動画の長さ・フレームレート（タイムスタンプが範囲外にならないようにする）"""
+    if media_info is None or not media_info.duration:
+        return []
+    text = f"動画の長さは {media_info.duration:.1f} 秒です。"
+    if media_info.fps:
+        text += f"フレームレートは {media_info.fps:g} fps です。"
+    return [text + "タイムスタンプは 0 から動画の長さまでの範囲で記載してください。"]
+
+
+def clamp_risk_timestamps(risk_data: Dict[str, Any], media_info: Optional[MediaInfo]) -> None:
+    """Gemini が返したリスクのタイムスタンプを動画の長さの範囲に収める"""
+    if media_info is None or not media_info.duration:
+        return
+    for key in ("timestamp", "end_timestamp"):
+        try:
+            value = float(risk_data[key])
+        except (KeyError, TypeError, ValueError):
+            continue
+        risk_data[key] = min(max(value, 0.0), media_info.duration)
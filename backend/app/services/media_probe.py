@@ -0,0 +1,226 @@
+"""ffprobe による動画メタ情報（長さ・解像度・コーデック等）の取得"""
+import json
+import logging
+import subprocess
+from dataclasses import asdict, dataclass
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+PROBE_TIMEOUT_SECONDS = 60
+# キーフレーム間隔は先頭からこの秒数分のパケットのみで推定する（デコードはしない）
+KEYFRAME_SCAN_SECONDS = 60
+# ストレージの URL から取得する場合は読み込み量を抑える（完了通知の応答時間に含まれるため）
+URL_PROBE_TIMEOUT_SECONDS = 30
+URL_KEYFRAME_SCAN_SECONDS = 10
+URL_EXPIRATION_SECONDS = 600
+
+
+class MediaProbeError(Exception):
+    """ffprobe の実行または出力の解析に失敗"""
+
+
+@dataclass
+class MediaInfo:
+    duration: Optional[float] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    fps: Optional[float] = None
+    video_codec: Optional[str] = None
+    audio_codec: Optional[str] = None
+    has_audio: bool = False
+    bit_rate: Optional[int] = None
+    keyframe_interval: Optional[float] = None
+
+    @property
+    def total_frames(self) -> Optional[int]:
+        """長さとフレームレートから求めた総フレーム数の概算"""
+        if not self.duration or not self.fps:
+            return None
+        return int(round(self.duration * self.fps))
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def _to_float(value: Any) -> Optional[float]:
+    try:
+        result = float(value)
+    except (TypeError, ValueError):
+        return None
+    return result if result > 0 else None
+
+
+def _to_int(value: Any) -> Optional[int]:
+    result = _to_float(value)
+    return int(result) if result is not None else None
+
+
+def _parse_frame_rate(value: Optional[str]) -> Optional[float]:
+    """"30000/1001" 形式のフレームレートを数値に変換（"0/0" は None）"""
+    if not value:
+        return None
+    numerator, _, denominator = value.partition("/")
+    num = _to_float(numerator)
+    den = _to_float(denominator) if denominator else 1.0
+    if num is None or den is None:
+        return None
+    return round(num / den, 3)
+
+
+def parse_ffprobe_output(data: dict) -> MediaInfo:
+    """ffprobe -show_format -show_streams の JSON 出力を MediaInfo に変換"""
+    streams = data.get("streams") or []
+    fmt = data.get("format") or {}
+
+    # カバーアート（attached_pic）は映像ストリームとして扱わない
+    video = next(
+        (
+            s for s in streams
+            if s.get("codec_type") == "video" and not (s.get("disposition") or {}).get("attached_pic")
+        ),
+        None,
+    )
+    audio = next((s for s in streams if s.get("codec_type") == "audio"), None)
+
+    info = MediaInfo(
+        duration=_to_float(fmt.get("duration")),
+        bit_rate=_to_int(fmt.get("bit_rate")),
+        has_audio=audio is not None,
+        audio_codec=audio.get("codec_name") if audio else None,
+    )
+    if video is not None:
+        info.width = _to_int(video.get("width"))
+        info.height = _to_int(video.get("height"))
+        info.video_codec = video.get("codec_name")
+        info.fps = _parse_frame_rate(video.get("avg_frame_rate")) or _parse_frame_rate(video.get("r_frame_rate"))
+        if info.duration is None:
+            info.duration = _to_float(video.get("duration"))
+    return info
+
+
+def parse_keyframe_interval(packets: list[dict]) -> Optional[float]:
+    """キーフレームのパケット時刻の平均間隔（秒）。キーフレームが2つ未満なら None"""
+    times = sorted(
+        float(p["pts_time"])
+        for p in packets
+        if "K" in (p.get("flags") or "") and p.get("pts_time") not in (None, "N/A")
+    )
+    if len(times) < 2:
+        return None
+    return round((times[-1] - times[0]) / (len(times) - 1), 3)
+
+
+def _display_path(path: str) -> str:
+    """ログ用のパス（署名付き URL のクエリ文字列は残さない）"""
+    return path.split("?", 1)[0]
+
+
+def _run_ffprobe(args: list[str], ffprobe_path: str, timeout: int = PROBE_TIMEOUT_SECONDS) -> dict:
+    try:
+        result = subprocess.run(
+            [ffprobe_path, "-v", "error", "-of", "json", *args],
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+        )
+    except (OSError, subprocess.TimeoutExpired) as e:
+        raise MediaProbeError(f"ffprobe の実行に失敗しました: {e}") from e
+    if result.returncode != 0:
+        raise MediaProbeError(f"ffprobe error: {result.stderr.strip()}")
+    try:
+        return json.loads(result.stdout or "{}")
+    except json.JSONDecodeError as e:
+        raise MediaProbeError(f"ffprobe の出力を解析できません: {e}") from e
+
+
+def probe_media(
+    path: str,
+    ffprobe_path: str = "ffprobe",
+    timeout: int = PROBE_TIMEOUT_SECONDS,
+    keyframe_scan_seconds: int = KEYFRAME_SCAN_SECONDS,
+) -> MediaInfo:
+    """
+    動画ファイルのメタ情報を取得
+
+    Args:
+        path: 動画ファイルのローカルパスまたは URL
+        ffprobe_path: ffprobe の実行ファイル
+        timeout: ffprobe 1回あたりのタイムアウト（秒）
+        keyframe_scan_seconds: キーフレーム間隔の推定に読む先頭からの秒数
+
+    Raises:
+        MediaProbeError: ffprobe が失敗した、または映像・音声のいずれも含まない
+    """
+    info = parse_ffprobe_output(_run_ffprobe(["-show_format", "-show_streams", path], ffprobe_path, timeout))
+    if info.video_codec is None and not info.has_audio:
+        raise MediaProbeError(f"映像・音声ストリームがありません: path={_display_path(path)}")
+
+    if info.video_codec is not None:
+        try:
+            packets = _run_ffprobe(
+                [
+                    "-select_streams", "v:0",
+                    "-read_intervals", f"%+{keyframe_scan_seconds}",
+                    "-show_entries", "packet=pts_time,flags",
+                    path,
+                ],
+                ffprobe_path,
+                timeout,
+            )
+            info.keyframe_interval = parse_keyframe_interval(packets.get("packets") or [])
+        except MediaProbeError as e:
+            # キーフレーム間隔は補助情報のため、取得できなくても他の値は使う
+            logger.warning(f"キーフレーム間隔の取得に失敗しました: path={_display_path(path)}, error={e}")
+
+    logger.info(f"動画メタ情報を取得しました: path={_display_path(path)}, info={info.to_dict()}")
+    return info
+
+
+def probe_stored_media(storage_service, file_path: str, ffprobe_path: str = "ffprobe") -> MediaInfo:
+    """
+    ストレージ上の動画のメタ情報を署名付き URL から取得（ダウンロードしない）
+
+    ffprobe はコンテナのヘッダーと先頭のパケットのみをレンジ読み込みする。
+    """
+    url = storage_service.generate_presigned_url(file_path, expiration=URL_EXPIRATION_SECONDS)
+    try:
+        return probe_media(
+            url,
+            ffprobe_path,
+            timeout=URL_PROBE_TIMEOUT_SECONDS,
+            keyframe_scan_seconds=URL_KEYFRAME_SCAN_SECONDS,
+        )
+    except MediaProbeError as e:
+        # 署名付き URL をログやエラーに残さない
+        raise MediaProbeError(str(e).replace(url, file_path)) from None
+
+
+def apply_media_info(video, info: MediaInfo) -> None:
+    """取得したメタ情報を Video モデルへ反映"""
+    video.duration = info.duration
+    video.width = info.width
+    video.height = info.height
+    video.fps = info.fps
+    video.video_codec = info.video_codec
+    video.audio_codec = info.audio_codec
+    video.has_audio = info.has_audio
+    video.bit_rate = info.bit_rate
+    video.keyframe_interval = info.keyframe_interval
+
+
+def media_info_from_video(video) -> Optional[MediaInfo]:
+    """Video モデルに保存済みのメタ情報（未取得なら None）"""
+    if video is None or video.has_audio is None:
+        return None
+    return MediaInfo(
+        duration=video.duration,
+        width=video.width,
+        height=video.height,
+        fps=video.fps,
+        video_codec=video.video_codec,
+        audio_codec=video.audio_codec,
+        has_audio=video.has_audio,
+        bit_rate=video.bit_rate,
+        keyframe_interval=video.keyframe_interval,
+    )
@@ -0,0 +1,107 @@
+"""ジョブ単位でダウンロード済み動画を共有するワークスペース"""
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from app.services.storage import BaseStorageService, StorageService
+from app.services.video_cache import download_video
+
+logger = logging.getLogger(__name__)
+
+
+class MediaWorkspace:
+    """
+    1ジョブ内の全解析ステージで共有するローカル作業領域
+
+    - 動画は最初に必要とされた時点で一度だけダウンロードする（ワーカーのキャッシュ経由）
+    - 並行ステージから同時に要求された場合も、ダウンロードは1回のみ
+    - close() またはコンテキスト終了時に作業ディレクトリごと削除する
+      （in_use() で使用中のステージが残っている場合は、最後のステージの終了時に削除する）
+    """
+
+    def __init__(
+        self,
+        video_path: str,
+        storage_service: Optional[BaseStorageService] = None,
+    ):
+        self.video_path = video_path
+        self.storage_service = storage_service
+        self.directory = tempfile.mkdtemp(prefix="media_workspace_")
+        self._lock = threading.Lock()
+        self._local_video_path: Optional[str] = None
+        self._download_error: Optional[BaseException] = None
+        self._users_lock = threading.Lock()
+        self._users = 0
+        self._closed = False
+
+    def __enter__(self) -> "MediaWorkspace":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    @property
+    def local_video_path(self) -> str:
+        """ダウンロード済み動画のローカルパス（未取得の場合はダウンロード）"""
+        with self._lock:
+            if self._local_video_path is not None:
+                return self._local_video_path
+            if self._download_error is not None:
+                raise self._download_error
+
+            extension = os.path.splitext(self.video_path)[1] or ".mp4"
+            destination = os.path.join(self.directory, f"source{extension}")
+            try:
+                storage_service = self.storage_service or StorageService()
+                download_video(storage_service, self.video_path, destination)
+            except Exception as e:
+                logger.error(f"動画のダウンロードに失敗しました: video_path={self.video_path}, error={e}")
+                self._download_error = e
+                raise
+
+            logger.info(
+                f"動画をワークスペースにダウンロードしました: video_path={self.video_path}, "
+                f"size={os.path.getsize(destination)}"
+            )
+            self._local_video_path = destination
+            return destination
+
+    def path_for(self, filename: str) -> str:
+        """ワークスペース内の作業ファイルパスを返す"""
+        return os.path.join(self.directory, filename)
+
+    @contextmanager
+    def in_use(self) -> Iterator["MediaWorkspace"]:
+        """
+        作業ディレクトリを使用する区間
+
+        タイムアウトしたステージのスレッドは停止まで時間がかかることがあるため、
+        使用中に close() された場合は削除を使用終了まで遅らせる。
+        """
+        with self._users_lock:
+            self._users += 1
+        try:
+            yield self
+        finally:
+            with self._users_lock:
+                self._users -= 1
+                remove = self._closed and self._users == 0
+            if remove:
+                self._remove()
+
+    def close(self) -> None:
+        """作業ディレクトリを削除（使用中の場合は使用終了後に削除）"""
+        with self._users_lock:
+            self._closed = True
+            remove = self._users == 0
+        if remove:
+            self._remove()
+        else:
+            logger.info(f"使用中のステージがあるため作業ディレクトリの削除を遅らせます: directory={self.directory}")
+
+    def _remove(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
@@ -1,17 +1,35 @@
-import concurrent.futures
-from typing import Optional
-import traceback
+from typing import Any, Optional
 import logging
 import uuid
 
-from app.services.progress import ProgressService, PhaseStatus
+from app.config import get_settings
+from app.services.progress import PHASES, ProgressService, PhaseStatus
 
 logger = logging.getLogger(__name__)
-from app.services.audio_analyzer import AudioAnalyzerService
-from app.services.gemini_video_analysis import GeminiVideoAnalysisService, UnifiedVideoAnalysisResult
+from app.services.audio_analyzer import (
+    EXTRACTION_MODE_LOCAL,
+    AudioAnalyzerService,
+    TranscriptionListener,
+    TranscriptionResult,
+    TranscriptionSegment,
+)
+from app.services.gemini_video_analysis import (
+    GeminiVideoAnalysisService,
+    UnifiedVideoAnalysisResult,
+    requires_local_video,
+)
+from app.services.media_probe import MediaInfo
+from app.services.media_workspace import MediaWorkspace
+from app.services.pipeline import FatalStageError, Stage, StageContext, StageGraph
 from app.services.risk_evaluator import RiskEvaluatorService, RiskAssessment, RiskItem, RiskCategory, RiskLevel, RiskSource
-from app.models.database import SessionLocal
-from app.models.job import AnalysisJob, RiskItem as DBRiskItem
+
+settings = get_settings()
+
+# 音声解析ステージが波形ピークを書き出すワークスペース内のファイル名
+WAVEFORM_FILENAME = "waveform.peaks"
+# 音声解析の進捗: 音声の読み込み開始で 10%、文字起こしの処理済み音声に応じて 95% まで進め、完了で 100%
+AUDIO_EXTRACTION_PROGRESS = 10.0
+AUDIO_TRANSCRIPTION_PROGRESS = 95.0
 
 
 class OrchestratorService:
@@ -21,43 +39,200 @@ class OrchestratorService:
         self.gemini_video_analyzer = GeminiVideoAnalysisService()
         self.risk_evaluator = RiskEvaluatorService()
 
-    def run_analysis(self, job_id: str, video_path: str, metadata: dict) -> dict:
-        transcription_result = None
-        unified_analysis_result: Optional[UnifiedVideoAnalysisResult] = None
-        final_risks = [] # To hold risks from either Gemini or RiskEvaluatorService
+    def build_stages(
+        self,
+        job_id: str,
+        video_path: str,
+        metadata: dict,
+        workspace: MediaWorkspace,
+        media_info: Optional[MediaInfo] = None,
+    ) -> list[Stage]:
+        """
+        解析ステージの依存グラフを構築
+
+        音声解析とGemini統合解析は互いに独立しているため同時に実行し、
+        リスク評価はGemini統合解析の完了のみを待つ。
+        動画のローカルコピーが必要なステージがある場合のみ source ステージで workspace に一度だけ
+        ダウンロードし、ステージ間で共有する。ダウンロードの失敗は全ステージ共通の失敗のため source のみ fatal とし、
+        音声・Gemini・リスク評価の失敗はジョブを止めない（空の結果で完了する）。
+        GCS の場合、Gemini は gs:// URI から直接読むためダウンロードを待たない。
+        url / stream モードの音声抽出は、ダウンロードが行われない場合のみストレージから直接読み、
+        行われる場合はそのローカルコピーを読む（同じ動画をストレージから二重に読まない）。
+        media_info で音声ストリームがないと分かっている場合、音声解析は抽出を行わない。
+        """
+        audio_needed = media_info is None or media_info.has_audio
+        local_for_audio = audio_needed and settings.audio_extraction_mode == EXTRACTION_MODE_LOCAL
+        needs_source = requires_local_video() or local_for_audio
+        audio_reads_local = audio_needed and needs_source
+        stages = [
+            Stage(
+                name="audio",
+                func=lambda deps, context: self._run_audio_analysis(
+                    job_id, video_path, workspace, context, media_info, audio_reads_local
+                ),
+                depends_on=("source",) if audio_reads_local else (),
+                timeout=settings.analysis_audio_timeout_seconds,
+            ),
+            Stage(
+                name="video",
+                func=lambda deps, context: self._run_video_analysis(job_id, video_path, workspace, context, media_info),
+                depends_on=("source",) if requires_local_video() else (),
+                timeout=settings.analysis_video_timeout_seconds,
+            ),
+            Stage(
+                name="risk",
+                func=lambda deps, context: self._run_risk_evaluation(job_id, deps.get("video"), metadata, context),
+                depends_on=("video",),
+                timeout=settings.analysis_risk_timeout_seconds,
+            ),
+        ]
+        if needs_source:
+            stages.insert(
+                0,
+                Stage(
+                    name="source",
+                    func=lambda deps, context: self._fetch_source(workspace),
+                    timeout=settings.analysis_source_timeout_seconds,
+                    fatal=True,
+                ),
+            )
+        return stages
 
+    def run_analysis(
+        self,
+        job_id: str,
+        video_path: str,
+        metadata: dict,
+        workspace: Optional[MediaWorkspace] = None,
+        media_info: Optional[MediaInfo] = None,
+    ) -> dict:
         errors = {}
 
-        # 1. 音声解析を並行実行
-        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor: # Max_workers=1 as only audio now
-            audio_future = executor.submit(self._run_audio_analysis, job_id, video_path)
+        # 1. 音声解析・Gemini統合解析・リスク評価を依存グラフとして並行実行
+        owns_workspace = workspace is None
+        if owns_workspace:
+            workspace = MediaWorkspace(video_path)
+        try:
+            outcome = StageGraph(self.build_stages(job_id, video_path, metadata, workspace, media_info)).run()
+        finally:
+            if owns_workspace:
+                workspace.close()
 
-            try:
-                transcription_result = audio_future.result()
-            except Exception as e:
-                errors["audio"] = str(e)
-                self.progress_service.update_progress(job_id, "audio", PhaseStatus.failed, 0)
-                logger.error(f"[{job_id}] 音声解析失敗 (ThreadPool): error={e}", exc_info=True)
+        for name, error in outcome.errors.items():
+            errors[{"video": "gemini_video", "source": "download"}.get(name, name)] = str(error)
+            if name in PHASES:
+                self.progress_service.update_progress(job_id, name, PhaseStatus.failed, 0)
+            logger.error(f"[{job_id}] ステージ失敗: stage={name}, error={error}")
+
+        fatal_error = outcome.fatal_error
+        if fatal_error is not None:
+            raise fatal_error
+
+        transcription_result: Optional[dict] = outcome.results.get("audio")
+        unified_analysis_result: UnifiedVideoAnalysisResult = outcome.results.get("video") or UnifiedVideoAnalysisResult(
+            gemini_overall_score=0, gemini_risk_level=RiskLevel.none.value, risks=[]
+        )
+        risk_result = outcome.results.get("risk") or {"overall_score": 0, "risk_level": "none", "risks": []}
+
+        final_overall_score = risk_result.get("overall_score", 0)
+        final_risk_level = risk_result.get("risk_level", "none")
+        final_risks = risk_result.get("risks", [])
+
+        self.progress_service.set_job_completed(job_id)
+
+        # 解析結果サマリーログ
+        logger.info(
+            f"[{job_id}] ========== 解析結果サマリー ==========\n"
+            f"  音声解析: {'成功' if transcription_result else '失敗/データなし'}\n"
+            f"  Gemini統合解析: {'成功' if 'video' in outcome.results else '失敗/データなし'}\n"
+            f"  総合スコア: {final_overall_score}\n"
+            f"  リスクレベル: {final_risk_level}\n"
+            f"  リスク項目数: {len(final_risks)}\n"
+            f"  エラー: {errors if errors else 'なし'}\n"
+            f"=========================================="
+        )
+
+        return {
+            "transcription": transcription_result,
+            # ここではOCRとVideoAnalysisはunified_analysis_resultから直接取得される
+            "ocr": {"text_annotations": unified_analysis_result.detected_texts},
+            "video_analysis": {
+                "frames": [], # We no longer have individual frames from VideoAnalyzerService
+                "detected_events": unified_analysis_result.detected_events,
+                "objects": unified_analysis_result.detected_objects
+            },
+            "overall_score": final_overall_score,
+            "risk_level": final_risk_level,
+            "risks": final_risks,
+            "errors": errors if errors else None,
+            "gemini_risk_summary": unified_analysis_result.gemini_risk_summary,
+        }
+
+    @staticmethod
+    def _local_video_path(workspace: MediaWorkspace) -> str:
+        """共有ワークスペースから動画を取得（取得失敗は全ステージ共通の致命的エラー）"""
+        try:
+            return workspace.local_video_path
+        except Exception as e:
+            raise FatalStageError(f"動画のダウンロードに失敗しました: {e}") from e
+
+    def _fetch_source(self, workspace: MediaWorkspace) -> str:
+        """動画をワークスペースへダウンロード"""
+        with workspace.in_use():
+            return self._local_video_path(workspace)
+
+    def _update_progress(
+        self,
+        context: StageContext,
+        job_id: str,
+        phase: str,
+        status: PhaseStatus,
+        progress: float,
+    ) -> None:
+        """ステージの進捗を更新（タイムアウト・キャンセル後は書き込まない）"""
+        context.run_unless_cancelled(self.progress_service.update_progress, job_id, phase, status, progress)
 
-        # 2. Geminiによる統合動画解析
+    def _run_video_analysis(
+        self,
+        job_id: str,
+        video_path: str,
+        workspace: MediaWorkspace,
+        context: StageContext,
+        media_info: Optional[MediaInfo] = None,
+    ) -> UnifiedVideoAnalysisResult:
+        """Geminiによる統合動画解析を実行"""
         logger.info(f"[{job_id}] Geminiによる統合動画解析開始: video_path={video_path}")
-        self.progress_service.update_progress(job_id, "video", PhaseStatus.processing, 0)
+        self._update_progress(context, job_id, "video", PhaseStatus.processing, 0)
 
         try:
-            unified_analysis_result = self.gemini_video_analyzer.analyze_video(video_path)
-            self.progress_service.update_progress(job_id, "video", PhaseStatus.completed, 100)
-            logger.info(f"[{job_id}] Geminiによる統合動画解析完了")
+            with workspace.in_use():
+                local_video_path = self._local_video_path(workspace) if requires_local_video() else None
+                result = self.gemini_video_analyzer.analyze_video(video_path, local_video_path, media_info=media_info)
         except Exception as e:
-            errors["gemini_video"] = str(e)
-            self.progress_service.update_progress(job_id, "video", PhaseStatus.failed, 0)
             logger.error(f"[{job_id}] Geminiによる統合動画解析失敗: error={e}", exc_info=True)
-            unified_analysis_result = UnifiedVideoAnalysisResult(gemini_overall_score=0, gemini_risk_level=RiskLevel.none.value, risks=[])
+            raise
+
+        # Gemini の呼び出しは中断できないため、戻った時点で打ち切られていれば結果を捨てる
+        context.raise_if_cancelled()
+        self._update_progress(context, job_id, "video", PhaseStatus.completed, 100)
+        logger.info(f"[{job_id}] Geminiによる統合動画解析完了")
+        return result
 
+    def _run_risk_evaluation(
+        self,
+        job_id: str,
+        unified_analysis_result: Optional[UnifiedVideoAnalysisResult],
+        metadata: dict,
+        context: StageContext,
+    ) -> dict[str, Any]:
+        """リスク評価 (Geminiからの直接リスクがあればそれを使用、なければ既存のRiskEvaluatorServiceを使用)"""
+        if unified_analysis_result is None:
+            unified_analysis_result = UnifiedVideoAnalysisResult(
+                gemini_overall_score=0, gemini_risk_level=RiskLevel.none.value, risks=[]
+            )
 
-        # 3. リスク評価 (Geminiからの直接リスクがあればそれを使用、なければ既存のRiskEvaluatorServiceを使用)
-        if unified_analysis_result and unified_analysis_result.risks:
+        if unified_analysis_result.risks:
             logger.info(f"[{job_id}] Geminiからの直接リスク評価結果を使用")
-            final_risks = unified_analysis_result.risks
             overall_score = unified_analysis_result.gemini_overall_score if unified_analysis_result.gemini_overall_score is not None else 0
             risk_level_str = unified_analysis_result.gemini_risk_level if unified_analysis_result.gemini_risk_level else RiskLevel.none.value
             try:
@@ -91,72 +266,75 @@ class OrchestratorService:
                 risks=risk_items,
             )
             risk_result = self.risk_evaluator.result_to_dict(risk_assessment) # Use existing dict conversion
-            self.progress_service.update_progress(job_id, "risk", PhaseStatus.completed, 100)
-        else:
-            logger.info(f"[{job_id}] 既存のリスク評価サービスを使用")
-            self.progress_service.update_progress(job_id, "risk", PhaseStatus.processing, 0)
-            try:
-                # `RiskEvaluatorService`の`evaluate`メソッドの引数をUnifiedVideoAnalysisResultの構造に合わせて調整する
-                # detected_texts -> ocr_result
-                # detected_objects, detected_events -> video_analysis_result
-                
-                risk_assessment = self.risk_evaluator.evaluate(
-                    unified_analysis_result,
-                    metadata,
-                )
-                risk_result = self.risk_evaluator.result_to_dict(risk_assessment)
-                self.progress_service.update_progress(job_id, "risk", PhaseStatus.completed, 100)
-
-            except Exception as e:
-                logger.error(f"[{job_id}] リスク評価失敗 (RiskEvaluatorService): error={e}", exc_info=True)
-                errors["risk"] = str(e)
-                self.progress_service.update_progress(job_id, "risk", PhaseStatus.failed, 0)
-                risk_result = {"overall_score": 0, "risk_level": "none", "risks": []}
-        
-        final_overall_score = risk_result.get("overall_score", 0)
-        final_risk_level = risk_result.get("risk_level", "none")
-        final_risks = risk_result.get("risks", [])
+            self._update_progress(context, job_id, "risk", PhaseStatus.completed, 100)
+            return risk_result
 
+        logger.info(f"[{job_id}] 既存のリスク評価サービスを使用")
+        self._update_progress(context, job_id, "risk", PhaseStatus.processing, 0)
+        try:
+            risk_assessment = self.risk_evaluator.evaluate(
+                unified_analysis_result,
+                metadata,
+            )
+            risk_result = self.risk_evaluator.result_to_dict(risk_assessment)
+        except Exception as e:
+            logger.error(f"[{job_id}] リスク評価失敗 (RiskEvaluatorService): error={e}", exc_info=True)
+            raise
 
-        self.progress_service.set_job_completed(job_id)
+        context.raise_if_cancelled()
+        self._update_progress(context, job_id, "risk", PhaseStatus.completed, 100)
+        return risk_result
 
-        # 解析結果サマリーログ
-        logger.info(
-            f"[{job_id}] ========== 解析結果サマリー ==========\n"
-            f"  音声解析: {'成功' if transcription_result else '失敗/データなし'}\n"
-            f"  Gemini統合解析: {'成功' if unified_analysis_result else '失敗/データなし'}\n"
-            f"  総合スコア: {final_overall_score}\n"
-            f"  リスクレベル: {final_risk_level}\n"
-            f"  リスク項目数: {len(final_risks)}\n"
-            f"  エラー: {errors if errors else 'なし'}\n"
-            f"=========================================="
-        )
+    def _transcription_listener(self, job_id: str, context: StageContext) -> TranscriptionListener:
+        """文字起こしの途中経過を進捗と Redis 上の途中結果へ反映する通知先"""
+        def on_progress(fraction: float) -> None:
+            progress = AUDIO_EXTRACTION_PROGRESS + fraction * (AUDIO_TRANSCRIPTION_PROGRESS - AUDIO_EXTRACTION_PROGRESS)
+            self._update_progress(context, job_id, "audio", PhaseStatus.processing, round(progress, 1))
 
-        return {
-            "transcription": transcription_result,
-            # ここではOCRとVideoAnalysisはunified_analysis_resultから直接取得される
-            "ocr": {"text_annotations": unified_analysis_result.detected_texts} if unified_analysis_result else None,
-            "video_analysis": {
-                "frames": [], # We no longer have individual frames from VideoAnalyzerService
-                "detected_events": unified_analysis_result.detected_events,
-                "objects": unified_analysis_result.detected_objects
-            } if unified_analysis_result else None,
-            "overall_score": final_overall_score,
-            "risk_level": final_risk_level,
-            "risks": final_risks,
-            "errors": errors if errors else None,
-            "gemini_risk_summary": unified_analysis_result.gemini_risk_summary if unified_analysis_result else None,
-        }
+        def on_segments(segments: list[TranscriptionSegment]) -> None:
+            context.run_unless_cancelled(
+                self.progress_service.append_transcript_segments,
+                job_id,
+                self.audio_analyzer.result_to_dict(TranscriptionResult(segments, True))["segments"],
+            )
+
+        def on_partial(chunk_start: float, text: str) -> None:
+            context.run_unless_cancelled(self.progress_service.set_partial_transcript, job_id, chunk_start, text)
+
+        return TranscriptionListener(on_progress=on_progress, on_segments=on_segments, on_partial=on_partial)
+
+    def _run_audio_analysis(
+        self,
+        job_id: str,
+        video_path: str,
+        workspace: MediaWorkspace,
+        context: StageContext,
+        media_info: Optional[MediaInfo] = None,
+        read_local_video: bool = True,
+    ) -> Optional[dict]:
+        """音声解析を実行（read_local_video が偽の場合はダウンロードせずストレージから直接抽出する）"""
+        if media_info is not None and not media_info.has_audio:
+            logger.info(f"[{job_id}] 音声ストリームがないため音声解析をスキップ: video_path={video_path}")
+            self._update_progress(context, job_id, "audio", PhaseStatus.completed, 100)
+            return self.audio_analyzer.result_to_dict(TranscriptionResult(segments=[], has_audio=False))
 
-    def _run_audio_analysis(self, job_id: str, video_path: str) -> Optional[dict]:
-        """音声解析を実行"""
         logger.info(f"[{job_id}] 音声解析開始: video_path={video_path}")
-        self.progress_service.update_progress(
-            job_id, "audio", PhaseStatus.processing, 0
-        )
+        self._update_progress(context, job_id, "audio", PhaseStatus.processing, 0)
+        context.run_unless_cancelled(self.progress_service.reset_transcript, job_id)
 
         try:
-            result = self.audio_analyzer.analyze(video_path)
+            with workspace.in_use():
+                local_video_path = self._local_video_path(workspace) if read_local_video else None
+                waveform_output = workspace.path_for(WAVEFORM_FILENAME) if settings.waveform_enabled else None
+                result = self.audio_analyzer.analyze(
+                    video_path,
+                    local_video_path,
+                    waveform_output=waveform_output,
+                    duration=media_info.duration if media_info is not None else None,
+                    listener=self._transcription_listener(job_id, context),
+                    cancel_event=context.cancel_event,
+                )
+            context.raise_if_cancelled()
             result_dict = self.audio_analyzer.result_to_dict(result)
 
             # 音声解析結果の詳細ログ
@@ -177,15 +355,11 @@ class OrchestratorService:
                 for i, seg in enumerate(result_dict["segments"][:3]):  # 最初の3セグメントのみ
                     logger.info(f"[{job_id}] 音声セグメント[{i}]: text=\"{seg.get('text', '')[:50]}...\", confidence={seg.get('confidence', 0):.2f}")
 
-            self.progress_service.update_progress(
-                job_id, "audio", PhaseStatus.completed, 100
-            )
+            self._update_progress(context, job_id, "audio", PhaseStatus.completed, 100)
 
             return result_dict
 
         except Exception as e:
             logger.error(f"[{job_id}] 音声解析失敗: error={e}", exc_info=True)
-            self.progress_service.update_progress(
-                job_id, "audio", PhaseStatus.failed, 0
-            )
+            self._update_progress(context, job_id, "audio", PhaseStatus.failed, 0)
             raise
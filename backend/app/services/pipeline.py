@@ -0,0 +1,229 @@
+"""解析ステージを依存グラフとして並行実行するためのユーティリティ"""
+import concurrent.futures
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# タイムアウト・キャンセルしたステージのスレッドが停止するまで待つ時間（秒）
+DEFAULT_CANCEL_GRACE_SECONDS = 10.0
+
+
+class FatalStageError(RuntimeError):
+    """後続・並行ステージを打ち切るべき致命的なエラー"""
+
+
+class StageTimeoutError(TimeoutError):
+    """ステージが制限時間内に完了しなかった"""
+
+
+class StageCancelledError(RuntimeError):
+    """他ステージの致命的エラーによりキャンセルされた"""
+
+
+class StageContext:
+    """
+    実行中のステージに渡す停止通知
+
+    タイムアウト・キャンセルしたステージのスレッドは強制終了できないため、
+    ステージ側でチャンクやリクエストの区切りごとに raise_if_cancelled() を呼んで処理を打ち切る。
+    進捗などの書き込みは run_unless_cancelled() 経由で行い、打ち切り後に結果が上書きされないようにする。
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.cancel_event = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def cancel(self) -> None:
+        # 実行中の run_unless_cancelled() の完了を待ってから停止を通知する
+        with self._lock:
+            self.cancel_event.set()
+
+    def raise_if_cancelled(self) -> None:
+        if self.cancel_event.is_set():
+            raise StageCancelledError(f"{self.name} はキャンセルされました")
+
+    def run_unless_cancelled(self, func: Callable[..., T], *args, **kwargs) -> Optional[T]:
+        """停止が通知されていなければ func を実行する（通知済みの場合は何もしない）"""
+        with self._lock:
+            if self.cancel_event.is_set():
+                return None
+            return func(*args, **kwargs)
+
+
+@dataclass
+class Stage:
+    """
+    解析ステージの定義
+
+    Attributes:
+        name: ステージ名（結果辞書のキー）
+        func: 依存ステージの結果辞書と StageContext を受け取り、ステージ結果を返す関数
+        depends_on: 完了を待つステージ名
+        timeout: 開始からの制限時間（秒）。Noneの場合は無制限
+        fatal: Trueの場合、失敗時に他ステージをキャンセルする
+    """
+    name: str
+    func: Callable[[dict[str, Any], StageContext], Any]
+    depends_on: tuple[str, ...] = ()
+    timeout: Optional[float] = None
+    fatal: bool = False
+
+
+@dataclass
+class StageGraphResult:
+    results: dict[str, Any] = field(default_factory=dict)
+    errors: dict[str, BaseException] = field(default_factory=dict)
+    # 猶予時間内に停止しなかったステージ名（スレッドはまだ実行中）
+    abandoned: list[str] = field(default_factory=list)
+
+    @property
+    def fatal_error(self) -> Optional[BaseException]:
+        for error in self.errors.values():
+            if isinstance(error, FatalStageError):
+                return error
+        return None
+
+
+class StageGraph:
+    """
+    依存関係を持つステージ群をスレッドプールで並行実行する
+
+    - 依存ステージが（成功・失敗問わず）終了した時点で後続ステージを開始
+    - 後続ステージには成功した依存ステージの結果のみ渡される
+    - タイムアウトしたステージは失敗扱いとし、結果は破棄する（StageContext で停止を通知）
+    - 致命的エラー時は未開始ステージをキャンセルし、実行中ステージには
+      StageContext で停止を通知する
+    - 停止を通知したステージは cancel_grace_seconds まで終了を待ってから戻る
+    """
+
+    def __init__(self, stages: list[Stage], cancel_grace_seconds: float = DEFAULT_CANCEL_GRACE_SECONDS):
+        names = [stage.name for stage in stages]
+        if len(set(names)) != len(names):
+            raise ValueError(f"ステージ名が重複しています: {names}")
+        for stage in stages:
+            unknown = set(stage.depends_on) - set(names)
+            if unknown:
+                raise ValueError(f"未定義の依存ステージです: {stage.name} -> {sorted(unknown)}")
+        self.stages = {stage.name: stage for stage in stages}
+        self.cancel_event = threading.Event()
+        self.cancel_grace_seconds = cancel_grace_seconds
+
+    def run(self) -> StageGraphResult:
+        outcome = StageGraphResult()
+        waiting = dict(self.stages)
+        running: dict[concurrent.futures.Future, tuple[Stage, float]] = {}
+        contexts: dict[str, StageContext] = {}
+        stopped: dict[concurrent.futures.Future, str] = {}
+        finished: set[str] = set()
+
+        executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(len(self.stages), 1),
+            thread_name_prefix="stage",
+        )
+        try:
+            while waiting or running:
+                if not self.cancel_event.is_set():
+                    for name, stage in list(waiting.items()):
+                        if all(dep in finished for dep in stage.depends_on):
+                            del waiting[name]
+                            deps = {dep: outcome.results[dep] for dep in stage.depends_on if dep in outcome.results}
+                            context = contexts[name] = StageContext(name)
+                            future = executor.submit(stage.func, deps, context)
+                            running[future] = (stage, time.monotonic())
+
+                if self.cancel_event.is_set():
+                    for name in waiting:
+                        outcome.errors[name] = StageCancelledError(f"{name} はキャンセルされました")
+                    waiting.clear()
+                    for future, (stage, _) in list(running.items()):
+                        self._stop(future, contexts[stage.name], stopped)
+                        outcome.errors.setdefault(
+                            stage.name, StageCancelledError(f"{stage.name} はキャンセルされました")
+                        )
+                    running.clear()
+                    break
+
+                if not running:
+                    # 依存関係が循環している場合
+                    for name in waiting:
+                        outcome.errors[name] = RuntimeError(f"{name} の依存関係を解決できません")
+                    break
+
+                done, _ = concurrent.futures.wait(
+                    running,
+                    timeout=self._next_deadline(running),
+                    return_when=concurrent.futures.FIRST_COMPLETED,
+                )
+
+                for future in done:
+                    stage, _ = running.pop(future)
+                    finished.add(stage.name)
+                    try:
+                        outcome.results[stage.name] = future.result()
+                    except BaseException as e:
+                        self._record_failure(outcome, stage, e)
+
+                now = time.monotonic()
+                for future, (stage, started_at) in list(running.items()):
+                    if stage.timeout is not None and now - started_at >= stage.timeout:
+                        running.pop(future)
+                        self._stop(future, contexts[stage.name], stopped)
+                        finished.add(stage.name)
+                        logger.error(f"ステージタイムアウト: stage={stage.name}, timeout={stage.timeout}s")
+                        self._record_failure(
+                            outcome,
+                            stage,
+                            StageTimeoutError(f"{stage.name} が {stage.timeout} 秒以内に完了しませんでした"),
+                        )
+        finally:
+            if stopped:
+                # 停止を通知したステージが作業ファイルを使い終えるまで待つ（猶予を超えた場合は待たない）
+                concurrent.futures.wait(stopped, timeout=self.cancel_grace_seconds)
+                outcome.abandoned = [name for future, name in stopped.items() if not future.done()]
+                if outcome.abandoned:
+                    logger.warning(f"停止を通知したステージが終了していません: stages={outcome.abandoned}")
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return outcome
+
+    @staticmethod
+    def _stop(
+        future: concurrent.futures.Future,
+        context: StageContext,
+        stopped: dict[concurrent.futures.Future, str],
+    ) -> None:
+        """実行中のステージに停止を通知する（未開始ならキャンセル）"""
+        context.cancel()
+        if not future.cancel():
+            stopped[future] = context.name
+
+    def _record_failure(self, outcome: StageGraphResult, stage: Stage, error: BaseException) -> None:
+        if stage.fatal and not isinstance(error, FatalStageError):
+            error = FatalStageError(f"{stage.name}: {error}")
+        outcome.errors[stage.name] = error
+        if isinstance(error, FatalStageError):
+            logger.error(f"致命的エラーのため残りのステージをキャンセルします: stage={stage.name}")
+            self.cancel_event.set()
+
+    @staticmethod
+    def _next_deadline(running: dict[concurrent.futures.Future, tuple[Stage, float]]) -> Optional[float]:
+        now = time.monotonic()
+        remaining = [
+            stage.timeout - (now - started_at)
+            for stage, started_at in running.values()
+            if stage.timeout is not None
+        ]
+        if not remaining:
+            return None
+        return max(min(remaining), 0.0)
@@ -1,11 +1,11 @@
 import json
+import threading
 import time
 from enum import Enum
 from typing import Optional
 
-import redis
-
 from app.config import get_settings
+from app.services.clients import get_redis_client
 
 settings = get_settings()
 
@@ -35,9 +35,14 @@ PHASE_WEIGHTS = {
 
 class ProgressService:
     def __init__(self):
-        self.redis_client = redis.from_url(settings.redis_url)
+        self.redis_client = get_redis_client()
         self.progress_key_prefix = "job_progress:"
         self.start_time_key_prefix = "job_start_time:"
+        self.transcript_key_prefix = "job_transcript:"
+        self.partial_transcript_key_prefix = "job_transcript_partial:"
+        self.transcript_generation_key_prefix = "job_transcript_generation:"
+        # 解析ステージが並行して進捗を更新するため、読み取り→書き込みを直列化する
+        self._lock = threading.Lock()
 
     def _get_progress_key(self, job_id: str) -> str:
         return f"{self.progress_key_prefix}{job_id}"
@@ -45,6 +50,15 @@ class ProgressService:
     def _get_start_time_key(self, job_id: str) -> str:
         return f"{self.start_time_key_prefix}{job_id}"
 
+    def _get_transcript_key(self, job_id: str) -> str:
+        return f"{self.transcript_key_prefix}{job_id}"
+
+    def _get_partial_transcript_key(self, job_id: str) -> str:
+        return f"{self.partial_transcript_key_prefix}{job_id}"
+
+    def _get_transcript_generation_key(self, job_id: str) -> str:
+        return f"{self.transcript_generation_key_prefix}{job_id}"
+
     def initialize_progress(self, job_id: str) -> None:
         """ジョブの進捗を初期化"""
         progress_data = {
@@ -76,6 +90,16 @@ class ProgressService:
         progress: float,
     ) -> None:
         """フェーズの進捗を更新"""
+        with self._lock:
+            self._update_progress(job_id, phase, status, progress)
+
+    def _update_progress(
+        self,
+        job_id: str,
+        phase: str,
+        status: PhaseStatus,
+        progress: float,
+    ) -> None:
         progress_data = self.get_progress(job_id)
         if not progress_data:
             self.initialize_progress(job_id)
@@ -161,7 +185,64 @@ class ProgressService:
                 ex=86400,
             )
 
+    def append_transcript_segments(self, job_id: str, segments: list[dict]) -> None:
+        """確定した文字起こしセグメントを追加（解析完了前に参照できるようにする）"""
+        if not segments:
+            return
+        key = self._get_transcript_key(job_id)
+        pipeline = self.redis_client.pipeline()
+        pipeline.rpush(key, *[json.dumps(segment, ensure_ascii=False) for segment in segments])
+        pipeline.expire(key, 86400)
+        pipeline.execute()
+
+    def get_transcript_segments(self, job_id: str, start: int = 0) -> list[dict]:
+        """確定済みの文字起こしセグメント（start 番目以降、追加順）"""
+        return [json.loads(item) for item in self.redis_client.lrange(self._get_transcript_key(job_id), start, -1)]
+
+    def set_partial_transcript(self, job_id: str, chunk_start: float, text: str) -> None:
+        """チャンクごとの未確定の文字起こし（確定したら空文字で消す）"""
+        key = self._get_partial_transcript_key(job_id)
+        field = f"{chunk_start:.3f}"
+        if text:
+            pipeline = self.redis_client.pipeline()
+            pipeline.hset(key, field, text)
+            pipeline.expire(key, 86400)
+            pipeline.execute()
+        else:
+            self.redis_client.hdel(key, field)
+
+    def get_partial_transcripts(self, job_id: str) -> dict[str, str]:
+        """チャンク開始時刻（秒）ごとの未確定の文字起こし"""
+        partials = self.redis_client.hgetall(self._get_partial_transcript_key(job_id))
+        return {
+            (key.decode() if isinstance(key, bytes) else key): (value.decode() if isinstance(value, bytes) else value)
+            for key, value in partials.items()
+        }
+
+    def reset_transcript(self, job_id: str) -> None:
+        """
+        途中経過の文字起こしを破棄（再実行時に前回分と混ざらないようにする）
+
+        世代番号を進め、配信側が読み込み済みの位置を先頭に戻せるようにする。
+        """
+        generation_key = self._get_transcript_generation_key(job_id)
+        pipeline = self.redis_client.pipeline()
+        pipeline.delete(self._get_transcript_key(job_id), self._get_partial_transcript_key(job_id))
+        pipeline.incr(generation_key)
+        pipeline.expire(generation_key, 86400)
+        pipeline.execute()
+
+    def get_transcript_generation(self, job_id: str) -> int:
+        """途中経過の文字起こしを破棄した回数（セグメントの一覧が作り直されたことの判定に使う）"""
+        value = self.redis_client.get(self._get_transcript_generation_key(job_id))
+        return int(value) if value else 0
+
     def delete_progress(self, job_id: str) -> None:
         """ジョブの進捗データを削除"""
         self.redis_client.delete(self._get_progress_key(job_id))
         self.redis_client.delete(self._get_start_time_key(job_id))
+        self.redis_client.delete(
+            self._get_transcript_key(job_id),
+            self._get_partial_transcript_key(job_id),
+            self._get_transcript_generation_key(job_id),
+        )
@@ -0,0 +1,120 @@
+"""タイムライン編集用の低解像度プロキシ動画と HLS レンディションの生成"""
+import logging
+import os
+import subprocess
+from dataclasses import dataclass, field
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+ENCODE_TIMEOUT_SECONDS = 3600
+HLS_PLAYLIST_NAME = "playlist.m3u8"
+HLS_INIT_NAME = "init.mp4"
+
+HLS_CONTENT_TYPES = {
+    ".m3u8": "application/vnd.apple.mpegurl",
+    ".m4s": "video/iso.segment",
+    ".mp4": "video/mp4",
+}
+
+
+class ProxyRenditionError(Exception):
+    """プロキシ・HLS の生成に失敗"""
+
+
+@dataclass
+class ProxyRendition:
+    proxy_path: str
+    hls_directory: str
+    hls_files: list[str] = field(default_factory=list)
+
+
+def hls_content_type(filename: str) -> str:
+    return HLS_CONTENT_TYPES.get(os.path.splitext(filename)[1].lower(), "application/octet-stream")
+
+
+def build_proxy_command(input_path: str, output_path: str, ffmpeg_path: str = "ffmpeg") -> list[str]:
+    """
+    短辺を proxy_short_side に縮小した低ビットレートの MP4 を生成するコマンド
+
+    - 縦動画でも横動画でも短辺基準で縮小し、元より大きくはしない
+    - キーフレームを HLS のセグメント長ごとに強制し、シーク・セグメント分割を揃える
+    - タイムスタンプは元動画のまま（編集時刻は元動画の時間軸で扱う）
+    """
+    settings = get_settings()
+    short_side = settings.proxy_short_side
+    segment = settings.proxy_hls_segment_seconds
+    scale = (
+        f"scale='if(gt(iw,ih),-2,min({short_side},iw))':'if(gt(iw,ih),min({short_side},ih),-2)'"
+    )
+    return [
+        ffmpeg_path,
+        "-y",
+        "-i", input_path,
+        "-map", "0:v:0",
+        "-map", "0:a:0?",
+        "-vf", scale,
+        "-c:v", "libx264",
+        "-preset", "veryfast",
+        "-crf", "28",
+        "-maxrate", f"{settings.proxy_max_bitrate_kbps}k",
+        "-bufsize", f"{settings.proxy_max_bitrate_kbps * 2}k",
+        "-pix_fmt", "yuv420p",
+        "-force_key_frames", f"expr:gte(t,n_forced*{segment})",
+        "-c:a", "aac",
+        "-b:a", "96k",
+        "-ac", "2",
+        "-movflags", "+faststart",
+        output_path,
+    ]
+
+
+def build_hls_command(proxy_path: str, hls_directory: str, ffmpeg_path: str = "ffmpeg") -> list[str]:
+    """プロキシ動画を再エンコードせずに fMP4 セグメントの HLS に分割するコマンド"""
+    settings = get_settings()
+    return [
+        ffmpeg_path,
+        "-y",
+        "-i", proxy_path,
+        "-c", "copy",
+        "-f", "hls",
+        "-hls_time", str(settings.proxy_hls_segment_seconds),
+        "-hls_playlist_type", "vod",
+        "-hls_segment_type", "fmp4",
+        "-hls_fmp4_init_filename", HLS_INIT_NAME,
+        "-hls_segment_filename", os.path.join(hls_directory, "segment_%05d.m4s"),
+        os.path.join(hls_directory, HLS_PLAYLIST_NAME),
+    ]
+
+
+def _run(command: list[str]) -> None:
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, timeout=ENCODE_TIMEOUT_SECONDS)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        raise ProxyRenditionError(f"ffmpeg の実行に失敗しました: {e}") from e
+    if result.returncode != 0:
+        raise ProxyRenditionError(f"ffmpeg error: {result.stderr}")
+
+
+def generate_proxy_rendition(input_path: str, work_directory: str, ffmpeg_path: str = "ffmpeg") -> ProxyRendition:
+    """
+    元動画からプロキシ MP4 と HLS を work_directory に生成
+
+    Returns:
+        生成したファイルのローカルパス（HLS はディレクトリとファイル名の一覧）
+    """
+    proxy_path = os.path.join(work_directory, "proxy.mp4")
+    hls_directory = os.path.join(work_directory, "hls")
+    os.makedirs(hls_directory, exist_ok=True)
+
+    _run(build_proxy_command(input_path, proxy_path, ffmpeg_path))
+    _run(build_hls_command(proxy_path, hls_directory, ffmpeg_path))
+
+    hls_files = sorted(os.listdir(hls_directory))
+    if HLS_PLAYLIST_NAME not in hls_files:
+        raise ProxyRenditionError("HLS のプレイリストが生成されませんでした")
+    logger.info(
+        f"プロキシ動画を生成しました: size={os.path.getsize(proxy_path)}, hls_files={len(hls_files)}"
+    )
+    return ProxyRendition(proxy_path=proxy_path, hls_directory=hls_directory, hls_files=hls_files)
@@ -0,0 +1,255 @@
+"""チャンク単位で再開可能なアップロード（tus 方式）のセッション管理"""
+import json
+import logging
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import BinaryIO, Optional
+
+from app.config import get_settings
+from app.services.clients import get_redis_client
+from app.services.storage import BaseStorageService, StorageService
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# ロックの値が自分のトークンと一致する場合のみ削除する（期限切れ後に他のリクエストが取得したロックを消さない）
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class ResumableUploadError(Exception):
+    """レジューマブルアップロードの操作エラー"""
+
+
+class UploadSessionNotFound(ResumableUploadError):
+    """セッションが存在しない（期限切れ・完了済み・中止済み）"""
+
+
+class UploadSessionBusy(ResumableUploadError):
+    """同じセッションへのチャンク送信が処理中"""
+
+
+class InvalidUploadChunk(ResumableUploadError):
+    """チャンクのサイズやセッションの状態が不正"""
+
+
+class UploadOffsetMismatch(ResumableUploadError):
+    """送信されたオフセットがサーバー側の受信済みオフセットと一致しない"""
+
+    def __init__(self, offset: int):
+        super().__init__(f"オフセットが一致しません: current={offset}")
+        self.offset = offset
+
+
+@dataclass
+class ResumableUploadSession:
+    upload_id: str
+    file_path: str
+    storage_upload_id: str
+    content_type: str
+    size: int
+    chunk_size: int
+    offset: int = 0
+    # [パート番号, パート識別子] の一覧
+    parts: list[list] = field(default_factory=list)
+
+    def expected_chunk_length(self) -> int:
+        """次に受け付けるチャンクのバイト数（最終チャンク以外は chunk_size 固定）"""
+        return min(self.chunk_size, self.size - self.offset)
+
+
+class ResumableUploadService:
+    """
+    レジューマブルアップロードのセッションを Redis に保持し、
+    チャンクをそのままストレージの分割アップロードへ転送する
+
+    - チャンク = S3 マルチパートの1パート / GCS レジューマブルセッションの1チャンク
+    - 受信済みオフセットはストレージへの送信が成功したチャンクまで
+    - 同一セッションへの同時送信はロックで拒否する
+    - セッションの期限切れ後も中止できるよう、ストレージ側のアップロードIDを期限なしの索引に残し、
+      sweep_expired() で期限切れのものを中止する
+    """
+
+    key_prefix = "resumable_upload:"
+    # upload_id -> セッションの期限（UNIX 時刻）
+    expiry_index_key = "resumable_upload_index:expiry"
+    # upload_id -> {"file_path", "storage_upload_id"}（期限切れ後の中止に使う）
+    storage_index_key = "resumable_upload_index:storage"
+    sweep_lock_key = "resumable_upload_index:sweep"
+
+    def __init__(self, storage_service: Optional[BaseStorageService] = None):
+        self.redis_client = get_redis_client()
+        self.storage_service = storage_service or StorageService()
+
+    def _get_key(self, upload_id: str) -> str:
+        return f"{self.key_prefix}{upload_id}"
+
+    def _save(self, session: ResumableUploadSession) -> None:
+        expiration = settings.resumable_upload_expiration_seconds
+        pipeline = self.redis_client.pipeline()
+        pipeline.set(self._get_key(session.upload_id), json.dumps(asdict(session)), ex=expiration)
+        pipeline.hset(
+            self.storage_index_key,
+            session.upload_id,
+            json.dumps({"file_path": session.file_path, "storage_upload_id": session.storage_upload_id}),
+        )
+        pipeline.zadd(self.expiry_index_key, {session.upload_id: time.time() + expiration})
+        pipeline.execute()
+
+    def _forget(self, upload_id: str) -> None:
+        """セッションと期限切れ中止用の索引を削除"""
+        pipeline = self.redis_client.pipeline()
+        pipeline.delete(self._get_key(upload_id))
+        pipeline.hdel(self.storage_index_key, upload_id)
+        pipeline.zrem(self.expiry_index_key, upload_id)
+        pipeline.execute()
+
+    def create(
+        self,
+        upload_id: str,
+        original_filename: str,
+        content_type: str,
+        size: int,
+    ) -> ResumableUploadSession:
+        """ストレージの分割アップロードを開始し、セッションを作成"""
+        file_path, storage_upload_id = self.storage_service.create_resumable_upload(
+            original_filename, content_type, size
+        )
+        session = ResumableUploadSession(
+            upload_id=upload_id,
+            file_path=file_path,
+            storage_upload_id=storage_upload_id,
+            content_type=content_type,
+            size=size,
+            chunk_size=settings.resumable_upload_chunk_size_bytes,
+        )
+        self._save(session)
+        logger.info(f"レジューマブルアップロード開始: upload_id={upload_id}, size={size}")
+        return session
+
+    def get(self, upload_id: str) -> Optional[ResumableUploadSession]:
+        data = self.redis_client.get(self._get_key(upload_id))
+        if not data:
+            return None
+        return ResumableUploadSession(**json.loads(data))
+
+    def _require(self, upload_id: str) -> ResumableUploadSession:
+        session = self.get(upload_id)
+        if session is None:
+            raise UploadSessionNotFound(upload_id)
+        return session
+
+    def write_chunk(
+        self,
+        upload_id: str,
+        offset: int,
+        data: BinaryIO,
+        length: int,
+    ) -> ResumableUploadSession:
+        """
+        offset から始まるチャンクをストレージへ送信し、受信済みオフセットを進める
+
+        Args:
+            upload_id: セッションID
+            offset: クライアントが送信したチャンクの開始位置（Upload-Offset）
+            data: チャンクの内容
+            length: チャンクのバイト数
+        """
+        lock_key = f"{self._get_key(upload_id)}:lock"
+        lock_token = uuid.uuid4().hex
+        if not self.redis_client.set(lock_key, lock_token, nx=True, ex=600):
+            raise UploadSessionBusy(upload_id)
+        try:
+            session = self._require(upload_id)
+            if offset != session.offset:
+                raise UploadOffsetMismatch(session.offset)
+            if session.offset >= session.size:
+                raise InvalidUploadChunk("アップロードは既に全て受信済みです")
+            expected = session.expected_chunk_length()
+            if length != expected:
+                raise InvalidUploadChunk(f"チャンクのサイズが不正です: expected={expected}, actual={length}")
+
+            part_number = offset // session.chunk_size + 1
+            part = self.storage_service.upload_part(
+                session.file_path,
+                session.storage_upload_id,
+                part_number,
+                offset,
+                data,
+                length,
+                session.size,
+            )
+            session.parts.append([part_number, part])
+            session.offset += length
+            self._save(session)
+            return session
+        finally:
+            self.redis_client.eval(RELEASE_LOCK_SCRIPT, 1, lock_key, lock_token)
+
+    def complete(self, upload_id: str) -> ResumableUploadSession:
+        """全チャンク受信後にストレージのオブジェクトを確定し、セッションを破棄"""
+        session = self._require(upload_id)
+        if session.offset != session.size:
+            raise InvalidUploadChunk(
+                f"アップロードが完了していません: offset={session.offset}, size={session.size}"
+            )
+        self.storage_service.complete_resumable_upload(
+            session.file_path,
+            session.storage_upload_id,
+            [(part_number, part) for part_number, part in session.parts],
+        )
+        self._forget(upload_id)
+        logger.info(f"レジューマブルアップロード完了: upload_id={upload_id}, parts={len(session.parts)}")
+        return session
+
+    def abort(self, upload_id: str) -> ResumableUploadSession:
+        """ストレージの分割アップロードを中止し、セッションを破棄"""
+        session = self._require(upload_id)
+        try:
+            self.storage_service.abort_resumable_upload(session.file_path, session.storage_upload_id)
+        finally:
+            self._forget(upload_id)
+        logger.info(f"レジューマブルアップロード中止: upload_id={upload_id}")
+        return session
+
+    def claim_sweep(self) -> bool:
+        """前回の掃除から resumable_upload_sweep_interval_seconds が経過していれば True（複数プロセスで1回のみ）"""
+        return bool(
+            self.redis_client.set(
+                self.sweep_lock_key, "1", nx=True, ex=settings.resumable_upload_sweep_interval_seconds
+            )
+        )
+
+    def sweep_expired(self, limit: int = 100) -> int:
+        """
+        セッションが期限切れになったストレージの分割アップロードを中止する
+
+        完了・中止されずに放置されたセッションは Redis から消えるが、S3 のマルチパートは
+        中止するまで送信済みパートが残るため、索引に残したアップロードIDで中止する。
+        中止に失敗したものは索引から外し、バケットのライフサイクルルールに委ねる。
+
+        Returns:
+            処理したアップロード数
+        """
+        upload_ids = self.redis_client.zrangebyscore(self.expiry_index_key, 0, time.time(), start=0, num=limit)
+        for raw_id in upload_ids:
+            upload_id = raw_id.decode() if isinstance(raw_id, bytes) else raw_id
+            if self.redis_client.exists(self._get_key(upload_id)):
+                # 期限の直前に更新されたセッション（索引は次の保存で更新される）
+                continue
+            data = self.redis_client.hget(self.storage_index_key, upload_id)
+            try:
+                if data:
+                    target = json.loads(data)
+                    self.storage_service.abort_resumable_upload(target["file_path"], target["storage_upload_id"])
+                    logger.info(f"期限切れのレジューマブルアップロードを中止しました: upload_id={upload_id}")
+            except Exception as e:
+                logger.warning(f"期限切れのレジューマブルアップロードの中止に失敗しました: upload_id={upload_id}, error={e}")
+            finally:
+                self._forget(upload_id)
+        return len(upload_ids)
@@ -1,13 +1,144 @@
+import concurrent.futures
+import io
 import os
+import threading
+import time
 import uuid
 from abc import ABC, abstractmethod
-from typing import BinaryIO, Optional
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import BinaryIO, Callable, Optional
 
 from app.config import get_settings
+from app.services.clients import registry
 
 settings = get_settings()
 
 
+@dataclass
+class ObjectMetadata:
+    """ストレージオブジェクトのメタデータ"""
+    size: int
+    etag: Optional[str] = None
+    content_type: Optional[str] = None
+
+
+@dataclass
+class UploadTarget:
+    """ブラウザからストレージへ直接アップロードするための送信先"""
+    file_path: str
+    method: str  # "POST"（フォーム送信）または "PUT"
+    url: str
+    fields: dict[str, str] = field(default_factory=dict)
+    headers: dict[str, str] = field(default_factory=dict)
+
+
+# アップロード済みバイト数と総バイト数（不明な場合はNone）を受け取るコールバック
+UploadProgressCallback = Callable[[int, Optional[int]], None]
+
+
+class _ProgressTracker:
+    """並行転送から呼ばれる増分バイト数を累積してコールバックに通知する"""
+
+    def __init__(self, total: Optional[int], on_progress: Optional[UploadProgressCallback]):
+        self.total = total
+        self.on_progress = on_progress
+        self.transferred = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, bytes_amount: int) -> None:
+        if not self.on_progress:
+            return
+        with self._lock:
+            self.transferred += bytes_amount
+            transferred = self.transferred
+        self.on_progress(transferred, self.total)
+
+
+class _ProgressReader(io.RawIOBase):
+    """read() されたバイト数を通知するファイルラッパー"""
+
+    def __init__(self, file: BinaryIO, tracker: _ProgressTracker):
+        self._file = file
+        self._tracker = tracker
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._file.read(size)
+        if data:
+            self._tracker(len(data))
+        return data
+
+    def seekable(self) -> bool:
+        return self._file.seekable()
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        return self._file.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+
+class SignedUrlCache:
+    """
+    署名付きURLのTTLキャッシュ
+
+    有効期限を bucket_seconds 単位の時間枠の終端に揃えて署名することで、
+    同じ時間枠内の要求には同一のURLを返す。返すURLの残り有効期間は
+    常に要求された expiration 以上となる。
+    """
+
+    def __init__(self, bucket_seconds: int, max_entries: int):
+        self.bucket_seconds = max(bucket_seconds, 1)
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple[str, int, int], tuple[str, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_sign(self, file_path: str, expiration: int, sign: Callable[[int], str]) -> str:
+        """
+        Args:
+            file_path: ストレージ内のファイルパス
+            expiration: 最低限必要な有効期間（秒）
+            sign: 有効期間（秒）を受け取って署名付きURLを生成する関数
+        """
+        now = time.time()
+        window = int(now // self.bucket_seconds)
+        key = (file_path, expiration, window)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] - now >= expiration:
+                self._entries.move_to_end(key)
+                return entry[0]
+
+        expires_at = (window + 1) * self.bucket_seconds + expiration
+        url = sign(int(expires_at - now))
+
+        with self._lock:
+            self._entries[key] = (url, expires_at)
+            self._entries.move_to_end(key)
+            # 期限切れと上限超過分を削除
+            for stale_key, (_, stale_expires_at) in list(self._entries.items()):
+                if stale_expires_at - now < stale_key[1] or len(self._entries) > self.max_entries:
+                    del self._entries[stale_key]
+                else:
+                    break
+        return url
+
+
+def _remaining_size(file: BinaryIO) -> Optional[int]:
+    """ファイルオブジェクトの現在位置から末尾までのサイズ"""
+    try:
+        position = file.tell()
+        end = file.seek(0, io.SEEK_END)
+        file.seek(position)
+        return end - position
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return None
+
+
 class BaseStorageService(ABC):
     """ストレージサービスの基底クラス"""
 
@@ -17,13 +148,59 @@ class BaseStorageService(ABC):
         file: BinaryIO,
         original_filename: str,
         content_type: str = "video/mp4",
+        on_progress: Optional[UploadProgressCallback] = None,
     ) -> str:
         """ファイルをアップロードし、保存先パスを返す"""
         pass
 
+    def download_file(self, file_path: str, destination: str, size: Optional[int] = None) -> None:
+        """
+        ファイルをダウンロード
+
+        パートサイズを超えるファイルは、事前確保したファイルに対して
+        複数のレンジGETを並列に書き込む。
+
+        Args:
+            file_path: ストレージ内のファイルパス
+            destination: 保存先のローカルパス
+            size: 既知のファイルサイズ（省略時はメタデータを取得）
+        """
+        if size is None:
+            metadata = self.get_file_metadata(file_path)
+            size = metadata.size if metadata else None
+
+        part_size = settings.storage_download_part_size_bytes
+        concurrency = settings.storage_download_concurrency
+        if size is None or size <= part_size or concurrency <= 1:
+            self._download_whole(file_path, destination)
+            return
+
+        with open(destination, "wb") as f:
+            f.truncate(size)
+
+        def download_part(start: int) -> None:
+            end = min(start + part_size, size) - 1
+            with open(destination, "r+b") as f:
+                f.seek(start)
+                self._download_range(file_path, start, end, f)
+
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+                for future in [executor.submit(download_part, start) for start in range(0, size, part_size)]:
+                    future.result()
+        except BaseException:
+            if os.path.exists(destination):
+                os.unlink(destination)
+            raise
+
+    @abstractmethod
+    def _download_whole(self, file_path: str, destination: str) -> None:
+        """ファイル全体を1リクエストでダウンロード"""
+        pass
+
     @abstractmethod
-    def download_file(self, file_path: str, destination: str) -> None:
-        """ファイルをダウンロード"""
+    def _download_range(self, file_path: str, start: int, end: int, file: BinaryIO) -> None:
+        """バイト範囲 [start, end] をファイルオブジェクトの現在位置に書き込む"""
         pass
 
     @abstractmethod
@@ -36,6 +213,85 @@ class BaseStorageService(ABC):
         """署名付きURLを生成"""
         pass
 
+    @abstractmethod
+    def create_upload_target(
+        self,
+        original_filename: str,
+        content_type: str,
+        size: int,
+        expiration: int = 3600,
+        origin: Optional[str] = None,
+    ) -> UploadTarget:
+        """
+        クライアントが API を経由せずにアップロードするための送信先を発行
+
+        Args:
+            original_filename: 元のファイル名（拡張子の決定に使用）
+            content_type: MIMEタイプ
+            size: アップロードされるファイルのバイト数
+            expiration: 有効期限（秒）
+            origin: アップロード元のオリジン（CORS 用、GCS のみ使用）
+        """
+        pass
+
+    @abstractmethod
+    def create_resumable_upload(
+        self,
+        original_filename: str,
+        content_type: str,
+        size: Optional[int],
+    ) -> tuple[str, str]:
+        """
+        分割アップロードを開始する（size は不明な場合 None）
+
+        Returns:
+            (保存先のファイルパス, アップロードID（S3: UploadId / GCS: セッションURL）)
+        """
+        pass
+
+    @abstractmethod
+    def upload_part(
+        self,
+        file_path: str,
+        upload_id: str,
+        part_number: int,
+        offset: int,
+        data: BinaryIO,
+        length: int,
+        total_size: Optional[int],
+    ) -> Optional[str]:
+        """
+        分割アップロードの1パートを送信
+
+        Args:
+            file_path: 保存先のファイルパス
+            upload_id: create_resumable_upload が返したID
+            part_number: パート番号（1始まり）
+            offset: パート先頭のファイル内オフセット
+            data: パートの内容
+            length: パートのバイト数
+            total_size: ファイル全体のバイト数（最終パート以外で不明な場合は None）
+
+        Returns:
+            完了時に必要なパートの識別子（S3 の ETag、不要な場合は None）
+        """
+        pass
+
+    @abstractmethod
+    def complete_resumable_upload(
+        self,
+        file_path: str,
+        upload_id: str,
+        parts: list[tuple[int, Optional[str]]],
+    ) -> None:
+        """分割アップロードを完了し、オブジェクトを確定する"""
+        pass
+
+    @abstractmethod
+    def abort_resumable_upload(self, file_path: str, upload_id: str) -> None:
+        """分割アップロードを中止し、送信済みのパートを破棄する"""
+        pass
+
     @abstractmethod
     def delete_file(self, file_path: str) -> None:
         """ファイルを削除"""
@@ -52,8 +308,17 @@ class BaseStorageService(ABC):
         pass
 
     @abstractmethod
-    def get_file_stream(self, file_path: str):
-        """ファイルをストリーム形式で取得"""
+    def get_file_stream(self, file_path: str, start: Optional[int] = None, end: Optional[int] = None):
+        """
+        ファイルをストリーム形式で取得
+
+        start/end を指定した場合はバイト範囲 [start, end] のみを読み出す
+        """
+        pass
+
+    @abstractmethod
+    def get_file_metadata(self, file_path: str) -> Optional[ObjectMetadata]:
+        """ファイルのメタデータを取得（存在しない場合はNone）"""
         pass
 
     def _generate_unique_path(self, original_filename: str) -> str:
@@ -68,16 +333,27 @@ class S3StorageService(BaseStorageService):
 
     def __init__(self):
         import boto3
+        from boto3.s3.transfer import TransferConfig
         from botocore.exceptions import ClientError
 
+        from botocore.config import Config
+
         self.ClientError = ClientError
+        # 並列転送・並行リクエストでクライアントを共有するため接続プールを広げる
         self.s3_client = boto3.client(
             "s3",
             endpoint_url=settings.storage_endpoint,
             aws_access_key_id=settings.storage_access_key,
             aws_secret_access_key=settings.storage_secret_key,
+            config=Config(max_pool_connections=settings.storage_max_pool_connections),
         )
         self.bucket = settings.storage_bucket
+        self.transfer_config = TransferConfig(
+            multipart_threshold=settings.storage_multipart_threshold_bytes,
+            multipart_chunksize=settings.storage_multipart_chunksize_bytes,
+            max_concurrency=settings.storage_transfer_concurrency,
+            use_threads=True,
+        )
         self._ensure_bucket_exists()
 
     def _ensure_bucket_exists(self) -> None:
@@ -92,43 +368,57 @@ class S3StorageService(BaseStorageService):
         file: BinaryIO,
         original_filename: str,
         content_type: str = "video/mp4",
+        on_progress: Optional[UploadProgressCallback] = None,
     ) -> str:
         file_path = self._generate_unique_path(original_filename)
-        self.s3_client.upload_fileobj(
-            file,
-            self.bucket,
-            file_path,
-            ExtraArgs={"ContentType": content_type},
-        )
-        return file_path
+        return self.upload_file_to_path(file, file_path, content_type, on_progress=on_progress)
 
     def upload_file_to_path(
         self,
         file: BinaryIO,
         file_path: str,
         content_type: str = "video/mp4",
+        on_progress: Optional[UploadProgressCallback] = None,
     ) -> str:
         """
         指定したパスにファイルをアップロード
 
+        閾値を超えるファイルは設定に従ってマルチパートで並列アップロードする。
+
         Args:
             file: ファイルオブジェクト
             file_path: 保存先のファイルパス（キー）
             content_type: MIMEタイプ
+            on_progress: 進捗コールバック（アップロード済みバイト数, 総バイト数）
 
         Returns:
             保存先のファイルパス（キー）
         """
+        tracker = _ProgressTracker(_remaining_size(file), on_progress)
         self.s3_client.upload_fileobj(
             file,
             self.bucket,
             file_path,
             ExtraArgs={"ContentType": content_type},
+            Config=self.transfer_config,
+            Callback=tracker,
         )
         return file_path
 
-    def download_file(self, file_path: str, destination: str) -> None:
-        self.s3_client.download_file(self.bucket, file_path, destination)
+    def _download_whole(self, file_path: str, destination: str) -> None:
+        response = self.s3_client.get_object(Bucket=self.bucket, Key=file_path)
+        with open(destination, "wb") as f:
+            for chunk in response["Body"].iter_chunks(chunk_size=1024 * 1024):
+                f.write(chunk)
+
+    def _download_range(self, file_path: str, start: int, end: int, file: BinaryIO) -> None:
+        response = self.s3_client.get_object(
+            Bucket=self.bucket,
+            Key=file_path,
+            Range=f"bytes={start}-{end}",
+        )
+        for chunk in response["Body"].iter_chunks(chunk_size=1024 * 1024):
+            file.write(chunk)
 
     def get_file_content(self, file_path: str) -> bytes:
         response = self.s3_client.get_object(Bucket=self.bucket, Key=file_path)
@@ -141,6 +431,97 @@ class S3StorageService(BaseStorageService):
             ExpiresIn=expiration,
         )
 
+    def create_upload_target(
+        self,
+        original_filename: str,
+        content_type: str,
+        size: int,
+        expiration: int = 3600,
+        origin: Optional[str] = None,
+    ) -> UploadTarget:
+        """
+        署名付き POST を発行
+
+        Content-Type とサイズをポリシーの条件に含めるため、
+        申告と異なるファイルはストレージ側で拒否される。
+        """
+        file_path = self._generate_unique_path(original_filename)
+        presigned = self.s3_client.generate_presigned_post(
+            Bucket=self.bucket,
+            Key=file_path,
+            Fields={"Content-Type": content_type},
+            Conditions=[
+                {"Content-Type": content_type},
+                ["content-length-range", size, size],
+            ],
+            ExpiresIn=expiration,
+        )
+        url = presigned["url"]
+        # POST ポリシーの署名はホストを含まないため、公開エンドポイントへ置き換えられる
+        if settings.storage_public_endpoint and settings.storage_endpoint:
+            url = url.replace(settings.storage_endpoint.rstrip("/"), settings.storage_public_endpoint.rstrip("/"), 1)
+        return UploadTarget(
+            file_path=file_path,
+            method="POST",
+            url=url,
+            fields=presigned["fields"],
+        )
+
+    def create_resumable_upload(
+        self,
+        original_filename: str,
+        content_type: str,
+        size: Optional[int],
+    ) -> tuple[str, str]:
+        file_path = self._generate_unique_path(original_filename)
+        response = self.s3_client.create_multipart_upload(
+            Bucket=self.bucket,
+            Key=file_path,
+            ContentType=content_type,
+        )
+        return file_path, response["UploadId"]
+
+    def upload_part(
+        self,
+        file_path: str,
+        upload_id: str,
+        part_number: int,
+        offset: int,
+        data: BinaryIO,
+        length: int,
+        total_size: Optional[int],
+    ) -> Optional[str]:
+        response = self.s3_client.upload_part(
+            Bucket=self.bucket,
+            Key=file_path,
+            UploadId=upload_id,
+            PartNumber=part_number,
+            Body=data,
+            ContentLength=length,
+        )
+        return response["ETag"]
+
+    def complete_resumable_upload(
+        self,
+        file_path: str,
+        upload_id: str,
+        parts: list[tuple[int, Optional[str]]],
+    ) -> None:
+        self.s3_client.complete_multipart_upload(
+            Bucket=self.bucket,
+            Key=file_path,
+            UploadId=upload_id,
+            MultipartUpload={
+                "Parts": [
+                    {"PartNumber": part_number, "ETag": etag}
+                    for part_number, etag in sorted(parts)
+                ]
+            },
+        )
+
+    def abort_resumable_upload(self, file_path: str, upload_id: str) -> None:
+        self.s3_client.abort_multipart_upload(Bucket=self.bucket, Key=file_path, UploadId=upload_id)
+
     def delete_file(self, file_path: str) -> None:
         self.s3_client.delete_object(Bucket=self.bucket, Key=file_path)
 
@@ -158,11 +539,25 @@ class S3StorageService(BaseStorageService):
         except self.ClientError:
             return None
 
-    def get_file_stream(self, file_path: str):
+    def get_file_stream(self, file_path: str, start: Optional[int] = None, end: Optional[int] = None):
         """Get file as streaming response"""
-        response = self.s3_client.get_object(Bucket=self.bucket, Key=file_path)
+        params = {"Bucket": self.bucket, "Key": file_path}
+        if start is not None:
+            params["Range"] = f"bytes={start}-{'' if end is None else end}"
+        response = self.s3_client.get_object(**params)
         return response["Body"]
 
+    def get_file_metadata(self, file_path: str) -> Optional[ObjectMetadata]:
+        try:
+            response = self.s3_client.head_object(Bucket=self.bucket, Key=file_path)
+        except self.ClientError:
+            return None
+        return ObjectMetadata(
+            size=response["ContentLength"],
+            etag=response.get("ETag", "").strip('"') or None,
+            content_type=response.get("ContentType"),
+        )
+
 
 class GCSStorageService(BaseStorageService):
     """Google Cloud Storage サービス"""
@@ -175,47 +570,170 @@ class GCSStorageService(BaseStorageService):
         self.client = storage.Client()
         self.bucket_name = settings.storage_bucket
         self.bucket = self.client.bucket(self.bucket_name)
+        self._credentials = None
+        self._credentials_lock = threading.Lock()
+        self._http_session = None
+        self._http_session_lock = threading.Lock()
+        self._signed_url_cache = SignedUrlCache(
+            bucket_seconds=settings.signed_url_cache_bucket_seconds,
+            max_entries=settings.signed_url_cache_max_entries,
+        )
 
     def upload_file(
         self,
         file: BinaryIO,
         original_filename: str,
         content_type: str = "video/mp4",
+        on_progress: Optional[UploadProgressCallback] = None,
     ) -> str:
         file_path = self._generate_unique_path(original_filename)
-        blob = self.bucket.blob(file_path)
-        blob.upload_from_file(file, content_type=content_type)
-        return file_path
+        return self.upload_file_to_path(file, file_path, content_type, on_progress=on_progress)
 
     def upload_file_to_path(
         self,
         file: BinaryIO,
         file_path: str,
         content_type: str = "video/mp4",
+        on_progress: Optional[UploadProgressCallback] = None,
     ) -> str:
-        blob = self.bucket.blob(file_path)
-        blob.upload_from_file(file, content_type=content_type)
+        """
+        指定したパスにファイルをアップロード
+
+        - 閾値以上のファイルは分割して並列アップロードし、compose で結合する
+        - それ以外はチャンク単位のレジューマブルアップロードを行う
+        """
+        size = _remaining_size(file)
+        tracker = _ProgressTracker(size, on_progress)
+        if size is not None and size >= settings.gcs_parallel_composite_threshold_bytes:
+            self._upload_composite(file, file_path, content_type, tracker)
+            return file_path
+
+        blob = self.bucket.blob(file_path, chunk_size=settings.gcs_upload_chunk_size_bytes)
+        blob.upload_from_file(_ProgressReader(file, tracker), content_type=content_type, size=size)
         return file_path
 
-    def download_file(self, file_path: str, destination: str) -> None:
+    def _upload_composite(
+        self,
+        file: BinaryIO,
+        file_path: str,
+        content_type: str,
+        tracker: _ProgressTracker,
+    ) -> None:
+        """パーツを並列アップロードし、1つのオブジェクトに結合する"""
+        part_size = settings.storage_multipart_chunksize_bytes
+        max_in_flight = settings.storage_transfer_concurrency
+        part_blobs = []
+        upload_id = uuid.uuid4().hex
+
+        def upload_part(blob, data: bytes) -> None:
+            blob.upload_from_file(io.BytesIO(data), content_type=content_type, size=len(data))
+            tracker(len(data))
+
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+                pending: set[concurrent.futures.Future] = set()
+                while True:
+                    data = file.read(part_size)
+                    if not data:
+                        break
+                    part_blob = self.bucket.blob(f"{file_path}.parts/{upload_id}/{len(part_blobs):05d}")
+                    part_blobs.append(part_blob)
+                    pending.add(executor.submit(upload_part, part_blob, data))
+                    # 読み込み済みパーツのメモリを抑えるため、同時実行数を超えたら完了を待つ
+                    if len(pending) >= max_in_flight:
+                        done, pending = concurrent.futures.wait(
+                            pending, return_when=concurrent.futures.FIRST_COMPLETED
+                        )
+                        for future in done:
+                            future.result()
+                for future in pending:
+                    future.result()
+
+            self._compose(part_blobs, file_path, content_type, f"{file_path}.parts/{upload_id}")
+        finally:
+            self._delete_blobs(part_blobs)
+
+    def _compose(self, sources: list, file_path: str, content_type: str, prefix: str) -> None:
+        """
+        compose は1回あたり32ソースまでのため、段階的に結合する
+
+        中間オブジェクトは段ごとに名前を分け（prefix/compose-L{段}-{番号}）、
+        次の段で結合した時点で削除する。
+        """
+        max_sources = 32
+        previous: list = []
+        current: list = []
+        level = 0
+        try:
+            while len(sources) > max_sources:
+                for index in range(0, len(sources), max_sources):
+                    intermediate = self.bucket.blob(f"{prefix}/compose-L{level}-{index // max_sources:05d}")
+                    intermediate.content_type = content_type
+                    intermediate.compose(sources[index:index + max_sources])
+                    current.append(intermediate)
+                self._delete_blobs(previous)
+                previous, sources, current = current, current, []
+                level += 1
+
+            destination = self.bucket.blob(file_path)
+            destination.content_type = content_type
+            destination.compose(sources)
+        finally:
+            self._delete_blobs(previous + current)
+
+    def _delete_blobs(self, blobs: list) -> None:
+        for blob in blobs:
+            try:
+                blob.delete()
+            except self.NotFound:
+                pass
+
+    def _download_whole(self, file_path: str, destination: str) -> None:
         blob = self.bucket.blob(file_path)
         blob.download_to_filename(destination)
 
+    def _download_range(self, file_path: str, start: int, end: int, file: BinaryIO) -> None:
+        blob = self.bucket.blob(file_path)
+        blob.download_to_file(file, start=start, end=end)
+
     def get_file_content(self, file_path: str) -> bytes:
         blob = self.bucket.blob(file_path)
         return blob.download_as_bytes()
 
-    def generate_presigned_url(self, file_path: str, expiration: int = 3600) -> str:
-        from datetime import timedelta
+    def _get_credentials(self):
+        """
+        署名用の認証情報を取得
+
+        認証情報はインスタンス内で保持し、アクセストークンの期限が
+        近づいた場合のみ refresh する。
+        """
         import google.auth
         from google.auth.transport import requests as google_requests
 
+        with self._credentials_lock:
+            if self._credentials is None:
+                self._credentials, _ = google.auth.default()
+
+            credentials = self._credentials
+            margin = timedelta(seconds=settings.gcs_credentials_refresh_margin_seconds)
+            expiry = getattr(credentials, "expiry", None)
+            # google-auth の expiry は naive UTC
+            if not credentials.token or expiry is None or expiry - datetime.utcnow() < margin:
+                credentials.refresh(google_requests.Request())
+            return credentials
+
+    def generate_presigned_url(self, file_path: str, expiration: int = 3600) -> str:
+        return self._signed_url_cache.get_or_sign(
+            file_path,
+            expiration,
+            lambda seconds: self._sign_url(file_path, seconds),
+        )
+
+    def _sign_url(self, file_path: str, expiration: int) -> str:
         blob = self.bucket.blob(file_path)
 
-        # Get credentials and refresh to ensure a valid access token
-        credentials, _ = google.auth.default()
-        auth_request = google_requests.Request()
-        credentials.refresh(auth_request)
+        # Get credentials (cached) with a valid access token
+        credentials = self._get_credentials()
 
         # Resolve service account email
         service_account_email = settings.gcs_service_account_email
@@ -239,6 +757,101 @@ class GCSStorageService(BaseStorageService):
             access_token=credentials.token,
         )
 
+    def create_upload_target(
+        self,
+        original_filename: str,
+        content_type: str,
+        size: int,
+        expiration: int = 3600,
+        origin: Optional[str] = None,
+    ) -> UploadTarget:
+        """
+        レジューマブルアップロードのセッションを発行
+
+        セッションURLへの PUT（Content-Range による分割送信も可）でアップロードする。
+        サイズはセッション作成時に固定されるため、申告と異なる送信は完了しない。
+        """
+        file_path = self._generate_unique_path(original_filename)
+        blob = self.bucket.blob(file_path)
+        session_url = blob.create_resumable_upload_session(
+            content_type=content_type,
+            size=size,
+            origin=origin,
+        )
+        return UploadTarget(
+            file_path=file_path,
+            method="PUT",
+            url=session_url,
+            headers={"Content-Type": content_type},
+        )
+
+    def create_resumable_upload(
+        self,
+        original_filename: str,
+        content_type: str,
+        size: Optional[int],
+    ) -> tuple[str, str]:
+        file_path = self._generate_unique_path(original_filename)
+        blob = self.bucket.blob(file_path)
+        return file_path, blob.create_resumable_upload_session(content_type=content_type, size=size)
+
+    def upload_part(
+        self,
+        file_path: str,
+        upload_id: str,
+        part_number: int,
+        offset: int,
+        data: BinaryIO,
+        length: int,
+        total_size: Optional[int],
+    ) -> Optional[str]:
+        """
+        レジューマブルセッションへ Content-Range 付きでチャンクを送信
+
+        最終チャンク以外は 308 が返り、Range ヘッダーに永続化済みの範囲が入る。
+        チャンク末尾まで永続化されていない場合は失敗として扱い、クライアントに再送させる。
+        """
+        end = offset + length - 1
+        response = self._get_http_session().put(
+            upload_id,
+            data=data,
+            headers={
+                "Content-Length": str(length),
+                "Content-Range": f"bytes {offset}-{end}/{'*' if total_size is None else total_size}",
+            },
+        )
+        if response.status_code in (200, 201):
+            return None
+        if response.status_code == 308:
+            persisted = response.headers.get("Range", "")
+            if persisted == f"bytes=0-{end}":
+                return None
+            raise IOError(f"チャンクが永続化されていません: expected=bytes=0-{end}, actual={persisted or 'none'}")
+        raise IOError(f"チャンクの送信に失敗しました: status={response.status_code}, body={response.text[:200]}")
+
+    def complete_resumable_upload(
+        self,
+        file_path: str,
+        upload_id: str,
+        parts: list[tuple[int, Optional[str]]],
+    ) -> None:
+        # 最終チャンクの受信時点でオブジェクトが確定しているため、何もしない
+        pass
+
+    def abort_resumable_upload(self, file_path: str, upload_id: str) -> None:
+        # セッションURLへの DELETE でセッションを破棄する（成功時は 499 が返る）
+        self._get_http_session().delete(upload_id)
+
+    def _get_http_session(self):
+        """セッションURLへの送信用 HTTP セッション（URL 自体が認可情報を含む）"""
+        if self._http_session is None:
+            import requests
+
+            with self._http_session_lock:
+                if self._http_session is None:
+                    self._http_session = requests.Session()
+        return self._http_session
+
     def delete_file(self, file_path: str) -> None:
         blob = self.bucket.blob(file_path)
         blob.delete()
@@ -252,21 +865,47 @@ class GCSStorageService(BaseStorageService):
         blob.reload()
         return blob.size
 
-    def get_file_stream(self, file_path: str):
+    def get_file_stream(self, file_path: str, start: Optional[int] = None, end: Optional[int] = None):
         """Get file as streaming response"""
-        from io import BytesIO
-
         blob = self.bucket.blob(file_path)
-        # Download to BytesIO buffer
-        buffer = BytesIO()
-        blob.download_to_file(buffer)
-        buffer.seek(0)
-        return buffer
+        # BlobReader はチャンク単位のレンジリクエストで逐次読み込むため、
+        # メモリ使用量はファイルサイズではなくチャンクサイズに比例する
+        chunk_size = settings.storage_stream_chunk_size_bytes
+        if end is not None:
+            # 範囲の終端を超えて先読みしないよう、チャンクを範囲長に合わせて縮める
+            # （GCS のチャンクサイズは 256KB の倍数である必要がある）
+            unit = 256 * 1024
+            span = end - (start or 0) + 1
+            chunk_size = min(chunk_size, max(unit, -(-span // unit) * unit))
+        reader = blob.open("rb", chunk_size=chunk_size)
+        if start:
+            reader.seek(start)
+        return reader
+
+    def get_file_metadata(self, file_path: str) -> Optional[ObjectMetadata]:
+        blob = self.bucket.get_blob(file_path)
+        if blob is None:
+            return None
+        # generation はオブジェクトの上書きごとに変わるため、ETag より確実な版識別子として使う
+        return ObjectMetadata(
+            size=blob.size,
+            etag=str(blob.generation) if blob.generation else blob.etag,
+            content_type=blob.content_type,
+        )
 
 
-def StorageService() -> BaseStorageService:
-    """設定に基づいて適切なストレージサービスを返すファクトリ関数"""
+def _create_storage_service() -> BaseStorageService:
     if settings.use_gcs:
         return GCSStorageService()
     else:
         return S3StorageService()
+
+
+def StorageService() -> BaseStorageService:
+    """
+    設定に基づいて適切なストレージサービスを返すファクトリ関数
+
+    インスタンスはプロセス内で共有されるため、クライアント生成と
+    バケット存在確認はプロセスごとに1回のみ行われる。
+    """
+    return registry.get("storage", _create_storage_service)
@@ -0,0 +1,171 @@
+"""タイムラインのサムネイルスプライトとリスク箇所の静止画の生成"""
+import logging
+import math
+import os
+import subprocess
+from dataclasses import asdict, dataclass, field
+from typing import Optional
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_TIMEOUT_SECONDS = 1800
+SPRITE_PATTERN = "sprite_%03d.jpg"
+
+
+class ThumbnailError(Exception):
+    """サムネイルの生成に失敗"""
+
+
+@dataclass
+class ThumbnailManifest:
+    """
+    スプライトシートのレイアウトと生成済みファイルの一覧
+
+    スプライトの i 番目（0始まり）のサムネイルは時刻 i * interval のフレームで、
+    sprites[i // (columns * rows)] の (i % columns, (i // columns) % rows) のセルにある。
+    """
+    token: str
+    interval: float
+    width: int
+    height: int
+    columns: int
+    rows: int
+    count: int
+    sprites: list[str] = field(default_factory=list)
+    # リスクアイテムID -> 静止画のファイル名
+    stills: dict[str, str] = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def still_filename(risk_item_id: str) -> str:
+    return f"risk_{risk_item_id}.jpg"
+
+
+def sprite_interval(duration: Optional[float]) -> float:
+    """スプライトの間隔（長い動画でもサムネイル数が上限を超えないよう広げる）"""
+    settings = get_settings()
+    interval = float(settings.thumbnail_interval_seconds)
+    if duration:
+        interval = max(interval, duration / settings.thumbnail_max_count)
+    return round(interval, 3)
+
+
+def build_thumbnail_command(
+    input_path: str,
+    output_directory: str,
+    interval: float,
+    stills: list[tuple[str, float]],
+    ffmpeg_path: str = "ffmpeg",
+) -> list[str]:
+    """
+    1回のデコードでスプライトシートと各時刻の静止画を出力するコマンド
+
+    デコードしたフレームを split で分岐し、スプライト用は一定間隔で間引いてタイル状に並べ、
+    静止画用は trim で指定時刻以降の最初の1フレームを取り出す。
+    """
+    settings = get_settings()
+    width, height = settings.thumbnail_width, settings.thumbnail_height
+    columns, rows = settings.thumbnail_sprite_columns, settings.thumbnail_sprite_rows
+
+    branches = "".join(f"[still{i}]" for i in range(len(stills)))
+    filters = [
+        f"[0:v]split={len(stills) + 1}[sprite_in]{branches}",
+        (
+            f"[sprite_in]fps=1/{interval},"
+            f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+            f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,"
+            f"tile={columns}x{rows}[sprite]"
+        ),
+    ]
+    for i, (_, timestamp) in enumerate(stills):
+        filters.append(
+            f"[still{i}]trim=start={timestamp:.3f},setpts=PTS-STARTPTS,"
+            f"scale={settings.thumbnail_still_width}:-2[still{i}_out]"
+        )
+
+    command = [
+        ffmpeg_path,
+        "-y",
+        "-i", input_path,
+        "-filter_complex", ";".join(filters),
+        "-map", "[sprite]",
+        "-q:v", "4",
+        os.path.join(output_directory, SPRITE_PATTERN),
+    ]
+    for i, (risk_item_id, _) in enumerate(stills):
+        command += [
+            "-map", f"[still{i}_out]",
+            "-frames:v", "1",
+            "-q:v", "3",
+            os.path.join(output_directory, still_filename(risk_item_id)),
+        ]
+    return command
+
+
+def generate_thumbnails(
+    input_path: str,
+    output_directory: str,
+    token: str,
+    duration: Optional[float],
+    risk_timestamps: dict[str, float],
+    ffmpeg_path: str = "ffmpeg",
+) -> ThumbnailManifest:
+    """
+    スプライトシートとリスク箇所の静止画を output_directory に生成
+
+    Args:
+        input_path: 動画のローカルパス
+        output_directory: 出力先ディレクトリ
+        token: 生成ごとに異なる識別子（URL を不変にするためのパス要素）
+        duration: 動画の長さ（秒）。静止画の時刻の補正とサムネイル数の見積もりに使う
+        risk_timestamps: リスクアイテムID -> 時刻（秒）
+    """
+    settings = get_settings()
+    interval = sprite_interval(duration)
+
+    stills = []
+    for risk_item_id, timestamp in risk_timestamps.items():
+        timestamp = max(timestamp, 0.0)
+        if duration:
+            # 末尾を指す時刻ではフレームが取れないため、最後のフレーム付近に寄せる
+            timestamp = min(timestamp, max(duration - 0.1, 0.0))
+        stills.append((risk_item_id, timestamp))
+
+    command = build_thumbnail_command(input_path, output_directory, interval, stills, ffmpeg_path)
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, timeout=THUMBNAIL_TIMEOUT_SECONDS)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        raise ThumbnailError(f"ffmpeg の実行に失敗しました: {e}") from e
+    if result.returncode != 0:
+        raise ThumbnailError(f"ffmpeg error: {result.stderr}")
+
+    files = set(os.listdir(output_directory))
+    sprites = sorted(name for name in files if name.startswith("sprite_"))
+    if not sprites:
+        raise ThumbnailError("スプライトシートが生成されませんでした")
+
+    per_sheet = settings.thumbnail_sprite_columns * settings.thumbnail_sprite_rows
+    count = math.ceil(duration / interval) if duration else len(sprites) * per_sheet
+    manifest = ThumbnailManifest(
+        token=token,
+        interval=interval,
+        width=settings.thumbnail_width,
+        height=settings.thumbnail_height,
+        columns=settings.thumbnail_sprite_columns,
+        rows=settings.thumbnail_sprite_rows,
+        count=min(count, len(sprites) * per_sheet),
+        sprites=sprites,
+        stills={
+            risk_item_id: still_filename(risk_item_id)
+            for risk_item_id, _ in stills
+            if still_filename(risk_item_id) in files
+        },
+    )
+    logger.info(
+        f"サムネイルを生成しました: sprites={len(sprites)}, stills={len(manifest.stills)}, interval={interval}"
+    )
+    return manifest
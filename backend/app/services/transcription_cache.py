@@ -0,0 +1,92 @@
+"""抽出した音声の内容と認識設定をキーにした文字起こし結果のキャッシュ"""
+import hashlib
+import json
+import logging
+from typing import Optional
+
+from app.config import get_settings
+from app.services.clients import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+# キャッシュの形式や結果の組み立て方を変えた場合に上げる（既存のエントリは参照されなくなる）
+CACHE_VERSION = 3
+KEY_PREFIX = "transcription_cache:"
+
+
+class AudioFingerprint:
+    """PCM とサンプルレートの SHA-256（音声の抽出と並行して PCM を先頭から順に受け取る）"""
+
+    def __init__(self, sample_rate: int):
+        self._digest = hashlib.sha256(f"{sample_rate}:".encode())
+
+    def update(self, pcm: bytes) -> None:
+        self._digest.update(pcm)
+
+    def hexdigest(self) -> str:
+        return self._digest.hexdigest()
+
+
+def config_fingerprint(recognizer_config: dict) -> str:
+    """
+    認識結果に影響する設定のハッシュ
+
+    認識モデル・言語・機能に加え、チャンク分割・発話検出・送信形式の設定も含める。
+    """
+    settings = get_settings()
+    config = {
+        "version": CACHE_VERSION,
+        "recognizer": recognizer_config,
+        "mode": settings.transcription_mode,
+        "chunk": [
+            settings.transcription_chunk_max_seconds,
+            settings.transcription_chunk_min_seconds,
+            settings.transcription_chunk_overlap_seconds,
+            settings.transcription_silence_threshold_db,
+        ],
+        "vad": settings.transcription_vad_enabled,
+        "encoding": [
+            settings.transcription_audio_encoding,
+            settings.transcription_opus_min_duration_seconds,
+            settings.transcription_opus_bitrate_kbps,
+        ],
+    }
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()[:16]
+
+
+class TranscriptionCache:
+    """
+    Redis に保存する文字起こし結果のキャッシュ
+
+    - キーは「音声のハッシュ + 設定のハッシュ」。設定が変わると別のキーになり、古いエントリは期限で消える
+    - 期限は transcription_cache_ttl_seconds（Redis の maxmemory-policy による追い出しも前提とする）
+    - 読み書きの失敗は文字起こしを止めない（キャッシュなしとして扱う）
+    """
+
+    def __init__(self, redis_client=None):
+        self.redis_client = redis_client or get_redis_client()
+
+    @staticmethod
+    def key(audio_hash: str, config_hash: str) -> str:
+        return f"{KEY_PREFIX}{config_hash}:{audio_hash}"
+
+    def get(self, key: str) -> Optional[dict]:
+        try:
+            data = self.redis_client.get(key)
+        except Exception as e:
+            logger.warning(f"文字起こしキャッシュの取得に失敗しました: key={key}, error={e}")
+            return None
+        if not data:
+            return None
+        try:
+            return json.loads(data)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"文字起こしキャッシュの形式が不正です: key={key}, error={e}")
+            return None
+
+    def set(self, key: str, result: dict) -> None:
+        ttl = get_settings().transcription_cache_ttl_seconds
+        try:
+            self.redis_client.set(key, json.dumps(result, ensure_ascii=False), ex=ttl if ttl > 0 else None)
+        except Exception as e:
+            logger.warning(f"文字起こしキャッシュの保存に失敗しました: key={key}, error={e}")
@@ -0,0 +1,154 @@
+"""リクエストボディを受信しながらストレージへ送信するアップロード取り込み"""
+import asyncio
+import hashlib
+import io
+import logging
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.config import get_settings
+from app.services.storage import BaseStorageService
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class UploadTooLarge(Exception):
+    """受信済みのサイズが上限を超えた"""
+
+    def __init__(self, max_size: int):
+        super().__init__(f"ファイルサイズが上限を超えています: max_size={max_size}")
+        self.max_size = max_size
+
+
+class EmptyUpload(Exception):
+    """ファイルの内容が空"""
+
+
+@dataclass
+class IngestResult:
+    file_path: str
+    size: int
+    sha256: str
+
+
+class StreamingStorageUpload:
+    """
+    受信したバイト列をディスクに書かずにストレージの分割アップロードへ送信する
+
+    - パートサイズ分たまるごとに1パートとして送信し、次のパートの受信と並行させる
+    - 受信と同じ1パスで SHA-256 を計算する
+    - 上限を超えた時点で UploadTooLarge を送出する（呼び出し側で abort する）
+    - GCS のセッションは順序通りの送信が必要なため、送信中のパートは常に1つ
+    """
+
+    def __init__(
+        self,
+        storage_service: BaseStorageService,
+        original_filename: str,
+        content_type: str,
+        max_size: int,
+        part_size: Optional[int] = None,
+    ):
+        self.storage_service = storage_service
+        self.original_filename = original_filename
+        self.content_type = content_type
+        self.max_size = max_size
+        self.part_size = part_size or settings.storage_multipart_chunksize_bytes
+        self.size = 0
+        self._hash = hashlib.sha256()
+        self._buffer = bytearray()
+        self._file_path: Optional[str] = None
+        self._upload_id: Optional[str] = None
+        self._offset = 0
+        self._parts: list[tuple[int, Optional[str]]] = []
+        self._pending: Optional[asyncio.Future] = None
+
+    async def start(self) -> None:
+        self._file_path, self._upload_id = await run_in_threadpool(
+            self.storage_service.create_resumable_upload,
+            self.original_filename,
+            self.content_type,
+            None,
+        )
+
+    async def write(self, data: bytes) -> None:
+        if not data:
+            return
+        self.size += len(data)
+        if self.size > self.max_size:
+            raise UploadTooLarge(self.max_size)
+        self._hash.update(data)
+        self._buffer.extend(data)
+        # 最終パートを必ず空でなくするため、パートサイズを超えた分がある時だけ送信する
+        while len(self._buffer) > self.part_size:
+            part = bytes(self._buffer[:self.part_size])
+            del self._buffer[:self.part_size]
+            await self._send_part(part, total_size=None)
+
+    async def _wait_pending(self) -> None:
+        if self._pending is not None:
+            pending, self._pending = self._pending, None
+            self._parts.append(await pending)
+
+    async def _send_part(self, part: bytes, total_size: Optional[int]) -> None:
+        await self._wait_pending()
+        part_number = len(self._parts) + 1
+        offset = self._offset
+        self._offset += len(part)
+
+        async def upload() -> tuple[int, Optional[str]]:
+            etag = await run_in_threadpool(
+                self.storage_service.upload_part,
+                self._file_path,
+                self._upload_id,
+                part_number,
+                offset,
+                io.BytesIO(part),
+                len(part),
+                total_size,
+            )
+            return part_number, etag
+
+        self._pending = asyncio.ensure_future(upload())
+
+    async def finish(self) -> IngestResult:
+        """残りを最終パートとして送信し、オブジェクトを確定する"""
+        if self.size == 0:
+            raise EmptyUpload()
+        await self._send_part(bytes(self._buffer), total_size=self.size)
+        self._buffer.clear()
+        await self._wait_pending()
+        await run_in_threadpool(
+            self.storage_service.complete_resumable_upload,
+            self._file_path,
+            self._upload_id,
+            self._parts,
+        )
+        result = IngestResult(file_path=self._file_path, size=self.size, sha256=self._hash.hexdigest())
+        logger.info(
+            f"ストリーミングアップロード完了: file_path={result.file_path}, "
+            f"size={result.size}, parts={len(self._parts)}, sha256={result.sha256}"
+        )
+        return result
+
+    async def abort(self) -> None:
+        """送信中のパートを待ってから分割アップロードを破棄する"""
+        if self._pending is not None:
+            try:
+                await self._pending
+            except Exception:
+                pass
+            self._pending = None
+        if self._upload_id is None:
+            return
+        try:
+            await run_in_threadpool(
+                self.storage_service.abort_resumable_upload,
+                self._file_path,
+                self._upload_id,
+            )
+        except Exception as e:
+            logger.warning(f"分割アップロードの中止に失敗しました: file_path={self._file_path}, error={e}")
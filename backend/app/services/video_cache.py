@@ -0,0 +1,222 @@
+"""ワーカー単位の動画ディスクキャッシュ（コンテンツアドレス + LRU）"""
+import errno
+import fcntl
+import hashlib
+import logging
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Iterator
+
+from app.config import get_settings
+from app.services.storage import BaseStorageService
+
+logger = logging.getLogger(__name__)
+
+ENTRY_SUFFIX = ".video"
+LOCK_SUFFIX = ".lock"
+PARTIAL_SUFFIX = ".part"
+# エントリのロックはハッシュで固定数のロックファイルに割り当てる（エントリごとのロックファイルは作らない）
+LOCK_STRIPES = 64
+
+
+class VideoCache:
+    """
+    ストレージキー + ETag/generation をキーとするディスクキャッシュ
+
+    - 同一ホスト上の複数プロセス（Celery prefork の子プロセス）で共有する
+    - エントリのハッシュで選ぶ固定数のファイルロックは、エントリの確認・公開・リンクの間だけ保持する
+      （flock 中のロックファイルは安全に削除できないため、エントリ数に比例したロックファイルを残さない）
+    - エントリごとの一時ファイルへダウンロードし、アトミックにリネームして公開する。
+      一時ファイル自体をダウンロード中のロックとし、同一オブジェクトを要求した他プロセスはその完了を待つ
+      （別のオブジェクトのダウンロードは同じロックに割り当てられても並行して進む）
+    - 利用側にはハードリンクで渡すため、エビクション後も利用中のファイルは消えない
+    - 容量上限を超えた場合は最終アクセス時刻の古い順に削除する
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+        self._counter_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self) -> dict:
+        """このプロセスでのヒット・ミス・エビクション回数"""
+        with self._counter_lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._counter_lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def _entry_path(self, file_path: str, version: str) -> str:
+        digest = hashlib.sha256(f"{file_path}\0{version}".encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{digest}{ENTRY_SUFFIX}")
+
+    def _lock_path(self, entry: str) -> str:
+        """エントリに対応するロックファイル（LOCK_STRIPES 個のいずれか）"""
+        stripe = int(os.path.basename(entry)[:8], 16) % LOCK_STRIPES
+        return os.path.join(self.directory, f"stripe-{stripe:02d}{LOCK_SUFFIX}")
+
+    @contextmanager
+    def _file_lock(self, lock_path: str, blocking: bool = True) -> Iterator[bool]:
+        with open(lock_path, "a") as lock_file:
+            flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+            try:
+                fcntl.flock(lock_file, flags)
+            except OSError as e:
+                if e.errno in (errno.EAGAIN, errno.EACCES):
+                    yield False
+                    return
+                raise
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _link(source: str, destination: str) -> None:
+        if os.path.exists(destination):
+            os.unlink(destination)
+        try:
+            os.link(source, destination)
+        except OSError:
+            # 別デバイス等でハードリンクできない場合はコピー
+            shutil.copyfile(source, destination)
+
+    def download_file(
+        self,
+        storage_service: BaseStorageService,
+        file_path: str,
+        destination: str,
+    ) -> None:
+        """
+        キャッシュ経由でファイルを destination に配置
+
+        Args:
+            storage_service: ストレージサービス
+            file_path: ストレージ内のファイルパス
+            destination: 配置先のローカルパス
+        """
+        metadata = storage_service.get_file_metadata(file_path)
+        if metadata is None or not metadata.etag or metadata.size > self.max_bytes:
+            self._count("misses")
+            storage_service.download_file(file_path, destination, size=metadata.size if metadata else None)
+            return
+
+        entry = self._entry_path(file_path, metadata.etag)
+        partial = entry + PARTIAL_SUFFIX
+        while True:
+            with self._file_lock(self._lock_path(entry)):
+                if os.path.exists(entry):
+                    self._count("hits")
+                    os.utime(entry)
+                    self._link(entry, destination)
+                    logger.info(f"動画キャッシュヒット: file_path={file_path}, stats={self.stats()}")
+                    return
+                partial_file = open(partial, "a")
+            try:
+                try:
+                    fcntl.flock(partial_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError as e:
+                    if e.errno not in (errno.EAGAIN, errno.EACCES):
+                        raise
+                    # 他プロセスがダウンロード中。完了（公開または失敗）を待ってから確認し直す
+                    fcntl.flock(partial_file, fcntl.LOCK_EX)
+                    continue
+                if not self._is_same_file(partial_file, partial):
+                    # ロックを取る前に他プロセスが公開・削除した一時ファイルだった
+                    continue
+                self._download_entry(storage_service, file_path, metadata.size, entry, partial, destination)
+                break
+            finally:
+                partial_file.close()
+
+        self.evict(keep=entry)
+
+    @staticmethod
+    def _is_same_file(opened, path: str) -> bool:
+        try:
+            return os.path.samestat(os.fstat(opened.fileno()), os.stat(path))
+        except FileNotFoundError:
+            return False
+
+    def _download_entry(
+        self,
+        storage_service: BaseStorageService,
+        file_path: str,
+        size: int,
+        entry: str,
+        partial: str,
+        destination: str,
+    ) -> None:
+        """ロック済みの一時ファイルへダウンロードし、エントリとして公開して destination にリンクする"""
+        self._count("misses")
+        try:
+            storage_service.download_file(file_path, partial, size=size)
+        except BaseException:
+            with self._file_lock(self._lock_path(entry)):
+                self._unlink_quietly(partial)
+            raise
+        with self._file_lock(self._lock_path(entry)):
+            os.replace(partial, entry)
+            self._link(entry, destination)
+        logger.info(f"動画キャッシュミス: file_path={file_path}, stats={self.stats()}")
+
+    def evict(self, keep: str | None = None) -> None:
+        """容量上限を超えている場合、最終アクセスの古いエントリから削除"""
+        with self._file_lock(os.path.join(self.directory, ".evict" + LOCK_SUFFIX)):
+            entries = []
+            for name in os.listdir(self.directory):
+                if not name.endswith(ENTRY_SUFFIX):
+                    continue
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                # 他プロセスが利用中（ダウンロード・リンク中）のエントリは削除しない
+                with self._file_lock(self._lock_path(path), blocking=False) as acquired:
+                    if not acquired:
+                        continue
+                    try:
+                        os.unlink(path)
+                    except FileNotFoundError:
+                        continue
+                total -= size
+                self._count("evictions")
+                logger.info(f"動画キャッシュエビクション: path={path}, size={size}")
+
+    @staticmethod
+    def _unlink_quietly(path: str) -> None:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+@lru_cache
+def get_video_cache() -> VideoCache:
+    settings = get_settings()
+    return VideoCache(settings.video_cache_dir, settings.video_cache_max_bytes)
+
+
+def download_video(storage_service: BaseStorageService, file_path: str, destination: str) -> None:
+    """設定に応じてキャッシュ経由またはストレージから直接ダウンロード"""
+    if get_settings().video_cache_enabled:
+        get_video_cache().download_file(storage_service, file_path, destination)
+    else:
+        storage_service.download_file(file_path, destination)
@@ -137,7 +137,8 @@ class VideoEditorService:
         else:
             command += ["-c", "copy"]
 
-        command += ["-progress", "pipe:1", "-nostats", output_path]
+        # Put moov first so the exported file starts playing before it is fully downloaded
+        command += ["-movflags", "+faststart", "-progress", "pipe:1", "-nostats", output_path]
 
         process = subprocess.Popen(
             command,
@@ -161,18 +162,46 @@ class VideoEditorService:
         if process.returncode != 0:
             raise RuntimeError(f"ffmpeg failed: {stderr_output}")
 
+    @staticmethod
+    def output_duration(
+        actions: Iterable[EditAction],
+        duration_seconds: float | None,
+    ) -> float | None:
+        """Duration of the exported video after removing cut ranges."""
+        if not duration_seconds:
+            return None
+        cuts = sorted(
+            (max(action.start_time, 0.0), min(action.end_time, duration_seconds))
+            for action in actions
+            if action.type == EditActionType.cut
+        )
+        removed = 0.0
+        covered_until = 0.0
+        for start, end in cuts:
+            start = max(start, covered_until)
+            if end > start:
+                removed += end - start
+                covered_until = end
+        remaining = duration_seconds - removed
+        return remaining if remaining > 0 else None
+
     @staticmethod
     def _parse_progress_line(
         line: str,
         total_frames: int | None,
         duration_seconds: float | None,
     ) -> float | None:
-        if line.startswith("frame=") and total_frames:
-            frame = int(line.split("=", 1)[1].strip())
-            return min(frame / total_frames * 100.0, 100.0)
-        if line.startswith("out_time_ms=") and duration_seconds:
-            out_time_ms = int(line.split("=", 1)[1].strip())
-            return min(out_time_ms / (duration_seconds * 1000) * 100.0, 100.0)
+        key, _, value = line.partition("=")
+        value = value.strip()
+        if not value.lstrip("-").isdigit():
+            # ffmpeg reports "N/A" until the first frame is encoded
+            return None
+        if key == "frame" and total_frames:
+            return min(int(value) / total_frames * 100.0, 100.0)
+        # Despite its name, out_time_ms is reported in microseconds (same as out_time_us)
+        if key in ("out_time_us", "out_time_ms") and duration_seconds:
+            out_time_seconds = max(int(value), 0) / 1_000_000
+            return min(out_time_seconds / duration_seconds * 100.0, 100.0)
         return None
 
     @staticmethod
@@ -0,0 +1,158 @@
+"""タイムライン表示用の音声波形ピーク（最小値・最大値）の計算とバイナリ形式"""
+import logging
+import struct
+from dataclasses import dataclass
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# バイナリ形式（リトルエンディアン）
+#   ヘッダー: magic "WVPK", version u8, bits u8 (8 または 16), sample_rate u32, level_count u16
+#   レベルごと: samples_per_peak u32, peak_count u32
+#   データ: レベル順に [min0, max0, min1, max1, ...]（int8 または int16）
+MAGIC = b"WVPK"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sBBIH")
+LEVEL_HEADER = struct.Struct("<II")
+
+
+class WaveformError(Exception):
+    """ピークの設定が不正、または波形ピークのデータが読めない"""
+
+
+@dataclass
+class WaveformLevel:
+    samples_per_peak: int
+    mins: np.ndarray
+    maxs: np.ndarray
+
+
+@dataclass
+class WaveformPeaks:
+    sample_rate: int
+    bits: int
+    levels: list[WaveformLevel]
+
+
+def _reduce(mins: np.ndarray, maxs: np.ndarray, factor: int) -> tuple[np.ndarray, np.ndarray]:
+    """隣接する factor 個のピークをまとめた粗いレベルを作る（端数は最後のピークにまとめる）"""
+    full = len(mins) // factor * factor
+    reduced_mins = mins[:full].reshape(-1, factor).min(axis=1)
+    reduced_maxs = maxs[:full].reshape(-1, factor).max(axis=1)
+    if full < len(mins):
+        reduced_mins = np.append(reduced_mins, mins[full:].min())
+        reduced_maxs = np.append(reduced_maxs, maxs[full:].max())
+    return reduced_mins, reduced_maxs
+
+
+class WaveformBuilder:
+    """
+    16bit モノラル PCM を先頭から順に受け取り、複数ズームレベルの最小値・最大値ピークを計算
+
+    最も細かいレベルをブロック単位のベクトル演算で求め、粗いレベルは細かいレベルのピークを
+    集約して求める（音声の抽出と並行して使い、PCM は保持しない）。
+
+    Args:
+        sample_rate: サンプルレート
+        samples_per_peak: レベルごとの1ピークあたりのサンプル数（昇順、各値は最小値の倍数）
+        bits: 出力の量子化ビット数（8 または 16）
+    """
+
+    def __init__(self, sample_rate: int, samples_per_peak: list[int], bits: int = 8):
+        if bits not in (8, 16):
+            raise WaveformError(f"bits は 8 または 16 を指定してください: {bits}")
+        levels = sorted(set(samples_per_peak))
+        if not levels or levels[0] <= 0 or any(level % levels[0] for level in levels):
+            raise WaveformError(f"レベルは最小値の倍数である必要があります: {levels}")
+        self.sample_rate = sample_rate
+        self.bits = bits
+        self.levels = levels
+        self.sample_count = 0
+        self._mins: list[np.ndarray] = []
+        self._maxs: list[np.ndarray] = []
+        self._tail = np.zeros(0, dtype=np.int16)
+
+    def feed(self, samples: np.ndarray) -> None:
+        base = self.levels[0]
+        self.sample_count += len(samples)
+        if len(self._tail):
+            samples = np.concatenate([self._tail, samples])
+        full = len(samples) // base * base
+        if full:
+            frames = np.asarray(samples[:full]).reshape(-1, base)
+            self._mins.append(frames.min(axis=1))
+            self._maxs.append(frames.max(axis=1))
+        self._tail = np.array(samples[full:], dtype=np.int16)
+
+    def finish(self) -> WaveformPeaks:
+        if len(self._tail):
+            self._mins.append(self._tail.min(keepdims=True))
+            self._maxs.append(self._tail.max(keepdims=True))
+            self._tail = np.zeros(0, dtype=np.int16)
+        if self._mins:
+            base_mins = np.concatenate(self._mins)
+            base_maxs = np.concatenate(self._maxs)
+        else:
+            base_mins = base_maxs = np.zeros(0, dtype=np.int16)
+
+        if self.bits == 8:
+            # 上位8bitを取り出す（算術シフトのため負値も正しく丸められる）
+            base_mins = (base_mins >> 8).astype(np.int8)
+            base_maxs = (base_maxs >> 8).astype(np.int8)
+
+        base = self.levels[0]
+        result = []
+        for level in self.levels:
+            mins, maxs = (base_mins, base_maxs) if level == base else _reduce(base_mins, base_maxs, level // base)
+            result.append(WaveformLevel(samples_per_peak=level, mins=mins, maxs=maxs))
+
+        logger.info(
+            f"波形ピークを計算しました: samples={self.sample_count}, sample_rate={self.sample_rate}, "
+            f"levels={[(level.samples_per_peak, len(level.mins)) for level in result]}"
+        )
+        return WaveformPeaks(sample_rate=self.sample_rate, bits=self.bits, levels=result)
+
+
+def encode_waveform_peaks(peaks: WaveformPeaks) -> bytes:
+    """ピークをバイナリ形式に変換"""
+    dtype = np.dtype("<i1") if peaks.bits == 8 else np.dtype("<i2")
+    parts = [HEADER.pack(MAGIC, FORMAT_VERSION, peaks.bits, peaks.sample_rate, len(peaks.levels))]
+    for level in peaks.levels:
+        parts.append(LEVEL_HEADER.pack(level.samples_per_peak, len(level.mins)))
+    for level in peaks.levels:
+        interleaved = np.empty(len(level.mins) * 2, dtype=dtype)
+        interleaved[0::2] = level.mins
+        interleaved[1::2] = level.maxs
+        parts.append(interleaved.tobytes())
+    return b"".join(parts)
+
+
+def decode_waveform_peaks(data: bytes) -> WaveformPeaks:
+    """バイナリ形式からピークを復元"""
+    if len(data) < HEADER.size:
+        raise WaveformError("データが短すぎます")
+    magic, version, bits, sample_rate, level_count = HEADER.unpack_from(data)
+    if magic != MAGIC or version != FORMAT_VERSION or bits not in (8, 16):
+        raise WaveformError("波形ピークの形式ではありません")
+    dtype = np.dtype("<i1") if bits == 8 else np.dtype("<i2")
+
+    offset = HEADER.size
+    headers = []
+    for _ in range(level_count):
+        headers.append(LEVEL_HEADER.unpack_from(data, offset))
+        offset += LEVEL_HEADER.size
+
+    levels = []
+    for level_samples, count in headers:
+        values = np.frombuffer(data, dtype=dtype, count=count * 2, offset=offset)
+        offset += count * 2 * dtype.itemsize
+        levels.append(WaveformLevel(samples_per_peak=level_samples, mins=values[0::2], maxs=values[1::2]))
+    return WaveformPeaks(sample_rate=sample_rate, bits=bits, levels=levels)
+
+
+def save_waveform_peaks(peaks: WaveformPeaks, output_path: str) -> None:
+    """ピークをバイナリ形式で output_path に書き出す"""
+    with open(output_path, "wb") as f:
+        f.write(encode_waveform_peaks(peaks))
+
@@ -1,4 +1,5 @@
 import logging
+import os
 import uuid
 from datetime import datetime, timezone
 
@@ -11,6 +12,24 @@ from app.models.job import AnalysisJob, JobStatus, RiskItem as DBRiskItem, RiskC
 logger = logging.getLogger(__name__)
 
 
+def save_waveform(db, video, local_path: str) -> None:
+    """音声解析ステージが書き出した波形ピークをストレージへ保存（失敗しても解析は継続）"""
+    from app.services.storage import StorageService
+
+    if not os.path.exists(local_path):
+        return
+    try:
+        with open(local_path, "rb") as f:
+            video.waveform_path = StorageService().upload_file_to_path(
+                f,
+                f"waveforms/{video.id}/{uuid.uuid4().hex}.peaks",
+                content_type="application/octet-stream",
+            )
+        db.commit()
+    except Exception as e:
+        logger.warning(f"波形ピークの保存に失敗しました: video_id={video.id}, error={e}")
+
+
 @celery_app.task(bind=True, max_retries=3)
 def analyze_video(self, job_id: str, video_path: str, metadata: dict) -> dict:
     """
@@ -39,17 +58,60 @@ def analyze_video(self, job_id: str, video_path: str, metadata: dict) -> dict:
         job.status = JobStatus.processing
         db.commit()
 
-        from app.services.orchestrator import OrchestratorService
+        from app.services.analysis_dedup import current_analysis_version, reuse_analysis_if_available
+        from app.services.media_probe import (
+            MediaProbeError,
+            apply_media_info,
+            media_info_from_video,
+            probe_stored_media,
+        )
+        from app.services.media_workspace import MediaWorkspace
+        from app.services.orchestrator import WAVEFORM_FILENAME, OrchestratorService
         from app.services.progress import ProgressService
+        from app.services.storage import StorageService
+        from app.tasks.media import schedule_thumbnails
 
         progress_service = ProgressService()
         orchestrator = OrchestratorService(progress_service)
 
         try:
-            result = orchestrator.run_analysis(job_id, video_path, metadata)
+            # 動画のダウンロードはローカルコピーを使うステージがある場合のみ、ジョブ内で1回行う。
+            # 成功・失敗に関わらず作業領域は削除する
+            with MediaWorkspace(video_path) as workspace:
+                # 最初の解析ステップとして動画のメタ情報を取得し、後続ステージで利用する
+                # （アップロード時に取得できなかった場合も、ダウンロードせずに署名付き URL から読む）
+                media_info = media_info_from_video(job.video)
+                if media_info is None:
+                    try:
+                        media_info = probe_stored_media(StorageService(), video_path)
+                        apply_media_info(job.video, media_info)
+                        db.commit()
+                    except MediaProbeError as e:
+                        logger.warning(f"動画メタ情報の取得に失敗しました: job_id={job_id}, error={e}")
+
+                # content_hash は動画処理タスクが計算する（未計算の間は再利用せずに解析する）
+                db.refresh(job.video)
+                source_job = reuse_analysis_if_available(db, job, job.video.content_hash)
+                if source_job is None:
+                    result = orchestrator.run_analysis(
+                        job_id, video_path, metadata, workspace=workspace, media_info=media_info
+                    )
+                    save_waveform(db, job.video, workspace.path_for(WAVEFORM_FILENAME))
+
+            if source_job is not None:
+                progress_service.set_job_completed(job_id)
+                schedule_thumbnails(job_id)
+                return {
+                    "job_id": job_id,
+                    "status": "completed",
+                    "overall_score": job.overall_score,
+                    "risk_count": len(source_job.risk_items),
+                    "reused_job_id": str(source_job.id),
+                }
 
             job.status = JobStatus.completed
             job.completed_at = datetime.now(timezone.utc)
+            job.analysis_version = current_analysis_version()
             job.overall_score = result.get("overall_score")
             job.risk_level = result.get("risk_level")
             job.transcription_result = result.get("transcription")
@@ -77,6 +139,7 @@ def analyze_video(self, job_id: str, video_path: str, metadata: dict) -> dict:
                 except Exception as e:
                     logger.warning(f"リスクアイテム保存スキップ: {e} - data={risk_data}")
             db.commit()
+            schedule_thumbnails(job_id)
 
             # 各解析結果の詳細をログ出力
             transcription = result.get("transcription")
@@ -7,11 +7,16 @@ from app.celery_app import celery_app
 from app.models.database import SessionLocal
 from app.models.edit_session import ExportJob, ExportJobStatus, EditSessionStatus
 from app.services.export_progress import ExportProgressService
+from app.services.media_probe import MediaProbeError, apply_media_info, probe_media
 from app.services.storage import StorageService
+from app.services.video_cache import download_video
 from app.services.video_editor import VideoEditorService
 
 logger = logging.getLogger(__name__)
 
+# 全体進捗のうちエンコードが占める割合（残りはアップロード）
+ENCODE_PROGRESS_WEIGHT = 90.0
+
 
 @celery_app.task(bind=True, max_retries=2)
 def export_video(self, export_id: str) -> dict:
@@ -51,16 +56,41 @@ def export_video(self, export_id: str) -> dict:
 
         storage_service = StorageService()
         editor_service = VideoEditorService()
-        duration_seconds = job.video.duration
         output_key = f"exports/{job.id}/{export_id}.mp4"
 
         with tempfile.TemporaryDirectory() as tmpdir:
             input_path = os.path.join(tmpdir, "input.mp4")
             output_path = os.path.join(tmpdir, "output.mp4")
 
-            storage_service.download_file(job.video.file_path, input_path)
+            download_video(storage_service, job.video.file_path, input_path)
+
+            # 解析前の動画などメタ情報が未取得の場合は、進捗計算のためここで取得する
+            if job.video.duration is None:
+                try:
+                    apply_media_info(job.video, probe_media(input_path))
+                    db.commit()
+                except MediaProbeError as e:
+                    logger.warning("Media probe failed: export_id=%s, error=%s", export_id, e)
+            # 進捗はカット後の出力動画の長さを基準に計算する
+            duration_seconds = editor_service.output_duration(session.actions, job.video.duration)
 
             def on_progress(value: float) -> None:
+                progress_service.set_progress(
+                    export_id, "processing", value * ENCODE_PROGRESS_WEIGHT / 100.0
+                )
+
+            last_reported = {"value": -1.0}
+
+            def on_upload_progress(uploaded: int, total: int | None) -> None:
+                if not total:
+                    return
+                value = round(
+                    ENCODE_PROGRESS_WEIGHT + (100.0 - ENCODE_PROGRESS_WEIGHT) * uploaded / total, 1
+                )
+                # 転送コールバックは高頻度のため、値が変わった時のみRedisに書き込む
+                if value == last_reported["value"]:
+                    return
+                last_reported["value"] = value
                 progress_service.set_progress(export_id, "processing", value)
 
             editor_service.run_ffmpeg(
@@ -76,6 +106,7 @@ def export_video(self, export_id: str) -> dict:
                     output_file,
                     output_key,
                     content_type="video/mp4",
+                    on_progress=on_upload_progress,
                 )
 
         export_job.status = ExportJobStatus.completed
@@ -0,0 +1,252 @@
+import logging
+import os
+import tempfile
+import uuid
+
+from app.celery_app import celery_app
+from app.config import get_settings
+from app.models.database import SessionLocal
+from app.models.job import AnalysisJob, Video
+from app.services.analysis_dedup import compute_file_sha256
+from app.services.faststart import needs_faststart, remux_faststart
+from app.services.proxy_rendition import HLS_PLAYLIST_NAME, generate_proxy_rendition, hls_content_type
+from app.services.storage import StorageService
+from app.services.thumbnails import ThumbnailManifest, generate_thumbnails as render_thumbnails
+from app.services.video_cache import download_video
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(bind=True, max_retries=2, default_retry_delay=60)
+def process_video_media(self, video_id: str, thumbnails: bool = False) -> dict:
+    """
+    アップロード動画の faststart 化・再生用プロキシ生成を、1回ダウンロードしたローカルコピーで続けて行う
+
+    - faststart の要否はボックスヘッダーのレンジ読み込みで判定し、何も必要なければダウンロードしない
+    - Video.content_hash が未計算なら、差し替え前のローカルコピーからここで計算する
+      （content_hash はアップロードされた元のバイト列のハッシュで、faststart で差し替えても変更しない）
+    - リマックス結果は新しいキーへ保存し、Video.file_path の条件付き更新で切り替える
+      （読み込み中のリクエストが新旧のバイト列を混在して受け取らないようにするため）
+    - プロキシは差し替え後のローカルファイルから生成する
+    - thumbnails が指定された場合（解析結果を再利用して完了済みのジョブ）は、
+      生成したプロキシからサムネイルも続けて生成する
+
+    Args:
+        video_id: 動画ID
+        thumbnails: サムネイルも生成するか
+    """
+    settings = get_settings()
+    db = SessionLocal()
+    try:
+        video = db.query(Video).filter(Video.id == video_id).first()
+        if not video:
+            logger.warning(f"動画が見つかりません: video_id={video_id}")
+            return {"video_id": video_id, "status": "not_found"}
+
+        source_path = video.file_path
+        storage_service = StorageService()
+        metadata = storage_service.get_file_metadata(source_path)
+        if metadata is None:
+            logger.warning(f"動画オブジェクトが見つかりません: video_id={video_id}, file_path={source_path}")
+            return {"video_id": video_id, "status": "not_found"}
+
+        faststart = settings.faststart_remux_enabled and needs_faststart(
+            storage_service, source_path, metadata.size
+        )
+        if not (faststart or settings.proxy_enabled or thumbnails or not video.content_hash):
+            return {"video_id": video_id, "status": "skipped"}
+
+        result = {"video_id": video_id, "status": "completed"}
+        try:
+            with tempfile.TemporaryDirectory() as tmpdir:
+                local_path = os.path.join(tmpdir, "input.mp4")
+                download_video(storage_service, source_path, local_path)
+
+                if not video.content_hash:
+                    db.query(Video).filter(Video.id == video.id, Video.content_hash.is_(None)).update(
+                        {Video.content_hash: compute_file_sha256(local_path)}, synchronize_session=False
+                    )
+                    db.commit()
+
+                if faststart:
+                    local_path, result["faststart"] = _replace_with_faststart(
+                        db, video, storage_service, metadata, local_path, tmpdir
+                    )
+
+                playback_path = local_path
+                if settings.proxy_enabled:
+                    playback_path = _store_proxy(db, video, storage_service, local_path, tmpdir)
+                    result["proxy_path"] = video.proxy_path
+
+                if thumbnails and video.job is not None and not (
+                    video.has_audio is not None and video.video_codec is None
+                ):
+                    # 失敗してもリマックス・プロキシはやり直さず、サムネイルだけ別タスクで再試行する
+                    try:
+                        _store_thumbnails(db, video.job, storage_service, playback_path, tmpdir)
+                    except Exception as e:
+                        logger.warning(f"サムネイル生成失敗のため別タスクで再試行します: video_id={video_id}, error={e}")
+                        schedule_thumbnails(video.job.id)
+        except Exception as e:
+            logger.error(f"動画処理失敗: video_id={video_id}, error={e}", exc_info=True)
+            if self.request.retries < self.max_retries:
+                raise self.retry(exc=e)
+            return {"video_id": video_id, "status": "failed", "error": str(e)}
+
+        return result
+    finally:
+        db.close()
+
+
+def _replace_with_faststart(db, video: Video, storage_service, metadata, local_path: str, tmpdir: str) -> tuple[str, str]:
+    """
+    ローカルコピーを faststart 形式にリマックスして Video.file_path を差し替える
+
+    Returns:
+        (以降の処理に使うローカルファイル, 差し替えの結果)
+    """
+    source_path = video.file_path
+    output_path = os.path.join(tmpdir, "faststart.mp4")
+    remux_faststart(local_path, output_path)
+    output_size = os.path.getsize(output_path)
+    with open(output_path, "rb") as output_file:
+        new_path = storage_service.upload_file(
+            output_file,
+            video.original_name,
+            content_type=metadata.content_type or "video/mp4",
+        )
+
+    # 処理中に別の差し替えが行われていた場合は、今回の結果を破棄する
+    updated = (
+        db.query(Video)
+        .filter(Video.id == video.id, Video.file_path == source_path)
+        .update({Video.file_path: new_path, Video.file_size: output_size}, synchronize_session=False)
+    )
+    db.commit()
+    if not updated:
+        storage_service.delete_file(new_path)
+        return local_path, "superseded"
+
+    delete_replaced_video.apply_async(
+        (source_path,),
+        countdown=get_settings().faststart_original_retention_seconds,
+    )
+    logger.info(
+        f"faststart 形式に差し替えました: video_id={video.id}, "
+        f"source={source_path}, file_path={new_path}, size={metadata.size}->{output_size}"
+    )
+    return output_path, "completed"
+
+
+@celery_app.task
+def delete_replaced_video(file_path: str) -> dict:
+    """差し替え前の動画オブジェクトを削除（まだ参照されている場合は残す）"""
+    db = SessionLocal()
+    try:
+        if db.query(Video).filter(Video.file_path == file_path).first() is not None:
+            logger.warning(f"参照中のため差し替え前の動画を削除しません: file_path={file_path}")
+            return {"file_path": file_path, "status": "in_use"}
+    finally:
+        db.close()
+
+    StorageService().delete_file(file_path)
+    logger.info(f"差し替え前の動画を削除しました: file_path={file_path}")
+    return {"file_path": file_path, "status": "deleted"}
+
+
+def _store_proxy(db, video: Video, storage_service, input_path: str, tmpdir: str) -> str:
+    """
+    タイムライン編集の再生用に低解像度プロキシ MP4 と HLS を生成してストレージへ保存
+
+    エクスポートは引き続き元動画から行うため、元動画は変更しない。
+
+    Returns:
+        生成したプロキシ MP4 のローカルパス
+    """
+    prefix = f"proxies/{video.id}"
+    rendition = generate_proxy_rendition(input_path, tmpdir)
+
+    # プレイリストは最後に保存し、参照される時点で全セグメントが揃っているようにする
+    for filename in sorted(rendition.hls_files, key=lambda name: name == HLS_PLAYLIST_NAME):
+        with open(os.path.join(rendition.hls_directory, filename), "rb") as f:
+            storage_service.upload_file_to_path(
+                f, f"{prefix}/hls/{filename}", content_type=hls_content_type(filename)
+            )
+    with open(rendition.proxy_path, "rb") as f:
+        proxy_path = storage_service.upload_file_to_path(
+            f, f"{prefix}/proxy.mp4", content_type="video/mp4"
+        )
+
+    video.proxy_path = proxy_path
+    video.hls_playlist_path = f"{prefix}/hls/{HLS_PLAYLIST_NAME}"
+    db.commit()
+    logger.info(f"プロキシ動画を保存しました: video_id={video.id}, proxy_path={proxy_path}")
+    return rendition.proxy_path
+
+
+def schedule_thumbnails(job_id) -> None:
+    """リスクアイテムの確定後にサムネイル生成を登録（失敗しても解析結果には影響させない）"""
+    if not get_settings().thumbnails_enabled:
+        return
+    try:
+        generate_thumbnails.delay(str(job_id))
+    except Exception as e:
+        logger.warning(f"サムネイル生成タスクの登録に失敗しました: job_id={job_id}, error={e}")
+
+
+@celery_app.task(bind=True, max_retries=2, default_retry_delay=60)
+def generate_thumbnails(self, job_id: str) -> dict:
+    """
+    解析完了後にサムネイルスプライトとリスク箇所の静止画を生成してストレージへ保存
+
+    - 再生用プロキシがあればプロキシからデコードする（元動画より軽いため）
+    - 生成ごとに新しいトークンのパスへ保存し、配信 URL の内容を不変にする
+
+    Args:
+        job_id: 解析ジョブID
+    """
+    db = SessionLocal()
+    try:
+        job = db.query(AnalysisJob).filter(AnalysisJob.id == job_id).first()
+        if not job or not job.video:
+            logger.warning(f"ジョブが見つかりません: job_id={job_id}")
+            return {"job_id": job_id, "status": "not_found"}
+
+        video = job.video
+        if video.has_audio is not None and video.video_codec is None:
+            return {"job_id": job_id, "status": "skipped"}
+
+        storage_service = StorageService()
+        try:
+            with tempfile.TemporaryDirectory() as tmpdir:
+                input_path = os.path.join(tmpdir, "input.mp4")
+                download_video(storage_service, video.proxy_path or video.file_path, input_path)
+                manifest = _store_thumbnails(db, job, storage_service, input_path, tmpdir)
+        except Exception as e:
+            logger.error(f"サムネイル生成失敗: job_id={job_id}, error={e}", exc_info=True)
+            if self.request.retries < self.max_retries:
+                raise self.retry(exc=e)
+            return {"job_id": job_id, "status": "failed", "error": str(e)}
+
+        return {"job_id": job_id, "status": "completed", "sprites": len(manifest.sprites)}
+    finally:
+        db.close()
+
+
+def _store_thumbnails(db, job: AnalysisJob, storage_service, input_path: str, tmpdir: str) -> ThumbnailManifest:
+    """ローカルの動画からサムネイルを生成し、新しいトークンのパスへ保存して Video に記録する"""
+    video = job.video
+    token = uuid.uuid4().hex
+    prefix = f"thumbnails/{video.id}/{token}"
+    risk_timestamps = {str(item.id): item.timestamp for item in job.risk_items}
+    output_directory = os.path.join(tmpdir, "thumbnails")
+    os.makedirs(output_directory)
+    manifest = render_thumbnails(input_path, output_directory, token, video.duration, risk_timestamps)
+    for filename in manifest.sprites + list(manifest.stills.values()):
+        with open(os.path.join(output_directory, filename), "rb") as f:
+            storage_service.upload_file_to_path(f, f"{prefix}/{filename}", content_type="image/jpeg")
+
+    video.thumbnail_manifest = manifest.to_dict()
+    db.commit()
+    logger.info(f"サムネイルを保存しました: job_id={job.id}, prefix={prefix}")
+    return manifest
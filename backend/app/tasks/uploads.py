@@ -0,0 +1,83 @@
+import logging
+
+from app.celery_app import celery_app
+from app.services.resumable_upload import ResumableUploadService
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task
+def sweep_expired_uploads() -> dict:
+    """期限切れのレジューマブルアップロードについて、ストレージ側の分割アップロードを中止する"""
+    swept = ResumableUploadService().sweep_expired()
+    if swept:
+        logger.info(f"期限切れのレジューマブルアップロードを処理しました: count={swept}")
+    return {"swept": swept}
+
+
+@celery_app.task(bind=True, max_retries=2, default_retry_delay=60)
+def verify_content_hash(self, job_id: str, file_path: str, declared_hash: str) -> dict:
+    """
+    クライアントが申告した SHA-256 で解析結果を再利用したジョブについて、実際の内容を検証する
+
+    - オブジェクトを読み流してハッシュを計算し、Video.content_hash に保存する
+      （file_path は完了通知時点のオブジェクト。faststart の差し替え後も猶予期間中は残っている）
+    - 申告と異なる場合は複製した解析結果を破棄し、実際のハッシュで再利用を試みるか解析し直す
+
+    Args:
+        job_id: 解析ジョブID
+        file_path: 完了通知時点の動画ファイルパス
+        declared_hash: クライアントが申告した SHA-256
+    """
+    from app.models.database import SessionLocal
+    from app.models.job import AnalysisJob
+    from app.services.analysis_dedup import compute_object_sha256, discard_analysis, reuse_analysis_if_available
+    from app.services.progress import ProgressService
+    from app.services.storage import StorageService
+    from app.tasks.analyze import analyze_video
+    from app.tasks.media import schedule_thumbnails
+
+    db = SessionLocal()
+    try:
+        job = db.query(AnalysisJob).filter(AnalysisJob.id == job_id).first()
+        if not job:
+            logger.warning(f"ジョブが見つかりません: job_id={job_id}")
+            return {"job_id": job_id, "status": "not_found"}
+
+        try:
+            actual_hash = compute_object_sha256(StorageService(), file_path)
+        except Exception as e:
+            logger.error(f"動画のハッシュ検証に失敗しました: job_id={job_id}, error={e}", exc_info=True)
+            if self.request.retries < self.max_retries:
+                raise self.retry(exc=e)
+            return {"job_id": job_id, "status": "failed", "error": str(e)}
+
+        job.video.content_hash = actual_hash
+        db.commit()
+        if actual_hash == declared_hash.lower():
+            return {"job_id": job_id, "status": "verified"}
+
+        logger.warning(
+            f"申告されたハッシュが動画の内容と一致しないため解析し直します: job_id={job_id}, "
+            f"declared={declared_hash}, actual={actual_hash}"
+        )
+        discard_analysis(db, job)
+        progress_service = ProgressService()
+        progress_service.initialize_progress(str(job.id))
+        if reuse_analysis_if_available(db, job, actual_hash):
+            progress_service.set_job_completed(str(job.id))
+            schedule_thumbnails(job.id)
+            return {"job_id": job_id, "status": "reused"}
+
+        analyze_video.delay(
+            str(job.id),
+            job.video.file_path,
+            {
+                "purpose": job.purpose,
+                "platform": job.platform.value,
+                "target_audience": job.target_audience,
+            },
+        )
+        return {"job_id": job_id, "status": "reanalyzing"}
+    finally:
+        db.close()
@@ -0,0 +1,159 @@
+import hashlib
+import io
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from unittest.mock import MagicMock
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import Base
+from app.models.job import (
+    AnalysisJob,
+    JobStatus,
+    Platform,
+    RiskCategory,
+    RiskItem,
+    RiskLevel,
+    RiskSource,
+    Video,
+)
+from app.services.analysis_dedup import (
+    compute_object_sha256,
+    current_analysis_version,
+    discard_analysis,
+    reuse_analysis_if_available,
+)
+
+CONTENT_HASH = "a" * 64
+
+
+@pytest.fixture
+def db_session():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def add_job(db, status=JobStatus.pending, content_hash=CONTENT_HASH, **overrides):
+    video = Video(
+        id=uuid.uuid4(),
+        file_path=f"videos/{uuid.uuid4()}.mp4",
+        original_name="clip.mp4",
+        file_size=100,
+        content_hash=content_hash,
+    )
+    db.add(video)
+    fields = {
+        "purpose": "PR",
+        "platform": Platform.twitter,
+        "target_audience": "general",
+    }
+    fields.update(overrides)
+    job = AnalysisJob(id=uuid.uuid4(), video_id=video.id, status=status, **fields)
+    db.add(job)
+    db.commit()
+    return job
+
+
+@pytest.fixture
+def completed_job(db_session):
+    job = add_job(
+        db_session,
+        status=JobStatus.completed,
+        overall_score=42.0,
+        risk_level=RiskLevel.medium,
+        transcription_result={"segments": [{"text": "hello"}]},
+        analysis_version=current_analysis_version(),
+        completed_at=datetime.now(timezone.utc),
+    )
+    video = job.video
+    video.duration = 12.5
+    db_session.add(
+        RiskItem(
+            id=uuid.uuid4(),
+            job_id=job.id,
+            timestamp=1.0,
+            end_timestamp=2.0,
+            category=RiskCategory.misleading,
+            subcategory="誇張",
+            score=40.0,
+            level=RiskLevel.medium,
+            rationale="理由",
+            source=RiskSource.audio,
+            evidence="証拠",
+        )
+    )
+    db_session.commit()
+    return job
+
+
+def test_identical_upload_clones_results(db_session, completed_job):
+    """同一内容・同一メタ情報のジョブは結果とリスクアイテムが複製されること"""
+    job = add_job(db_session)
+
+    source = reuse_analysis_if_available(db_session, job, CONTENT_HASH)
+
+    assert source.id == completed_job.id
+    db_session.refresh(job)
+    assert job.status == JobStatus.completed
+    assert job.overall_score == 42.0
+    assert job.transcription_result == {"segments": [{"text": "hello"}]}
+    assert job.video.duration == 12.5
+    assert len(job.risk_items) == 1
+    assert job.risk_items[0].id != completed_job.risk_items[0].id
+    assert job.risk_items[0].evidence == "証拠"
+
+
+@pytest.mark.parametrize(
+    "overrides",
+    [
+        {"purpose": "別の用途"},
+        {"platform": Platform.youtube},
+        {"content_hash": "b" * 64},
+    ],
+)
+def test_different_metadata_or_content_is_not_reused(db_session, completed_job, overrides):
+    content_hash = overrides.pop("content_hash", CONTENT_HASH)
+    job = add_job(db_session, content_hash=content_hash, **overrides)
+
+    assert reuse_analysis_if_available(db_session, job, content_hash) is None
+    assert job.status == JobStatus.pending
+
+
+def test_results_from_other_version_or_deleted_jobs_are_not_reused(db_session, completed_job):
+    completed_job.analysis_version = "speech=old;gemini=old;prompt=0"
+    db_session.commit()
+    job = add_job(db_session)
+    assert reuse_analysis_if_available(db_session, job, CONTENT_HASH) is None
+
+    completed_job.analysis_version = current_analysis_version()
+    completed_job.deleted_at = datetime.now(timezone.utc)
+    db_session.commit()
+    assert reuse_analysis_if_available(db_session, job, CONTENT_HASH) is None
+
+
+def test_discard_analysis_resets_cloned_results(db_session, completed_job):
+    """複製した結果を破棄すると解析待ちに戻り、リスクアイテムも削除されること"""
+    job = add_job(db_session, content_hash=None)
+    reuse_analysis_if_available(db_session, job, CONTENT_HASH)
+
+    discard_analysis(db_session, job)
+
+    db_session.refresh(job)
+    assert job.status == JobStatus.pending
+    assert job.overall_score is None
+    assert job.transcription_result is None
+    assert job.risk_items == []
+    assert db_session.query(RiskItem).count() == 1
+
+
+def test_compute_object_sha256_streams_from_storage():
+    content = b"x" * (3 * 1024 * 1024 + 5)
+    storage = MagicMock()
+    storage.get_file_stream.return_value = io.BytesIO(content)
+
+    assert compute_object_sha256(storage, "videos/a.mp4") == hashlib.sha256(content).hexdigest()
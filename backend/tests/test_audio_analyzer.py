@@ -0,0 +1,372 @@
+import datetime
+import io
+import subprocess
+import sys
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+from google.cloud.speech_v2.types import cloud_speech
+
+from app.services.audio_analyzer import AudioAnalyzerService, TranscriptionListener, build_extract_command, run_ffmpeg
+from app.services.audio_chunking import AudioChunk
+from app.services.audio_encoding import AudioEncodingError
+from app.services.pipeline import StageCancelledError
+from app.services.waveform import decode_waveform_peaks
+
+
+@pytest.fixture
+def analyzer():
+    with patch("app.services.audio_analyzer.StorageService"), \
+        patch("app.services.audio_analyzer.get_speech_client"):
+        yield AudioAnalyzerService()
+
+
+@pytest.fixture
+def audio_settings():
+    with patch("app.services.audio_analyzer.settings") as settings:
+        settings.audio_extraction_mode = "local"
+        settings.audio_extraction_url_expiration_seconds = 3600
+        settings.transcription_chunk_max_seconds = 10
+        settings.transcription_chunk_min_seconds = 4
+        settings.transcription_chunk_overlap_seconds = 1
+        settings.transcription_silence_threshold_db = -40
+        settings.transcription_max_parallel_chunks = 2
+        settings.transcription_vad_enabled = False
+        settings.transcription_mode = "batch"
+        settings.transcription_cache_enabled = False
+        settings.waveform_samples_per_peak_list = [160, 640]
+        settings.waveform_bits = 8
+        yield settings
+
+
+def tone_pcm(seconds):
+    t = np.arange(int(seconds * 16000)) / 16000
+    return (np.sin(2 * np.pi * 440 * t) * 10000).astype("<i2").tobytes()
+
+
+def fake_ffmpeg(stdout, returncode=0, stderr=""):
+    """抽出した PCM の代わりに stdout（バイト列または read を持つオブジェクト）を読み手に渡す run_ffmpeg"""
+    def run(command, cancel_event=None, feed=None, timeout=None, consume=None):
+        consume(io.BytesIO(stdout) if isinstance(stdout, bytes) else stdout)
+        return subprocess.CompletedProcess(command, returncode, "", stderr)
+    return run
+
+
+def chunk_start_content(pcm, chunk, encoding):
+    """送信データの代わりにチャンクの開始秒を送る（認識のモックでチャンクを見分ける）"""
+    return str(int(chunk.start)).encode()
+
+
+def word(text, start, end):
+    return cloud_speech.WordInfo(
+        word=text,
+        start_offset=datetime.timedelta(seconds=start),
+        end_offset=datetime.timedelta(seconds=end),
+    )
+
+
+def recognize_response(words):
+    return cloud_speech.RecognizeResponse(
+        results=[
+            cloud_speech.SpeechRecognitionResult(
+                alternatives=[cloud_speech.SpeechRecognitionAlternative(words=words, confidence=0.9)]
+            )
+        ]
+    )
+
+
+def test_analyze_stitches_chunks(analyzer, audio_settings, tmp_path):
+    """チャンクごとの時刻を絶対時刻に直し、重なり部分の単語を重複させないこと"""
+    responses = {
+        0: [word("a", 1.0, 1.5), word("b", 9.2, 9.8)],
+        # 重なり（9〜10秒）の単語は前のチャンクで採用済み
+        9: [word("b", 0.2, 0.8), word("c", 5.0, 5.5)],
+        18: [word("d", 2.0, 3.0)],
+    }
+    analyzer.speech_client.recognize.side_effect = lambda request: recognize_response(responses[int(request.content)])
+    waveform_path = tmp_path / "waveform.peaks"
+
+    with patch("app.services.audio_analyzer.run_ffmpeg", side_effect=fake_ffmpeg(tone_pcm(25))), \
+        patch.object(analyzer, "_chunk_content", side_effect=chunk_start_content):
+        result = analyzer.analyze("videos/a.mp4", "/tmp/a.mp4", waveform_output=str(waveform_path))
+
+    assert analyzer.speech_client.recognize.call_count == 3
+    texts = [(seg.text, seg.start_time, seg.end_time) for seg in result.segments]
+    assert texts == [("a b", 1.0, 9.8), ("c", 14.0, 14.5), ("d", 20.0, 21.0)]
+    peaks = decode_waveform_peaks(waveform_path.read_bytes())
+    assert [len(level.mins) for level in peaks.levels] == [2500, 625]
+
+
+def test_chunks_recognized_while_extracting(analyzer, audio_settings):
+    """区切りが確定したチャンクは音声の抽出が終わる前に認識を始めること"""
+    pcm = tone_pcm(25)
+    recognized = threading.Event()
+
+    class SlowStdout:
+        def __init__(self):
+            self.buffer = io.BytesIO(pcm)
+
+        def read(self, size):
+            # 後半の音声は最初のチャンクの認識が始まるまで渡さない
+            if self.buffer.tell() >= len(pcm) // 2:
+                assert recognized.wait(timeout=5)
+            return self.buffer.read(size)
+
+    def recognize(request):
+        recognized.set()
+        return cloud_speech.RecognizeResponse()
+
+    analyzer.speech_client.recognize.side_effect = recognize
+    with patch("app.services.audio_analyzer.run_ffmpeg", side_effect=fake_ffmpeg(SlowStdout())), \
+        patch.object(analyzer, "_chunk_content", side_effect=chunk_start_content):
+        result = analyzer.analyze("videos/a.mp4", "/tmp/a.mp4")
+
+    assert analyzer.speech_client.recognize.call_count == 3
+    assert result.has_audio is False
+
+
+def test_analyze_skips_silent_audio(analyzer, audio_settings):
+    """発話が検出されなければ認識を呼ばずに音声なしとすること"""
+    audio_settings.transcription_vad_enabled = True
+
+    with patch("app.services.audio_analyzer.run_ffmpeg", side_effect=fake_ffmpeg(b"\x00\x00" * 16000 * 5)):
+        result = analyzer.analyze("videos/a.mp4", "/tmp/a.mp4")
+
+    assert result.has_audio is False
+    assert result.segments == []
+    analyzer.speech_client.recognize.assert_not_called()
+
+
+def test_chunk_content_falls_back_to_wav(analyzer):
+    """圧縮に失敗した場合は WAV で送信すること"""
+    pcm = tone_pcm(1)
+    chunk = AudioChunk(index=0, start_sample=0, end_sample=16000, sample_rate=16000, keep_start=0, keep_end=1)
+
+    with patch("app.services.audio_analyzer.encode_pcm", return_value=b"fLaC...") as encode:
+        assert analyzer._chunk_content(pcm, chunk, "flac") == b"fLaC..."
+    assert encode.call_args.args[0] == pcm
+
+    with patch("app.services.audio_analyzer.encode_pcm", side_effect=AudioEncodingError("no encoder")):
+        content = analyzer._chunk_content(pcm, chunk, "flac")
+    assert content[:4] == b"RIFF"
+
+
+def test_build_extract_command_writes_pcm_to_stdout():
+    command = build_extract_command("https://storage.example.com/videos/a.mp4?sig=x")
+    assert command[command.index("-reconnect") + 1] == "1"
+    assert command[command.index("-i") + 1] == "https://storage.example.com/videos/a.mp4?sig=x"
+    assert command[command.index("-f") + 1] == "s16le"
+    assert command[-1] == "pipe:1"
+
+    assert "-reconnect" not in build_extract_command("pipe:0")
+
+
+def test_extract_audio_from_presigned_url(analyzer, audio_settings):
+    """url モードでは動画をダウンロードせず、署名付き URL を ffmpeg に渡すこと"""
+    audio_settings.audio_extraction_mode = "url"
+    analyzer.storage_service.generate_presigned_url.return_value = "https://storage.example.com/a.mp4"
+
+    with patch("app.services.audio_analyzer.run_ffmpeg", side_effect=fake_ffmpeg(b"\x00\x00" * 1600)) as mock_run:
+        analyzer.analyze("videos/a.mp4")
+
+    assert "https://storage.example.com/a.mp4" in mock_run.call_args.args[0]
+    analyzer.storage_service.download_file.assert_not_called()
+
+
+def test_extract_audio_falls_back_to_download(analyzer, audio_settings):
+    """音声を読み始める前に直接読み込みが失敗した場合はダウンロードして抽出すること"""
+    audio_settings.audio_extraction_mode = "url"
+    analyzer.storage_service.generate_presigned_url.side_effect = RuntimeError("signing failed")
+    run = fake_ffmpeg(b"", returncode=1, stderr="Output file #0 does not contain any stream")
+
+    with patch("app.services.audio_analyzer.run_ffmpeg", side_effect=run):
+        result = analyzer.analyze("videos/a.mp4")
+
+    assert result.has_audio is False
+    analyzer.storage_service.download_file.assert_called_once()
+
+
+def test_extract_audio_does_not_retry_after_reading_audio(analyzer, audio_settings):
+    """音声を読み始めた後の失敗はダウンロードし直さずに失敗とすること"""
+    audio_settings.audio_extraction_mode = "url"
+    run = fake_ffmpeg(b"\x00\x00" * 1600, returncode=1, stderr="Connection reset")
+
+    with patch("app.services.audio_analyzer.run_ffmpeg", side_effect=run), \
+        pytest.raises(RuntimeError, match="Connection reset"):
+        analyzer.analyze("videos/a.mp4")
+
+    analyzer.storage_service.download_file.assert_not_called()
+
+
+def test_run_ffmpeg_passes_stdout_to_consumer():
+    """標準出力を consume に渡し、consume の失敗はプロセスを終了させて送出すること"""
+    received = []
+    command = [sys.executable, "-c", "import sys; sys.stdout.buffer.write(b'x' * 300000)"]
+    result = run_ffmpeg(command, consume=lambda stdout: received.append(len(stdout.read())))
+    assert result.returncode == 0
+    assert received == [300000]
+
+    def fail(stdout):
+        stdout.read(10)
+        raise ValueError("consumer failed")
+
+    started = time.monotonic()
+    endless = [sys.executable, "-c", "import sys\nwhile True: sys.stdout.buffer.write(b'x' * 65536)"]
+    with pytest.raises(ValueError, match="consumer failed"):
+        run_ffmpeg(endless, consume=fail, timeout=None)
+    assert time.monotonic() - started < 5
+
+
+def test_run_ffmpeg_from_stream_feeds_stdin(analyzer):
+    """ストレージのストリームを標準入力へ流し、読み込み失敗は明示的なエラーとすること"""
+    content = b"x" * 300_000
+    analyzer.storage_service.get_file_stream.return_value = io.BytesIO(content)
+    command = [sys.executable, "-c", "import sys; sys.stderr.write(str(len(sys.stdin.buffer.read())))"]
+
+    with patch("app.services.audio_analyzer.settings") as settings:
+        settings.storage_stream_chunk_size_bytes = 65536
+        result = analyzer._run_ffmpeg_from_stream(command, "videos/a.mp4")
+
+        assert result.returncode == 0
+        assert result.stderr == str(len(content))
+
+        broken = MagicMock()
+        broken.read.side_effect = ConnectionError("reset")
+        analyzer.storage_service.get_file_stream.return_value = broken
+        with pytest.raises(RuntimeError, match="reset"):
+            analyzer._run_ffmpeg_from_stream(command, "videos/a.mp4")
+
+
+def test_run_ffmpeg_kills_process_on_cancel():
+    """停止が通知されたらプロセスを終了させて StageCancelledError を送出すること"""
+    cancel_event = threading.Event()
+    threading.Timer(0.2, cancel_event.set).start()
+    started = time.monotonic()
+
+    with pytest.raises(StageCancelledError):
+        run_ffmpeg([sys.executable, "-c", "import time; time.sleep(30)"], cancel_event)
+
+    assert time.monotonic() - started < 5
+
+
+def test_streaming_transcription_reports_partials_and_progress(analyzer, audio_settings):
+    """ストリーミング認識の途中結果・確定セグメント・処理済み位置を逐次通知すること"""
+    audio_settings.transcription_mode = "streaming"
+    sent = []
+
+    def streaming_recognize(requests):
+        sent.extend(requests)
+        yield cloud_speech.StreamingRecognizeResponse(
+            results=[
+                cloud_speech.StreamingRecognitionResult(
+                    alternatives=[cloud_speech.SpeechRecognitionAlternative(transcript="こん")],
+                    result_end_offset=datetime.timedelta(seconds=1),
+                )
+            ]
+        )
+        yield cloud_speech.StreamingRecognizeResponse(
+            results=[
+                cloud_speech.StreamingRecognitionResult(
+                    alternatives=[
+                        cloud_speech.SpeechRecognitionAlternative(
+                            transcript="こんにちは", words=[word("こんにちは", 0.5, 1.5)], confidence=0.8
+                        )
+                    ],
+                    is_final=True,
+                    result_end_offset=datetime.timedelta(seconds=4),
+                )
+            ]
+        )
+
+    analyzer.speech_client.streaming_recognize.side_effect = streaming_recognize
+    progress, segments, partials = [], [], []
+    listener = TranscriptionListener(
+        on_progress=progress.append,
+        on_segments=segments.extend,
+        on_partial=lambda start, text: partials.append((start, text)),
+    )
+
+    with patch("app.services.audio_analyzer.run_ffmpeg", side_effect=fake_ffmpeg(tone_pcm(4))), \
+        patch("app.services.audio_analyzer.select_audio_encoding", return_value="linear16"):
+        result = analyzer.analyze("videos/a.mp4", "/tmp/a.mp4", listener=listener)
+
+    assert sent[0].streaming_config.streaming_features.interim_results is True
+    decoding = sent[0].streaming_config.config.explicit_decoding_config
+    assert decoding.encoding == cloud_speech.ExplicitDecodingConfig.AudioEncoding.LINEAR16
+    assert sum(len(request.audio) for request in sent[1:]) == 4 * 16000 * 2
+    assert partials == [(0.0, "こん"), (0.0, "")]
+    assert [(seg.text, seg.start_time) for seg in segments] == [("こんにちは", 0.5)]
+    assert progress == [0.0, 0.25, 1.0]
+    assert [seg.text for seg in result.segments] == ["こんにちは"]
+    analyzer.speech_client.recognize.assert_not_called()
+
+
+def test_streaming_starts_before_chunk_is_cut(analyzer, audio_settings):
+    """ストリーミング認識は区切りの確定を待たず、抽出中の PCM を送り始めること"""
+    audio_settings.transcription_mode = "streaming"
+    pcm = tone_pcm(25)
+    streamed = threading.Event()
+    received = []
+
+    class SlowStdout:
+        def __init__(self):
+            self.buffer = io.BytesIO(pcm)
+
+        def read(self, size):
+            # 最初の区切り（10秒）が確定する前の 3 秒以降は、音声が認識へ送られるまで渡さない
+            if self.buffer.tell() >= 3 * 16000 * 2:
+                assert streamed.wait(timeout=5)
+            return self.buffer.read(size)
+
+    def streaming_recognize(requests):
+        next(requests)
+        audio = b""
+        for request in requests:
+            audio += request.audio
+            streamed.set()
+        received.append(audio)
+        return iter([])
+
+    analyzer.speech_client.streaming_recognize.side_effect = streaming_recognize
+    with patch("app.services.audio_analyzer.run_ffmpeg", side_effect=fake_ffmpeg(SlowStdout())), \
+        patch("app.services.audio_analyzer.select_audio_encoding", return_value="linear16"):
+        result = analyzer.analyze("videos/a.mp4", "/tmp/a.mp4")
+
+    assert result.has_audio is False
+    # 10 秒で固定位置に切り、1 秒ずつ重ねる
+    assert sorted(len(audio) for audio in received) == [7 * 16000 * 2, 10 * 16000 * 2, 10 * 16000 * 2]
+
+
+def test_streaming_sends_compressed_audio(analyzer, audio_settings):
+    """ストリーミング認識でも選択した形式に圧縮して送り、その形式を明示すること"""
+    audio_settings.transcription_mode = "streaming"
+    sent = []
+
+    class FakeEncoder:
+        def __init__(self, encoding, sample_rate):
+            assert (encoding, sample_rate) == ("flac", 16000)
+
+        def encode(self, blocks, read_bytes):
+            for block in blocks:
+                yield b"fLaC" + str(len(block)).encode()
+
+        def close(self):
+            pass
+
+    def streaming_recognize(requests):
+        sent.extend(requests)
+        return iter([])
+
+    analyzer.speech_client.streaming_recognize.side_effect = streaming_recognize
+    with patch("app.services.audio_analyzer.run_ffmpeg", side_effect=fake_ffmpeg(tone_pcm(4))), \
+        patch("app.services.audio_analyzer.select_audio_encoding", return_value="flac"), \
+        patch("app.services.audio_analyzer.StreamEncoder", FakeEncoder):
+        analyzer.analyze("videos/a.mp4", "/tmp/a.mp4")
+
+    decoding = sent[0].streaming_config.config.explicit_decoding_config
+    assert decoding.encoding == cloud_speech.ExplicitDecodingConfig.AudioEncoding.FLAC
+    assert all(request.audio.startswith(b"fLaC") for request in sent[1:])
+    assert sum(int(request.audio[4:]) for request in sent[1:]) == 4 * 16000 * 2
@@ -0,0 +1,148 @@
+import io
+import wave
+
+import numpy as np
+
+from app.services.audio_chunking import ChunkPlanner, pcm_to_wav
+
+SAMPLE_RATE = 16000
+
+
+def tone(seconds):
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (np.sin(2 * np.pi * 440 * t) * 10000).astype(np.int16)
+
+
+def silence(seconds):
+    return np.zeros(int(seconds * SAMPLE_RATE), dtype=np.int16)
+
+
+def noise(seconds, amplitude):
+    rng = np.random.default_rng(0)
+    return (rng.uniform(-1, 1, int(seconds * SAMPLE_RATE)) * amplitude).astype(np.int16)
+
+
+def plan(samples, max_seconds=10, min_seconds=4, overlap_seconds=1, speech_only=False, threshold_db=-40):
+    """音声全体を一度に渡して区切ったチャンクを返す"""
+    planner = ChunkPlanner(SAMPLE_RATE, max_seconds, min_seconds, overlap_seconds, threshold_db, speech_only)
+    returned = planner.feed(samples.tobytes()) + planner.finish()
+    for chunk, pcm in returned:
+        assert pcm == samples[chunk.start_sample:chunk.end_sample].tobytes()
+    return [chunk for chunk, _ in returned]
+
+
+def test_short_audio_is_single_chunk():
+    chunks = plan(tone(3))
+
+    assert len(chunks) == 1
+    assert chunks[0].start == 0
+    assert chunks[0].end == 3
+    assert chunks[0].keeps(0) and chunks[0].keeps(2.9)
+
+
+def test_splits_at_silence_without_overlap():
+    """無音の中央付近で区切り、チャンクが重ならないこと"""
+    chunks = plan(np.concatenate([tone(6), silence(1), tone(6)]))
+
+    assert len(chunks) == 2
+    assert 6.0 <= chunks[0].end <= 7.0
+    assert chunks[1].start == chunks[0].end
+    assert chunks[0].keep_end == chunks[1].keep_start == chunks[0].end
+    assert all(c.end - c.start <= 10 for c in chunks)
+
+
+def test_hard_cut_with_overlap_when_no_silence():
+    """無音がなければ上限で切って重ね、重なりの中央を単語の境界とすること"""
+    chunks = plan(tone(25))
+
+    assert [(c.start, c.end) for c in chunks] == [(0, 10), (9, 19), (18, 25)]
+    assert chunks[0].keep_end == 9.5
+    assert chunks[1].keep_start == 9.5
+    assert chunks[0].keeps(9.4) and not chunks[1].keeps(9.4)
+    assert chunks[1].keeps(9.5) and not chunks[0].keeps(9.5)
+    assert chunks[-1].keep_end == 25
+
+
+def test_pcm_to_wav():
+    samples = tone(1)
+
+    with wave.open(io.BytesIO(pcm_to_wav(samples.tobytes(), SAMPLE_RATE)), "rb") as f:
+        assert f.getframerate() == SAMPLE_RATE
+        assert f.getnchannels() == 1
+        pcm = np.frombuffer(f.readframes(f.getnframes()), dtype="<i2")
+    assert np.array_equal(pcm, samples)
+
+
+def test_speech_only_chunks_and_silent_audio():
+    """無音区間を除いた発話区間（前後に余白付き）のみをチャンクにし、発話がなければ何も返さないこと"""
+    chunks = plan(np.concatenate([silence(5), tone(2), silence(10), tone(3), silence(5)]), speech_only=True)
+
+    assert [(round(c.start, 1), round(c.end, 1)) for c in chunks] == [(4.7, 7.3), (16.7, 20.3)]
+    assert chunks[0].keeps(5.0) and not chunks[0].keeps(10.0)
+    assert plan(silence(10), speech_only=True) == []
+
+
+def test_detect_unvoiced_sound_by_zero_crossings():
+    """エネルギーが小さくてもゼロ交差率の高い区間（無声子音）は発話とすること"""
+    unvoiced = noise(1, 600)
+    assert 20 * np.log10(np.sqrt(np.mean(np.square(unvoiced.astype(np.float64)))) / 32768) < -32
+
+    chunks = plan(np.concatenate([silence(3), unvoiced, silence(3)]), speech_only=True, threshold_db=-32)
+
+    assert [(round(c.start, 1), round(c.end, 1)) for c in chunks] == [(2.7, 4.3)]
+
+
+def feed_in_blocks(planner, samples, block_bytes=3200):
+    """PCM を小さなブロックで渡し、(チャンク, PCM, その時点までに渡したサンプル数) を返す"""
+    data = samples.tobytes()
+    returned = []
+    for offset in range(0, len(data), block_bytes):
+        returned += [(chunk, pcm, planner.sample_count) for chunk, pcm in planner.feed(data[offset:offset + block_bytes])]
+    returned += [(chunk, pcm, planner.sample_count) for chunk, pcm in planner.finish()]
+    return returned
+
+
+def test_planner_returns_chunks_before_end_of_audio():
+    """区切りが確定したチャンクは音声の終端を待たずに返し、渡すブロックの大きさによらず同じ位置で区切ること"""
+    samples = np.concatenate([tone(6), silence(1), tone(6), silence(1), tone(25)])
+
+    returned = feed_in_blocks(ChunkPlanner(SAMPLE_RATE, 10, 4, 1, -40), samples)
+
+    assert [chunk for chunk, _, _ in returned] == plan(samples)
+    assert len(returned) == 5
+    assert returned[0][2] < len(samples) // 2
+    for chunk, pcm, _ in returned:
+        assert pcm == samples[chunk.start_sample:chunk.end_sample].tobytes()
+
+
+def test_planner_detects_speech_after_warmup():
+    """ノイズフロアを求める長さを超える音声でも、発話区間のチャンクを途中で返すこと"""
+    samples = np.concatenate([silence(12), tone(2), silence(12), tone(3), silence(5)])
+
+    returned = feed_in_blocks(ChunkPlanner(SAMPLE_RATE, 10, 4, 1, -40, speech_only=True), samples)
+
+    assert [(round(c.start, 1), round(c.end, 1)) for c, _, _ in returned] == [(11.7, 14.3), (25.7, 29.3)]
+    assert returned[0][2] < SAMPLE_RATE * 20
+    assert returned[1][1] == samples[returned[1][0].start_sample:returned[1][0].end_sample].tobytes()
+
+
+def test_planner_pending_chunk_is_prefix_of_final_chunk():
+    """区切りが未確定のチャンクとして返す範囲は、確定後のチャンクの先頭に含まれ採用範囲内にあること"""
+    samples = np.concatenate([silence(12), tone(6), silence(1), tone(25), silence(12), tone(1), silence(12)])
+    data = samples.tobytes()
+    planner = ChunkPlanner(SAMPLE_RATE, 10, 4, 1, -40, speech_only=True)
+    pending, chunks = {}, []
+    for offset in range(0, len(data), 3200):
+        chunks += [chunk for chunk, _ in planner.feed(data[offset:offset + 3200])]
+        chunk = planner.pending()
+        if chunk is not None:
+            pending[chunk.index] = chunk
+            assert planner.pcm(chunk.start_sample, chunk.end_sample) == data[chunk.start_sample * 2:chunk.end_sample * 2]
+    chunks += [chunk for chunk, _ in planner.finish()]
+
+    assert planner.pending() is None
+    assert set(pending) == {chunk.index for chunk in chunks}
+    for chunk in chunks:
+        assert pending[chunk.index].start_sample == chunk.start_sample
+        assert pending[chunk.index].end_sample <= chunk.end_sample
+        assert pending[chunk.index].end <= chunk.keep_end
@@ -0,0 +1,80 @@
+import subprocess
+import sys
+from unittest.mock import patch
+
+import pytest
+
+from app.services.audio_encoding import (
+    AudioEncodingError,
+    StreamEncoder,
+    build_encode_command,
+    encode_pcm,
+    select_audio_encoding,
+)
+
+
+@pytest.fixture
+def settings():
+    with patch("app.services.audio_encoding.get_settings") as mock:
+        settings = mock.return_value
+        settings.transcription_audio_encoding = "auto"
+        settings.transcription_opus_min_duration_seconds = 1800
+        settings.transcription_opus_bitrate_kbps = 32
+        yield settings
+
+
+def test_select_encoding_by_duration(settings):
+    """auto の場合は短い動画を FLAC、長い動画を Opus にすること"""
+    assert select_audio_encoding(60.0) == "flac"
+    assert select_audio_encoding(None) == "flac"
+    assert select_audio_encoding(3600.0) == "opus"
+
+    settings.transcription_audio_encoding = "linear16"
+    assert select_audio_encoding(3600.0) == "linear16"
+
+
+def test_build_encode_command(settings):
+    flac = build_encode_command("flac", 16000)
+    assert flac[flac.index("-i") + 1] == "pipe:0"
+    assert flac[flac.index("-ar") + 1] == "16000"
+    assert flac[flac.index("-c:a") + 1] == "flac"
+    assert flac[-1] == "pipe:1"
+
+    opus = build_encode_command("opus", 16000)
+    assert opus[opus.index("-c:a") + 1] == "libopus"
+    assert opus[opus.index("-b:a") + 1] == "32k"
+    assert opus[opus.index("-f", opus.index("-c:a")) + 1] == "ogg"
+
+    with pytest.raises(AudioEncodingError):
+        build_encode_command("linear16", 16000)
+
+
+def test_encode_pcm(settings):
+    completed = subprocess.CompletedProcess(args=[], returncode=0, stdout=b"fLaC", stderr=b"")
+    with patch("app.services.audio_encoding.subprocess.run", return_value=completed) as run:
+        assert encode_pcm(b"\x00\x00" * 10, 16000, "flac") == b"fLaC"
+    assert run.call_args.kwargs["input"] == b"\x00\x00" * 10
+
+    failed = subprocess.CompletedProcess(args=[], returncode=1, stdout=b"", stderr=b"Unknown encoder 'libopus'")
+    with patch("app.services.audio_encoding.subprocess.run", return_value=failed):
+        with pytest.raises(AudioEncodingError, match="libopus"):
+            encode_pcm(b"\x00\x00", 16000, "opus")
+
+
+def test_stream_encoder_returns_output_while_writing(settings):
+    """入力を書き込みながら出力を返し、ffmpeg の失敗は AudioEncodingError とすること"""
+    copy = [sys.executable, "-c", "import shutil, sys; shutil.copyfileobj(sys.stdin.buffer, sys.stdout.buffer)"]
+    with patch("app.services.audio_encoding.build_encode_command", return_value=copy):
+        encoder = StreamEncoder("flac", 16000)
+    output = b"".join(encoder.encode(iter([b"ab", b"cd" * 5000]), 4096))
+    assert output == b"ab" + b"cd" * 5000
+
+    failing = [sys.executable, "-c", "import sys; sys.stderr.write('Unknown encoder'); sys.exit(1)"]
+    with patch("app.services.audio_encoding.build_encode_command", return_value=failing):
+        encoder = StreamEncoder("opus", 16000)
+    with pytest.raises(AudioEncodingError, match="Unknown encoder"):
+        list(encoder.encode(iter([b"\x00\x00"]), 4096))
+
+    with patch("app.services.audio_encoding.build_encode_command", return_value=["/nonexistent/ffmpeg"]):
+        with pytest.raises(AudioEncodingError):
+            StreamEncoder("flac", 16000)
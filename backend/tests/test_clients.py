@@ -0,0 +1,47 @@
+import threading
+from unittest.mock import MagicMock, patch
+
+from app.services.clients import ClientRegistry
+
+
+def test_registry_creates_client_once():
+    """同時に要求されてもクライアントは1回だけ生成されること"""
+    registry = ClientRegistry()
+    factory = MagicMock(side_effect=lambda: object())
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(registry.get("storage", factory)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert factory.call_count == 1
+    assert len({id(client) for client in results}) == 1
+
+
+def test_registry_reset_closes_clients():
+    registry = ClientRegistry()
+    client = MagicMock()
+    registry.get("redis", lambda: client)
+
+    registry.reset()
+
+    client.close.assert_called_once()
+    assert registry.get("redis", lambda: "new") == "new"
+
+
+def test_registry_discards_clients_after_fork():
+    """fork後の子プロセスでは親のクライアントを使わないこと"""
+    registry = ClientRegistry()
+    parent_client = MagicMock()
+    registry.get("speech", lambda: parent_client)
+
+    with patch("app.services.clients.os.getpid", return_value=registry._pid + 1):
+        child_client = registry.get("speech", lambda: "child")
+
+    assert child_client == "child"
+    parent_client.close.assert_not_called()
@@ -389,3 +389,36 @@ class TestExportJob:
             ExportJob.session_id == session.id
         ).all()
         assert len(exports) == 2
+
+
+def test_update_session_rejects_actions_beyond_duration(db_session):
+    """動画の長さを超える編集範囲は保存しないこと"""
+    from app.schemas.editor import EditActionInput
+    from app.services.edit_session import EditSessionService
+
+    video = Video(id=uuid.uuid4(), file_path="videos/test.mp4", original_name="test.mp4", file_size=1, duration=30.0)
+    job = AnalysisJob(
+        id=uuid.uuid4(),
+        video_id=video.id,
+        status=JobStatus.completed,
+        purpose="test",
+        platform=Platform.youtube,
+        target_audience="general",
+    )
+    db_session.add_all([video, job])
+    db_session.commit()
+
+    service = EditSessionService(db_session)
+    with pytest.raises(ValueError):
+        service.update_session(
+            job.id,
+            [EditActionInput(type=EditActionType.cut, start_time=25.0, end_time=31.0)],
+            duration=30.0,
+        )
+
+    session = service.update_session(
+        job.id,
+        [EditActionInput(type=EditActionType.cut, start_time=25.0, end_time=30.05)],
+        duration=30.0,
+    )
+    assert len(session.actions) == 1
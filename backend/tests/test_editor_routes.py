@@ -33,6 +33,8 @@ def test_get_video_url_success(client, mock_db_session):
     job = MagicMock()
     video = MagicMock()
     video.file_path = "videos/test.mp4"
+    video.proxy_path = None
+    video.hls_playlist_path = None
     job.video = video
 
     mock_db_session.query.return_value.join.return_value.filter.return_value.first.return_value = job
@@ -47,6 +49,30 @@ def test_get_video_url_success(client, mock_db_session):
     data = response.json()
     assert data["url"] == "http://example.com/video"
     assert "expires_at" in data
+    assert data["is_proxy"] is False
+    assert data["hls_url"] is None
+
+
+def test_get_video_url_prefers_proxy(client, mock_db_session):
+    job_id = uuid4()
+    job = MagicMock()
+    job.video.file_path = "videos/test.mp4"
+    job.video.proxy_path = "proxies/video-1/proxy.mp4"
+    job.video.hls_playlist_path = "proxies/video-1/hls/playlist.m3u8"
+
+    mock_db_session.query.return_value.join.return_value.filter.return_value.first.return_value = job
+
+    with patch("app.api.routes.editor.StorageService") as storage_mock:
+        storage_instance = storage_mock.return_value
+        storage_instance.generate_presigned_url.return_value = "http://example.com/proxy"
+
+        response = client.get(f"/api/jobs/{job_id}/video-url")
+
+    assert response.status_code == 200
+    storage_instance.generate_presigned_url.assert_called_once_with("proxies/video-1/proxy.mp4", expiration=3600)
+    data = response.json()
+    assert data["is_proxy"] is True
+    assert data["hls_url"] == f"/api/jobs/{job_id}/video/hls/playlist.m3u8"
 
 
 def test_get_edit_session_not_found(client, mock_db_session):
@@ -1,3 +1,4 @@
+import io
 from datetime import datetime
 from unittest.mock import MagicMock, patch
 from uuid import uuid4
@@ -7,6 +8,7 @@ from fastapi.testclient import TestClient
 
 from app.main import app
 from app.models.edit_session import ExportJobStatus
+from app.services.storage import ObjectMetadata
 
 
 @pytest.fixture
@@ -145,3 +147,37 @@ def test_get_export_download_success(client, mock_db_session):
     data = response.json()
     assert data["url"] == "http://example.com/download"
     assert "expires_at" in data
+
+
+def test_download_export_file_streams_without_buffering(client, mock_db_session):
+    """エクスポート済み動画は全体を読み込まずストリーミングで返すこと"""
+    job = MagicMock()
+    job.id = uuid4()
+    session = MagicMock()
+    session.id = uuid4()
+    export_job = MagicMock()
+    export_job.status = ExportJobStatus.completed
+    export_job.output_path = f"exports/{job.id}/export.mp4"
+    content = b"v" * 4096
+
+    mock_db_session.query.side_effect = [
+        make_query_mock(job),
+        make_query_mock(export_job),
+    ]
+
+    with patch("app.api.routes.editor.EditSessionService") as service_mock, \
+        patch("app.api.routes.editor.StorageService") as storage_mock:
+        service_mock.return_value.get_session.return_value = session
+        storage = storage_mock.return_value
+        storage.get_file_metadata.return_value = ObjectMetadata(size=len(content), etag="e1")
+        storage.get_file_stream.side_effect = lambda path, start=None, end=None: io.BytesIO(
+            content[start or 0:(end + 1) if end is not None else None]
+        )
+
+        response = client.get(f"/api/jobs/{job.id}/export/file", headers={"Range": "bytes=1024-"})
+
+    assert response.status_code == 206
+    assert response.content == content[1024:]
+    assert response.headers["content-length"] == str(len(content) - 1024)
+    assert response.headers["content-disposition"] == 'attachment; filename="export.mp4"'
+    storage.get_file_content.assert_not_called()
@@ -0,0 +1,84 @@
+import struct
+import subprocess
+from io import BytesIO
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.services.faststart import FaststartError, moov_after_mdat, needs_faststart, remux_faststart
+
+
+def box(box_type: bytes, payload_size: int) -> bytes:
+    return struct.pack(">I4s", payload_size + 8, box_type) + b"\0" * payload_size
+
+
+def reader(data: bytes):
+    calls = []
+
+    def read_range(start, end):
+        calls.append((start, end))
+        return data[start:end + 1]
+
+    return read_range, calls
+
+
+def test_moov_after_mdat_detects_tail_moov():
+    data = box(b"ftyp", 16) + box(b"free", 0) + box(b"mdat", 1000) + box(b"moov", 100)
+    read_range, calls = reader(data)
+
+    assert moov_after_mdat(read_range, len(data)) is True
+    # ボックスヘッダーのみを読み、mdat の中身は読まないこと
+    assert all(end - start < 16 for start, end in calls)
+
+
+def test_moov_after_mdat_faststart_file():
+    data = box(b"ftyp", 16) + box(b"moov", 100) + box(b"mdat", 1000)
+    read_range, _ = reader(data)
+
+    assert moov_after_mdat(read_range, len(data)) is False
+
+
+def test_moov_after_mdat_large_box_header():
+    large_mdat = struct.pack(">I4sQ", 1, b"wide", 24) + b"\0" * 8
+    data = box(b"ftyp", 16) + large_mdat + box(b"mdat", 10) + box(b"moov", 10)
+    read_range, _ = reader(data)
+
+    assert moov_after_mdat(read_range, len(data)) is True
+
+
+def test_moov_after_mdat_not_mp4():
+    data = b"\x1a\x45\xdf\xa3" + b"\0" * 100
+    read_range, _ = reader(data)
+
+    assert moov_after_mdat(read_range, len(data)) is None
+
+
+def test_needs_faststart_reads_ranges_from_storage():
+    data = box(b"ftyp", 16) + box(b"mdat", 1000) + box(b"moov", 100)
+    storage = MagicMock()
+    storage.get_file_stream.side_effect = lambda path, start, end: BytesIO(data[start:end + 1])
+
+    assert needs_faststart(storage, "videos/test.mp4", len(data)) is True
+    storage.get_file_stream.assert_any_call("videos/test.mp4", 0, 15)
+
+
+def test_remux_faststart_uses_stream_copy():
+    with patch(
+        "app.services.faststart.subprocess.run",
+        return_value=subprocess.CompletedProcess(args=[], returncode=0, stdout="", stderr=""),
+    ) as run:
+        remux_faststart("/tmp/in.mp4", "/tmp/out.mp4")
+
+    command = run.call_args[0][0]
+    assert command[command.index("-c") + 1] == "copy"
+    assert command[command.index("-movflags") + 1] == "+faststart"
+    assert command[-1] == "/tmp/out.mp4"
+
+
+def test_remux_faststart_raises_on_failure():
+    with patch(
+        "app.services.faststart.subprocess.run",
+        return_value=subprocess.CompletedProcess(args=[], returncode=1, stdout="", stderr="moov atom not found"),
+    ):
+        with pytest.raises(FaststartError):
+            remux_faststart("/tmp/in.mp4", "/tmp/out.mp4")
@@ -0,0 +1,59 @@
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.services.gemini_video_analysis import (
+    GeminiVideoAnalysisService,
+    build_generation_config,
+    build_video_metadata,
+    clamp_risk_timestamps,
+)
+from app.services.media_probe import MediaInfo
+
+
+@pytest.fixture
+def service():
+    with patch("app.services.gemini_video_analysis.get_gemini_model") as get_model, \
+        patch("app.services.gemini_video_analysis.StorageService"):
+        model = MagicMock()
+        model.generate_content.return_value.text = json.dumps(
+            {"gemini_overall_score": 10, "risks": [{"timestamp": 5.0, "end_timestamp": 99.0}]}
+        )
+        get_model.return_value = model
+        yield GeminiVideoAnalysisService()
+
+
+def test_build_video_metadata_uses_duration():
+    assert build_video_metadata(MediaInfo(duration=12.5)) == {
+        "video_metadata": {"start_offset": "0s", "end_offset": "12.500s"}
+    }
+    assert build_video_metadata(None) == {}
+
+
+def test_build_generation_config_lowers_resolution_for_long_videos():
+    assert build_generation_config(MediaInfo(duration=60.0)) is None
+    config = build_generation_config(MediaInfo(duration=3600.0))
+    assert config.to_dict() == {"media_resolution": "MEDIA_RESOLUTION_LOW"}
+
+
+def test_clamp_risk_timestamps():
+    risk = {"timestamp": -1.0, "end_timestamp": "120"}
+    clamp_risk_timestamps(risk, MediaInfo(duration=30.0))
+    assert risk == {"timestamp": 0.0, "end_timestamp": 30.0}
+
+
+def test_analyze_video_reads_gcs_uri_without_local_file(service):
+    """GCS の場合は gs:// URI を渡し、ワーカーで動画を読み込まないこと"""
+    media_info = MediaInfo(duration=20.0, fps=29.97)
+    with patch("app.services.gemini_video_analysis.requires_local_video", return_value=False), \
+        patch("builtins.open") as open_mock:
+        result = service.analyze_video("videos/a.mp4", media_info=media_info)
+
+    open_mock.assert_not_called()
+    contents = service.model.generate_content.call_args.args[0]
+    part = contents[-1].to_dict()
+    assert part["file_data"]["file_uri"] == f"gs://{service.settings.storage_bucket}/videos/a.mp4"
+    assert part["video_metadata"]["end_offset"] == "20s"
+    assert "29.97 fps" in contents[1]
+    assert result.risks[0]["end_timestamp"] == 20.0
@@ -1,3 +1,7 @@
+import asyncio
+import io
+import json
+
 import pytest
 from unittest.mock import MagicMock, patch
 from uuid import uuid4
@@ -5,8 +9,10 @@ from datetime import datetime, timezone
 
 from fastapi.testclient import TestClient
 
+from app.api.routes.jobs import get_job_events
 from app.main import app
 from app.models.job import JobStatus, Platform
+from app.services.storage import ObjectMetadata
 
 
 @pytest.fixture
@@ -38,6 +44,9 @@ def sample_job():
 
     video = MagicMock()
     video.original_name = "test.mp4"
+    video.proxy_path = None
+    video.waveform_path = None
+    video.hls_playlist_path = None
     job.video = video
 
     return job
@@ -75,3 +84,235 @@ def test_get_results_not_completed(client, mock_db_session, sample_job):
 
     response = client.get(f"/api/jobs/{sample_job.id}/results")
     assert response.status_code == 400
+
+
+@pytest.fixture
+def mock_video_storage():
+    content = bytes(range(256)) * 4
+    with patch("app.api.routes.jobs.StorageService") as mock:
+        storage = mock.return_value
+        storage.get_file_metadata.return_value = ObjectMetadata(size=len(content), etag="abc123")
+
+        def get_file_stream(file_path, start=None, end=None):
+            start = 0 if start is None else start
+            end = len(content) - 1 if end is None else end
+            return io.BytesIO(content[start:end + 1])
+
+        storage.get_file_stream.side_effect = get_file_stream
+        yield storage, content
+
+
+def test_get_video_full(client, mock_db_session, sample_job, mock_video_storage):
+    """Range なしの場合は全体を200で返すこと"""
+    storage, content = mock_video_storage
+    sample_job.video.file_path = "videos/test.mp4"
+    mock_db_session.query.return_value.join.return_value.filter.return_value.first.return_value = sample_job
+
+    response = client.get(f"/api/jobs/{sample_job.id}/video")
+
+    assert response.status_code == 200
+    assert response.content == content
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["content-length"] == str(len(content))
+    storage.file_exists.assert_not_called()
+    storage.get_file_size.assert_not_called()
+
+
+def test_get_video_range(client, mock_db_session, sample_job, mock_video_storage):
+    """Range 指定時は該当範囲のみを206で返すこと"""
+    storage, content = mock_video_storage
+    sample_job.video.file_path = "videos/test.mp4"
+    mock_db_session.query.return_value.join.return_value.filter.return_value.first.return_value = sample_job
+
+    response = client.get(f"/api/jobs/{sample_job.id}/video", headers={"Range": "bytes=100-199"})
+
+    assert response.status_code == 206
+    assert response.content == content[100:200]
+    assert response.headers["content-range"] == f"bytes 100-199/{len(content)}"
+    storage.get_file_stream.assert_called_once_with("videos/test.mp4", 100, 199)
+
+
+def test_get_video_if_range_mismatch(client, mock_db_session, sample_job, mock_video_storage):
+    """If-Range が一致しない場合は全体を200で返すこと"""
+    _, content = mock_video_storage
+    sample_job.video.file_path = "videos/test.mp4"
+    mock_db_session.query.return_value.join.return_value.filter.return_value.first.return_value = sample_job
+
+    response = client.get(
+        f"/api/jobs/{sample_job.id}/video",
+        headers={"Range": "bytes=100-199", "If-Range": '"stale"'},
+    )
+
+    assert response.status_code == 200
+    assert response.content == content
+
+
+def test_get_video_range_not_satisfiable(client, mock_db_session, sample_job, mock_video_storage):
+    _, content = mock_video_storage
+    sample_job.video.file_path = "videos/test.mp4"
+    mock_db_session.query.return_value.join.return_value.filter.return_value.first.return_value = sample_job
+
+    response = client.get(f"/api/jobs/{sample_job.id}/video", headers={"Range": "bytes=5000-"})
+
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(content)}"
+
+
+def test_get_video_prefers_proxy(client, mock_db_session, sample_job, mock_video_storage):
+    """再生用プロキシがある場合はプロキシを配信し、original=true で元動画を配信すること"""
+    storage, _ = mock_video_storage
+    sample_job.video.file_path = "videos/test.mp4"
+    sample_job.video.proxy_path = "proxies/video-1/proxy.mp4"
+    mock_db_session.query.return_value.join.return_value.filter.return_value.first.return_value = sample_job
+
+    response = client.get(f"/api/jobs/{sample_job.id}/video", headers={"Range": "bytes=0-9"})
+    assert response.status_code == 206
+    storage.get_file_stream.assert_called_with("proxies/video-1/proxy.mp4", 0, 9)
+
+    response = client.get(f"/api/jobs/{sample_job.id}/video?original=true", headers={"Range": "bytes=0-9"})
+    assert response.status_code == 206
+    storage.get_file_stream.assert_called_with("videos/test.mp4", 0, 9)
+
+
+def test_get_video_hls_segment(client, mock_db_session, sample_job, mock_video_storage):
+    """HLS のファイルはプレイリストと同じディレクトリから配信すること"""
+    storage, _ = mock_video_storage
+    sample_job.video.hls_playlist_path = "proxies/video-1/hls/playlist.m3u8"
+    mock_db_session.query.return_value.join.return_value.filter.return_value.first.return_value = sample_job
+
+    response = client.get(f"/api/jobs/{sample_job.id}/video/hls/segment_00001.m4s")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "video/iso.segment"
+    storage.get_file_stream.assert_called_once_with("proxies/video-1/hls/segment_00001.m4s", None, None)
+
+
+def test_get_video_hls_rejects_path_traversal(client, mock_db_session, sample_job):
+    """HLS のファイル名以外は配信しないこと"""
+    response = client.get(f"/api/jobs/{sample_job.id}/video/hls/..%2Fproxy.mp4")
+
+    assert response.status_code == 404
+
+
+THUMBNAIL_MANIFEST = {
+    "token": "abc",
+    "interval": 2.0,
+    "width": 160,
+    "height": 90,
+    "columns": 10,
+    "rows": 10,
+    "count": 15,
+    "sprites": ["sprite_001.jpg"],
+    "stills": {"risk-1": "risk_risk-1.jpg"},
+}
+
+
+def test_get_thumbnails(client, mock_db_session, sample_job):
+    """サムネイルのレイアウトとトークン付きURLを返すこと"""
+    sample_job.video.thumbnail_manifest = THUMBNAIL_MANIFEST
+    mock_db_session.query.return_value.join.return_value.filter.return_value.first.return_value = sample_job
+
+    response = client.get(f"/api/jobs/{sample_job.id}/thumbnails")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["sprite_urls"] == [f"/api/jobs/{sample_job.id}/thumbnails/abc/sprite_001.jpg"]
+    assert data["risk_thumbnail_urls"] == {"risk-1": f"/api/jobs/{sample_job.id}/thumbnails/abc/risk_risk-1.jpg"}
+    assert data["count"] == 15
+
+
+def test_get_thumbnails_not_generated(client, mock_db_session, sample_job):
+    sample_job.video.thumbnail_manifest = None
+    mock_db_session.query.return_value.join.return_value.filter.return_value.first.return_value = sample_job
+
+    response = client.get(f"/api/jobs/{sample_job.id}/thumbnails")
+
+    assert response.status_code == 404
+
+
+def test_get_thumbnail_file_is_immutable(client, mock_db_session, sample_job, mock_video_storage):
+    """サムネイル画像は不変のキャッシュヘッダー付きで配信し、古いトークンは404とすること"""
+    storage, _ = mock_video_storage
+    sample_job.video.id = "video-1"
+    sample_job.video.thumbnail_manifest = THUMBNAIL_MANIFEST
+    mock_db_session.query.return_value.join.return_value.filter.return_value.first.return_value = sample_job
+
+    response = client.get(f"/api/jobs/{sample_job.id}/thumbnails/abc/sprite_001.jpg")
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "public, max-age=31536000, immutable"
+    assert response.headers["content-type"] == "image/jpeg"
+    storage.get_file_metadata.assert_called_once_with("thumbnails/video-1/abc/sprite_001.jpg")
+
+    response = client.get(f"/api/jobs/{sample_job.id}/thumbnails/old/sprite_001.jpg")
+    assert response.status_code == 404
+
+
+def test_get_waveform(client, mock_db_session, sample_job, mock_video_storage):
+    """波形ピークを ETag 付きで配信し、If-None-Match 一致時は304とすること"""
+    storage, content = mock_video_storage
+    sample_job.video.waveform_path = "waveforms/video-1/abc.peaks"
+    mock_db_session.query.return_value.join.return_value.filter.return_value.first.return_value = sample_job
+
+    response = client.get(f"/api/jobs/{sample_job.id}/waveform")
+    assert response.status_code == 200
+    assert response.content == content
+    assert response.headers["content-type"] == "application/octet-stream"
+    assert response.headers["cache-control"] == "public, max-age=86400"
+    assert response.headers["etag"] == '"abc123"'
+
+    response = client.get(f"/api/jobs/{sample_job.id}/waveform", headers={"If-None-Match": '"abc123"'})
+    assert response.status_code == 304
+    assert response.content == b""
+    storage.get_file_stream.assert_called_once()
+
+
+def test_get_waveform_not_computed(client, mock_db_session, sample_job):
+    sample_job.video.waveform_path = None
+    mock_db_session.query.return_value.join.return_value.filter.return_value.first.return_value = sample_job
+
+    response = client.get(f"/api/jobs/{sample_job.id}/waveform")
+
+    assert response.status_code == 404
+
+
+def test_job_events_restart_transcript_after_retry(mock_db_session, sample_job):
+    """再実行で文字起こしが破棄されたら transcript_reset を送り、新しいセグメントを先頭から配信すること"""
+    mock_db_session.query.return_value.filter.return_value.first.return_value = sample_job
+    first = [{"text": "a"}, {"text": "b"}, {"text": "c"}]
+    retried = [{"text": "x"}]
+    polls = [
+        (0, first, None),
+        (1, retried, None),
+        (1, retried, {"status": "completed"}),
+    ]
+    state = {}
+
+    progress_service = MagicMock()
+
+    def get_generation(job_id):
+        state["poll"] = polls.pop(0)
+        return state["poll"][0]
+
+    progress_service.get_transcript_generation.side_effect = get_generation
+    progress_service.get_transcript_segments.side_effect = lambda job_id, start: state["poll"][1][start:]
+    progress_service.get_partial_transcripts.return_value = {}
+    progress_service.get_progress.side_effect = lambda job_id: state["poll"][2]
+
+    async def collect():
+        with patch("app.api.routes.jobs.ProgressService", return_value=progress_service), \
+            patch("app.api.routes.jobs.asyncio.sleep", return_value=None):
+            response = await get_job_events("job-1")
+            return [event async for event in response.body_iterator]
+
+    events = asyncio.run(collect())
+    transcript_events = [
+        (event["event"], json.loads(event["data"]).get("segments"))
+        for event in events
+        if event["event"].startswith("transcript")
+    ]
+    assert transcript_events == [
+        ("transcript", first),
+        ("transcript_reset", None),
+        ("transcript", retried),
+    ]
+    assert events[-1]["event"] == "complete"
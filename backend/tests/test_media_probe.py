@@ -0,0 +1,144 @@
+import json
+import subprocess
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.services.media_probe import (
+    MediaProbeError,
+    media_info_from_video,
+    parse_ffprobe_output,
+    parse_keyframe_interval,
+    probe_media,
+    probe_stored_media,
+)
+
+FFPROBE_OUTPUT = {
+    "streams": [
+        {
+            "codec_type": "video",
+            "codec_name": "h264",
+            "width": 1920,
+            "height": 1080,
+            "avg_frame_rate": "30000/1001",
+            "r_frame_rate": "30000/1001",
+        },
+        {"codec_type": "audio", "codec_name": "aac"},
+    ],
+    "format": {"duration": "12.345000", "bit_rate": "4500000"},
+}
+
+PACKETS_OUTPUT = {
+    "packets": [
+        {"pts_time": "0.000000", "flags": "K__"},
+        {"pts_time": "0.033367", "flags": "___"},
+        {"pts_time": "2.002000", "flags": "K__"},
+        {"pts_time": "4.004000", "flags": "K__"},
+    ]
+}
+
+
+def completed(stdout, returncode=0, stderr=""):
+    return subprocess.CompletedProcess(args=[], returncode=returncode, stdout=json.dumps(stdout), stderr=stderr)
+
+
+def test_parse_ffprobe_output():
+    info = parse_ffprobe_output(FFPROBE_OUTPUT)
+
+    assert info.duration == 12.345
+    assert info.width == 1920
+    assert info.height == 1080
+    assert info.fps == 29.97
+    assert info.video_codec == "h264"
+    assert info.audio_codec == "aac"
+    assert info.has_audio is True
+    assert info.bit_rate == 4500000
+    assert info.total_frames == 370
+
+
+def test_parse_ffprobe_output_without_audio_ignores_cover_art():
+    data = {
+        "streams": [
+            {"codec_type": "video", "codec_name": "mjpeg", "disposition": {"attached_pic": 1}},
+            {"codec_type": "video", "codec_name": "vp9", "avg_frame_rate": "0/0", "r_frame_rate": "25/1", "duration": "3.5"},
+        ],
+        "format": {"bit_rate": "N/A"},
+    }
+
+    info = parse_ffprobe_output(data)
+
+    assert info.video_codec == "vp9"
+    assert info.fps == 25.0
+    assert info.duration == 3.5
+    assert info.bit_rate is None
+    assert info.has_audio is False
+    assert info.audio_codec is None
+
+
+def test_parse_keyframe_interval():
+    assert parse_keyframe_interval(PACKETS_OUTPUT["packets"]) == 2.002
+    assert parse_keyframe_interval([{"pts_time": "0.0", "flags": "K_"}]) is None
+
+
+def test_probe_media_runs_format_and_packet_probes():
+    with patch("app.services.media_probe.subprocess.run", side_effect=[completed(FFPROBE_OUTPUT), completed(PACKETS_OUTPUT)]) as run:
+        info = probe_media("/tmp/source.mp4")
+
+    assert info.keyframe_interval == 2.002
+    assert info.duration == 12.345
+    packet_command = run.call_args_list[1].args[0]
+    assert "-select_streams" in packet_command
+    assert "-read_intervals" in packet_command
+
+
+def test_probe_media_keeps_info_when_keyframe_probe_fails():
+    with patch(
+        "app.services.media_probe.subprocess.run",
+        side_effect=[completed(FFPROBE_OUTPUT), completed({}, returncode=1, stderr="boom")],
+    ):
+        info = probe_media("/tmp/source.mp4")
+
+    assert info.keyframe_interval is None
+    assert info.width == 1920
+
+
+def test_probe_media_raises_on_ffprobe_failure():
+    with patch("app.services.media_probe.subprocess.run", return_value=completed({}, returncode=1, stderr="Invalid data")):
+        with pytest.raises(MediaProbeError):
+            probe_media("/tmp/broken.mp4")
+
+
+def test_probe_media_raises_without_streams():
+    with patch("app.services.media_probe.subprocess.run", return_value=completed({"streams": [], "format": {}})):
+        with pytest.raises(MediaProbeError):
+            probe_media("/tmp/empty.mp4")
+
+
+def test_probe_stored_media_reads_from_signed_url():
+    """ダウンロードせずに署名付き URL を ffprobe に渡し、読み込み量を抑えること"""
+    storage = MagicMock()
+    storage.generate_presigned_url.return_value = "https://storage/videos/a.mp4?signature=secret"
+    with patch("app.services.media_probe.subprocess.run", side_effect=[completed(FFPROBE_OUTPUT), completed(PACKETS_OUTPUT)]) as run:
+        info = probe_stored_media(storage, "videos/a.mp4")
+
+    assert info.fps == 29.97
+    storage.download_file.assert_not_called()
+    packet_command = run.call_args_list[1].args[0]
+    assert packet_command[-1] == "https://storage/videos/a.mp4?signature=secret"
+    assert "%+10" in packet_command
+
+
+def test_probe_stored_media_hides_signed_url_in_errors():
+    storage = MagicMock()
+    url = "https://storage/videos/a.mp4?signature=secret"
+    storage.generate_presigned_url.return_value = url
+    with patch("app.services.media_probe.subprocess.run", return_value=completed({}, returncode=1, stderr=f"{url}: 403 Forbidden")):
+        with pytest.raises(MediaProbeError) as excinfo:
+            probe_stored_media(storage, "videos/a.mp4")
+
+    assert "secret" not in str(excinfo.value)
+
+
+def test_media_info_from_video_requires_probe():
+    assert media_info_from_video(SimpleNamespace(has_audio=None)) is None
@@ -0,0 +1,124 @@
+import hashlib
+import os
+import uuid
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.database import Base
+from app.models.job import AnalysisJob, JobStatus, Platform, Video
+from app.services.proxy_rendition import ProxyRendition
+from app.services.storage import ObjectMetadata
+from app.services.thumbnails import ThumbnailManifest
+from app.tasks.media import process_video_media
+
+CONTENT = b"original upload bytes"
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    with patch("app.tasks.media.SessionLocal", factory):
+        yield factory
+
+
+@pytest.fixture
+def video_id(session_factory):
+    db = session_factory()
+    video = Video(id=uuid.uuid4(), file_path="videos/original.mp4", original_name="clip.mp4", file_size=len(CONTENT))
+    db.add(video)
+    db.add(
+        AnalysisJob(
+            id=uuid.uuid4(),
+            video_id=video.id,
+            status=JobStatus.completed,
+            purpose="PR",
+            platform=Platform.twitter,
+            target_audience="general",
+        )
+    )
+    db.commit()
+    yield video.id
+    db.close()
+
+
+@pytest.fixture
+def media_services():
+    storage = MagicMock()
+    storage.get_file_metadata.return_value = ObjectMetadata(size=len(CONTENT), content_type="video/mp4")
+    storage.upload_file.return_value = "videos/faststart.mp4"
+    storage.upload_file_to_path.side_effect = lambda f, path, content_type=None: path
+
+    def download(storage_service, file_path, destination):
+        with open(destination, "wb") as f:
+            f.write(CONTENT)
+
+    def remux(input_path, output_path):
+        with open(output_path, "wb") as f:
+            f.write(b"remuxed")
+
+    def proxy(input_path, tmpdir):
+        proxy_path = os.path.join(tmpdir, "proxy.mp4")
+        with open(proxy_path, "wb") as f:
+            f.write(b"proxy")
+        os.makedirs(os.path.join(tmpdir, "hls"))
+        return ProxyRendition(proxy_path=proxy_path, hls_directory=os.path.join(tmpdir, "hls"))
+
+    with patch("app.tasks.media.StorageService", return_value=storage), \
+        patch("app.tasks.media.download_video", side_effect=download) as download_mock, \
+        patch("app.tasks.media.needs_faststart", return_value=True), \
+        patch("app.tasks.media.remux_faststart", side_effect=remux) as remux_mock, \
+        patch("app.tasks.media.generate_proxy_rendition", side_effect=proxy) as proxy_mock, \
+        patch("app.tasks.media.render_thumbnails") as thumbnails_mock, \
+        patch("app.tasks.media.delete_replaced_video"):
+        thumbnails_mock.return_value = ThumbnailManifest(
+            token="t", interval=1.0, width=160, height=90, columns=1, rows=1, count=0
+        )
+        yield {
+            "download": download_mock,
+            "remux": remux_mock,
+            "proxy": proxy_mock,
+            "thumbnails": thumbnails_mock,
+        }
+
+
+def test_process_video_media_downloads_once(session_factory, video_id, media_services):
+    """faststart・プロキシ・サムネイルを1回ダウンロードしたローカルコピーで続けて処理すること"""
+    result = process_video_media(video_id, thumbnails=True)
+
+    assert result["faststart"] == "completed"
+    media_services["download"].assert_called_once()
+    # プロキシは差し替え後のファイルから、サムネイルはプロキシから生成する
+    assert media_services["proxy"].call_args[0][0].endswith("faststart.mp4")
+    assert media_services["thumbnails"].call_args[0][0].endswith("proxy.mp4")
+
+    db = session_factory()
+    video = db.query(Video).filter(Video.id == video_id).one()
+    assert video.file_path == "videos/faststart.mp4"
+    assert video.proxy_path == f"proxies/{video_id}/proxy.mp4"
+    assert video.thumbnail_manifest is not None
+    # content_hash は差し替え前の元のバイト列のハッシュ
+    assert video.content_hash == hashlib.sha256(CONTENT).hexdigest()
+    db.close()
+
+
+def test_process_video_media_keeps_existing_content_hash(session_factory, video_id, media_services):
+    db = session_factory()
+    db.query(Video).filter(Video.id == video_id).update({Video.content_hash: "b" * 64})
+    db.commit()
+    db.close()
+
+    process_video_media(video_id)
+
+    db = session_factory()
+    video = db.query(Video).filter(Video.id == video_id).one()
+    assert video.content_hash == "b" * 64
+    assert video.thumbnail_manifest is None
+    db.close()
@@ -0,0 +1,81 @@
+import os
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.services.media_workspace import MediaWorkspace
+
+
+def fake_download(file_path, destination, size=None):
+    with open(destination, "wb") as f:
+        f.write(b"fake video content")
+
+
+def test_downloads_once_for_concurrent_stages():
+    """並行ステージから要求されてもダウンロードは1回のみであること"""
+    storage = MagicMock()
+    storage.get_file_metadata.return_value = None
+    storage.download_file.side_effect = fake_download
+
+    with MediaWorkspace("videos/test.mp4", storage_service=storage) as workspace:
+        paths = []
+        threads = [
+            threading.Thread(target=lambda: paths.append(workspace.local_video_path))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert storage.download_file.call_count == 1
+        assert len(set(paths)) == 1
+        assert os.path.exists(paths[0])
+
+    assert not os.path.exists(paths[0])
+    assert not os.path.exists(workspace.directory)
+
+
+def test_cleans_up_on_failure():
+    """例外発生時も作業ディレクトリが削除されること"""
+    storage = MagicMock()
+    storage.get_file_metadata.return_value = None
+    storage.download_file.side_effect = fake_download
+
+    with pytest.raises(RuntimeError):
+        with MediaWorkspace("videos/test.mp4", storage_service=storage) as workspace:
+            local_path = workspace.local_video_path
+            raise RuntimeError("analysis failed")
+
+    assert not os.path.exists(local_path)
+
+
+def test_download_error_is_not_retried():
+    """ダウンロード失敗は記録され、後続の要求でも同じエラーになること"""
+    storage = MagicMock()
+    storage.get_file_metadata.return_value = None
+    storage.download_file.side_effect = RuntimeError("NoSuchKey")
+
+    with MediaWorkspace("videos/missing.mp4", storage_service=storage) as workspace:
+        with pytest.raises(RuntimeError):
+            workspace.local_video_path
+        with pytest.raises(RuntimeError):
+            workspace.local_video_path
+
+    assert storage.download_file.call_count == 1
+
+
+def test_close_while_in_use_defers_removal():
+    """使用中のステージがある間は close() しても作業ディレクトリが削除されないこと"""
+    storage = MagicMock()
+    storage.get_file_metadata.return_value = None
+    storage.download_file.side_effect = fake_download
+
+    workspace = MediaWorkspace("videos/test.mp4", storage_service=storage)
+    with workspace.in_use():
+        local_path = workspace.local_video_path
+        workspace.close()
+        assert os.path.exists(local_path)
+
+    assert not os.path.exists(workspace.directory)
@@ -0,0 +1,194 @@
+import threading
+from unittest.mock import ANY, MagicMock, PropertyMock, patch
+
+import pytest
+
+from app.services.gemini_video_analysis import UnifiedVideoAnalysisResult
+from app.services.media_probe import MediaInfo
+from app.services.orchestrator import WAVEFORM_FILENAME, OrchestratorService
+from app.services.pipeline import FatalStageError, StageContext
+
+
+@pytest.fixture
+def orchestrator():
+    with patch("app.services.orchestrator.AudioAnalyzerService"), \
+        patch("app.services.orchestrator.GeminiVideoAnalysisService"):
+        service = OrchestratorService(MagicMock())
+        yield service
+
+
+@pytest.fixture
+def workspace():
+    workspace = MagicMock()
+    workspace.local_video_path = "/tmp/media_workspace/source.mp4"
+    return workspace
+
+
+def test_audio_and_video_run_concurrently(orchestrator, workspace):
+    """音声解析とGemini統合解析が同時に実行されること"""
+    barrier = threading.Barrier(2, timeout=2)
+
+    def analyze_audio(video_path, local_video_path, waveform_output=None, duration=None, listener=None, cancel_event=None):
+        barrier.wait()
+        return MagicMock()
+
+    def analyze_video(video_path, local_video_path, media_info=None):
+        barrier.wait()
+        return UnifiedVideoAnalysisResult(
+            gemini_overall_score=80,
+            gemini_risk_level="high",
+            risks=[{"timestamp": 1.0, "end_timestamp": 2.0, "category": "aggressiveness", "level": "high", "score": 80}],
+        )
+
+    orchestrator.audio_analyzer.analyze.side_effect = analyze_audio
+    orchestrator.audio_analyzer.result_to_dict.return_value = {"segments": [], "has_audio": False}
+    orchestrator.gemini_video_analyzer.analyze_video.side_effect = analyze_video
+
+    result = orchestrator.run_analysis("job-1", "videos/test.mp4", {}, workspace=workspace)
+
+    assert result["errors"] is None
+    assert result["overall_score"] == 80
+    assert result["risk_level"] == "high"
+    assert len(result["risks"]) == 1
+    orchestrator.progress_service.set_job_completed.assert_called_once_with("job-1")
+
+
+def test_gemini_failure_falls_back_to_empty_assessment(orchestrator, workspace):
+    """Gemini統合解析が失敗してもリスク評価は空の結果で完了すること"""
+    orchestrator.audio_analyzer.result_to_dict.return_value = {"segments": [], "has_audio": False}
+    orchestrator.gemini_video_analyzer.analyze_video.side_effect = RuntimeError("quota exceeded")
+
+    result = orchestrator.run_analysis("job-1", "videos/test.mp4", {}, workspace=workspace)
+
+    assert "gemini_video" in result["errors"]
+    assert result["overall_score"] == 0
+    assert result["risks"] == []
+    assert result["transcription"] == {"segments": [], "has_audio": False}
+
+
+def test_shared_video_passed_to_all_stages(orchestrator, workspace):
+    """両ステージがワークスペースの同一ローカルファイルを使用すること"""
+    orchestrator.audio_analyzer.result_to_dict.return_value = {"segments": [], "has_audio": False}
+    orchestrator.gemini_video_analyzer.analyze_video.return_value = UnifiedVideoAnalysisResult()
+
+    orchestrator.run_analysis("job-1", "videos/test.mp4", {}, workspace=workspace)
+
+    orchestrator.audio_analyzer.analyze.assert_called_once_with(
+        "videos/test.mp4",
+        workspace.local_video_path,
+        waveform_output=workspace.path_for(WAVEFORM_FILENAME),
+        duration=None,
+        listener=ANY,
+        cancel_event=ANY,
+    )
+    orchestrator.gemini_video_analyzer.analyze_video.assert_called_once_with(
+        "videos/test.mp4", workspace.local_video_path, media_info=None
+    )
+
+
+def test_gemini_reads_gcs_without_waiting_for_download(orchestrator, workspace):
+    """GCS の場合、Gemini 統合解析はダウンロードを待たずメタ情報とともに URI で解析すること"""
+    orchestrator.audio_analyzer.result_to_dict.return_value = {"segments": [], "has_audio": False}
+    orchestrator.gemini_video_analyzer.analyze_video.return_value = UnifiedVideoAnalysisResult()
+    media_info = MediaInfo(duration=10.0, fps=30.0, has_audio=False)
+
+    with patch("app.services.orchestrator.requires_local_video", return_value=False):
+        stages = {stage.name: stage for stage in orchestrator.build_stages("job-1", "videos/test.mp4", {}, workspace, media_info)}
+        orchestrator.run_analysis("job-1", "videos/test.mp4", {}, workspace=workspace, media_info=media_info)
+
+    assert stages["video"].depends_on == ()
+    orchestrator.gemini_video_analyzer.analyze_video.assert_called_once_with(
+        "videos/test.mp4", None, media_info=media_info
+    )
+
+
+@pytest.fixture
+def url_mode_settings():
+    with patch("app.services.orchestrator.settings") as settings:
+        settings.audio_extraction_mode = "url"
+        settings.waveform_enabled = False
+        settings.analysis_source_timeout_seconds = 900
+        settings.analysis_audio_timeout_seconds = 600
+        settings.analysis_video_timeout_seconds = 900
+        settings.analysis_risk_timeout_seconds = 120
+        yield settings
+
+
+def test_audio_extracted_without_download(orchestrator, workspace, url_mode_settings):
+    """url / stream モードでローカルコピーを使うステージがなければ、ダウンロードせずに音声を抽出すること"""
+    orchestrator.audio_analyzer.result_to_dict.return_value = {"segments": [], "has_audio": False}
+    orchestrator.gemini_video_analyzer.analyze_video.return_value = UnifiedVideoAnalysisResult()
+    type(workspace).local_video_path = PropertyMock(side_effect=AssertionError("downloaded"))
+
+    with patch("app.services.orchestrator.requires_local_video", return_value=False):
+        stages = orchestrator.build_stages("job-1", "videos/test.mp4", {}, workspace)
+        result = orchestrator.run_analysis("job-1", "videos/test.mp4", {}, workspace=workspace)
+
+    assert "source" not in [stage.name for stage in stages]
+    assert result["errors"] is None
+    assert orchestrator.audio_analyzer.analyze.call_args.args == ("videos/test.mp4", None)
+
+
+def test_audio_reuses_download_for_gemini(orchestrator, workspace, url_mode_settings):
+    """Gemini のために動画をダウンロードする場合、url モードの音声抽出もそのローカルコピーを読むこと"""
+    orchestrator.audio_analyzer.result_to_dict.return_value = {"segments": [], "has_audio": False}
+    orchestrator.gemini_video_analyzer.analyze_video.return_value = UnifiedVideoAnalysisResult()
+
+    with patch("app.services.orchestrator.requires_local_video", return_value=True):
+        stages = {stage.name: stage for stage in orchestrator.build_stages("job-1", "videos/test.mp4", {}, workspace)}
+        orchestrator.run_analysis("job-1", "videos/test.mp4", {}, workspace=workspace)
+
+    assert stages["audio"].depends_on == ("source",)
+    assert orchestrator.audio_analyzer.analyze.call_args.args == ("videos/test.mp4", workspace.local_video_path)
+
+
+def test_audio_extraction_skipped_without_audio_stream(orchestrator, workspace):
+    """メタ情報で音声ストリームがない場合は音声抽出を行わないこと"""
+    orchestrator.audio_analyzer.result_to_dict.return_value = {"segments": [], "has_audio": False}
+    orchestrator.gemini_video_analyzer.analyze_video.return_value = UnifiedVideoAnalysisResult()
+
+    result = orchestrator.run_analysis(
+        "job-1", "videos/test.mp4", {}, workspace=workspace, media_info=MediaInfo(duration=10.0, has_audio=False)
+    )
+
+    orchestrator.audio_analyzer.analyze.assert_not_called()
+    assert result["transcription"] == {"segments": [], "has_audio": False}
+    assert result["errors"] is None
+
+
+def test_download_failure_is_fatal(orchestrator):
+    """動画のダウンロード失敗はジョブ全体の失敗として送出されること"""
+    workspace = MagicMock()
+    type(workspace).local_video_path = PropertyMock(side_effect=RuntimeError("NoSuchKey"))
+
+    with pytest.raises(FatalStageError):
+        orchestrator.run_analysis("job-1", "videos/missing.mp4", {}, workspace=workspace)
+
+    orchestrator.progress_service.set_job_completed.assert_not_called()
+
+
+def test_transcription_listener_updates_progress_and_transcript(orchestrator):
+    """文字起こしの処理済み割合を音声フェーズの進捗に、確定セグメントを途中結果に反映すること"""
+    orchestrator.audio_analyzer.result_to_dict.return_value = {"segments": [{"text": "a"}], "has_audio": True}
+    listener = orchestrator._transcription_listener("job-1", StageContext("audio"))
+
+    listener.on_progress(0.5)
+    listener.on_segments([MagicMock()])
+    listener.on_partial(12.0, "途中")
+
+    orchestrator.progress_service.update_progress.assert_called_once_with("job-1", "audio", ANY, 52.5)
+    orchestrator.progress_service.append_transcript_segments.assert_called_once_with("job-1", [{"text": "a"}])
+    orchestrator.progress_service.set_partial_transcript.assert_called_once_with("job-1", 12.0, "途中")
+
+
+def test_cancelled_stage_does_not_write_progress(orchestrator):
+    """タイムアウト・キャンセル後のステージの進捗・途中結果は書き込まれないこと"""
+    context = StageContext("audio")
+    listener = orchestrator._transcription_listener("job-1", context)
+    context.cancel()
+
+    listener.on_progress(1.0)
+    listener.on_segments([MagicMock()])
+
+    orchestrator.progress_service.update_progress.assert_not_called()
+    orchestrator.progress_service.append_transcript_segments.assert_not_called()
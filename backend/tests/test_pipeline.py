@@ -0,0 +1,137 @@
+import threading
+import time
+
+import pytest
+
+from app.services.pipeline import (
+    FatalStageError,
+    Stage,
+    StageCancelledError,
+    StageGraph,
+    StageTimeoutError,
+)
+
+
+def test_independent_stages_run_concurrently():
+    """依存関係のないステージは同時に実行されること"""
+    barrier = threading.Barrier(2, timeout=2)
+
+    def wait_for_sibling(deps, context):
+        barrier.wait()
+        return "ok"
+
+    outcome = StageGraph([
+        Stage(name="audio", func=wait_for_sibling),
+        Stage(name="video", func=wait_for_sibling),
+    ]).run()
+
+    assert outcome.results == {"audio": "ok", "video": "ok"}
+    assert outcome.errors == {}
+
+
+def test_dependent_stage_receives_dependency_results():
+    """後続ステージは依存ステージの結果のみを受け取ること"""
+    received = {}
+
+    def risk(deps, context):
+        received.update(deps)
+        return deps["video"] * 2
+
+    outcome = StageGraph([
+        Stage(name="audio", func=lambda deps, context: 1),
+        Stage(name="video", func=lambda deps, context: 21),
+        Stage(name="risk", func=risk, depends_on=("video",)),
+    ]).run()
+
+    assert outcome.results["risk"] == 42
+    assert received == {"video": 21}
+
+
+def test_failed_dependency_still_runs_dependent():
+    """依存ステージが失敗しても後続ステージは空の依存結果で実行されること"""
+    def video(deps, context):
+        raise RuntimeError("gemini error")
+
+    outcome = StageGraph([
+        Stage(name="video", func=video),
+        Stage(name="risk", func=lambda deps, context: deps.get("video", "fallback"), depends_on=("video",)),
+    ]).run()
+
+    assert isinstance(outcome.errors["video"], RuntimeError)
+    assert outcome.results["risk"] == "fallback"
+    assert outcome.fatal_error is None
+
+
+def test_stage_timeout():
+    """制限時間を超えたステージはタイムアウトとして記録されること"""
+    outcome = StageGraph([
+        Stage(name="audio", func=lambda deps, context: context.cancel_event.wait(5), timeout=0.1),
+        Stage(name="video", func=lambda deps, context: "ok"),
+    ]).run()
+
+    assert isinstance(outcome.errors["audio"], StageTimeoutError)
+    assert outcome.results == {"video": "ok"}
+
+
+def test_fatal_error_cancels_siblings():
+    """致命的エラー時は実行中・未開始のステージがキャンセルされること"""
+    release = threading.Event()
+
+    def slow(deps, context):
+        context.cancel_event.wait(5)
+        release.set()
+        return "late"
+
+    def broken(deps, context):
+        time.sleep(0.05)
+        raise RuntimeError("download failed")
+
+    outcome = StageGraph([
+        Stage(name="audio", func=slow),
+        Stage(name="media", func=broken, fatal=True),
+        Stage(name="risk", func=lambda deps, context: "never", depends_on=("media",)),
+    ]).run()
+
+    assert isinstance(outcome.errors["media"], FatalStageError)
+    assert isinstance(outcome.errors["audio"], StageCancelledError)
+    assert isinstance(outcome.errors["risk"], StageCancelledError)
+    assert outcome.fatal_error is outcome.errors["media"]
+    # 停止を通知したステージの終了を待ってから戻る
+    assert release.is_set()
+    assert outcome.abandoned == []
+
+
+def test_timed_out_stage_is_notified_and_writes_are_dropped():
+    """タイムアウトしたステージには停止が通知され、その後の書き込みは行われないこと"""
+    writes = []
+
+    def slow(deps, context):
+        while not context.cancelled:
+            time.sleep(0.01)
+        context.run_unless_cancelled(writes.append, "completed")
+        context.raise_if_cancelled()
+
+    outcome = StageGraph([Stage(name="audio", func=slow, timeout=0.1)]).run()
+
+    assert isinstance(outcome.errors["audio"], StageTimeoutError)
+    assert writes == []
+    assert outcome.abandoned == []
+
+
+def test_stage_ignoring_cancel_is_abandoned_after_grace():
+    """猶予時間内に停止しないステージは abandoned として記録されること"""
+    release = threading.Event()
+
+    outcome = StageGraph(
+        [Stage(name="video", func=lambda deps, context: release.wait(5), timeout=0.05)],
+        cancel_grace_seconds=0.05,
+    ).run()
+    release.set()
+
+    assert isinstance(outcome.errors["video"], StageTimeoutError)
+    assert outcome.abandoned == ["video"]
+
+
+def test_unknown_dependency_rejected():
+    with pytest.raises(ValueError):
+        StageGraph([Stage(name="risk", func=lambda deps, context: None, depends_on=("video",))])
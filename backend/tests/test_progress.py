@@ -6,9 +6,9 @@ from app.services.progress import ProgressService, PhaseStatus, JobStatus
 
 @pytest.fixture
 def mock_redis():
-    with patch("app.services.progress.redis") as mock:
+    with patch("app.services.progress.get_redis_client") as mock:
         mock_client = MagicMock()
-        mock.from_url.return_value = mock_client
+        mock.return_value = mock_client
         yield mock_client
 
 
@@ -80,3 +80,38 @@ def test_set_job_failed(progress_service, mock_redis):
     progress_service.set_job_failed(job_id, "API error occurred")
 
     mock_redis.set.assert_called()
+
+
+def test_transcript_segments(progress_service, mock_redis):
+    """確定セグメントを追加順に保持し、差分を取得できること"""
+    progress_service.append_transcript_segments("job-1", [{"text": "a", "start_time": 1.0}])
+
+    pipeline = mock_redis.pipeline.return_value
+    pipeline.rpush.assert_called_once_with("job_transcript:job-1", '{"text": "a", "start_time": 1.0}')
+    pipeline.execute.assert_called_once()
+
+    mock_redis.lrange.return_value = [b'{"text": "b", "start_time": 2.0}']
+    assert progress_service.get_transcript_segments("job-1", 1) == [{"text": "b", "start_time": 2.0}]
+    mock_redis.lrange.assert_called_once_with("job_transcript:job-1", 1, -1)
+
+
+def test_partial_transcript_cleared_when_final(progress_service, mock_redis):
+    progress_service.set_partial_transcript("job-1", 12.0, "途中")
+    mock_redis.pipeline.return_value.hset.assert_called_once_with("job_transcript_partial:job-1", "12.000", "途中")
+
+    progress_service.set_partial_transcript("job-1", 12.0, "")
+    mock_redis.hdel.assert_called_once_with("job_transcript_partial:job-1", "12.000")
+
+
+def test_reset_transcript_advances_generation(progress_service, mock_redis):
+    """文字起こしを破棄すると世代番号を進めること"""
+    progress_service.reset_transcript("job-1")
+
+    pipeline = mock_redis.pipeline.return_value
+    pipeline.delete.assert_called_once_with("job_transcript:job-1", "job_transcript_partial:job-1")
+    pipeline.incr.assert_called_once_with("job_transcript_generation:job-1")
+
+    mock_redis.get.return_value = b"2"
+    assert progress_service.get_transcript_generation("job-1") == 2
+    mock_redis.get.return_value = None
+    assert progress_service.get_transcript_generation("job-1") == 0
@@ -0,0 +1,65 @@
+import os
+import subprocess
+from unittest.mock import patch
+
+import pytest
+
+from app.services.proxy_rendition import (
+    HLS_PLAYLIST_NAME,
+    ProxyRenditionError,
+    build_hls_command,
+    build_proxy_command,
+    generate_proxy_rendition,
+    hls_content_type,
+)
+
+
+def test_build_proxy_command_scales_short_side_and_aligns_keyframes():
+    command = build_proxy_command("/tmp/in.mp4", "/tmp/proxy.mp4")
+
+    scale = command[command.index("-vf") + 1]
+    assert "min(540,iw)" in scale and "min(540,ih)" in scale
+    assert command[command.index("-force_key_frames") + 1] == "expr:gte(t,n_forced*2)"
+    assert command[command.index("-movflags") + 1] == "+faststart"
+    assert "0:a:0?" in command
+
+
+def test_build_hls_command_copies_proxy_streams():
+    command = build_hls_command("/tmp/proxy.mp4", "/tmp/hls")
+
+    assert command[command.index("-c") + 1] == "copy"
+    assert command[command.index("-hls_segment_type") + 1] == "fmp4"
+    assert command[-1] == os.path.join("/tmp/hls", HLS_PLAYLIST_NAME)
+
+
+def test_hls_content_type():
+    assert hls_content_type("playlist.m3u8") == "application/vnd.apple.mpegurl"
+    assert hls_content_type("segment_00001.m4s") == "video/iso.segment"
+    assert hls_content_type("init.mp4") == "video/mp4"
+
+
+def test_generate_proxy_rendition(tmp_path):
+    def run(command, **kwargs):
+        output = command[-1]
+        if output.endswith(HLS_PLAYLIST_NAME):
+            for name in (HLS_PLAYLIST_NAME, "init.mp4", "segment_00000.m4s"):
+                (tmp_path / "hls" / name).write_bytes(b"x")
+        else:
+            with open(output, "wb") as f:
+                f.write(b"proxy")
+        return subprocess.CompletedProcess(args=command, returncode=0, stdout="", stderr="")
+
+    with patch("app.services.proxy_rendition.subprocess.run", side_effect=run):
+        rendition = generate_proxy_rendition("/tmp/in.mp4", str(tmp_path))
+
+    assert rendition.proxy_path == str(tmp_path / "proxy.mp4")
+    assert rendition.hls_files == ["init.mp4", HLS_PLAYLIST_NAME, "segment_00000.m4s"]
+
+
+def test_generate_proxy_rendition_raises_on_ffmpeg_failure(tmp_path):
+    with patch(
+        "app.services.proxy_rendition.subprocess.run",
+        return_value=subprocess.CompletedProcess(args=[], returncode=1, stdout="", stderr="Unknown encoder"),
+    ):
+        with pytest.raises(ProxyRenditionError):
+            generate_proxy_rendition("/tmp/in.mp4", str(tmp_path))
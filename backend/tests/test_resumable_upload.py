@@ -0,0 +1,154 @@
+import io
+from unittest.mock import patch
+
+import fakeredis
+import pytest
+from moto import mock_aws
+
+import app.services.storage as storage_module
+from app.services import resumable_upload as resumable_module
+from app.services.resumable_upload import (
+    InvalidUploadChunk,
+    ResumableUploadService,
+    UploadOffsetMismatch,
+    UploadSessionBusy,
+    UploadSessionNotFound,
+)
+from app.services.storage import S3StorageService
+
+CHUNK_MB = 5
+CHUNK = CHUNK_MB * 1024 * 1024
+
+
+@pytest.fixture
+def redis_client():
+    client = fakeredis.FakeRedis()
+    with patch("app.services.resumable_upload.get_redis_client", return_value=client):
+        yield client
+
+
+@pytest.fixture
+def service(redis_client):
+    with mock_aws():
+        with patch.object(storage_module.settings, "storage_endpoint", None), \
+            patch.object(resumable_module.settings, "resumable_upload_chunk_size_mb", CHUNK_MB):
+            yield ResumableUploadService(storage_service=S3StorageService())
+
+
+def test_chunks_are_assembled_into_multipart_object(service):
+    """チャンクが S3 マルチパートとして結合され、元のファイルと一致すること"""
+    content = bytes(range(256)) * (CHUNK * 2 // 256) + b"tail"
+    session = service.create("job-1", "clip.mp4", "video/mp4", len(content))
+
+    for offset in range(0, len(content), CHUNK):
+        chunk = content[offset:offset + CHUNK]
+        session = service.write_chunk("job-1", offset, io.BytesIO(chunk), len(chunk))
+        assert session.offset == offset + len(chunk)
+
+    service.complete("job-1")
+
+    assert service.storage_service.get_file_content(session.file_path) == content
+    assert service.get("job-1") is None
+
+
+def test_offset_survives_and_mismatch_reports_current_offset(service):
+    """中断後は受信済みオフセットから再開でき、異なるオフセットは拒否されること"""
+    content = b"a" * (CHUNK + 10)
+    service.create("job-1", "clip.mp4", "video/mp4", len(content))
+    service.write_chunk("job-1", 0, io.BytesIO(content[:CHUNK]), CHUNK)
+
+    assert service.get("job-1").offset == CHUNK
+    with pytest.raises(UploadOffsetMismatch) as excinfo:
+        service.write_chunk("job-1", 0, io.BytesIO(content[:CHUNK]), CHUNK)
+    assert excinfo.value.offset == CHUNK
+
+
+def test_failed_part_does_not_advance_offset(service):
+    content = b"a" * (CHUNK + 10)
+    service.create("job-1", "clip.mp4", "video/mp4", len(content))
+
+    with patch.object(service.storage_service, "upload_part", side_effect=IOError("network")):
+        with pytest.raises(IOError):
+            service.write_chunk("job-1", 0, io.BytesIO(content[:CHUNK]), CHUNK)
+
+    assert service.get("job-1").offset == 0
+    service.write_chunk("job-1", 0, io.BytesIO(content[:CHUNK]), CHUNK)
+    assert service.get("job-1").offset == CHUNK
+
+
+def test_chunk_must_match_chunk_size(service):
+    service.create("job-1", "clip.mp4", "video/mp4", CHUNK * 2)
+
+    with pytest.raises(InvalidUploadChunk):
+        service.write_chunk("job-1", 0, io.BytesIO(b"a" * 100), 100)
+
+
+def test_concurrent_chunk_is_rejected(service, redis_client):
+    service.create("job-1", "clip.mp4", "video/mp4", CHUNK)
+    redis_client.set("resumable_upload:job-1:lock", "other")
+
+    with pytest.raises(UploadSessionBusy):
+        service.write_chunk("job-1", 0, io.BytesIO(b"a" * CHUNK), CHUNK)
+
+
+def test_complete_requires_all_chunks(service):
+    service.create("job-1", "clip.mp4", "video/mp4", CHUNK * 2)
+
+    with pytest.raises(InvalidUploadChunk):
+        service.complete("job-1")
+
+
+def test_abort_discards_session(service):
+    service.create("job-1", "clip.mp4", "video/mp4", CHUNK)
+    service.abort("job-1")
+
+    with pytest.raises(UploadSessionNotFound):
+        service.write_chunk("job-1", 0, io.BytesIO(b"a" * CHUNK), CHUNK)
+
+
+def test_expired_session_multipart_is_aborted(service, redis_client):
+    """期限切れで Redis から消えたセッションも、ストレージの分割アップロードが中止されること"""
+    content = b"a" * (CHUNK + 10)
+    session = service.create("job-1", "clip.mp4", "video/mp4", len(content))
+    service.write_chunk("job-1", 0, io.BytesIO(content[:CHUNK]), CHUNK)
+    redis_client.delete("resumable_upload:job-1")
+
+    with patch.object(resumable_module.time, "time", return_value=10**12), \
+        patch.object(service.storage_service, "abort_resumable_upload") as abort:
+        assert service.sweep_expired() == 1
+
+    abort.assert_called_once_with(session.file_path, session.storage_upload_id)
+    assert redis_client.zcard(service.expiry_index_key) == 0
+    assert redis_client.hlen(service.storage_index_key) == 0
+
+
+def test_sweep_keeps_live_and_finished_sessions(service, redis_client):
+    """期限内のセッションは中止せず、完了したセッションは索引から外れること"""
+    service.create("job-1", "clip.mp4", "video/mp4", CHUNK)
+    service.create("job-2", "clip.mp4", "video/mp4", CHUNK)
+    service.abort("job-2")
+
+    with patch.object(service.storage_service, "abort_resumable_upload") as abort:
+        assert service.sweep_expired() == 0
+
+    abort.assert_not_called()
+    assert redis_client.zcard(service.expiry_index_key) == 1
+
+
+def test_lock_release_keeps_lock_taken_by_other_request(service, redis_client):
+    """期限切れ後に他のリクエストが取得したロックは解放しないこと"""
+    service.create("job-1", "clip.mp4", "video/mp4", CHUNK)
+
+    def take_over(*args, **kwargs):
+        redis_client.set("resumable_upload:job-1:lock", "other")
+        return "etag"
+
+    with patch.object(service.storage_service, "upload_part", side_effect=take_over):
+        service.write_chunk("job-1", 0, io.BytesIO(b"a" * CHUNK), CHUNK)
+
+    assert redis_client.get("resumable_upload:job-1:lock") == b"other"
+
+
+def test_sweep_is_claimed_once_per_interval(service):
+    assert service.claim_sweep() is True
+    assert service.claim_sweep() is False
@@ -0,0 +1,278 @@
+import io
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from app.services import storage as storage_module
+from app.services.storage import GCSStorageService, S3StorageService, SignedUrlCache
+
+
+@pytest.fixture
+def s3_service():
+    with mock_aws():
+        with patch.object(storage_module.settings, "storage_endpoint", None), \
+            patch.object(storage_module.settings, "storage_multipart_threshold_mb", 5), \
+            patch.object(storage_module.settings, "storage_multipart_chunksize_mb", 5):
+            service = S3StorageService()
+            yield service
+
+
+def test_s3_multipart_upload_reports_progress(s3_service):
+    """マルチパートアップロードで進捗が総バイト数まで通知されること"""
+    content = b"a" * (12 * 1024 * 1024)
+    progress = []
+
+    s3_service.upload_file_to_path(
+        io.BytesIO(content),
+        "exports/test.mp4",
+        on_progress=lambda uploaded, total: progress.append((uploaded, total)),
+    )
+
+    assert s3_service.get_file_content("exports/test.mp4") == content
+    assert progress[-1] == (len(content), len(content))
+    assert s3_service.transfer_config.multipart_chunksize == 5 * 1024 * 1024
+
+
+@pytest.fixture
+def gcs_service():
+    with patch("google.cloud.storage.Client"):
+        service = GCSStorageService()
+        service.bucket = MagicMock()
+        yield service
+
+
+def test_gcs_small_file_uses_chunked_resumable_upload(gcs_service):
+    content = b"a" * 1024
+    progress = []
+
+    def upload_from_file(file, content_type=None, size=None):
+        assert file.read() == content
+
+    blob = gcs_service.bucket.blob.return_value
+    blob.upload_from_file.side_effect = upload_from_file
+
+    gcs_service.upload_file_to_path(
+        io.BytesIO(content),
+        "exports/test.mp4",
+        on_progress=lambda uploaded, total: progress.append((uploaded, total)),
+    )
+
+    gcs_service.bucket.blob.assert_called_once_with(
+        "exports/test.mp4", chunk_size=storage_module.settings.gcs_upload_chunk_size_bytes
+    )
+    assert progress[-1] == (1024, 1024)
+
+
+def test_gcs_large_file_uses_parallel_composite_upload(gcs_service):
+    """閾値以上のファイルはパーツに分割して並列アップロードし結合されること"""
+    content = b"a" * 2500
+    blobs = {}
+
+    def make_blob(name, **kwargs):
+        blobs.setdefault(name, MagicMock(name=name))
+        return blobs[name]
+
+    gcs_service.bucket.blob.side_effect = make_blob
+
+    with patch.object(storage_module.settings, "gcs_parallel_composite_threshold_mb", 0), \
+        patch.object(type(storage_module.settings), "storage_multipart_chunksize_bytes", 1000):
+        gcs_service.upload_file_to_path(io.BytesIO(content), "exports/test.mp4")
+
+    part_names = sorted(name for name in blobs if ".parts/" in name)
+    assert len(part_names) == 3
+    blobs["exports/test.mp4"].compose.assert_called_once()
+    for name in part_names:
+        blobs[name].delete.assert_called_once()
+
+
+def test_gcs_compose_names_intermediates_per_level(gcs_service):
+    """多段の compose では段ごとに別名の中間オブジェクトを使い、次の段の結合後に削除すること"""
+    blobs = {}
+    deleted_before_final = []
+
+    def make_blob(name, **kwargs):
+        blobs.setdefault(name, MagicMock(name=name))
+        return blobs[name]
+
+    gcs_service.bucket.blob.side_effect = make_blob
+    sources = [MagicMock(name=f"part-{i}") for i in range(32 * 32 + 1)]
+
+    def final_compose(sources):
+        deleted_before_final.extend(name for name, blob in blobs.items() if blob.delete.called)
+
+    make_blob("exports/test.mp4").compose.side_effect = final_compose
+    gcs_service._compose(sources, "exports/test.mp4", "video/mp4", "exports/test.mp4.parts/upload")
+
+    level0 = [name for name in blobs if "/compose-L0-" in name]
+    level1 = [name for name in blobs if "/compose-L1-" in name]
+    assert len(level0) == 33
+    assert len(level1) == 2
+    # 1段目の中間オブジェクトは2段目の結合後、最終結合の前に削除済み
+    assert sorted(deleted_before_final) == sorted(level0)
+    for name in level0 + level1:
+        blobs[name].delete.assert_called_once()
+    blobs["exports/test.mp4"].compose.assert_called_once_with([blobs[name] for name in sorted(level1)])
+
+
+def test_s3_ranged_parallel_download(s3_service, tmp_path):
+    """パートサイズを超えるファイルはレンジGETで並列ダウンロードされること"""
+    content = bytes(range(256)) * 4096
+    s3_service.upload_file_to_path(io.BytesIO(content), "videos/test.mp4")
+    destination = tmp_path / "out.mp4"
+
+    with patch.object(type(storage_module.settings), "storage_download_part_size_bytes", 100_000), \
+        patch.object(s3_service, "_download_range", wraps=s3_service._download_range) as range_mock:
+        s3_service.download_file("videos/test.mp4", str(destination))
+
+    assert destination.read_bytes() == content
+    assert range_mock.call_count == -(-len(content) // 100_000)
+
+
+def test_s3_small_file_single_request(s3_service, tmp_path):
+    s3_service.upload_file_to_path(io.BytesIO(b"small"), "videos/small.mp4")
+    destination = tmp_path / "out.mp4"
+
+    with patch.object(s3_service, "_download_range") as range_mock:
+        s3_service.download_file("videos/small.mp4", str(destination))
+
+    assert destination.read_bytes() == b"small"
+    range_mock.assert_not_called()
+
+
+def test_failed_ranged_download_removes_partial_file(s3_service, tmp_path):
+    content = b"a" * 300_000
+    s3_service.upload_file_to_path(io.BytesIO(content), "videos/test.mp4")
+    destination = tmp_path / "out.mp4"
+
+    with patch.object(type(storage_module.settings), "storage_download_part_size_bytes", 100_000), \
+        patch.object(s3_service, "_download_range", side_effect=RuntimeError("connection reset")):
+        with pytest.raises(RuntimeError):
+            s3_service.download_file("videos/test.mp4", str(destination))
+
+    assert not destination.exists()
+
+
+def test_gcs_file_stream_reads_lazily(gcs_service):
+    """GCSのストリームは全体をダウンロードせずチャンク単位で読み込むこと"""
+    blob = gcs_service.bucket.blob.return_value
+
+    stream = gcs_service.get_file_stream("videos/test.mp4")
+
+    assert stream is blob.open.return_value
+    blob.open.assert_called_once_with("rb", chunk_size=storage_module.settings.storage_stream_chunk_size_bytes)
+    blob.download_to_file.assert_not_called()
+
+
+def test_s3_ranged_file_stream(s3_service):
+    content = bytes(range(256))
+    s3_service.upload_file_to_path(io.BytesIO(content), "videos/test.mp4")
+
+    stream = s3_service.get_file_stream("videos/test.mp4", 10, 19)
+
+    assert stream.read() == content[10:20]
+
+
+def test_signed_url_cache_reuses_url_within_window():
+    """同じ時間枠内の要求には同一の署名付きURLを返すこと"""
+    cache = SignedUrlCache(bucket_seconds=300, max_entries=10)
+    sign = MagicMock(side_effect=lambda seconds: f"https://signed/{seconds}")
+
+    with patch("app.services.storage.time.time", return_value=1_000_000.0):
+        first = cache.get_or_sign("videos/a.mp4", 3600, sign)
+    with patch("app.services.storage.time.time", return_value=1_000_100.0):
+        second = cache.get_or_sign("videos/a.mp4", 3600, sign)
+
+    assert first == second
+    assert sign.call_count == 1
+    # 有効期限は時間枠の終端に揃えられ、要求された期間以上が残る
+    assert sign.call_args[0][0] >= 3600
+
+
+def test_signed_url_cache_resigns_in_new_window():
+    cache = SignedUrlCache(bucket_seconds=300, max_entries=10)
+    sign = MagicMock(side_effect=lambda seconds: f"https://signed/{sign.call_count}")
+
+    with patch("app.services.storage.time.time", return_value=1_000_000.0):
+        cache.get_or_sign("videos/a.mp4", 3600, sign)
+    with patch("app.services.storage.time.time", return_value=1_000_400.0):
+        cache.get_or_sign("videos/a.mp4", 3600, sign)
+
+    assert sign.call_count == 2
+
+
+def test_signed_url_cache_bounded():
+    cache = SignedUrlCache(bucket_seconds=300, max_entries=2)
+    sign = MagicMock(return_value="https://signed")
+
+    for index in range(5):
+        cache.get_or_sign(f"videos/{index}.mp4", 3600, sign)
+
+    assert len(cache._entries) == 2
+
+
+def test_gcs_credentials_refreshed_only_near_expiry(gcs_service):
+    credentials = MagicMock()
+    credentials.token = "token"
+    credentials.expiry = datetime.utcnow() + timedelta(hours=1)
+
+    with patch("google.auth.default", return_value=(credentials, "project")) as default_mock:
+        gcs_service._get_credentials()
+        gcs_service._get_credentials()
+        credentials.refresh.assert_not_called()
+
+        credentials.expiry = datetime.utcnow() + timedelta(seconds=10)
+        gcs_service._get_credentials()
+
+    default_mock.assert_called_once()
+    credentials.refresh.assert_called_once()
+
+
+def test_s3_upload_target_is_presigned_post(s3_service):
+    target = s3_service.create_upload_target("clip.mp4", "video/mp4", 1024)
+
+    assert target.method == "POST"
+    assert target.file_path.startswith("videos/") and target.file_path.endswith(".mp4")
+    assert target.fields["key"] == target.file_path
+    assert target.fields["Content-Type"] == "video/mp4"
+    assert "policy" in target.fields
+
+
+def test_gcs_upload_target_is_resumable_session(gcs_service):
+    blob = gcs_service.bucket.blob.return_value
+    blob.create_resumable_upload_session.return_value = "https://storage.googleapis.com/upload?upload_id=1"
+
+    target = gcs_service.create_upload_target("clip.mp4", "video/mp4", 1024, origin="http://localhost:5173")
+
+    assert target.method == "PUT"
+    assert target.url.endswith("upload_id=1")
+    blob.create_resumable_upload_session.assert_called_once_with(
+        content_type="video/mp4", size=1024, origin="http://localhost:5173"
+    )
+
+
+def test_s3_upload_target_uses_public_endpoint(s3_service):
+    with patch.object(storage_module.settings, "storage_endpoint", "http://minio:9000"), \
+        patch.object(storage_module.settings, "storage_public_endpoint", "http://localhost:9000"), \
+        patch.object(s3_service.s3_client, "generate_presigned_post", return_value={
+            "url": "http://minio:9000/videos", "fields": {},
+        }):
+        target = s3_service.create_upload_target("clip.mp4", "video/mp4", 1024)
+
+    assert target.url == "http://localhost:9000/videos"
+
+
+def test_gcs_upload_part_requires_persisted_range(gcs_service):
+    """308 応答の Range がチャンク末尾まで届いていない場合は失敗とすること"""
+    session = MagicMock()
+    gcs_service._http_session = session
+    session.put.return_value = MagicMock(status_code=308, headers={"Range": "bytes=0-1023"})
+
+    assert gcs_service.upload_part("videos/a.mp4", "https://session", 1, 0, io.BytesIO(b"a" * 1024), 1024, 4096) is None
+    assert session.put.call_args.kwargs["headers"]["Content-Range"] == "bytes 0-1023/4096"
+
+    session.put.return_value = MagicMock(status_code=308, headers={"Range": "bytes=0-511"})
+    with pytest.raises(IOError):
+        gcs_service.upload_part("videos/a.mp4", "https://session", 2, 1024, io.BytesIO(b"a" * 1024), 1024, 4096)
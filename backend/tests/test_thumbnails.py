@@ -0,0 +1,64 @@
+import subprocess
+from unittest.mock import patch
+
+import pytest
+
+from app.services.thumbnails import (
+    ThumbnailError,
+    build_thumbnail_command,
+    generate_thumbnails,
+    sprite_interval,
+    still_filename,
+)
+
+
+def test_build_thumbnail_command_single_decode_with_branches():
+    command = build_thumbnail_command(
+        "/tmp/in.mp4", "/tmp/out", 2.0, [("risk-1", 1.5), ("risk-2", 30.0)]
+    )
+
+    assert command.count("-i") == 1
+    graph = command[command.index("-filter_complex") + 1]
+    assert graph.startswith("[0:v]split=3[sprite_in][still0][still1]")
+    assert "fps=1/2.0" in graph and "tile=10x10[sprite]" in graph
+    assert "trim=start=1.500" in graph and "trim=start=30.000" in graph
+    assert command[-1] == "/tmp/out/risk_risk-2.jpg"
+    assert command.count("-frames:v") == 2
+
+
+def test_sprite_interval_caps_thumbnail_count():
+    assert sprite_interval(60.0) == 2.0
+    assert sprite_interval(10000.0) == 10.0
+    assert sprite_interval(None) == 2.0
+
+
+def test_generate_thumbnails_builds_manifest(tmp_path):
+    def run(command, **kwargs):
+        (tmp_path / "sprite_001.jpg").write_bytes(b"jpg")
+        (tmp_path / still_filename("risk-1")).write_bytes(b"jpg")
+        return subprocess.CompletedProcess(args=command, returncode=0, stdout="", stderr="")
+
+    with patch("app.services.thumbnails.subprocess.run", side_effect=run) as mock_run:
+        manifest = generate_thumbnails(
+            "/tmp/in.mp4",
+            str(tmp_path),
+            "token-1",
+            duration=61.0,
+            risk_timestamps={"risk-1": 3.0, "risk-2": 90.0},
+        )
+
+    # 動画の長さを超える時刻は末尾付近に補正されること
+    assert "trim=start=60.900" in mock_run.call_args[0][0][mock_run.call_args[0][0].index("-filter_complex") + 1]
+    assert manifest.token == "token-1"
+    assert manifest.sprites == ["sprite_001.jpg"]
+    assert manifest.count == 31
+    assert manifest.stills == {"risk-1": "risk_risk-1.jpg"}
+
+
+def test_generate_thumbnails_raises_on_ffmpeg_failure(tmp_path):
+    with patch(
+        "app.services.thumbnails.subprocess.run",
+        return_value=subprocess.CompletedProcess(args=[], returncode=1, stdout="", stderr="Invalid data"),
+    ):
+        with pytest.raises(ThumbnailError):
+            generate_thumbnails("/tmp/in.mp4", str(tmp_path), "token-1", 10.0, {})
@@ -0,0 +1,175 @@
+import datetime
+import hashlib
+import io
+import json
+import subprocess
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+from google.cloud.speech_v2.types import cloud_speech
+
+from app.config import get_settings
+from app.services.audio_analyzer import (
+    AudioAnalyzerService,
+    TranscriptionListener,
+)
+from app.services.transcription_cache import (
+    AudioFingerprint,
+    TranscriptionCache,
+    config_fingerprint,
+)
+
+RECOGNIZER = {"model": "chirp_2", "language_codes": ["ja-JP"], "features": {"enable_word_time_offsets": True}}
+
+
+def fingerprint(blocks, sample_rate=16000):
+    digest = AudioFingerprint(sample_rate)
+    for block in blocks:
+        digest.update(block)
+    return digest.hexdigest()
+
+
+def test_audio_fingerprint_depends_on_samples_only():
+    """PCM の区切り方によらず、サンプルとサンプルレートのみで決まること"""
+    pcm = b"\x01\x00\x02\x00" * 100
+
+    assert fingerprint([pcm]) == fingerprint([pcm[:6], pcm[6:]])
+    assert fingerprint([pcm]) == hashlib.sha256(b"16000:" + pcm).hexdigest()
+    assert fingerprint([pcm]) != fingerprint([b"\x01\x00\x03\x00" * 100])
+    assert fingerprint([pcm]) != fingerprint([pcm], sample_rate=8000)
+
+
+def test_config_fingerprint_changes_with_recognizer_and_settings():
+    """認識モデルや発話検出の設定が変わるとキーが変わること"""
+    base = config_fingerprint(RECOGNIZER)
+    assert config_fingerprint(dict(RECOGNIZER)) == base
+    assert config_fingerprint({**RECOGNIZER, "model": "chirp_3"}) != base
+
+    with patch("app.services.transcription_cache.get_settings") as mock:
+        mock.return_value = get_settings().model_copy(update={"transcription_vad_enabled": False})
+        assert config_fingerprint(RECOGNIZER) != base
+
+
+def test_cache_get_and_set():
+    redis_client = MagicMock()
+    cache = TranscriptionCache(redis_client)
+    key = cache.key("audiohash", "confighash")
+    result = {"segments": [{"speaker": "Speaker 1", "text": "こんにちは"}], "has_audio": True}
+
+    cache.set(key, result)
+    args, kwargs = redis_client.set.call_args
+    assert args[0] == "transcription_cache:confighash:audiohash"
+    assert kwargs["ex"] == 604800
+
+    redis_client.get.return_value = args[1].encode()
+    assert cache.get(key) == result
+
+    redis_client.get.return_value = None
+    assert cache.get(key) is None
+
+
+def test_cache_errors_are_ignored():
+    """Redis の障害時はキャッシュなしとして扱うこと"""
+    redis_client = MagicMock()
+    redis_client.get.side_effect = ConnectionError("down")
+    redis_client.set.side_effect = ConnectionError("down")
+    cache = TranscriptionCache(redis_client)
+
+    assert cache.get("key") is None
+    cache.set("key", {"segments": [], "has_audio": False})
+
+    redis_client.get.side_effect = None
+    redis_client.get.return_value = b"not json"
+    assert cache.get("key") is None
+
+
+@pytest.fixture
+def analyzer():
+    with patch("app.services.audio_analyzer.StorageService"), \
+        patch("app.services.audio_analyzer.get_speech_client"), \
+        patch("app.services.audio_analyzer.settings") as settings:
+        settings.audio_extraction_mode = "local"
+        settings.transcription_chunk_max_seconds = 10
+        settings.transcription_chunk_min_seconds = 4
+        settings.transcription_chunk_overlap_seconds = 1
+        settings.transcription_silence_threshold_db = -40
+        settings.transcription_max_parallel_chunks = 2
+        settings.transcription_vad_enabled = False
+        settings.transcription_mode = "batch"
+        settings.transcription_cache_enabled = True
+        service = AudioAnalyzerService()
+        with patch.object(service, "_chunk_content", side_effect=lambda pcm, chunk, encoding: str(int(chunk.start)).encode()):
+            yield service
+
+
+def tone_pcm(seconds):
+    t = np.arange(int(seconds * 16000)) / 16000
+    return (np.sin(2 * np.pi * 440 * t) * 10000).astype("<i2").tobytes()
+
+
+def recognize_response(words):
+    return cloud_speech.RecognizeResponse(
+        results=[
+            cloud_speech.SpeechRecognitionResult(
+                alternatives=[cloud_speech.SpeechRecognitionAlternative(words=words, confidence=0.9)]
+            )
+        ]
+    )
+
+
+def run_with_stdout(stdout):
+    def run(command, cancel_event=None, feed=None, timeout=None, consume=None):
+        consume(stdout)
+        return subprocess.CompletedProcess(command, 0, "", "")
+    return run
+
+
+@pytest.mark.parametrize("mode", ["batch", "streaming"])
+def test_analyze_returns_cached_result_without_calling_speech(analyzer, mode):
+    """キャッシュがあれば Speech-to-Text を一度も呼ばずに結果を返し、セグメントと完了を通知すること"""
+    pcm = tone_pcm(25)
+    cached = {
+        "segments": [
+            {"speaker": "Speaker 1", "text": "a", "start_time": 1.0, "end_time": 2.0, "confidence": 0.9},
+            {"speaker": "Speaker 1", "text": "b", "start_time": 15.0, "end_time": 16.0, "confidence": 0.9},
+        ],
+        "has_audio": True,
+    }
+    progress, segments = [], []
+    listener = TranscriptionListener(on_progress=progress.append, on_segments=segments.extend)
+    audio_hash = hashlib.sha256(b"16000:" + pcm).hexdigest()
+
+    with patch("app.services.audio_analyzer.run_ffmpeg", side_effect=run_with_stdout(io.BytesIO(pcm))), \
+        patch("app.services.audio_analyzer.settings.transcription_mode", mode), \
+        patch("app.services.audio_analyzer.TranscriptionCache") as cache_class:
+        cache_class.return_value.key.return_value = "key"
+        cache_class.return_value.get.return_value = json.loads(json.dumps(cached))
+
+        result = analyzer.analyze("videos/a.mp4", "/tmp/a.mp4", listener=listener)
+
+    analyzer.speech_client.recognize.assert_not_called()
+    analyzer.speech_client.streaming_recognize.assert_not_called()
+    assert cache_class.return_value.key.call_args.args[0] == audio_hash
+    assert [seg.text for seg in result.segments] == ["a", "b"]
+    assert result.has_audio is True
+    assert [seg.text for seg in segments] == ["a", "b"]
+    assert progress == [0.0, 1.0]
+    cache_class.return_value.set.assert_not_called()
+
+
+def test_analyze_stores_result_on_cache_miss(analyzer):
+    analyzer.speech_client.recognize.side_effect = lambda request: recognize_response(
+        [cloud_speech.WordInfo(word="a", start_offset=datetime.timedelta(seconds=1))]
+    )
+
+    with patch("app.services.audio_analyzer.run_ffmpeg", side_effect=run_with_stdout(io.BytesIO(tone_pcm(3)))), \
+        patch("app.services.audio_analyzer.TranscriptionCache") as cache_class:
+        cache = cache_class.return_value
+        cache.key.return_value = "key"
+        cache.get.return_value = None
+
+        result = analyzer.analyze("videos/a.mp4", "/tmp/a.mp4")
+
+    assert [seg.text for seg in result.segments] == ["a"]
+    cache.set.assert_called_once_with("key", analyzer.result_to_dict(result))
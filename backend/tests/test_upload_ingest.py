@@ -0,0 +1,74 @@
+import hashlib
+import io
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.services.upload_ingest import EmptyUpload, StreamingStorageUpload, UploadTooLarge
+
+
+def make_storage():
+    storage = MagicMock()
+    storage.create_resumable_upload.return_value = ("videos/a.mp4", "upload-1")
+    received = []
+
+    def upload_part(file_path, upload_id, part_number, offset, data, length, total_size):
+        received.append((part_number, offset, data.read(), length, total_size))
+        return f"etag-{part_number}"
+
+    storage.upload_part.side_effect = upload_part
+    return storage, received
+
+
+async def test_parts_are_sent_while_receiving_and_hashed():
+    """パートサイズごとに送信し、最終パートだけ総サイズを伝えること"""
+    storage, received = make_storage()
+    upload = StreamingStorageUpload(storage, "a.mp4", "video/mp4", max_size=1000, part_size=4)
+    await upload.start()
+    for data in (b"abc", b"defgh", b"ij"):
+        await upload.write(data)
+    result = await upload.finish()
+
+    assert [(n, offset, data, total) for n, offset, data, _, total in received] == [
+        (1, 0, b"abcd", None),
+        (2, 4, b"efgh", None),
+        (3, 8, b"ij", 10),
+    ]
+    storage.complete_resumable_upload.assert_called_once_with(
+        "videos/a.mp4", "upload-1", [(1, "etag-1"), (2, "etag-2"), (3, "etag-3")]
+    )
+    assert result.size == 10
+    assert result.sha256 == hashlib.sha256(b"abcdefghij").hexdigest()
+
+
+async def test_exact_multiple_keeps_last_part_non_empty():
+    storage, received = make_storage()
+    upload = StreamingStorageUpload(storage, "a.mp4", "video/mp4", max_size=1000, part_size=4)
+    await upload.start()
+    await upload.write(b"abcdefgh")
+    await upload.finish()
+
+    assert [data for _, _, data, _, _ in received] == [b"abcd", b"efgh"]
+    assert received[-1][4] == 8
+
+
+async def test_oversize_is_rejected_immediately():
+    storage, _ = make_storage()
+    upload = StreamingStorageUpload(storage, "a.mp4", "video/mp4", max_size=5, part_size=4)
+    await upload.start()
+    await upload.write(b"abcd")
+
+    with pytest.raises(UploadTooLarge):
+        await upload.write(b"ef")
+    await upload.abort()
+
+    storage.abort_resumable_upload.assert_called_once_with("videos/a.mp4", "upload-1")
+
+
+async def test_empty_upload_is_rejected():
+    storage, _ = make_storage()
+    upload = StreamingStorageUpload(storage, "a.mp4", "video/mp4", max_size=5)
+    await upload.start()
+
+    with pytest.raises(EmptyUpload):
+        await upload.finish()
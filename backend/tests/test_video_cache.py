@@ -0,0 +1,153 @@
+import os
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.services.storage import ObjectMetadata
+from app.services.video_cache import LOCK_STRIPES, VideoCache
+
+
+def make_storage(content=b"x" * 100, etag="etag-1"):
+    storage = MagicMock()
+    storage.get_file_metadata.return_value = ObjectMetadata(size=len(content), etag=etag)
+
+    def download_file(file_path, destination, size=None):
+        time.sleep(0.05)
+        with open(destination, "wb") as f:
+            f.write(content)
+
+    storage.download_file.side_effect = download_file
+    return storage
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return VideoCache(str(tmp_path / "cache"), max_bytes=250)
+
+
+def test_second_download_is_cache_hit(cache, tmp_path):
+    storage = make_storage()
+
+    cache.download_file(storage, "videos/a.mp4", str(tmp_path / "first.mp4"))
+    cache.download_file(storage, "videos/a.mp4", str(tmp_path / "second.mp4"))
+
+    assert storage.download_file.call_count == 1
+    assert (tmp_path / "second.mp4").read_bytes() == b"x" * 100
+    assert cache.stats() == {"hits": 1, "misses": 1, "evictions": 0}
+
+
+def test_new_etag_is_cache_miss(cache, tmp_path):
+    storage = make_storage()
+    cache.download_file(storage, "videos/a.mp4", str(tmp_path / "first.mp4"))
+
+    storage.get_file_metadata.return_value = ObjectMetadata(size=100, etag="etag-2")
+    cache.download_file(storage, "videos/a.mp4", str(tmp_path / "second.mp4"))
+
+    assert storage.download_file.call_count == 2
+    assert cache.stats()["misses"] == 2
+
+
+def test_concurrent_requests_download_once(cache, tmp_path):
+    """同一オブジェクトへの同時要求でもダウンロードは1回のみであること"""
+    storage = make_storage()
+    threads = [
+        threading.Thread(
+            target=cache.download_file,
+            args=(storage, "videos/a.mp4", str(tmp_path / f"out-{i}.mp4")),
+        )
+        for i in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert storage.download_file.call_count == 1
+    assert cache.stats() == {"hits": 3, "misses": 1, "evictions": 0}
+
+
+def test_lru_eviction_keeps_recently_used(cache, tmp_path):
+    """容量上限を超えると最終アクセスの古いエントリから削除されること"""
+    storage = make_storage()
+    cache.download_file(storage, "videos/a.mp4", str(tmp_path / "a.mp4"))
+    time.sleep(0.01)
+    cache.download_file(storage, "videos/b.mp4", str(tmp_path / "b.mp4"))
+    time.sleep(0.01)
+    # a を再利用して最近使用にする
+    cache.download_file(storage, "videos/a.mp4", str(tmp_path / "a2.mp4"))
+    time.sleep(0.01)
+    cache.download_file(storage, "videos/c.mp4", str(tmp_path / "c.mp4"))
+
+    assert cache.stats()["evictions"] == 1
+    storage.download_file.reset_mock()
+    cache.download_file(storage, "videos/a.mp4", str(tmp_path / "a3.mp4"))
+    assert storage.download_file.call_count == 0
+    cache.download_file(storage, "videos/b.mp4", str(tmp_path / "b2.mp4"))
+    assert storage.download_file.call_count == 1
+
+
+def test_evicted_file_remains_readable_by_holder(cache, tmp_path):
+    """エビクション後も利用中のファイルは読み取れること"""
+    storage = make_storage(content=b"y" * 200)
+    cache.download_file(storage, "videos/a.mp4", str(tmp_path / "a.mp4"))
+    cache.download_file(storage, "videos/b.mp4", str(tmp_path / "b.mp4"))
+
+    assert cache.stats()["evictions"] == 1
+    assert (tmp_path / "a.mp4").read_bytes() == b"y" * 200
+
+
+def test_objects_without_version_bypass_cache(cache, tmp_path):
+    storage = make_storage(etag=None)
+
+    cache.download_file(storage, "videos/a.mp4", str(tmp_path / "first.mp4"))
+    cache.download_file(storage, "videos/a.mp4", str(tmp_path / "second.mp4"))
+
+    assert storage.download_file.call_count == 2
+    assert not [name for name in os.listdir(cache.directory) if name.endswith(".video")]
+
+
+def test_eviction_does_not_accumulate_lock_files(cache, tmp_path):
+    """エントリを入れ替えてもロックファイルが固定数を超えて増えないこと"""
+    storage = make_storage()
+    for i in range(20):
+        cache.download_file(storage, f"videos/{i}.mp4", str(tmp_path / f"{i}.mp4"))
+
+    locks = [name for name in os.listdir(cache.directory) if name.endswith(".lock")]
+    entries = [name for name in os.listdir(cache.directory) if name.endswith(".video")]
+    assert len(entries) == 2
+    assert len(locks) <= LOCK_STRIPES + 1
+    assert not any(name.endswith(".video.lock") for name in locks)
+
+
+def test_different_videos_download_concurrently(tmp_path):
+    """同じロックに割り当てられた別の動画でも、ダウンロードは並行して進むこと"""
+    cache = VideoCache(str(tmp_path / "cache"), max_bytes=1000)
+    paths = ["videos/a.mp4"]
+    stripe = cache._lock_path(cache._entry_path(paths[0], "etag-1"))
+    paths.append(next(
+        f"videos/{i}.mp4" for i in range(10000)
+        if cache._lock_path(cache._entry_path(f"videos/{i}.mp4", "etag-1")) == stripe and i != 0
+    ))
+    barrier = threading.Barrier(2, timeout=5)
+    storage = make_storage()
+
+    def download_file(file_path, destination, size=None):
+        barrier.wait()
+        with open(destination, "wb") as f:
+            f.write(b"x" * 100)
+
+    storage.download_file.side_effect = download_file
+    threads = [
+        threading.Thread(target=cache.download_file, args=(storage, path, str(tmp_path / f"{i}.mp4")))
+        for i, path in enumerate(paths)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+
+    assert not barrier.broken
+    assert (tmp_path / "0.mp4").read_bytes() == (tmp_path / "1.mp4").read_bytes() == b"x" * 100
+    assert not [name for name in os.listdir(cache.directory) if name.endswith(".part")]
@@ -77,3 +77,27 @@ def test_escape_drawtext():
     assert "\\:" in escaped
     assert "\\'" in escaped
     assert "\\\\" in escaped
+
+
+def test_parse_progress_line_uses_microseconds():
+    """out_time_ms / out_time_us はマイクロ秒として扱うこと"""
+    parse = VideoEditorService._parse_progress_line
+
+    assert parse("out_time_us=5000000", total_frames=None, duration_seconds=10.0) == 50.0
+    assert parse("out_time_ms=5000000", total_frames=None, duration_seconds=10.0) == 50.0
+    assert parse("out_time_ms=20000000", total_frames=None, duration_seconds=10.0) == 100.0
+    assert parse("out_time_ms=N/A", total_frames=None, duration_seconds=10.0) is None
+    assert parse("frame=30", total_frames=60, duration_seconds=None) == 50.0
+    assert parse("out_time_us=5000000", total_frames=None, duration_seconds=None) is None
+
+
+def test_output_duration_subtracts_merged_cuts():
+    actions = [
+        make_action(EditActionType.cut, 5.0, 10.0),
+        make_action(EditActionType.cut, 8.0, 12.0),
+        make_action(EditActionType.mute, 20.0, 30.0),
+        make_action(EditActionType.cut, 55.0, 70.0),
+    ]
+
+    assert VideoEditorService.output_duration(actions, 60.0) == 60.0 - 7.0 - 5.0
+    assert VideoEditorService.output_duration(actions, None) is None
@@ -1,9 +1,19 @@
+import hashlib
 import pytest
+from datetime import datetime, timezone
 from io import BytesIO
 from unittest.mock import MagicMock, patch
+from uuid import uuid4
 from fastapi.testclient import TestClient
 
+from app.config import get_settings
+from app.api.routes.videos import schedule_media_processing
 from app.main import app
+from app.models.job import Video
+from app.services.media_probe import MediaInfo, MediaProbeError
+from app.services.storage import ObjectMetadata, UploadTarget
+
+settings = get_settings()
 
 
 @pytest.fixture
@@ -16,6 +26,8 @@ def mock_storage():
     with patch("app.api.routes.videos.StorageService") as mock:
         mock_instance = MagicMock()
         mock_instance.upload_file.return_value = "videos/test-uuid.mp4"
+        mock_instance.create_resumable_upload.return_value = ("videos/test-uuid.mp4", "upload-1")
+        mock_instance.upload_part.return_value = "etag-1"
         mock.return_value = mock_instance
         yield mock_instance
 
@@ -38,11 +50,20 @@ def mock_progress():
 
 @pytest.fixture
 def mock_task():
-    with patch("app.api.routes.videos.analyze_video") as mock:
+    with patch("app.api.routes.videos.analyze_video") as mock, \
+        patch("app.api.routes.videos.process_video_media"), \
+        patch("app.api.routes.videos.schedule_thumbnails"), \
+        patch("app.api.routes.videos.probe_stored_media", side_effect=MediaProbeError("not probed")):
         mock.delay.return_value = MagicMock(id="task-123")
         yield mock
 
 
+@pytest.fixture
+def mock_media():
+    with patch("app.api.routes.videos.process_video_media") as mock:
+        yield mock
+
+
 def test_upload_video_invalid_extension(client):
     """mp4形式以外のファイルはエラーになること"""
     file_content = b"fake video content"
@@ -71,7 +92,7 @@ def test_upload_video_missing_file(client):
     assert response.status_code == 422
 
 
-def test_upload_video_missing_metadata(client):
+def test_upload_video_missing_metadata(client, mock_storage):
     """メタ情報なしでアップロードするとエラーになること"""
     file_content = b"fake video content"
     response = client.post(
@@ -79,3 +100,418 @@ def test_upload_video_missing_metadata(client):
         files={"file": ("test.mp4", BytesIO(file_content), "video/mp4")},
     )
     assert response.status_code == 422
+    # 受信済みの分割アップロードは破棄されること
+    mock_storage.abort_resumable_upload.assert_called_once_with("videos/test-uuid.mp4", "upload-1")
+    mock_storage.complete_resumable_upload.assert_not_called()
+
+
+def test_upload_video_invalid_metadata_before_file_is_rejected_before_streaming(client, mock_storage):
+    """ファイルより前に届いた不正なメタ情報は、動画を受信する前に拒否されること"""
+    response = client.post(
+        "/api/videos",
+        data={
+            "purpose": "Test purpose",
+            "platform": "myspace",
+        },
+        files={"file": ("test.mp4", BytesIO(b"fake video content"), "video/mp4")},
+    )
+
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"][-1] == "platform"
+    mock_storage.create_resumable_upload.assert_not_called()
+    mock_storage.upload_part.assert_not_called()
+
+
+@pytest.fixture
+def mock_dedup():
+    with patch("app.api.routes.videos.reuse_analysis_if_available", return_value=None) as mock:
+        yield mock
+
+
+def test_upload_video_streams_to_storage(client, mock_storage, mock_db, mock_progress, mock_task, mock_dedup):
+    """ボディを受信しながらストレージの分割アップロードへ送信し、解析を登録すること"""
+    mock_db.refresh.side_effect = lambda obj: setattr(obj, "created_at", datetime.now(timezone.utc))
+    file_content = b"fake video content"
+    response = client.post(
+        "/api/videos",
+        data={
+            "purpose": "Test purpose",
+            "platform": "twitter",
+            "target_audience": "Test audience",
+        },
+        files={"file": ("test.mp4", BytesIO(file_content), "video/mp4")},
+    )
+
+    assert response.status_code == 202
+    mock_storage.upload_file.assert_not_called()
+    part_args = mock_storage.upload_part.call_args[0]
+    assert part_args[4].read() == file_content
+    assert part_args[5:] == (len(file_content), len(file_content))
+    mock_storage.complete_resumable_upload.assert_called_once_with(
+        "videos/test-uuid.mp4", "upload-1", [(1, "etag-1")]
+    )
+    video = mock_db.add.call_args_list[0][0][0]
+    assert video.file_size == len(file_content)
+    assert video.content_hash == hashlib.sha256(file_content).hexdigest()
+    mock_task.delay.assert_called_once()
+
+
+def test_upload_video_reuses_completed_analysis(
+    client, mock_storage, mock_db, mock_progress, mock_task, mock_dedup, mock_media
+):
+    """同一内容の解析が完了済みなら結果を再利用し、解析タスクを登録しないこと"""
+    from app.models.job import JobStatus
+
+    def reuse(db, job, content_hash):
+        job.status = JobStatus.completed
+        return MagicMock()
+
+    mock_dedup.side_effect = reuse
+    mock_db.refresh.side_effect = lambda obj: setattr(obj, "created_at", datetime.now(timezone.utc))
+
+    response = client.post(
+        "/api/videos",
+        data={
+            "purpose": "Test purpose",
+            "platform": "twitter",
+            "target_audience": "Test audience",
+        },
+        files={"file": ("test.mp4", BytesIO(b"fake video content"), "video/mp4")},
+    )
+
+    assert response.status_code == 202
+    assert response.json()["status"] == "completed"
+    mock_progress.set_job_completed.assert_called_once()
+    mock_task.delay.assert_not_called()
+    # サムネイルはプロキシ生成と同じタスクで生成する
+    video = mock_db.add.call_args_list[0][0][0]
+    mock_media.delay.assert_called_once_with(str(video.id), thumbnails=True)
+
+
+def test_upload_video_too_large_is_rejected_while_streaming(client, mock_storage, mock_task):
+    """上限を超えた時点で受信を打ち切り、分割アップロードを破棄すること"""
+    with patch.object(settings, "max_file_size_mb", 1):
+        response = client.post(
+            "/api/videos",
+            data={
+                "purpose": "Test purpose",
+                "platform": "twitter",
+                "target_audience": "Test audience",
+            },
+            files={"file": ("test.mp4", BytesIO(b"a" * (1024 * 1024 + 1)), "video/mp4")},
+        )
+
+    assert response.status_code == 413
+    mock_storage.abort_resumable_upload.assert_called_once()
+    mock_storage.complete_resumable_upload.assert_not_called()
+    mock_task.delay.assert_not_called()
+
+
+def direct_upload_payload(**overrides):
+    payload = {
+        "filename": "test.mp4",
+        "content_type": "video/mp4",
+        "file_size": 1024,
+        "purpose": "Test purpose",
+        "platform": "twitter",
+        "target_audience": "Test audience",
+    }
+    payload.update(overrides)
+    return payload
+
+
+@pytest.fixture
+def awaiting_job(mock_db):
+    from app.models.job import JobStatus, Platform as DBPlatform
+
+    job = MagicMock()
+    job.id = uuid4()
+    job.status = JobStatus.awaiting_upload
+    job.purpose = "Test purpose"
+    job.platform = DBPlatform.twitter
+    job.target_audience = "Test audience"
+    job.created_at = datetime.now(timezone.utc)
+    job.completed_at = None
+    job.error_message = None
+    job.video.file_path = "videos/test-uuid.mp4"
+    job.video.original_name = "test.mp4"
+    job.video.file_size = 1024
+    mock_db.query.return_value.filter.return_value.first.return_value = job
+    mock_db.query.return_value.filter.return_value.update.return_value = 1
+    return job
+
+
+def test_create_direct_upload(client, mock_storage, mock_db):
+    """アップロード枠の発行でアップロード待ちのジョブと送信先が返ること"""
+    from app.models.job import JobStatus
+
+    mock_storage.create_upload_target.return_value = UploadTarget(
+        file_path="videos/test-uuid.mp4",
+        method="POST",
+        url="http://storage/videos",
+        fields={"key": "videos/test-uuid.mp4"},
+    )
+
+    response = client.post("/api/videos/uploads", json=direct_upload_payload())
+
+    assert response.status_code == 201
+    body = response.json()
+    assert body["upload"]["method"] == "POST"
+    assert body["upload"]["fields"] == {"key": "videos/test-uuid.mp4"}
+    job = mock_db.add.call_args_list[1][0][0]
+    assert job.status == JobStatus.awaiting_upload
+    assert body["job_id"] == str(job.id)
+    mock_storage.create_upload_target.assert_called_once()
+
+
+def test_create_direct_upload_rejects_oversized(client, mock_storage):
+    response = client.post(
+        "/api/videos/uploads",
+        json=direct_upload_payload(file_size=settings.direct_upload_max_file_size_bytes + 1),
+    )
+
+    assert response.status_code == 413
+    mock_storage.create_upload_target.assert_not_called()
+
+
+def test_create_direct_upload_rejects_non_video(client, mock_storage):
+    response = client.post(
+        "/api/videos/uploads",
+        json=direct_upload_payload(content_type="application/pdf"),
+    )
+
+    assert response.status_code == 415
+
+
+def test_complete_direct_upload_enqueues_analysis(
+    client, mock_storage, mock_db, mock_progress, mock_task, awaiting_job
+):
+    """完了通知でサイズを検証し、解析タスクが登録されること"""
+    mock_storage.get_file_metadata.return_value = ObjectMetadata(size=1024, content_type="video/mp4")
+
+    response = client.post(f"/api/videos/uploads/{awaiting_job.id}/complete")
+
+    assert response.status_code == 202
+    assert response.json()["status"] == "pending"
+    mock_progress.initialize_progress.assert_called_once_with(str(awaiting_job.id))
+    mock_task.delay.assert_called_once()
+    assert mock_task.delay.call_args[0][1] == "videos/test-uuid.mp4"
+
+
+def test_complete_direct_upload_with_declared_hash_reuses_analysis(
+    client, mock_storage, mock_db, mock_progress, mock_task, awaiting_job
+):
+    """申告されたハッシュで完了済みの解析が見つかれば、解析を登録せずに再利用し、内容を後で検証すること"""
+    mock_storage.get_file_metadata.return_value = ObjectMetadata(size=1024, content_type="video/mp4")
+    declared = "AB" * 32
+    source_job = MagicMock()
+
+    def reuse(db, job, content_hash):
+        job.completed_at = datetime.now(timezone.utc)
+        return source_job
+
+    with patch("app.api.routes.videos.reuse_analysis_if_available", side_effect=reuse) as reuse_mock, \
+        patch("app.api.routes.videos.verify_content_hash") as verify:
+        response = client.post(f"/api/videos/uploads/{awaiting_job.id}/complete", json={"sha256": declared})
+
+    assert response.status_code == 202
+    assert response.json()["status"] == "completed"
+    assert reuse_mock.call_args[0][2] == declared.lower()
+    mock_task.delay.assert_not_called()
+    mock_progress.set_job_completed.assert_called_once_with(str(awaiting_job.id))
+    verify.delay.assert_called_once_with(str(awaiting_job.id), "videos/test-uuid.mp4", declared)
+
+
+def test_complete_direct_upload_probes_media_before_enqueuing(
+    client, mock_storage, mock_db, mock_progress, mock_task, awaiting_job
+):
+    """解析タスクの登録前に、署名付き URL から取得したメタ情報を保存すること"""
+    mock_storage.get_file_metadata.return_value = ObjectMetadata(size=1024, content_type="video/mp4")
+    info = MediaInfo(duration=42.0, fps=29.97, video_codec="h264", has_audio=True)
+
+    with patch("app.api.routes.videos.probe_stored_media", return_value=info) as probe:
+        response = client.post(f"/api/videos/uploads/{awaiting_job.id}/complete")
+
+    assert response.status_code == 202
+    probe.assert_called_once_with(mock_storage, "videos/test-uuid.mp4")
+    assert awaiting_job.video.duration == 42.0
+    assert awaiting_job.video.fps == 29.97
+    mock_task.delay.assert_called_once()
+
+
+def test_complete_direct_upload_rejects_malformed_hash(client, mock_storage, mock_task, awaiting_job):
+    response = client.post(f"/api/videos/uploads/{awaiting_job.id}/complete", json={"sha256": "xyz"})
+
+    assert response.status_code == 422
+    mock_task.delay.assert_not_called()
+
+
+def test_complete_direct_upload_not_uploaded(client, mock_storage, mock_task, awaiting_job):
+    mock_storage.get_file_metadata.return_value = None
+
+    response = client.post(f"/api/videos/uploads/{awaiting_job.id}/complete")
+
+    assert response.status_code == 409
+    mock_task.delay.assert_not_called()
+
+
+def test_complete_direct_upload_size_mismatch(client, mock_storage, mock_task, awaiting_job):
+    """申告と異なるサイズのファイルは削除され、ジョブが失敗になること"""
+    from app.models.job import JobStatus
+
+    mock_storage.get_file_metadata.return_value = ObjectMetadata(size=2048, content_type="video/mp4")
+
+    response = client.post(f"/api/videos/uploads/{awaiting_job.id}/complete")
+
+    assert response.status_code == 400
+    mock_storage.delete_file.assert_called_once_with("videos/test-uuid.mp4")
+    assert awaiting_job.status == JobStatus.failed
+    mock_task.delay.assert_not_called()
+
+
+def test_complete_direct_upload_twice(client, mock_storage, mock_db, mock_task, awaiting_job):
+    """同時に完了通知された場合、解析は1回だけ登録されること"""
+    mock_storage.get_file_metadata.return_value = ObjectMetadata(size=1024, content_type="video/mp4")
+    mock_db.query.return_value.filter.return_value.update.return_value = 0
+
+    response = client.post(f"/api/videos/uploads/{awaiting_job.id}/complete")
+
+    assert response.status_code == 409
+    mock_task.delay.assert_not_called()
+
+
+@pytest.fixture
+def mock_resumable():
+    with patch("app.api.routes.videos.ResumableUploadService") as mock:
+        mock_instance = MagicMock()
+        mock.return_value = mock_instance
+        yield mock_instance
+
+
+def make_resumable_session(offset=0, size=1024):
+    from app.services.resumable_upload import ResumableUploadSession
+
+    return ResumableUploadSession(
+        upload_id="job",
+        file_path="videos/test-uuid.mp4",
+        storage_upload_id="upload-1",
+        content_type="video/mp4",
+        size=size,
+        chunk_size=512,
+        offset=offset,
+    )
+
+
+def test_create_resumable_upload(client, mock_resumable, mock_db):
+    mock_resumable.create.return_value = make_resumable_session()
+    mock_resumable.claim_sweep.return_value = True
+
+    with patch("app.api.routes.videos.sweep_expired_uploads") as sweep_task:
+        response = client.post("/api/videos/resumable", json=direct_upload_payload())
+
+    sweep_task.delay.assert_called_once_with()
+
+    assert response.status_code == 201
+    body = response.json()
+    assert body["chunk_size"] == 512
+    assert body["offset"] == 0
+    assert response.headers["Location"] == f"/api/videos/resumable/{body['job_id']}"
+
+
+def test_head_resumable_upload_returns_offset(client, mock_resumable):
+    mock_resumable.get.return_value = make_resumable_session(offset=512)
+
+    response = client.head("/api/videos/resumable/job")
+
+    assert response.status_code == 200
+    assert response.headers["Upload-Offset"] == "512"
+    assert response.headers["Upload-Length"] == "1024"
+
+
+def test_patch_resumable_chunk(client, mock_resumable):
+    mock_resumable.get.return_value = make_resumable_session()
+    mock_resumable.write_chunk.return_value = make_resumable_session(offset=512)
+
+    response = client.patch(
+        "/api/videos/resumable/job",
+        content=b"a" * 512,
+        headers={"Upload-Offset": "0", "Content-Type": "application/offset+octet-stream"},
+    )
+
+    assert response.status_code == 204
+    assert response.headers["Upload-Offset"] == "512"
+    args = mock_resumable.write_chunk.call_args[0]
+    assert args[:2] == ("job", 0) and args[3] == 512
+
+
+def test_patch_resumable_chunk_offset_conflict(client, mock_resumable):
+    from app.services.resumable_upload import UploadOffsetMismatch
+
+    mock_resumable.get.return_value = make_resumable_session(offset=512)
+    mock_resumable.write_chunk.side_effect = UploadOffsetMismatch(512)
+
+    response = client.patch(
+        "/api/videos/resumable/job",
+        content=b"a" * 512,
+        headers={"Upload-Offset": "0"},
+    )
+
+    assert response.status_code == 409
+    assert response.headers["Upload-Offset"] == "512"
+
+
+def test_patch_resumable_chunk_too_large(client, mock_resumable):
+    mock_resumable.get.return_value = make_resumable_session()
+
+    response = client.patch(
+        "/api/videos/resumable/job",
+        content=b"a" * 513,
+        headers={"Upload-Offset": "0"},
+    )
+
+    assert response.status_code == 413
+    mock_resumable.write_chunk.assert_not_called()
+
+
+def test_complete_resumable_upload(
+    client, mock_resumable, mock_storage, mock_db, mock_progress, mock_task, awaiting_job
+):
+    mock_storage.get_file_metadata.return_value = ObjectMetadata(size=1024, content_type="video/mp4")
+
+    response = client.post(f"/api/videos/resumable/{awaiting_job.id}/complete")
+
+    assert response.status_code == 202
+    mock_resumable.complete.assert_called_once_with(str(awaiting_job.id))
+    mock_task.delay.assert_called_once()
+
+
+def test_schedule_media_processing_computes_missing_content_hash(mock_media):
+    """faststart・プロキシが無効でも content_hash が未計算なら動画処理タスクを登録すること"""
+    with patch("app.api.routes.videos.settings") as mock_settings:
+        mock_settings.faststart_remux_enabled = False
+        mock_settings.proxy_enabled = False
+        assert schedule_media_processing(Video(id=uuid4(), content_hash=None)) is True
+        assert schedule_media_processing(Video(id=uuid4(), content_hash="a" * 64)) is False
+
+    mock_media.delay.assert_called_once()
+
+
+def test_upload_video_schedules_media_processing(
+    client, mock_storage, mock_db, mock_progress, mock_task, mock_dedup, mock_media
+):
+    """アップロード後に faststart・プロキシ生成を1つのタスクとして登録すること"""
+    mock_db.refresh.side_effect = lambda obj: setattr(obj, "created_at", datetime.now(timezone.utc))
+
+    response = client.post(
+        "/api/videos",
+        data={
+            "purpose": "Test purpose",
+            "platform": "twitter",
+            "target_audience": "Test audience",
+        },
+        files={"file": ("test.mp4", BytesIO(b"fake video content"), "video/mp4")},
+    )
+
+    assert response.status_code == 202
+    video = mock_db.add.call_args_list[0][0][0]
+    mock_media.delay.assert_called_once_with(str(video.id), thumbnails=False)
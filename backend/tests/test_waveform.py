@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+
+from app.services.waveform import (
+    WaveformBuilder,
+    WaveformError,
+    decode_waveform_peaks,
+    encode_waveform_peaks,
+    save_waveform_peaks,
+)
+
+
+def build(samples, samples_per_peak, bits=8, block=333):
+    """PCM を端数の出るブロックで渡してピークを計算"""
+    builder = WaveformBuilder(16000, samples_per_peak, bits)
+    samples = np.asarray(samples, dtype=np.int16)
+    for start in range(0, len(samples), block):
+        builder.feed(samples[start:start + block])
+    return builder.finish()
+
+
+@pytest.fixture
+def samples():
+    # 0..999 の三角波に負値を混ぜた 1050 サンプル（端数のピークを含む）
+    values = np.arange(1050, dtype=np.int32) * 31 % 65536 - 32768
+    return values.astype(np.int16)
+
+
+def test_compute_levels_min_max(samples):
+    """各レベルのピークがブロックごとの最小値・最大値であること（渡すブロックの区切りによらない）"""
+    peaks = build(samples, [100, 400], bits=16)
+
+    assert peaks.sample_rate == 16000
+    assert [level.samples_per_peak for level in peaks.levels] == [100, 400]
+    fine, coarse = peaks.levels
+    assert len(fine.mins) == 11
+    assert len(coarse.mins) == 3
+    for i in range(11):
+        block = samples[i * 100:(i + 1) * 100]
+        assert fine.mins[i] == block.min()
+        assert fine.maxs[i] == block.max()
+    for i in range(3):
+        block = samples[i * 400:(i + 1) * 400]
+        assert coarse.mins[i] == block.min()
+        assert coarse.maxs[i] == block.max()
+    whole = build(samples, [100, 400], bits=16, block=len(samples))
+    assert all(np.array_equal(a.mins, b.mins) and np.array_equal(a.maxs, b.maxs) for a, b in zip(peaks.levels, whole.levels))
+
+
+def test_compute_8bit_keeps_upper_byte():
+    peaks = build([-32768, -1, 0, 255, 256, 32767], [2], bits=8)
+
+    level = peaks.levels[0]
+    assert level.mins.dtype == np.int8
+    assert list(level.mins) == [-128, 0, 1]
+    assert list(level.maxs) == [-1, 0, 127]
+
+
+def test_encode_decode_roundtrip(tmp_path, samples):
+    output_path = tmp_path / "waveform.peaks"
+    expected = build(samples, [100, 200, 400], bits=8)
+
+    save_waveform_peaks(expected, str(output_path))
+    decoded = decode_waveform_peaks(output_path.read_bytes())
+
+    assert decoded.bits == 8
+    assert decoded.sample_rate == 16000
+    for actual, original in zip(decoded.levels, expected.levels):
+        assert actual.samples_per_peak == original.samples_per_peak
+        assert np.array_equal(actual.mins, original.mins)
+        assert np.array_equal(actual.maxs, original.maxs)
+    assert encode_waveform_peaks(decoded) == output_path.read_bytes()
+
+
+def test_empty_audio():
+    peaks = build([], [100], bits=8)
+
+    assert len(peaks.levels[0].mins) == 0
+
+
+def test_rejects_invalid_settings():
+    with pytest.raises(WaveformError):
+        WaveformBuilder(16000, [100, 150])
+    with pytest.raises(WaveformError):
+        WaveformBuilder(16000, [100], bits=12)
+
+
+def test_decode_rejects_other_data():
+    with pytest.raises(WaveformError):
+        decode_waveform_peaks(b"RIFF" + b"\x00" * 20)
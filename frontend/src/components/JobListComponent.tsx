@@ -5,6 +5,7 @@ import { AnalysisJobSummary, JobStatus } from '../types'
 import './JobListComponent.css'
 
 const STATUS_LABELS: Record<JobStatus, string> = {
+  awaiting_upload: 'アップロード待ち',
   pending: '待機中',
   processing: '処理中',
   completed: '完了',
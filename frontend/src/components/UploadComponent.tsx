@@ -1,10 +1,10 @@
 import { useState, DragEvent, ChangeEvent } from 'react'
 import { useNavigate } from 'react-router-dom'
-import { api } from '../services/api'
+import { uploadVideoDirect } from '../services/api'
 import { AnalysisJob } from '../types'
 import './UploadComponent.css'
 
-const MAX_FILE_SIZE_MB = 100
+const MAX_FILE_SIZE_MB = 5120
 
 export function UploadComponent() {
   const navigate = useNavigate()
@@ -90,13 +90,11 @@ export function UploadComponent() {
     setError(null)
 
     try {
-      const formData = new FormData()
-      formData.append('file', file)
-      formData.append('purpose', '-')
-      formData.append('platform', 'other')
-      formData.append('target_audience', '-')
-
-      const response = await api.upload<AnalysisJob>('/api/videos', formData)
+      const response = await uploadVideoDirect<AnalysisJob>(file, {
+        purpose: '-',
+        platform: 'other',
+        target_audience: '-',
+      })
       navigate(`/jobs/${response.id}/progress`)
     } catch (err) {
       setError('アップロードに失敗しました。もう一度お試しください。')
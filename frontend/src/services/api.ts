@@ -1,3 +1,6 @@
+import { DirectUploadSlot, UploadTarget } from '../types'
+import { sha256File } from './sha256'
+
 const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000'
 
 export { API_BASE_URL }
@@ -37,6 +40,15 @@ export const api = {
       body: data ? JSON.stringify(data) : undefined,
     }),
 
+  getBinary: async (endpoint: string): Promise<ArrayBuffer> => {
+    const url = `${API_BASE_URL}${endpoint}`
+    const response = await fetch(url)
+    if (!response.ok) {
+      throw new Error(`API Error: ${response.status} ${response.statusText}`)
+    }
+    return response.arrayBuffer()
+  },
+
   delete: async (endpoint: string): Promise<void> => {
     const url = `${API_BASE_URL}${endpoint}`
     const response = await fetch(url, {
@@ -61,3 +73,50 @@ export const api = {
     return response.json()
   },
 }
+
+/**
+ * ファイルをストレージへ直接送信する（API サーバーを経由しない）
+ * S3/MinIO は署名付き POST、GCS はレジューマブルセッションへの PUT
+ */
+async function sendToStorage(target: UploadTarget, file: File): Promise<void> {
+  let response: Response
+  if (target.method === 'POST') {
+    const formData = new FormData()
+    Object.entries(target.fields).forEach(([key, value]) => formData.append(key, value))
+    // ファイルはポリシーのフィールドより後に追加する必要がある
+    formData.append('file', file)
+    response = await fetch(target.url, { method: 'POST', body: formData })
+  } else {
+    response = await fetch(target.url, {
+      method: 'PUT',
+      headers: target.headers,
+      body: file,
+    })
+  }
+
+  if (!response.ok) {
+    throw new Error(`Storage Error: ${response.status} ${response.statusText}`)
+  }
+}
+
+/**
+ * アップロード枠の発行 → ストレージへの送信 → 完了通知 の順で動画をアップロードする
+ * 送信と並行して SHA-256 を求めて完了通知に含め、同じ動画の解析結果を再利用できるようにする
+ * （ハッシュの計算に失敗しても、アップロード自体は続ける）
+ */
+export async function uploadVideoDirect<T>(
+  file: File,
+  metadata: { purpose: string; platform: string; target_audience: string }
+): Promise<T> {
+  const slot = await api.post<DirectUploadSlot>('/api/videos/uploads', {
+    filename: file.name,
+    content_type: file.type || 'video/mp4',
+    file_size: file.size,
+    ...metadata,
+  })
+  const [, sha256] = await Promise.all([
+    sendToStorage(slot.upload, file),
+    sha256File(file).catch(() => undefined),
+  ])
+  return api.post<T>(`/api/videos/uploads/${slot.job_id}/complete`, sha256 ? { sha256 } : undefined)
+}
@@ -1,10 +1,12 @@
 import { api } from './api'
+import { parseWaveformPeaks } from './waveform'
 import {
   DownloadUrlResponse,
   EditSessionResponse,
   EditSessionUpdate,
   ExportResponse,
   ExportStatusResponse,
+  ThumbnailsResponse,
   VideoUrlResponse,
 } from '../types'
 
@@ -12,6 +14,12 @@ export const editorApi = {
   getVideoUrl: (jobId: string) =>
     api.get<VideoUrlResponse>(`/api/jobs/${jobId}/video-url`),
 
+  getThumbnails: (jobId: string) =>
+    api.get<ThumbnailsResponse>(`/api/jobs/${jobId}/thumbnails`),
+
+  getWaveform: async (jobId: string) =>
+    parseWaveformPeaks(await api.getBinary(`/api/jobs/${jobId}/waveform`)),
+
   getEditSession: (jobId: string) =>
     api.get<EditSessionResponse>(`/api/jobs/${jobId}/edit-session`),
 
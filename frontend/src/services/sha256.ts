@@ -0,0 +1,106 @@
+// Web Crypto の digest は一括入力のみのため、大きな動画はブロックごとに読みながら自前で計算する
+const BLOCK_SIZE = 4 * 1024 * 1024
+
+const K = new Uint32Array([
+  0x428a2f98, 0x71374491, 0xb5c0fbcf, 0xe9b5dba5, 0x3956c25b, 0x59f111f1, 0x923f82a4, 0xab1c5ed5,
+  0xd807aa98, 0x12835b01, 0x243185be, 0x550c7dc3, 0x72be5d74, 0x80deb1fe, 0x9bdc06a7, 0xc19bf174,
+  0xe49b69c1, 0xefbe4786, 0x0fc19dc6, 0x240ca1cc, 0x2de92c6f, 0x4a7484aa, 0x5cb0a9dc, 0x76f988da,
+  0x983e5152, 0xa831c66d, 0xb00327c8, 0xbf597fc7, 0xc6e00bf3, 0xd5a79147, 0x06ca6351, 0x14292967,
+  0x27b70a85, 0x2e1b2138, 0x4d2c6dfc, 0x53380d13, 0x650a7354, 0x766a0abb, 0x81c2c92e, 0x92722c85,
+  0xa2bfe8a1, 0xa81a664b, 0xc24b8b70, 0xc76c51a3, 0xd192e819, 0xd6990624, 0xf40e3585, 0x106aa070,
+  0x19a4c116, 0x1e376c08, 0x2748774c, 0x34b0bcb5, 0x391c0cb3, 0x4ed8aa4a, 0x5b9cca4f, 0x682e6ff3,
+  0x748f82ee, 0x78a5636f, 0x84c87814, 0x8cc70208, 0x90befffa, 0xa4506ceb, 0xbef9a3f7, 0xc67178f2,
+])
+
+const rotr = (x: number, n: number) => (x >>> n) | (x << (32 - n))
+
+/**
+ * SHA-256 の逐次計算（update を繰り返し、最後に hex で取り出す）
+ */
+class Sha256 {
+  private state = new Uint32Array([
+    0x6a09e667, 0xbb67ae85, 0x3c6ef372, 0xa54ff53a, 0x510e527f, 0x9b05688c, 0x1f83d9ab, 0x5be0cd19,
+  ])
+  private w = new Uint32Array(64)
+  private buffer = new Uint8Array(64)
+  private buffered = 0
+  private length = 0
+
+  update(data: Uint8Array): void {
+    this.length += data.length
+    let offset = 0
+    if (this.buffered > 0) {
+      const take = Math.min(64 - this.buffered, data.length)
+      this.buffer.set(data.subarray(0, take), this.buffered)
+      this.buffered += take
+      offset = take
+      if (this.buffered < 64) return
+      this.compress(this.buffer, 0)
+      this.buffered = 0
+    }
+    for (; offset + 64 <= data.length; offset += 64) {
+      this.compress(data, offset)
+    }
+    this.buffer.set(data.subarray(offset), 0)
+    this.buffered = data.length - offset
+  }
+
+  hex(): string {
+    const bitLength = this.length * 8
+    const padding = new Uint8Array(((this.buffered < 56 ? 56 : 120) - this.buffered) + 8)
+    padding[0] = 0x80
+    const view = new DataView(padding.buffer)
+    view.setUint32(padding.length - 8, Math.floor(bitLength / 0x100000000))
+    view.setUint32(padding.length - 4, bitLength >>> 0)
+    this.update(padding)
+    return Array.from(this.state, (v) => v.toString(16).padStart(8, '0')).join('')
+  }
+
+  private compress(data: Uint8Array, offset: number): void {
+    const w = this.w
+    for (let i = 0; i < 16; i++) {
+      const j = offset + i * 4
+      w[i] = (data[j] << 24) | (data[j + 1] << 16) | (data[j + 2] << 8) | data[j + 3]
+    }
+    for (let i = 16; i < 64; i++) {
+      const s0 = rotr(w[i - 15], 7) ^ rotr(w[i - 15], 18) ^ (w[i - 15] >>> 3)
+      const s1 = rotr(w[i - 2], 17) ^ rotr(w[i - 2], 19) ^ (w[i - 2] >>> 10)
+      w[i] = (w[i - 16] + s0 + w[i - 7] + s1) | 0
+    }
+    let [a, b, c, d, e, f, g, h] = this.state
+    for (let i = 0; i < 64; i++) {
+      const t1 = (h + (rotr(e, 6) ^ rotr(e, 11) ^ rotr(e, 25)) + ((e & f) ^ (~e & g)) + K[i] + w[i]) | 0
+      const t2 = ((rotr(a, 2) ^ rotr(a, 13) ^ rotr(a, 22)) + ((a & b) ^ (a & c) ^ (b & c))) | 0
+      h = g
+      g = f
+      f = e
+      e = (d + t1) | 0
+      d = c
+      c = b
+      b = a
+      a = (t1 + t2) | 0
+    }
+    const s = this.state
+    s[0] += a
+    s[1] += b
+    s[2] += c
+    s[3] += d
+    s[4] += e
+    s[5] += f
+    s[6] += g
+    s[7] += h
+  }
+}
+
+/**
+ * ファイルの SHA-256（hex）をブロック単位で読みながら求める
+ * ファイル全体をメモリに載せないため、数 GB の動画でも使える
+ */
+export async function sha256File(file: Blob): Promise<string> {
+  const hash = new Sha256()
+  for (let offset = 0; offset < file.size; offset += BLOCK_SIZE) {
+    const block = await file.slice(offset, offset + BLOCK_SIZE).arrayBuffer()
+    hash.update(new Uint8Array(block))
+  }
+  return hash.hex()
+}
@@ -0,0 +1,66 @@
+import { WaveformLevel, WaveformPeaks } from '../types'
+
+// バックエンド app/services/waveform.py のバイナリ形式（リトルエンディアン）
+const MAGIC = 'WVPK'
+const FORMAT_VERSION = 1
+const HEADER_SIZE = 12
+const LEVEL_HEADER_SIZE = 8
+
+/**
+ * 波形ピークのバイナリを解析する
+ * 各レベルの min/max は交互に並んだ配列（[min0, max0, min1, max1, ...]）のまま返す
+ */
+export function parseWaveformPeaks(buffer: ArrayBuffer): WaveformPeaks {
+  const view = new DataView(buffer)
+  if (buffer.byteLength < HEADER_SIZE) {
+    throw new Error('Waveform Error: データが短すぎます')
+  }
+  const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4))
+  const version = view.getUint8(4)
+  const bits = view.getUint8(5)
+  if (magic !== MAGIC || version !== FORMAT_VERSION || (bits !== 8 && bits !== 16)) {
+    throw new Error('Waveform Error: 波形ピークの形式ではありません')
+  }
+  const sampleRate = view.getUint32(6, true)
+  const levelCount = view.getUint16(10, true)
+
+  let offset = HEADER_SIZE
+  const headers: { samplesPerPeak: number; count: number }[] = []
+  for (let i = 0; i < levelCount; i++) {
+    headers.push({
+      samplesPerPeak: view.getUint32(offset, true),
+      count: view.getUint32(offset + 4, true),
+    })
+    offset += LEVEL_HEADER_SIZE
+  }
+
+  const levels: WaveformLevel[] = headers.map(({ samplesPerPeak, count }) => {
+    let data: Int8Array | Int16Array
+    if (bits === 8) {
+      data = new Int8Array(buffer, offset, count * 2)
+    } else {
+      // Int16Array はバイト境界が揃っている必要があるため、そうでない場合はコピーする
+      data = offset % 2 === 0
+        ? new Int16Array(buffer, offset, count * 2)
+        : new Int16Array(buffer.slice(offset, offset + count * 4))
+    }
+    offset += count * 2 * (bits / 8)
+    return { samplesPerPeak, secondsPerPeak: samplesPerPeak / sampleRate, count, data }
+  })
+
+  return { sampleRate, bits, levels }
+}
+
+/**
+ * 表示幅に対して1ピクセルあたり1ピーク以上となる最も粗いレベルを選ぶ
+ */
+export function selectWaveformLevel(peaks: WaveformPeaks, secondsPerPixel: number): WaveformLevel | undefined {
+  const levels = [...peaks.levels].sort((a, b) => a.samplesPerPeak - b.samplesPerPeak)
+  let selected = levels[0]
+  for (const level of levels) {
+    if (level.secondsPerPeak <= secondsPerPixel) {
+      selected = level
+    }
+  }
+  return selected
+}
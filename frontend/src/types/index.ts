@@ -1,6 +1,6 @@
 export type Platform = 'twitter' | 'instagram' | 'youtube' | 'tiktok' | 'other'
 
-export type JobStatus = 'pending' | 'processing' | 'completed' | 'failed'
+export type JobStatus = 'awaiting_upload' | 'pending' | 'processing' | 'completed' | 'failed'
 
 export type PhaseStatus = 'pending' | 'processing' | 'completed' | 'failed'
 
@@ -26,6 +26,19 @@ export interface AnalysisJob {
   error_message: string | null
 }
 
+export interface UploadTarget {
+  method: 'POST' | 'PUT'
+  url: string
+  fields: Record<string, string>
+  headers: Record<string, string>
+}
+
+export interface DirectUploadSlot {
+  job_id: string
+  upload: UploadTarget
+  expires_in: number
+}
+
 export interface AnalysisJobSummary {
   id: string
   status: JobStatus
@@ -72,6 +85,31 @@ export interface AnalysisResult {
   video_url: string | null
 }
 
+export interface ThumbnailsResponse {
+  interval: number
+  width: number
+  height: number
+  columns: number
+  rows: number
+  count: number
+  sprite_urls: string[]
+  risk_thumbnail_urls: Record<string, string>
+}
+
+export interface WaveformLevel {
+  samplesPerPeak: number
+  secondsPerPeak: number
+  count: number
+  // [min0, max0, min1, max1, ...]
+  data: Int8Array | Int16Array
+}
+
+export interface WaveformPeaks {
+  sampleRate: number
+  bits: number
+  levels: WaveformLevel[]
+}
+
 export type EditActionType = 'cut' | 'mute' | 'mosaic' | 'telop' | 'skip'
 
 export type EditSessionStatus = 'draft' | 'exporting' | 'completed'
@@ -137,6 +175,8 @@ export interface ExportStatusResponse {
 export interface VideoUrlResponse {
   url: string
   expires_at: string
+  is_proxy?: boolean
+  hls_url?: string | null
 }
 
 export interface DownloadUrlResponse {